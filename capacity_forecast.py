@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Capacity Forecast from a Traffic Profile
+
+Benchmarks run synthetic op mixes at fixed object sizes; capacity planning
+needs the answer for the real profile (say 70% 4 KiB GET, 20% 1 MiB PUT, 10%
+DELETE/STAT at 5000 req/s). This module turns the benchmark results into one
+lookup surface per environment and operation: object throughput and latency
+percentiles over log2 object size x requests in flight. Points come from
+single-operation runs, from the size buckets (by_obj_log_2_size) of runs with
+random object sizes and from the operations of mixed runs. Requests in flight
+are the effective concurrency of Little's law, so runs with different client
+counts land on the same axis; an operation of a mixed run is scaled to all
+workers of the run at its measured latency, and such estimates are only used
+for sizes without single-operation runs. Throughput and latency of every size
+row are made non-decreasing in the load, and the row is resampled onto a
+common in-flight grid when the surface is built; beyond the measured range
+throughput stays flat and latency grows with the queue (Little's law), below
+it throughput shrinks with the load at the lowest measured latency.
+
+The forecast treats the operations as competing for one backend: an operation
+at rate r whose curve peaks at X_max uses r / X_max of the capacity, and the
+profile is achievable while the shares add up to less than one. At a total
+utilization U every operation behaves as if it ran alone at U x X_max, so its
+latency percentiles are read from its curve at that throughput. Achievable
+rate (the profile scaled until U = 1) and headroom follow directly, separately
+for PROD and TEST.
+
+Surfaces can be saved as JSON, so what-if queries (other rates or mixes)
+evaluate in milliseconds without parsing results again.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field, asdict, replace
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import (
+    WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE, parse_obj_size
+)
+from saturation_analysis import effective_concurrency
+
+
+DEFAULT_PROFILE_FILE = "traffic_profile.yaml"
+LATENCY_NAMES = ('avg', 'p50', 'p90', 'p99')
+LATENCY_ATTRS = {'avg': 'avg_latency_ms', 'p50': 'p50_latency_ms', 'p90': 'p90_latency_ms',
+                 'p99': 'p99_latency_ms'}
+SIZE_ROW_DECIMALS = 1  # points whose log2 sizes round to the same value form one row
+BYTES_PER_MIB = 1024 * 1024
+
+
+@dataclass
+class SurfacePoint:
+    """Mean throughput and latency of one job (or one operation or size bucket of it) at its load"""
+    size_bytes: float
+    in_flight: float
+    throughput_obj: float
+    latency_ms: Dict[str, float]
+    runs: int
+    source: str  # run, size bucket or mixed
+    job_key: str
+
+
+@dataclass
+class LookupSurface:
+    """Throughput and latency of one operation over log2 size x requests in flight, on a fixed grid"""
+    environment: str
+    operation: str
+    log2_sizes: List[float]
+    in_flight: List[float]
+    throughput: List[List[float]]  # [size row][grid column]
+    latency_ms: Dict[str, List[List[float]]]
+    points: List[SurfacePoint] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LookupSurface':
+        surface = cls(**{key: value for key, value in data.items() if key != 'points'})
+        surface.points = [SurfacePoint(**point) for point in data.get('points', [])]
+        return surface
+
+    def curve(self, size_bytes: Optional[float]) -> Tuple[List[float], Dict[str, List[float]], bool]:
+        """(throughput, latencies, extrapolated) over the in-flight grid at one object size
+
+        Rows are interpolated geometrically in log2 size; sizes outside the measured rows use
+        the nearest row and are flagged. Without a size the middle of the measured sizes is used.
+        """
+        rows = self.log2_sizes
+        if size_bytes is None or size_bytes <= 0:
+            target = (rows[0] + rows[-1]) / 2
+        else:
+            target = math.log2(size_bytes)
+        extrapolated = not rows[0] - 0.5 <= target <= rows[-1] + 0.5
+        if target <= rows[0] or len(rows) == 1:
+            return self.throughput[0], {name: values[0] for name, values in self.latency_ms.items()}, extrapolated
+        if target >= rows[-1]:
+            return self.throughput[-1], {name: values[-1] for name, values in self.latency_ms.items()}, extrapolated
+        upper = next(i for i, row in enumerate(rows) if row >= target)
+        weight = (target - rows[upper - 1]) / (rows[upper] - rows[upper - 1])
+
+        def blend(low: List[float], high: List[float]) -> List[float]:
+            return [a ** (1 - weight) * b ** weight if a > 0 and b > 0 else a + (b - a) * weight
+                    for a, b in zip(low, high)]
+
+        return (blend(self.throughput[upper - 1], self.throughput[upper]),
+                {name: blend(values[upper - 1], values[upper]) for name, values in self.latency_ms.items()},
+                extrapolated)
+
+
+@dataclass
+class ProfileEntry:
+    """One operation of a traffic profile"""
+    operation: str
+    share: float  # fraction of all requests
+    obj_size: str = ""
+    size_bytes: Optional[int] = None
+
+
+@dataclass
+class TrafficProfile:
+    """Production request mix and rate"""
+    name: str
+    rate: float  # requests per second, all operations
+    mix: List[ProfileEntry]
+
+
+@dataclass
+class OperationForecast:
+    operation: str
+    obj_size: str
+    rate: float
+    max_rate_alone: Optional[float] = None  # peak of the operation's curve at this size
+    capacity_share: Optional[float] = None  # rate / max_rate_alone
+    in_flight: Optional[float] = None
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    extrapolated: bool = False
+    missing: bool = False  # no benchmark of this operation in the environment
+
+
+@dataclass
+class Forecast:
+    """Forecast of one traffic profile at one rate in one environment"""
+    environment: str
+    profile: str
+    rate: float
+    utilization: Optional[float]
+    achievable_rate: Optional[float]
+    headroom_percent: Optional[float]
+    operations: List[OperationForecast]
+
+    @property
+    def saturated(self) -> bool:
+        return self.utilization is not None and self.utilization >= 1
+
+    @property
+    def complete(self) -> bool:
+        return not any(op.missing for op in self.operations)
+
+
+def load_profile(path: str) -> TrafficProfile:
+    """Load a traffic profile; shares may be given as fractions or percentages"""
+    # Imported here so the forecast itself does not require PyYAML
+    import yaml
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    return profile_from_dict(data)
+
+
+def profile_from_dict(data: Dict[str, Any]) -> TrafficProfile:
+    entries = []
+    for item in data.get('mix') or []:
+        obj_size = str(item.get('obj_size') or '')
+        entries.append(ProfileEntry(operation=str(item['op']).upper(), share=float(item['share']),
+                                    obj_size=obj_size, size_bytes=parse_obj_size(obj_size) if obj_size else None))
+    total = sum(entry.share for entry in entries)
+    if not entries or total <= 0:
+        raise ValueError("the traffic profile needs a mix with positive shares")
+    for entry in entries:
+        entry.share /= total
+    return TrafficProfile(name=str(data.get('name', 'profile')), rate=float(data.get('rate', 0)), mix=entries)
+
+
+def _size_bytes(result: WarpResult) -> Optional[float]:
+    if result.avg_throughput_obj > 0 and result.avg_throughput_mib > 0:
+        return result.avg_throughput_mib * BYTES_PER_MIB / result.avg_throughput_obj
+    # Operations without payload (DELETE, STAT) act on objects of the configured size
+    return parse_obj_size((result.test_params or {}).get('obj_size', '')) or None
+
+
+def _mean_point(job_key: str, results: List[WarpResult], source: str) -> Optional[SurfacePoint]:
+    """Mean of the runs of one job (or of one operation or size bucket across its runs)"""
+    usable = []
+    for result in results:
+        busy = result.effective_concurrency if result.effective_concurrency is not None else effective_concurrency(result)
+        size = _size_bytes(result)
+        if busy and size and result.avg_throughput_obj > 0 and result.avg_latency_ms > 0:
+            usable.append((result, busy, size))
+    if not usable:
+        return None
+    count = len(usable)
+    return SurfacePoint(
+        size_bytes=sum(size for _, _, size in usable) / count,
+        in_flight=sum(busy for _, busy, _ in usable) / count,
+        throughput_obj=sum(result.avg_throughput_obj for result, _, _ in usable) / count,
+        latency_ms={name: sum(getattr(result, attr) for result, _, _ in usable) / count
+                    for name, attr in LATENCY_ATTRS.items()},
+        runs=count,
+        source=source,
+        job_key=job_key,
+    )
+
+
+def collect_points(parser: WarpResultsParser) -> Dict[Tuple[str, str], List[SurfacePoint]]:
+    """Surface points per (environment, operation) from every valid job"""
+    points: Dict[Tuple[str, str], List[SurfacePoint]] = {}
+    for job_key, results in sorted(parser.group_valid_results().items()):
+        if not results:
+            continue
+        environment = results[0].environment
+        if any(result.op_breakdown for result in results):
+            # An operation of a mixed run only had its share of the workers. At the same latency all
+            # workers of the run would give it total / own in-flight times the throughput (Little's law),
+            # so the operations of a saturated mixed run add up to exactly its capacity.
+            parts: Dict[str, List[WarpResult]] = {}
+            for result in results:
+                busy = {op: part.effective_concurrency for op, part in (result.op_breakdown or {}).items()
+                        if part.effective_concurrency}
+                total = sum(busy.values())
+                for op, in_flight in busy.items():
+                    part = result.op_breakdown[op]
+                    scale = total / in_flight
+                    parts.setdefault(op, []).append(replace(
+                        part, avg_throughput_obj=part.avg_throughput_obj * scale,
+                        avg_throughput_mib=part.avg_throughput_mib * scale, effective_concurrency=total))
+            for op, op_parts in sorted(parts.items()):
+                point = _mean_point(job_key, op_parts, 'mixed')
+                if point:
+                    points.setdefault((environment, op), []).append(point)
+        elif any(result.size_breakdown for result in results):
+            for log2_size in sorted({size for result in results for size in (result.size_breakdown or {})}):
+                buckets = [result.size_breakdown[log2_size] for result in results
+                           if log2_size in (result.size_breakdown or {})]
+                point = _mean_point(job_key, buckets, 'size bucket')
+                if point:
+                    points.setdefault((environment, results[0].operation), []).append(point)
+        else:
+            point = _mean_point(job_key, list(results), 'run')
+            if point:
+                points.setdefault((environment, results[0].operation), []).append(point)
+    return points
+
+
+def _row_at(row: List[SurfacePoint], in_flight: float) -> Tuple[float, Dict[str, float]]:
+    """Throughput and latency of one size row at a load, extended with Little's law outside its range"""
+    first, last = row[0], row[-1]
+    if in_flight <= first.in_flight:
+        return first.throughput_obj * in_flight / first.in_flight, dict(first.latency_ms)
+    if in_flight >= last.in_flight:
+        # Saturated: throughput stays, the extra requests queue
+        factor = in_flight / last.in_flight
+        return last.throughput_obj, {name: value * factor for name, value in last.latency_ms.items()}
+    upper = next(i for i, point in enumerate(row) if point.in_flight >= in_flight)
+    low, high = row[upper - 1], row[upper]
+    weight = (in_flight - low.in_flight) / (high.in_flight - low.in_flight)
+    return (low.throughput_obj + (high.throughput_obj - low.throughput_obj) * weight,
+            {name: low.latency_ms[name] + (high.latency_ms[name] - low.latency_ms[name]) * weight
+             for name in LATENCY_NAMES})
+
+
+def monotonic_row(points: List[SurfacePoint]) -> List[SurfacePoint]:
+    """Points of one size row by load, with throughput and latencies made non-decreasing along it
+
+    More requests in flight never complete fewer requests or faster ones; dips come from run-to-run
+    noise and would make the interpolated curves (and their inversion) jump back and forth.
+    """
+    row = []
+    for point in sorted(points, key=lambda p: p.in_flight):
+        if row:
+            previous = row[-1]
+            point = replace(point, throughput_obj=max(point.throughput_obj, previous.throughput_obj),
+                            latency_ms={name: max(value, previous.latency_ms.get(name, value))
+                                        for name, value in point.latency_ms.items()})
+        row.append(point)
+    return row
+
+
+def build_surface(environment: str, operation: str, points: List[SurfacePoint]) -> LookupSurface:
+    """Resample the points of one operation onto a (log2 size x in-flight) grid"""
+    rows: Dict[float, List[SurfacePoint]] = {}
+    for point in points:
+        # + 0.0 turns the -0.0 of sizes just below one byte into 0.0
+        rows.setdefault(round(math.log2(point.size_bytes), SIZE_ROW_DECIMALS) + 0.0, []).append(point)
+    # Scaled mixed-run points are an estimate; they only fill sizes without single-operation runs
+    for log2_size, row in rows.items():
+        measured = [point for point in row if point.source != 'mixed']
+        if measured:
+            rows[log2_size] = measured
+    grid = sorted({round(point.in_flight, 1) for row in rows.values() for point in row if point.in_flight > 0})
+
+    log2_sizes = sorted(rows)
+    throughput: List[List[float]] = []
+    latency: Dict[str, List[List[float]]] = {name: [] for name in LATENCY_NAMES}
+    for log2_size in log2_sizes:
+        row = monotonic_row(rows[log2_size])
+        cells = [_row_at(row, in_flight) for in_flight in grid]
+        throughput.append([value for value, _ in cells])
+        for name in LATENCY_NAMES:
+            latency[name].append([latencies[name] for _, latencies in cells])
+    return LookupSurface(environment=environment, operation=operation, log2_sizes=log2_sizes, in_flight=grid,
+                         throughput=throughput, latency_ms=latency,
+                         points=[point for log2_size in log2_sizes for point in rows[log2_size]])
+
+
+def build_surfaces(parser: WarpResultsParser) -> Dict[Tuple[str, str], LookupSurface]:
+    """Lookup surface of every (environment, operation) with benchmark results"""
+    return {key: build_surface(key[0], key[1], points) for key, points in sorted(collect_points(parser).items())}
+
+
+def save_surfaces(surfaces: Dict[Tuple[str, str], LookupSurface], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([asdict(surface) for surface in surfaces.values()], f)
+        f.write("\n")
+
+
+def load_surfaces(path: str) -> Dict[Tuple[str, str], LookupSurface]:
+    with open(path, 'r', encoding='utf-8') as f:
+        surfaces = [LookupSurface.from_dict(data) for data in json.load(f)]
+    return {(surface.environment, surface.operation): surface for surface in surfaces}
+
+
+def _at_throughput(grid: List[float], throughput: List[float], latency: Dict[str, List[float]],
+                   target: float) -> Tuple[float, Dict[str, float]]:
+    """In-flight requests and latencies where the rising part of a curve reaches the target throughput"""
+    peak = max(range(len(throughput)), key=throughput.__getitem__)
+    if target <= throughput[0]:
+        # Below the lowest measured load the latency does not improve further
+        in_flight = grid[0] * target / throughput[0] if throughput[0] > 0 else 0.0
+        return in_flight, {name: values[0] for name, values in latency.items()}
+    for i in range(1, peak + 1):
+        if throughput[i] >= target:
+            weight = (target - throughput[i - 1]) / (throughput[i] - throughput[i - 1])
+            return (grid[i - 1] + (grid[i] - grid[i - 1]) * weight,
+                    {name: values[i - 1] + (values[i] - values[i - 1]) * weight for name, values in latency.items()})
+    return grid[peak], {name: values[peak] for name, values in latency.items()}
+
+
+def forecast(profile: TrafficProfile, surfaces: Dict[Tuple[str, str], LookupSurface], environment: str,
+             rate: Optional[float] = None) -> Forecast:
+    """Achievable rate, headroom and per-operation latency of a profile in one environment"""
+    rate = profile.rate if rate is None else rate
+    operations = []
+    curves = []
+    for entry in profile.mix:
+        op = OperationForecast(operation=entry.operation, obj_size=entry.obj_size or "-", rate=rate * entry.share)
+        operations.append(op)
+        surface = surfaces.get((environment, entry.operation))
+        if surface is None:
+            op.missing = True
+            continue
+        throughput, latency, op.extrapolated = surface.curve(entry.size_bytes)
+        op.max_rate_alone = max(throughput)
+        if op.max_rate_alone <= 0:
+            op.missing = True
+            continue
+        op.capacity_share = op.rate / op.max_rate_alone
+        curves.append((op, surface.in_flight, throughput, latency))
+
+    if not curves:
+        return Forecast(environment=environment, profile=profile.name, rate=rate, utilization=None,
+                        achievable_rate=None, headroom_percent=None, operations=operations)
+
+    # Operations without benchmarks in this environment do not count against the capacity
+    utilization = sum(op.capacity_share for op, *_ in curves)
+    if utilization < 1:
+        for op, grid, throughput, latency in curves:
+            op.in_flight, op.latency_ms = _at_throughput(grid, throughput, latency, utilization * op.max_rate_alone)
+    return Forecast(
+        environment=environment,
+        profile=profile.name,
+        rate=rate,
+        utilization=utilization,
+        achievable_rate=rate / utilization if utilization > 0 else None,
+        headroom_percent=(1 / utilization - 1) * 100 if utilization > 0 else None,
+        operations=operations,
+    )
+
+
+def _fmt(value: Optional[float], spec: str = ".1f") -> str:
+    return format(value, spec) if value is not None else "-"
+
+
+def print_forecast(result: Forecast, min_headroom_percent: float):
+    if result.utilization is None:
+        print(f"{result.environment}: no benchmark results for any operation of the profile")
+        return
+    if result.saturated:
+        status = "❌ over capacity"
+    elif result.headroom_percent < min_headroom_percent:
+        status = f"⚠️ headroom below {min_headroom_percent:.0f}%"
+    else:
+        status = "✅ OK"
+    print(f"{result.environment}: {result.rate:.0f} req/s uses {result.utilization:.0%} of capacity, "
+          f"achievable {result.achievable_rate:.0f} req/s, headroom {result.headroom_percent:+.0f}% {status}"
+          + ("" if result.complete else " (incomplete: operations without benchmarks are left out)"))
+    print(f"  {'Operation':<9} {'Obj Size':>9} {'Rate':>9} {'Max Alone':>10} {'Capacity':>9} {'In Flight':>9} "
+          + " ".join(f"{name + ' ms':>9}" for name in LATENCY_NAMES))
+    for op in result.operations:
+        if op.missing:
+            print(f"  {op.operation:<9} {op.obj_size:>9} {op.rate:>9.0f}  no benchmark in {result.environment}")
+            continue
+        flag = " (size extrapolated)" if op.extrapolated else ""
+        print(f"  {op.operation:<9} {op.obj_size:>9} {op.rate:>9.0f} {op.max_rate_alone:>10.0f} "
+              f"{op.capacity_share:>9.0%} {_fmt(op.in_flight):>9} "
+              + " ".join(f"{_fmt(op.latency_ms.get(name)):>9}" for name in LATENCY_NAMES) + flag)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Forecast capacity and latency of a production traffic profile '
+                                                 'from benchmark results')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE_FILE,
+                        help=f'Traffic profile (default: {DEFAULT_PROFILE_FILE})')
+    parser.add_argument('--rate', type=float, action='append',
+                        help='Total requests per second to evaluate instead of the profile rate (repeatable)')
+    parser.add_argument('--surfaces', help='Use lookup surfaces saved with --save-surfaces instead of parsing results')
+    parser.add_argument('--save-surfaces', help='Save the lookup surfaces as JSON for later what-if queries')
+    parser.add_argument('--json', help='Also write the forecasts as JSON')
+    args = parser.parse_args()
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    try:
+        profile = load_profile(args.profile)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: cannot load traffic profile {args.profile}: {e}", file=sys.stderr)
+        return 2
+
+    if args.surfaces:
+        surfaces = load_surfaces(args.surfaces)
+    else:
+        results_parser = WarpResultsParser(args.results_dir, config=config)
+        results_parser.find_and_parse_results()
+        surfaces = build_surfaces(results_parser)
+    if args.save_surfaces:
+        save_surfaces(surfaces, args.save_surfaces)
+        print(f"Lookup surfaces written to {args.save_surfaces}")
+    if not surfaces:
+        print(f"No benchmark results found in {args.results_dir}")
+        return 2
+
+    started = time.perf_counter()
+    environments = sorted({environment for environment, _ in surfaces})
+    forecasts = [forecast(profile, surfaces, environment, rate)
+                 for rate in (args.rate or [profile.rate]) for environment in environments]
+    elapsed = time.perf_counter() - started
+
+    mix = ", ".join(f"{entry.share:.0%} {entry.operation}" + (f" {entry.obj_size}" if entry.obj_size else "")
+                    for entry in profile.mix)
+    print(f"Profile {profile.name}: {mix}")
+    for result in forecasts:
+        print()
+        print_forecast(result, config.capacity_min_headroom_percent)
+    by_rate: Dict[float, Dict[str, Forecast]] = {}
+    for result in forecasts:
+        by_rate.setdefault(result.rate, {})[result.environment] = result
+    for rate, results in by_rate.items():
+        prod, test = results.get('PROD'), results.get('TEST')
+        if prod and test and prod.achievable_rate and test.achievable_rate:
+            change = (test.achievable_rate - prod.achievable_rate) / prod.achievable_rate * 100
+            print(f"\nTEST vs PROD achievable rate at {rate:.0f} req/s: {change:+.1f}%"
+                  + ("" if prod.complete and test.complete else " (environments cover different operations)"))
+    print(f"\n{len(forecasts)} forecast(s) in {elapsed * 1000:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([dict(asdict(result), saturated=result.saturated, complete=result.complete)
+                       for result in forecasts], f, indent=2)
+            f.write("\n")
+        print(f"Forecasts written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
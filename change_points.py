@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Change Points Across Benchmark History
+
+Every run of a configuration (the job key built from the parameters in the
+report: operation, environment, object size, concurrency) becomes one point of
+a run-level history series for throughput, p99 latency and error rate, ordered
+by run time. Binary segmentation then splits each series where its level
+shifts, which answers "which night did TEST start to fall behind".
+
+The cost is robust: each value is first clipped to its running median ± a few
+robust standard deviations, so a single bad night cannot pose as a level shift,
+and the noise level is the MAD of the first differences, which a level shift
+does not inflate. Splits are scored with prefix sums (squared error of segment
+means), so a series of n runs costs O(n log n) and thousands of runs take
+milliseconds. A split is kept when its cost reduction beats a BIC-style penalty
+and the median level of the segments on either side differs by more than the
+configured minimum change.
+
+In the comparison report the history comes from the parsed runs. The command
+line reads the run summaries from the rollup cache (rollups.py), so a history
+of thousands of runs needs no full parse once the rollups are built.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE
+from rollups import RollupCache
+
+
+RUNNING_MEDIAN_WINDOW = 5  # neighbourhood each run is compared with when clipping outliers
+CLIP_SIGMAS = 3.0
+MAD_SCALE = 1.4826  # MAD of normal noise times this is its standard deviation
+
+# (name, label, unit, whether higher is better)
+METRICS = (
+    ('throughput_mib', 'Throughput', 'MiB/s', True),
+    ('p99_ms', 'P99 Latency', 'ms', False),
+    ('error_rate_percent', 'Error Rate', '%', False),
+)
+
+
+@dataclass
+class RunPoint:
+    """Run-level metrics of one run of a configuration"""
+    run: str  # run timestamp
+    throughput_mib: float
+    p99_ms: Optional[float]
+    error_rate_percent: float
+
+
+@dataclass
+class ChangePoint:
+    """A level shift in the history of one metric of a configuration"""
+    job_key: str
+    metric: str
+    index: int  # first run of the new level
+    before: float  # median level of the segment before
+    after: float  # median level of the segment after
+    change_percent: Optional[float]  # None when the level before is zero
+    runs_before: int
+    runs_after: int
+    last_run_before: str
+    first_run_after: str
+    degradation: bool
+
+    @property
+    def label(self) -> str:
+        return next(label for name, label, _, _ in METRICS if name == self.metric)
+
+    @property
+    def unit(self) -> str:
+        return next(unit for name, _, unit, _ in METRICS if name == self.metric)
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def noise_sigma(values: List[float]) -> float:
+    """Robust noise level from the MAD of the first differences (unaffected by level shifts)"""
+    differences = [b - a for a, b in zip(values, values[1:])]
+    if not differences:
+        return 0.0
+    center = _median(differences)
+    return MAD_SCALE * _median([abs(d - center) for d in differences]) / math.sqrt(2)
+
+
+def clip_outliers(values: List[float], sigma: float) -> List[float]:
+    """Values clipped to their running median ± CLIP_SIGMAS sigma; level shifts move the median along"""
+    if sigma <= 0:
+        return list(values)
+    half = RUNNING_MEDIAN_WINDOW // 2
+    clipped = []
+    for i, value in enumerate(values):
+        local = _median(values[max(i - half, 0):i + half + 1])
+        clipped.append(min(max(value, local - CLIP_SIGMAS * sigma), local + CLIP_SIGMAS * sigma))
+    return clipped
+
+
+def binary_segmentation(values: List[float], min_size: int, penalty: float) -> List[int]:
+    """Indices where a new level starts, by recursive best splits of a robust mean-shift cost"""
+    n = len(values)
+    if n < 2 * min_size:
+        return []
+    sigma = noise_sigma(values)
+    if sigma <= 0:
+        # Noise-free runs of identical values: any real step is a change, but nothing else is
+        sigma = max(abs(_median(values)) * 1e-6, 1e-12)
+    clipped = clip_outliers(values, sigma)
+
+    prefix, prefix_sq = [0.0], [0.0]
+    for value in clipped:
+        prefix.append(prefix[-1] + value)
+        prefix_sq.append(prefix_sq[-1] + value * value)
+
+    def cost(start: int, end: int) -> float:
+        total = prefix[end] - prefix[start]
+        return prefix_sq[end] - prefix_sq[start] - total * total / (end - start)
+
+    threshold = penalty * sigma * sigma * math.log(n)
+    changes = []
+    pending: List[Tuple[int, int]] = [(0, n)]
+    while pending:
+        start, end = pending.pop()
+        if end - start < 2 * min_size:
+            continue
+        whole = cost(start, end)
+        best_gain, best_split = 0.0, None
+        for split in range(start + min_size, end - min_size + 1):
+            gain = whole - cost(start, split) - cost(split, end)
+            if gain > best_gain:
+                best_gain, best_split = gain, split
+        if best_split is not None and best_gain > threshold:
+            changes.append(best_split)
+            pending.extend([(start, best_split), (best_split, end)])
+    return sorted(changes)
+
+
+def detect_change_points(job_key: str, points: List[RunPoint], config: ComparisonConfig) -> List[ChangePoint]:
+    """Change points of every metric in the history of one configuration"""
+    change_points = []
+    for name, _, _, higher_is_better in METRICS:
+        series = [(point.run, getattr(point, name)) for point in points if getattr(point, name) is not None]
+        values = [value for _, value in series]
+        changes = binary_segmentation(values, config.history_min_segment_runs, config.history_penalty)
+        bounds = [0] + changes + [len(values)]
+        for i, index in enumerate(changes):
+            before = _median(values[bounds[i]:index])
+            after = _median(values[index:bounds[i + 2]])
+            if before:
+                change = (after - before) / abs(before) * 100
+                if abs(change) < config.history_min_change_percent:
+                    continue
+            else:
+                change = None
+                if after == before:
+                    continue
+            change_points.append(ChangePoint(
+                job_key=job_key,
+                metric=name,
+                index=index,
+                before=before,
+                after=after,
+                change_percent=change,
+                runs_before=index - bounds[i],
+                runs_after=bounds[i + 2] - index,
+                last_run_before=series[index - 1][0],
+                first_run_after=series[index][0],
+                degradation=(after < before) if higher_is_better else (after > before),
+            ))
+    return change_points
+
+
+def run_point(result: WarpResult) -> RunPoint:
+    """Run-level metrics of a merged run; MIXED runs only carry them per operation"""
+    parts = list((result.op_breakdown or {}).values()) or [result]
+    throughput = result.avg_throughput_mib or sum(part.avg_throughput_mib for part in parts)
+    p99_values = [part.p99_latency_ms for part in parts if part.p99_latency_ms]
+    # The tail of a MIXED run is the tail of its slowest operation
+    p99 = result.p99_latency_ms or (max(p99_values) if p99_values else None)
+    errors = max(result.error_count or 0, sum(part.error_count or 0 for part in parts))
+    requests = sum(window.get('requests', 0) or 0 for part in parts for window in part.latency_windows or [])
+    error_rate = errors / (requests + errors) * 100 if requests + errors else 0.0
+    return RunPoint(run=result.timestamp, throughput_mib=throughput, p99_ms=p99, error_rate_percent=error_rate)
+
+
+def history_from_parser(parser: WarpResultsParser) -> Dict[str, List[RunPoint]]:
+    """Run history of every configuration from the parsed (container-merged) runs"""
+    return {job_key: [run_point(result) for result in sorted(results, key=lambda r: r.timestamp)]
+            for job_key, results in sorted(parser.group_results_by_job().items())}
+
+
+def history_from_rollups(cache: RollupCache) -> Dict[str, List[RunPoint]]:
+    """Run history of every configuration from the summaries in a RollupCache"""
+    history: Dict[str, List[RunPoint]] = {}
+    for rollup in sorted(cache.runs.values(), key=lambda r: (r.job_key, r.timestamp)):
+        total = rollup.summary()
+        attempts = total.requests + total.errors
+        history.setdefault(rollup.job_key, []).append(RunPoint(
+            run=rollup.timestamp,
+            throughput_mib=total.mean_mib or 0.0,
+            p99_ms=total.quantile(0.99),
+            error_rate_percent=total.errors / attempts * 100 if attempts else 0.0,
+        ))
+    return history
+
+
+def analyze_history(history: Dict[str, List[RunPoint]], config: ComparisonConfig) -> List[ChangePoint]:
+    change_points = []
+    for job_key, points in history.items():
+        change_points.extend(detect_change_points(job_key, points, config))
+    return change_points
+
+
+def change_point_summary(parser: WarpResultsParser) -> List[Dict[str, Any]]:
+    """Machine-readable change points of every configuration"""
+    return [asdict(change) for change in analyze_history(history_from_parser(parser), parser.config)]
+
+
+def _level(value: float, unit: str) -> str:
+    return f"{value:.3f}{unit}" if unit == '%' else f"{value:.2f} {unit}"
+
+
+def _change(change: ChangePoint) -> str:
+    percent = f"{change.change_percent:+.1f}%" if change.change_percent is not None else "new"
+    return f"{percent} {'❌' if change.degradation else '✅'}"
+
+
+def write_change_point_section(f, parser: WarpResultsParser):
+    """Write the change point section of the comparison report"""
+    config = parser.config
+    history = history_from_parser(parser)
+    analyzed = [points for points in history.values() if len(points) >= 2 * config.history_min_segment_runs]
+    if not analyzed:
+        return
+    change_points = analyze_history(history, config)
+
+    f.write("## Change Points in Run History\n\n")
+    f.write(f"Run-level throughput, p99 and error rate of every configuration in run order, split by binary "
+            f"segmentation where the level shifts (robust cost, segments of at least "
+            f"{config.history_min_segment_runs} runs, changes of at least {config.history_min_change_percent:.0f}%). "
+            f"Levels are segment medians.\n\n")
+    if not change_points:
+        f.write(f"No change points in {len(analyzed)} configuration(s) with enough runs.\n\n")
+        return
+    f.write("| Job Type | Metric | Before | After | Change | Runs Before | Runs After | Last Run Before | "
+            "First Run After |\n")
+    f.write("|----------|--------|--------|-------|--------|-------------|------------|-----------------|"
+            "-----------------|\n")
+    for change in change_points:
+        f.write(f"| {change.job_key} | {change.label} | {_level(change.before, change.unit)} | "
+                f"{_level(change.after, change.unit)} | {_change(change)} | {change.runs_before} | "
+                f"{change.runs_after} | {change.last_run_before} | {change.first_run_after} |\n")
+    f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find when run-level metrics shifted across the run history')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    parser.add_argument('--job', help='Only configurations whose job key contains this (e.g. GET_TEST)')
+    parser.add_argument('--json', help='Also write the change points as JSON')
+    args = parser.parse_args()
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    cache = RollupCache(args.results_dir, config=config)
+    cache.refresh()
+
+    started = time.perf_counter()
+    history = history_from_rollups(cache)
+    if args.job:
+        history = {job_key: points for job_key, points in history.items() if args.job.upper() in job_key}
+    change_points = analyze_history(history, config)
+    elapsed = time.perf_counter() - started
+
+    for change in change_points:
+        print(f"{change.job_key} {change.label}: {_level(change.before, change.unit)} -> "
+              f"{_level(change.after, change.unit)} ({_change(change)}) between {change.last_run_before} "
+              f"({change.runs_before} runs) and {change.first_run_after} ({change.runs_after} runs)")
+    runs = sum(len(points) for points in history.values())
+    print(f"{len(change_points)} change point(s) in {len(history)} configuration(s), {runs} runs, "
+          f"analyzed in {elapsed * 1000:.0f} ms")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([asdict(change) for change in change_points], f, indent=2)
+            f.write("\n")
+        print(f"Change points written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,8 @@ set -e
 NAMESPACE="timesheet"
 WARP_POD_PREFIX="warp-"
 RESULTS_DIR="./warp_results"
+ARCHIVE_MODE="false"
+COMPACT_MODE="false"
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # Colors for output
@@ -100,6 +102,50 @@ collect_from_pod() {
     print_success "Collected $file_count files from $pod_name"
 }
 
+# Function to collect results from a single pod as one archive (no per-file copies, no unpack step)
+archive_from_pod() {
+    local pod_name="$1"
+    local archive_path
+    
+    print_status "Archiving results from pod: $pod_name"
+    
+    # Find all warp result files in the pod
+    local result_files
+    result_files=$(kubectl exec -n "$NAMESPACE" "$pod_name" -- find /tmp -name "warp-*.json.zst" 2>/dev/null || true)
+    
+    if [ -z "$result_files" ]; then
+        print_warning "No warp result files found in pod $pod_name"
+        return
+    fi
+    
+    # Store names relative to /tmp inside the archive
+    local relative_files
+    relative_files=$(echo "$result_files" | sed 's|^/tmp/||')
+    local file_count
+    file_count=$(echo "$relative_files" | grep -c .)
+    
+    # Stream a tarball out of the pod and compress it locally; prefer zstd, fall back to gzip
+    local -a compressor
+    if command -v zstd &> /dev/null; then
+        archive_path="$RESULTS_DIR/$pod_name.tar.zst"
+        compressor=(zstd -q -f -o "$archive_path")
+    else
+        archive_path="$RESULTS_DIR/$pod_name.tar.gz"
+        compressor=(sh -c 'gzip > "$1"' gzip "$archive_path")
+    fi
+    
+    # pipefail makes a failing kubectl exec or tar fail the pipeline, not just the compressor;
+    # a partial archive would otherwise be read as if the pod had fewer results
+    # shellcheck disable=SC2086
+    if ! (set -o pipefail; kubectl exec -n "$NAMESPACE" "$pod_name" -- tar cf - -C /tmp $relative_files | "${compressor[@]}"); then
+        rm -f "$archive_path"
+        print_warning "Failed to archive results from $pod_name"
+        return
+    fi
+    
+    print_success "Archived $file_count files from $pod_name into $archive_path"
+}
+
 # Function to collect all results
 collect_all_results() {
     print_status "Starting warp results collection..."
@@ -125,13 +171,36 @@ collect_all_results() {
     local total_files=0
     while IFS= read -r pod; do
         if [ -n "$pod" ]; then
-            collect_from_pod "$pod"
-            local pod_file_count=$(find "$RESULTS_DIR/$pod" -name "*.json.zst" 2>/dev/null | wc -l)
-            total_files=$((total_files + pod_file_count))
+            if [ "$ARCHIVE_MODE" = "true" ]; then
+                archive_from_pod "$pod"
+                local pod_archive_count=$(find "$RESULTS_DIR" -maxdepth 1 -name "$pod.tar.*" 2>/dev/null | wc -l)
+                total_files=$((total_files + pod_archive_count))
+            else
+                collect_from_pod "$pod"
+                local pod_file_count=$(find "$RESULTS_DIR/$pod" -name "*.json.zst" 2>/dev/null | wc -l)
+                total_files=$((total_files + pod_file_count))
+            fi
         fi
     done <<< "$pods"
     
-    print_success "Collection complete. Total files collected: $total_files"
+    if [ "$ARCHIVE_MODE" = "true" ]; then
+        print_success "Collection complete. Total pod archives: $total_files"
+    else
+        print_success "Collection complete. Total files collected: $total_files"
+    fi
+}
+
+# Function to pack the collected files into the deduplicated results store
+compact_results() {
+    print_status "Compacting collected results..."
+    
+    cd "$SCRIPT_DIR"
+    python3 results_store.py --results-dir "$RESULTS_DIR" compact || {
+        print_error "Failed to compact results (the collected files were kept)"
+        exit 1
+    }
+    
+    print_success "Results packed into $RESULTS_DIR/results.warpstore"
 }
 
 # Function to run the parser
@@ -165,6 +234,8 @@ show_usage() {
     echo "  -a, --all        Collect and parse (default)"
     echo "  -d, --dir DIR    Results directory (default: ./warp_results)"
     echo "  -n, --namespace  Kubernetes namespace (default: timesheet)"
+    echo "  -z, --archive    Keep each pod's results as one archive (<pod>.tar.zst or .tar.gz)"
+    echo "  -k, --compact    Pack collected files into a deduplicated store (results.warpstore)"
     echo "  -h, --help       Show this help message"
     echo ""
     echo "Examples:"
@@ -172,6 +243,8 @@ show_usage() {
     echo "  $0 --collect          # Only collect results"
     echo "  $0 --parse            # Only parse existing results"
     echo "  $0 --dir /tmp/results # Use custom results directory"
+    echo "  $0 --archive          # Collect one archive per pod and parse it in place"
+    echo "  $0 --collect --compact # Collect and pack into the results store"
 }
 
 # Main function
@@ -203,6 +276,14 @@ main() {
                 custom_namespace="$2"
                 shift 2
                 ;;
+            -z|--archive)
+                ARCHIVE_MODE="true"
+                shift
+                ;;
+            -k|--compact)
+                COMPACT_MODE="true"
+                shift
+                ;;
             -h|--help)
                 show_usage
                 exit 0
@@ -228,6 +309,8 @@ main() {
     echo "  Namespace: $NAMESPACE"
     echo "  Results directory: $RESULTS_DIR"
     echo "  Action: $action"
+    echo "  Archive mode: $ARCHIVE_MODE"
+    echo "  Compact mode: $COMPACT_MODE"
     echo ""
     
     # Check prerequisites
@@ -238,6 +321,9 @@ main() {
     case $action in
         "collect")
             collect_all_results
+            if [ "$COMPACT_MODE" = "true" ]; then
+                compact_results
+            fi
             ;;
         "parse")
             if [ ! -d "$RESULTS_DIR" ]; then
@@ -249,6 +335,9 @@ main() {
             ;;
         "all")
             collect_all_results
+            if [ "$COMPACT_MODE" = "true" ]; then
+                compact_results
+            fi
             run_parser
             ;;
     esac
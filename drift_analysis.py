@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Within-Run Drift and Periodicity Analysis
+
+This module looks inside long runs, where the run average hides how throughput
+evolved. Drift (compaction debt, cache eviction) is estimated from the
+per-second throughput of the steady part of a run with a robust Theil-Sen
+slope over binned medians and an early-vs-late window comparison. Periodic
+dips (background scrubbing, GC) are found in the detrended series with an FFT
+power spectrum; the strongest peak is confirmed with the autocorrelation at
+its period, which is computed from the same FFT (Wiener-Khinchin), so the
+analysis stays O(n log n) on hour-long series. Merged results carry the
+throughput of all containers summed per second, so the analysis covers the
+whole cluster run. MIXED runs only carry per-second throughput per operation,
+so each of their operations is analyzed on its own series and steady window.
+"""
+
+import cmath
+import math
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, parse_warp_time
+
+
+MIN_DRIFT_SECONDS = 120  # shorter runs are not analyzed
+TREND_BINS = 120  # Theil-Sen runs on at most this many bin medians
+EDGE_FRACTION = 0.2  # early and late windows cover this share of the run each
+MIN_PERIOD_SECONDS = 10
+MIN_CYCLES = 3  # a period must repeat at least this often within the run
+
+
+@dataclass
+class DriftResult:
+    """Trend and periodic component of one run's per-second throughput"""
+    job_key: str
+    timestamp: str
+    operation: str  # the analyzed operation of a MIXED run, otherwise the run's operation
+    environment: str
+    seconds: int
+    mean_obj: float
+    slope_percent_per_hour: float  # Theil-Sen slope relative to the mean
+    early_late_percent: float  # median of the last window relative to the first
+    drifting: bool
+    period_s: Optional[float] = None
+    amplitude_percent: Optional[float] = None  # peak amplitude of the periodic component relative to the mean
+    autocorrelation: Optional[float] = None  # autocorrelation of the detrended series at the period
+    periodic: bool = False
+
+
+def fft(values: List[complex], inverse: bool = False) -> List[complex]:
+    """Iterative radix-2 FFT; the length must be a power of two"""
+    n = len(values)
+    result = list(values)
+    # Bit-reversal permutation
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            result[i], result[j] = result[j], result[i]
+
+    sign = 1 if inverse else -1
+    size = 2
+    while size <= n:
+        step = cmath.exp(sign * 2j * math.pi / size)
+        half = size // 2
+        for start in range(0, n, size):
+            w = 1 + 0j
+            for k in range(start, start + half):
+                t = w * result[k + half]
+                result[k + half] = result[k] - t
+                result[k] = result[k] + t
+                w *= step
+        size *= 2
+
+    if inverse:
+        result = [value / n for value in result]
+    return result
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def per_second_series(result: WarpResult) -> List[float]:
+    """Throughput (obj/s) per wall-clock second of the steady part of a run, gaps filled with the previous value"""
+    start = parse_warp_time(result.steady_start) if result.steady_state else None
+    end = parse_warp_time(result.steady_end) if result.steady_state else None
+
+    buckets: Dict[int, float] = {}
+    for segment in result.throughput_per_second or []:
+        when = parse_warp_time(segment.get('start', ''))
+        if not when or (start and when < start) or (end and when >= end):
+            continue
+        second = int(when.timestamp())
+        buckets[second] = buckets.get(second, 0.0) + segment.get('obj_per_sec', 0)
+    if not buckets:
+        return []
+
+    series = []
+    first, last = min(buckets), max(buckets)
+    for second in range(first, last + 1):
+        series.append(buckets.get(second, series[-1] if series else 0.0))
+    return series
+
+
+def theil_sen_slope(series: List[float], bins: int = TREND_BINS) -> Tuple[float, float]:
+    """Robust (slope per sample, intercept) from the median of pairwise slopes of binned medians"""
+    size = max(len(series) // bins, 1)
+    points = [((i + (len(series[i:i + size]) - 1) / 2), _median(series[i:i + size]))
+              for i in range(0, len(series), size)]
+    slopes = [(y2 - y1) / (x2 - x1) for a, (x1, y1) in enumerate(points) for x2, y2 in points[a + 1:] if x2 != x1]
+    slope = _median(slopes) if slopes else 0.0
+    intercept = _median([y - slope * x for x, y in points])
+    return slope, intercept
+
+
+def dominant_period(residuals: List[float]) -> Optional[Tuple[float, float, float]]:
+    """(period in samples, amplitude, autocorrelation at the period) of the strongest periodic component"""
+    n = len(residuals)
+    size = 1
+    while size < 2 * n:  # zero padding keeps the autocorrelation linear instead of circular
+        size *= 2
+    spectrum = fft([complex(v) for v in residuals] + [0j] * (size - n))
+
+    # Strongest spectral peak with at least MIN_CYCLES cycles and a period of at least MIN_PERIOD_SECONDS
+    best_index, best_power = None, 0.0
+    for k in range(1, size // 2):
+        period = size / k
+        if period > n / MIN_CYCLES:
+            continue
+        if period < MIN_PERIOD_SECONDS:
+            break
+        power = abs(spectrum[k]) ** 2
+        if power > best_power:
+            best_index, best_power = k, power
+    if best_index is None:
+        return None
+
+    # Autocorrelation from the power spectrum
+    acf = fft([complex(abs(value) ** 2) for value in spectrum], inverse=True)
+    variance = acf[0].real
+    if variance <= 0:
+        return None
+
+    # Refine the period to the autocorrelation maximum around the spectral estimate
+    estimate = size / best_index
+    low, high = max(int(estimate * 0.8), 1), min(int(math.ceil(estimate * 1.2)), n - 1)
+    lag = max(range(low, high + 1), key=lambda l: acf[l].real / (n - l))
+    # Unbiased autocorrelation at the lag
+    autocorrelation = (acf[lag].real / (n - lag)) / (variance / n)
+    # Amplitude at the refined period; the FFT bin leaks when the period does not divide the padded length
+    amplitude = 2 * abs(sum(value * cmath.exp(-2j * math.pi * t / lag) for t, value in enumerate(residuals))) / n
+    return float(lag), amplitude, autocorrelation
+
+
+def analyze_run(job_key: str, result: WarpResult, drift_percent: float, min_amplitude_percent: float,
+                min_autocorrelation: float) -> Optional[DriftResult]:
+    """Drift and periodicity of one run, or None if the run is too short"""
+    series = per_second_series(result)
+    n = len(series)
+    if n < MIN_DRIFT_SECONDS:
+        return None
+    mean = sum(series) / n
+    if mean <= 0:
+        return None
+
+    slope, intercept = theil_sen_slope(series)
+    edge = max(int(n * EDGE_FRACTION), 1)
+    early, late = _median(series[:edge]), _median(series[-edge:])
+    early_late = (late - early) / early * 100 if early > 0 else 0.0
+    slope_percent = slope * 3600 / mean * 100
+    # Drift needs both views to agree: a large early-vs-late change in the direction of the slope
+    drifting = abs(early_late) > drift_percent and early_late * slope > 0
+
+    drift = DriftResult(
+        job_key=job_key,
+        timestamp=result.timestamp,
+        operation=result.operation,
+        environment=result.environment,
+        seconds=n,
+        mean_obj=mean,
+        slope_percent_per_hour=slope_percent,
+        early_late_percent=early_late,
+        drifting=drifting,
+    )
+
+    residuals = [value - (slope * i + intercept) for i, value in enumerate(series)]
+    periodic = dominant_period(residuals)
+    if periodic:
+        period, amplitude, autocorrelation = periodic
+        drift.period_s = period
+        drift.amplitude_percent = amplitude / mean * 100
+        drift.autocorrelation = autocorrelation
+        drift.periodic = drift.amplitude_percent >= min_amplitude_percent and autocorrelation >= min_autocorrelation
+    return drift
+
+
+def analyze_drift(parser: WarpResultsParser) -> List[DriftResult]:
+    """Drift and periodicity of every sufficiently long run (containers merged), per operation for MIXED runs"""
+    config = parser.config
+    results = []
+    for job_key, runs in sorted(parser.group_results_by_job().items()):
+        for result in sorted(runs, key=lambda r: r.timestamp):
+            parts = [result.op_breakdown[op] for op in sorted(result.op_breakdown)] if result.op_breakdown else [result]
+            for part in parts:
+                drift = analyze_run(job_key, part, config.drift_threshold_percent,
+                                    config.min_periodic_amplitude_percent, config.min_periodic_autocorrelation)
+                if drift:
+                    results.append(drift)
+    return results
+
+
+def drift_summary(parser: WarpResultsParser) -> List[Dict[str, Any]]:
+    """Machine-readable drift and periodicity of every analyzed run"""
+    return [asdict(drift) for drift in analyze_drift(parser)]
+
+
+def write_drift_section(f, parser: WarpResultsParser):
+    """Write the drift and periodicity section of the comparison report"""
+    results = analyze_drift(parser)
+    if not results:
+        return
+
+    f.write("## Drift and Periodicity\n\n")
+    f.write(f"Per-second throughput of the steady part of runs of at least {MIN_DRIFT_SECONDS}s, all containers "
+            f"summed. Slope is a robust (Theil-Sen) trend; early → late compares the medians of the first and last "
+            f"{EDGE_FRACTION:.0%} of the run. Periods come from the FFT of the detrended series and are confirmed "
+            f"by its autocorrelation. MIXED runs are analyzed per operation.\n\n")
+    f.write("| Job Type | Run | Operation | Duration (s) | Mean (obj/s) | Slope (%/h) | Early → Late | Period (s) | "
+            "Amplitude | Autocorrelation | Findings |\n")
+    f.write("|----------|-----|-----------|--------------|--------------|-------------|--------------|------------|"
+            "-----------|-----------------|----------|\n")
+    for drift in results:
+        findings = []
+        if drift.drifting:
+            findings.append("📉 degrading" if drift.early_late_percent < 0 else "📈 improving")
+        if drift.periodic:
+            findings.append(f"🔁 periodic ({drift.period_s:.0f}s)")
+        period = f"{drift.period_s:.0f}" if drift.period_s else "-"
+        amplitude = f"{drift.amplitude_percent:.1f}%" if drift.amplitude_percent is not None else "-"
+        acf = f"{drift.autocorrelation:.2f}" if drift.autocorrelation is not None else "-"
+        f.write(f"| {drift.job_key} | {drift.timestamp} | {drift.operation} | {drift.seconds} | {drift.mean_obj:.2f} | "
+                f"{drift.slope_percent_per_hour:+.1f} | {drift.early_late_percent:+.1f}% | {period} | "
+                f"{amplitude} | {acf} | {', '.join(findings) or '-'} |\n")
+    f.write("\n")
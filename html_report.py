@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Warp HTML Report
+
+This module renders a single self-contained HTML file with PROD vs TEST overlay
+charts of throughput, latency percentiles and errors over time for every
+container and operation. Series are downsampled with Largest-Triangle-Three-Buckets
+(LTTB) for the initial view; the full-resolution data is embedded gzip-compressed
+and decoded in the browser only when a chart is zoomed.
+"""
+
+import base64
+import gzip
+import html
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, parse_warp_time
+
+
+# Points per series in the initial (overview) rendering
+OVERVIEW_POINTS = 400
+LATENCY_METRICS = ('avg', 'p50', 'p90', 'p99')
+
+
+def lttb(points: List[Tuple[float, float]], threshold: int) -> List[Tuple[float, float]]:
+    """Downsample a series with Largest-Triangle-Three-Buckets, keeping its visual shape"""
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        # Pick the point of the current bucket forming the largest triangle
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[previous]
+        best_area = -1.0
+        best_index = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best_index = j
+
+        sampled.append(points[best_index])
+        previous = best_index
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def _round_points(points: List[Tuple[float, float]]) -> List[List[float]]:
+    return [[round(x, 1), round(y, 3)] for x, y in points]
+
+
+def result_series(result: WarpResult) -> Dict[str, Any]:
+    """Full-resolution time series of one result, on seconds elapsed since the start of the run"""
+    segments = result.throughput_per_second or []
+    windows = result.latency_windows or []
+
+    starts = [parse_warp_time(s.get('start', '')) for s in segments]
+    starts += [parse_warp_time(w.get('start', '')) for w in windows]
+    starts = [s for s in starts if s]
+    origin = min(starts) if starts else None
+
+    def elapsed(value: str) -> Optional[float]:
+        moment = parse_warp_time(value)
+        return (moment - origin).total_seconds() if moment and origin else None
+
+    throughput = []
+    errors = []
+    for segment in segments:
+        x = elapsed(segment.get('start', ''))
+        if x is not None:
+            throughput.append((x, segment.get('mib_per_sec', 0)))
+            errors.append((x, segment.get('errors', 0)))
+
+    # Combine the windows of all clients that start at the same time, weighted by request count
+    by_start: Dict[float, Dict[str, float]] = {}
+    for window in windows:
+        x = elapsed(window.get('start', ''))
+        if x is None:
+            continue
+        weight = window.get('requests', 0) or 1
+        bucket = by_start.setdefault(x, {'weight': 0.0, **{m: 0.0 for m in LATENCY_METRICS}})
+        bucket['weight'] += weight
+        for metric in LATENCY_METRICS:
+            bucket[metric] += window.get(f"{metric}_ms", 0) * weight
+    latency = {metric: [(x, by_start[x][metric] / by_start[x]['weight']) for x in sorted(by_start)]
+               for metric in LATENCY_METRICS}
+
+    return {
+        'throughput': sorted(throughput),
+        'errors': sorted(errors),
+        'latency': latency,
+    }
+
+
+def collect_panels(parser: WarpResultsParser) -> List[Dict[str, Any]]:
+    """One panel per job parameter combination and operation, with a series per run and container"""
+    panels: Dict[str, Dict[str, Any]] = {}
+    for result in sorted(parser.results, key=lambda r: (r.environment, r.timestamp, r.container_id)):
+        params = result.test_params or {}
+        combo = f"obj:{params.get('obj_size', 'unknown')}, concurrent:{params.get('concurrency', 'unknown')}"
+        # MIXED runs are charted per operation
+        parts = result.op_breakdown.items() if result.op_breakdown else [(result.operation, result)]
+        for op, op_result in parts:
+            title = f"{result.operation} ({combo})" + (f" - {op}" if op != result.operation else "")
+            panel = panels.setdefault(title, {'title': title, 'series': []})
+            panel['series'].append({
+                'label': f"{result.environment} {result.timestamp} {result.container_id}",
+                'env': result.environment,
+                'data': result_series(op_result),
+            })
+    return [panels[title] for title in sorted(panels)]
+
+
+def _downsample(data: Dict[str, Any], threshold: int) -> Dict[str, Any]:
+    return {
+        'throughput': _round_points(lttb(data['throughput'], threshold)),
+        'errors': _round_points(lttb(data['errors'], threshold)),
+        'latency': {m: _round_points(lttb(points, threshold)) for m, points in data['latency'].items()},
+    }
+
+
+def _full(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'throughput': _round_points(data['throughput']),
+        'errors': _round_points(data['errors']),
+        'latency': {m: _round_points(points) for m, points in data['latency'].items()},
+    }
+
+
+def _compress(payload: Any) -> str:
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    # A fixed gzip mtime keeps the embedded data identical across runs over the same results
+    return base64.b64encode(gzip.compress(raw, compresslevel=9, mtime=0)).decode('ascii')
+
+
+def _comparison_rows(parser: WarpResultsParser) -> str:
+    rows = []
+    for comp in parser.compare_prod_vs_test():
+        regression = comp.has_regression
+        status = "REGRESSION" if regression else "PASS"
+        rows.append(
+            f"<tr class=\"{'bad' if regression else 'good'}\"><td>{html.escape(comp.operation)}</td>"
+            f"<td>{comp.prod_stats['throughput_mib']['mean']:.2f}</td>"
+            f"<td>{comp.test_stats['throughput_mib']['mean']:.2f}</td>"
+            f"<td>{comp.throughput_diff_percent:+.1f}%</td>"
+            f"<td>{comp.latency_diff_percent:+.1f}%</td>"
+            f"<td>{comp.p99_diff_percent:+.1f}%</td>"
+            f"<td>{status}</td><td>{comp.significance_level}</td></tr>"
+        )
+    return "\n".join(rows)
+
+
+def generate_html_report(parser: WarpResultsParser, output_file: str = "warp_comparison_report.html",
+                         overview_points: int = OVERVIEW_POINTS):
+    """Write the self-contained HTML report"""
+    if not parser.results:
+        print("No results to report")
+        return
+
+    panels = collect_panels(parser)
+    overview = []
+    full = []
+    for panel in panels:
+        overview.append({'title': panel['title'], 'series': [
+            {'label': s['label'], 'env': s['env'], 'data': _downsample(s['data'], overview_points)}
+            for s in panel['series']]})
+        full.append(_compress([_full(s['data']) for s in panel['series']]))
+
+    comparison_rows = _comparison_rows(parser)
+    comparison_table = (
+        "<table><tr><th>Operation</th><th>PROD MiB/s</th><th>TEST MiB/s</th><th>Throughput</th>"
+        "<th>Latency</th><th>P99 Latency</th><th>Status</th><th>Significance</th></tr>" + comparison_rows + "</table>"
+        if comparison_rows else "<p>No PROD vs TEST comparisons available (missing either PROD or TEST data)</p>"
+    )
+
+    document = (HTML_TEMPLATE
+                .replace('__GENERATED__', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                .replace('__COUNT__', str(len(parser.results)))
+                .replace('__COMPARISONS__', comparison_table)
+                .replace('__OVERVIEW__', json.dumps(overview, separators=(',', ':')))
+                .replace('__FULL__', json.dumps(full)))
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(document)
+
+    print(f"Report generated: {output_file}")
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Warp Benchmark Results Comparison Report</title>
+<style>
+body { font-family: -apple-system, Segoe UI, Helvetica, Arial, sans-serif; margin: 24px; color: #222; }
+table { border-collapse: collapse; margin-bottom: 24px; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+tr.bad td { background: #fdecea; }
+tr.good td { background: #edf7ed; }
+.panel { border: 1px solid #ddd; border-radius: 6px; padding: 12px; margin-bottom: 24px; }
+.panel h3 { margin: 0 0 8px 0; }
+.chart { margin: 6px 0 14px 0; }
+.chart-title { font-size: 13px; font-weight: 600; }
+.legend { font-size: 12px; margin: 4px 0; }
+.legend span { display: inline-block; margin-right: 12px; }
+.legend i { display: inline-block; width: 14px; height: 3px; vertical-align: middle; margin-right: 4px; }
+.hint { color: #777; font-size: 12px; }
+svg { background: #fafafa; cursor: crosshair; user-select: none; }
+</style>
+</head>
+<body>
+<h1>Warp Benchmark Results Comparison Report</h1>
+<p>Generated: __GENERATED__<br>Total results parsed: __COUNT__</p>
+<h2>PROD vs TEST Comparison Summary</h2>
+__COMPARISONS__
+<h2>Time Series</h2>
+<p class="hint">Drag across a chart to zoom into a time range (full resolution is loaded on demand); double-click to reset.</p>
+<div id="panels"></div>
+<script>
+const OVERVIEW = __OVERVIEW__;
+const FULL = __FULL__;
+const ZOOM_POINTS = 800;
+const decoded = {};
+const PALETTE = {PROD: ['#1f77b4', '#4a90c8', '#7fb0dc', '#08519c', '#6baed6', '#2171b5'],
+                 TEST: ['#ff7f0e', '#f5a050', '#d95f02', '#fdae6b', '#e6550d', '#a63603']};
+
+function color(env, index) {
+  const colors = PALETTE[env] || ['#555', '#888', '#aaa'];
+  return colors[index % colors.length];
+}
+
+function lttb(points, threshold) {
+  if (threshold >= points.length || threshold < 3) return points;
+  const sampled = [points[0]];
+  const bucket = (points.length - 2) / (threshold - 2);
+  let previous = 0;
+  for (let i = 0; i < threshold - 2; i++) {
+    const nextStart = Math.floor((i + 1) * bucket) + 1;
+    const nextEnd = Math.min(Math.floor((i + 2) * bucket) + 1, points.length);
+    let avgX = 0, avgY = 0, n = 0;
+    for (let j = nextStart; j < nextEnd; j++) { avgX += points[j][0]; avgY += points[j][1]; n++; }
+    if (n === 0) { avgX = points[points.length - 1][0]; avgY = points[points.length - 1][1]; n = 1; } else { avgX /= n; avgY /= n; }
+    const start = Math.floor(i * bucket) + 1, end = Math.floor((i + 1) * bucket) + 1;
+    const [ax, ay] = points[previous];
+    let best = -1, bestIndex = start;
+    for (let j = start; j < end; j++) {
+      const area = Math.abs((ax - avgX) * (points[j][1] - ay) - (ax - points[j][0]) * (avgY - ay));
+      if (area > best) { best = area; bestIndex = j; }
+    }
+    sampled.push(points[bestIndex]);
+    previous = bestIndex;
+  }
+  sampled.push(points[points.length - 1]);
+  return sampled;
+}
+
+async function fullData(panelIndex) {
+  if (decoded[panelIndex]) return decoded[panelIndex];
+  const bytes = Uint8Array.from(atob(FULL[panelIndex]), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+  decoded[panelIndex] = JSON.parse(await new Response(stream).text());
+  return decoded[panelIndex];
+}
+
+function pick(data, kind, metric) {
+  return kind === 'latency' ? data.latency[metric] : data[kind];
+}
+
+function drawChart(svg, seriesList, range) {
+  const W = 960, H = 220, L = 60, R = 10, T = 10, B = 24;
+  let xmin = Infinity, xmax = -Infinity, ymax = 0;
+  for (const s of seriesList) for (const [x, y] of s.points) {
+    if (range && (x < range[0] || x > range[1])) continue;
+    xmin = Math.min(xmin, x); xmax = Math.max(xmax, x); ymax = Math.max(ymax, y);
+  }
+  if (range) { xmin = range[0]; xmax = range[1]; }
+  if (!isFinite(xmin)) { xmin = 0; xmax = 1; }
+  if (xmax === xmin) xmax = xmin + 1;
+  if (ymax === 0) ymax = 1;
+  const sx = x => L + (x - xmin) / (xmax - xmin) * (W - L - R);
+  const sy = y => H - B - y / ymax * (H - T - B);
+  let out = '';
+  for (let i = 0; i <= 4; i++) {
+    const y = ymax * i / 4;
+    out += `<line x1="${L}" x2="${W - R}" y1="${sy(y)}" y2="${sy(y)}" stroke="#e3e3e3"/>` +
+           `<text x="${L - 4}" y="${sy(y) + 4}" font-size="10" text-anchor="end">${y.toPrecision(3)}</text>`;
+    const x = xmin + (xmax - xmin) * i / 4;
+    out += `<text x="${sx(x)}" y="${H - 6}" font-size="10" text-anchor="middle">${x.toFixed(0)}s</text>`;
+  }
+  for (const s of seriesList) {
+    const pts = s.points.filter(([x]) => x >= xmin && x <= xmax);
+    if (!pts.length) continue;
+    const d = pts.map(([x, y], i) => (i ? 'L' : 'M') + sx(x).toFixed(1) + ' ' + sy(y).toFixed(1)).join('');
+    out += `<path d="${d}" fill="none" stroke="${s.color}" stroke-width="1.2"><title>${s.label}</title></path>`;
+  }
+  svg.innerHTML = out;
+  svg.dataset.xmin = xmin; svg.dataset.xmax = xmax;
+}
+
+function makeChart(container, panelIndex, kind, title) {
+  const panel = OVERVIEW[panelIndex];
+  const wrap = document.createElement('div');
+  wrap.className = 'chart';
+  const head = document.createElement('div');
+  head.className = 'chart-title';
+  head.textContent = title + ' ';
+  let metric = 'p99';
+  if (kind === 'latency') {
+    const select = document.createElement('select');
+    for (const m of ['avg', 'p50', 'p90', 'p99']) {
+      const option = document.createElement('option');
+      option.value = m; option.textContent = m; option.selected = m === metric;
+      select.appendChild(option);
+    }
+    select.onchange = () => { metric = select.value; render(state.range); };
+    head.appendChild(select);
+  }
+  wrap.appendChild(head);
+  const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+  svg.setAttribute('viewBox', '0 0 960 220');
+  svg.setAttribute('width', '960');
+  svg.setAttribute('height', '220');
+  wrap.appendChild(svg);
+  container.appendChild(wrap);
+
+  const state = {range: null};
+  async function render(range) {
+    state.range = range;
+    let sources = panel.series.map(s => s.data);
+    if (range) sources = await fullData(panelIndex);
+    const envIndex = {};
+    const seriesList = panel.series.map((s, i) => {
+      envIndex[s.env] = (envIndex[s.env] || 0) + 1;
+      let points = pick(sources[i], kind, metric);
+      if (range) points = lttb(points.filter(([x]) => x >= range[0] && x <= range[1]), ZOOM_POINTS);
+      return {label: s.label, color: color(s.env, envIndex[s.env] - 1), points};
+    });
+    drawChart(svg, seriesList, range);
+  }
+
+  let dragStart = null;
+  const toX = ev => {
+    const box = svg.getBoundingClientRect();
+    const px = (ev.clientX - box.left) / box.width * 960;
+    const xmin = +svg.dataset.xmin, xmax = +svg.dataset.xmax;
+    return xmin + (px - 60) / (960 - 70) * (xmax - xmin);
+  };
+  svg.addEventListener('mousedown', ev => { dragStart = toX(ev); });
+  svg.addEventListener('mouseup', ev => {
+    if (dragStart === null) return;
+    const end = toX(ev);
+    if (Math.abs(end - dragStart) > 0.5) render([Math.min(dragStart, end), Math.max(dragStart, end)]);
+    dragStart = null;
+  });
+  svg.addEventListener('dblclick', () => render(null));
+  render(null);
+}
+
+const root = document.getElementById('panels');
+OVERVIEW.forEach((panel, panelIndex) => {
+  const div = document.createElement('div');
+  div.className = 'panel';
+  const h = document.createElement('h3');
+  h.textContent = panel.title;
+  div.appendChild(h);
+  const legend = document.createElement('div');
+  legend.className = 'legend';
+  const envIndex = {};
+  for (const s of panel.series) {
+    envIndex[s.env] = (envIndex[s.env] || 0) + 1;
+    const item = document.createElement('span');
+    item.innerHTML = `<i style="background:${color(s.env, envIndex[s.env] - 1)}"></i>`;
+    item.appendChild(document.createTextNode(s.label));
+    legend.appendChild(item);
+  }
+  div.appendChild(legend);
+  makeChart(div, panelIndex, 'throughput', 'Throughput (MiB/s)');
+  makeChart(div, panelIndex, 'latency', 'Latency (ms)');
+  makeChart(div, panelIndex, 'errors', 'Errors per second');
+  root.appendChild(div);
+});
+</script>
+</body>
+</html>
+"""
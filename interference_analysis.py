@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Cross-Operation Interference in Mixed Runs
+
+In a `warp mixed` run GET, PUT, DELETE and STAT share the clients and the
+storage backend, so a burst of one operation can show up as tail latency of
+another. This module aligns the operations of each mixed run on common
+request-window slots (all clients and containers merged by wall clock): the
+per-second throughput of every operation is averaged over each slot, and the
+p99 latency of every operation is the request-weighted p99 of the slot. Both
+series are detrended, and the lagged cross-correlation of one operation's
+throughput with another operation's p99 (load leading latency by 0 to
+`max_lag_windows` slots) tells which operation's load best predicts the
+latency degradation of each other operation.
+
+Correlations of the runs of a job are averaged in Fisher z space, separately
+for PROD and TEST, so a TEST build whose GET tail reacts more strongly to PUT
+load is flagged even when the mean latencies agree.
+"""
+
+import math
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, parse_warp_time
+
+
+MIN_ALIGNED_WINDOWS = 12  # shorter mixed runs are not analyzed
+SIGNIFICANCE_Z = 1.96  # |r| above SIGNIFICANCE_Z / sqrt(n) is unlikely for uncorrelated series
+
+
+@dataclass
+class PairCorrelation:
+    """Correlation of one operation's throughput with another operation's p99 latency"""
+    source: str  # operation whose load leads
+    target: str  # operation whose latency follows
+    lag_windows: int
+    correlation: float
+    elasticity: float  # % change of the target p99 per 1% change of the source throughput
+    windows: int
+    significant: bool
+
+
+@dataclass
+class JobInterference:
+    """Interference between the operations of all mixed runs of one job type"""
+    job_key: str
+    environment: str
+    runs: int
+    window_s: int
+    # (source, target) -> correlation at the lag where it is strongest
+    pairs: Dict[Tuple[str, str], PairCorrelation] = field(default_factory=dict)
+
+    def best_predictor(self, target: str) -> Optional[PairCorrelation]:
+        """The significant pair whose source load best predicts the target's p99, if any"""
+        candidates = [pair for (_, pair_target), pair in self.pairs.items()
+                      if pair_target == target and pair.significant and pair.correlation > 0]
+        return max(candidates, key=lambda pair: pair.correlation) if candidates else None
+
+    def targets(self) -> List[str]:
+        return sorted({target for _, target in self.pairs})
+
+
+def aligned_series(result: WarpResult) -> Tuple[int, Dict[str, List[float]], Dict[str, List[float]]]:
+    """(slot width, throughput per op, p99 per op) of a mixed run on the slots every operation covers"""
+    # Imported here to avoid a circular import
+    from slo_analysis import merged_segments, merged_windows
+
+    parts = result.op_breakdown or {}
+    widths = []
+    for part in parts.values():
+        for window in (part.latency_windows or [])[:50]:
+            window_start = parse_warp_time(window.get('start', ''))
+            window_end = parse_warp_time(window.get('end', ''))
+            if window_start and window_end and window_end > window_start:
+                widths.append(max(int((window_end - window_start).total_seconds()), 1))
+    if not widths:
+        return 0, {}, {}
+    width = sorted(widths)[len(widths) // 2]
+
+    throughput: Dict[str, Dict[int, float]] = {}
+    latency: Dict[str, Dict[int, float]] = {}
+    for op, part in parts.items():
+        # The steady window of the whole run applies to every operation
+        part_view = _with_steady(part, result)
+        slots: Dict[int, List[float]] = {}
+        for segment in merged_segments(part_view):
+            second = int(parse_warp_time(segment['start']).timestamp())
+            slots.setdefault(second // width * width, []).append(segment['obj_per_sec'])
+        # Partial slots at the edges of the run would look like load drops
+        throughput[op] = {slot: sum(values) / len(values) for slot, values in slots.items() if len(values) == width}
+        latency[op] = {int(parse_warp_time(window['start']).timestamp()) // width * width: window['p99']
+                       for window in merged_windows(part_view) if window.get('p99') is not None}
+
+    if not throughput or not latency:
+        return width, {}, {}
+    common = set.intersection(*(set(series) for series in list(throughput.values()) + list(latency.values())))
+    slots_sorted = sorted(common)
+    return (width,
+            {op: [series[slot] for slot in slots_sorted] for op, series in throughput.items()},
+            {op: [series[slot] for slot in slots_sorted] for op, series in latency.items()})
+
+
+def _with_steady(part: WarpResult, result: WarpResult) -> WarpResult:
+    """The part with the steady window of the run it belongs to"""
+    if part.steady_state or not result.steady_state:
+        return part
+    return replace(part, steady_state=result.steady_state, steady_start=result.steady_start,
+                   steady_end=result.steady_end)
+
+
+def detrend(series: List[float]) -> List[float]:
+    """Residuals of a least-squares line, so shared slow drift does not read as interference"""
+    n = len(series)
+    mean_x = (n - 1) / 2
+    mean_y = sum(series) / n
+    sxx = sum((i - mean_x) ** 2 for i in range(n))
+    slope = sum((i - mean_x) * (value - mean_y) for i, value in enumerate(series)) / sxx if sxx else 0.0
+    return [value - mean_y - slope * (i - mean_x) for i, value in enumerate(series)]
+
+
+def lagged_correlation(source: List[float], target: List[float], lag: int) -> Optional[float]:
+    """Pearson correlation of source[t] with target[t + lag]"""
+    x = source[:len(source) - lag] if lag else source
+    y = target[lag:]
+    n = len(x)
+    if n < 3:
+        return None
+    mean_x, mean_y = sum(x) / n, sum(y) / n
+    sxy = sum((a - mean_x) * (b - mean_y) for a, b in zip(x, y))
+    sxx = sum((a - mean_x) ** 2 for a in x)
+    syy = sum((b - mean_y) ** 2 for b in y)
+    if sxx <= 0 or syy <= 0:
+        return None
+    return sxy / math.sqrt(sxx * syy)
+
+
+def _coefficient_of_variation(detrended: List[float], raw: List[float]) -> float:
+    mean = sum(raw) / len(raw)
+    if mean <= 0:
+        return 0.0
+    return math.sqrt(sum(value ** 2 for value in detrended) / len(detrended)) / mean
+
+
+def _fisher_z(r: float) -> float:
+    r = max(min(r, 0.999999), -0.999999)
+    return 0.5 * math.log((1 + r) / (1 - r))
+
+
+def analyze_job(job_key: str, results: List[WarpResult], max_lag: int) -> Optional[JobInterference]:
+    """Lagged throughput-vs-p99 correlations of all operation pairs, combined over the mixed runs of a job"""
+    # (source, target, lag) -> [(Fisher z, weight, elasticity)] per run
+    combined: Dict[Tuple[str, str, int], List[Tuple[float, int, float]]] = {}
+    widths = []
+    runs = 0
+    for result in results:
+        width, throughput, latency = aligned_series(result)
+        n = len(next(iter(throughput.values()), []))
+        if n < MIN_ALIGNED_WINDOWS:
+            continue
+        runs += 1
+        widths.append(width)
+        load = {op: detrend(series) for op, series in throughput.items()}
+        tail = {op: detrend(series) for op, series in latency.items()}
+        for source in sorted(load):
+            source_cv = _coefficient_of_variation(load[source], throughput[source])
+            for target in sorted(tail):
+                if target == source:
+                    continue
+                target_cv = _coefficient_of_variation(tail[target], latency[target])
+                for lag in range(max_lag + 1):
+                    r = lagged_correlation(load[source], tail[target], lag)
+                    if r is None or n - lag <= 3:
+                        continue
+                    elasticity = r * target_cv / source_cv if source_cv > 0 else 0.0
+                    # Fisher z has variance 1 / (n - 3), so runs are weighted by n - 3
+                    combined.setdefault((source, target, lag), []).append((_fisher_z(r), n - lag - 3, elasticity))
+    if not runs:
+        return None
+
+    job = JobInterference(job_key=job_key, environment=results[0].environment, runs=runs,
+                          window_s=sorted(widths)[len(widths) // 2])
+    for (source, target, lag), terms in combined.items():
+        weight = sum(w for _, w, _ in terms)
+        z = sum(z * w for z, w, _ in terms) / weight
+        r = math.tanh(z)
+        pair = PairCorrelation(
+            source=source,
+            target=target,
+            lag_windows=lag,
+            correlation=r,
+            elasticity=sum(e * w for _, w, e in terms) / weight,
+            windows=weight + 3 * len(terms),
+            # The combined z has standard error 1 / sqrt(sum of weights)
+            significant=abs(z) * math.sqrt(weight) > SIGNIFICANCE_Z,
+        )
+        best = job.pairs.get((source, target))
+        if best is None or pair.correlation > best.correlation:
+            job.pairs[(source, target)] = pair
+    return job
+
+
+def analyze_interference(parser: WarpResultsParser) -> List[JobInterference]:
+    """Interference analysis of every job type with mixed runs"""
+    max_lag = parser.config.interference_max_lag_windows
+    jobs = []
+    for job_key, results in sorted(parser.group_valid_results().items()):
+        mixed = [result for result in results if result.op_breakdown]
+        if mixed:
+            job = analyze_job(job_key, sorted(mixed, key=lambda r: r.timestamp), max_lag)
+            if job:
+                jobs.append(job)
+    return jobs
+
+
+def compare_interference(prod: JobInterference, test: JobInterference, min_correlation: float,
+                         correlation_increase: float) -> List[Dict[str, Any]]:
+    """Operation pairs whose interference is stronger in TEST than in PROD"""
+    rows = []
+    for key in sorted(set(prod.pairs) & set(test.pairs)):
+        prod_pair, test_pair = prod.pairs[key], test.pairs[key]
+        change = test_pair.correlation - prod_pair.correlation
+        regression = (test_pair.significant and test_pair.correlation >= min_correlation
+                      and change >= correlation_increase)
+        rows.append({
+            'source': key[0],
+            'target': key[1],
+            'prod_correlation': prod_pair.correlation,
+            'test_correlation': test_pair.correlation,
+            'prod_elasticity': prod_pair.elasticity,
+            'test_elasticity': test_pair.elasticity,
+            'change': change,
+            'regression': regression,
+        })
+    return rows
+
+
+def _pairs(jobs: List[JobInterference]) -> List[Tuple[JobInterference, JobInterference]]:
+    by_key = {job.job_key: job for job in jobs}
+    return [(by_key[job.job_key.replace('_TEST_', '_PROD_', 1)], job) for job in jobs
+            if job.environment == 'TEST' and job.job_key.replace('_TEST_', '_PROD_', 1) in by_key]
+
+
+def interference_summary(parser: WarpResultsParser) -> List[Dict[str, Any]]:
+    """Machine-readable interference of every job type with mixed runs, and its PROD vs TEST change"""
+    config = parser.config
+    jobs = analyze_interference(parser)
+    summary = []
+    for job in jobs:
+        summary.append({
+            'job': job.job_key,
+            'environment': job.environment,
+            'runs': job.runs,
+            'window_s': job.window_s,
+            'pairs': [
+                {'source': pair.source, 'target': pair.target, 'lag_s': pair.lag_windows * job.window_s,
+                 'correlation': pair.correlation, 'elasticity': pair.elasticity, 'windows': pair.windows,
+                 'significant': pair.significant}
+                for _, pair in sorted(job.pairs.items())
+            ],
+            'best_predictors': {
+                target: predictor.source for target in job.targets()
+                for predictor in [job.best_predictor(target)] if predictor
+                and predictor.correlation >= config.interference_min_correlation
+            },
+        })
+    for prod, test in _pairs(jobs):
+        summary.append({
+            'job': test.job_key,
+            'environment': 'PROD vs TEST',
+            'baseline': prod.job_key,
+            'pairs': compare_interference(prod, test, config.interference_min_correlation,
+                                          config.interference_correlation_increase),
+        })
+    return summary
+
+
+def write_interference_section(f, parser: WarpResultsParser):
+    """Write the cross-operation interference section of the comparison report"""
+    config = parser.config
+    jobs = analyze_interference(parser)
+    if not jobs:
+        return
+
+    f.write("## Cross-Operation Interference\n\n")
+    f.write(f"Mixed runs only, all clients and containers merged by wall clock. Each operation's throughput is "
+            f"correlated with every other operation's p99 per request window, both detrended, with the load "
+            f"leading by 0 to {config.interference_max_lag_windows} windows; runs are combined in Fisher z space. "
+            f"Elasticity is the % change of the p99 per 1% change of the load. A predictor is reported when the "
+            f"correlation is significant and at least {config.interference_min_correlation:.2f}.\n\n")
+    f.write("| Job Type | Runs | Latency of | Best Predictor (load of) | Lag (s) | Correlation | Elasticity | "
+            "Other Loads |\n")
+    f.write("|----------|------|------------|--------------------------|---------|-------------|------------|"
+            "-------------|\n")
+    for job in jobs:
+        for target in job.targets():
+            predictor = job.best_predictor(target)
+            others = ", ".join(f"{pair.source} {pair.correlation:+.2f}" for (source, pair_target), pair
+                               in sorted(job.pairs.items()) if pair_target == target
+                               and (not predictor or source != predictor.source))
+            if predictor and predictor.correlation >= config.interference_min_correlation:
+                f.write(f"| {job.job_key} | {job.runs} | {target} p99 | **{predictor.source}** | "
+                        f"{predictor.lag_windows * job.window_s} | {predictor.correlation:+.2f} | "
+                        f"{predictor.elasticity:+.2f} | {others or '-'} |\n")
+            else:
+                f.write(f"| {job.job_key} | {job.runs} | {target} p99 | - | - | - | - | {others or '-'} |\n")
+    f.write("\n")
+
+    pairs = _pairs(jobs)
+    if not pairs:
+        return
+    f.write("### PROD vs TEST Interference\n\n")
+    f.write(f"Interference regresses when a TEST correlation is significant, at least "
+            f"{config.interference_min_correlation:.2f}, and {config.interference_correlation_increase:.2f} or more "
+            f"above PROD.\n\n")
+    f.write("| Job Type | Load → Latency | PROD r | TEST r | Change | PROD Elasticity | TEST Elasticity | Status |\n")
+    f.write("|----------|----------------|--------|--------|--------|-----------------|-----------------|--------|\n")
+    for prod, test in pairs:
+        for row in compare_interference(prod, test, config.interference_min_correlation,
+                                        config.interference_correlation_increase):
+            status = "❌ REGRESSION" if row['regression'] else "✅ OK"
+            f.write(f"| {test.job_key.replace('_TEST_', '_', 1)} | {row['source']} → {row['target']} p99 | "
+                    f"{row['prod_correlation']:+.2f} | {row['test_correlation']:+.2f} | {row['change']:+.2f} | "
+                    f"{row['prod_elasticity']:+.2f} | {row['test_elasticity']:+.2f} | {status} |\n")
+    f.write("\n")
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Live Warp Run Monitor
+
+This script follows warp runs while they are still in progress. warp's JSON
+output is emitted repeatedly during a run; interim reports carry final=false
+and titles without "(Final)". Each report is cumulative, so the newest
+snapshot of every client is run through the same extract_metrics_from_report
+as finished results and the clients of a run are merged like collected
+containers. Snapshots are read from a directory where interim reports are
+dropped (plain, gzip or zstd JSON), from a log stream (`kubectl logs -f
+--prefix`, one stream per pod), or straight from kubectl.
+
+The view (terminal or a self-refreshing HTML page) shows throughput and
+latency so far, the last 30 seconds, errors and SLO compliance. With a
+baseline directory, each live run is compared per worker with the PROD runs
+of the same operation, object size and concurrency. --fail-after exits with
+status 1 once a run that has been going that long is clearly regressing, so
+a wrapper can abort it instead of waiting for the full duration.
+"""
+
+import argparse
+import contextlib
+import html
+import io
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, TextIO, Tuple
+
+from parse_warp_results import (WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE,
+                                detect_operation, parse_warp_time)
+from text_log_parser import ANSI_ESCAPE, KUBECTL_PREFIX, LINE_TIMESTAMP
+
+
+LIVE_TIMESTAMP = "live"
+RECENT_SECONDS = 30
+SNAPSHOT_SUFFIXES = ('.json', '.json.zst', '.json.gz')
+EXIT_OK = 0
+EXIT_ABORT = 1
+
+
+def is_final(report: Dict[str, Any]) -> bool:
+    """Whether a warp report is the final one of its run"""
+    if 'final' in report:
+        return bool(report['final'])
+    return "(Final)" in str(report.get('total', {}).get('Title', ''))
+
+
+class JsonStreamAssembler:
+    """Reassembles JSON documents from log lines, tracking brace depth outside strings"""
+
+    def __init__(self):
+        self.buffer: List[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        """Consume one line; return the document it completes, if any"""
+        if not self.buffer:
+            start = line.find('{')
+            if start < 0:
+                return None
+            line = line[start:]
+        self.buffer.append(line)
+        for char in line:
+            if self.escaped:
+                self.escaped = False
+            elif char == '\\' and self.in_string:
+                self.escaped = True
+            elif char == '"':
+                self.in_string = not self.in_string
+            elif not self.in_string:
+                if char == '{':
+                    self.depth += 1
+                elif char == '}':
+                    self.depth -= 1
+        if self.depth > 0:
+            return None
+
+        text = "\n".join(self.buffer)
+        self.buffer, self.depth, self.in_string, self.escaped = [], 0, False, False
+        try:
+            document = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return document if isinstance(document, dict) else None
+
+
+class DirectorySource:
+    """Interim reports dropped into a directory; every file is one client's latest snapshot"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.seen: Dict[str, Tuple[float, int]] = {}
+
+    def poll(self) -> List[Tuple[str, Dict[str, Any]]]:
+        snapshots = []
+        for path in sorted(self.directory.rglob('*')):
+            if not path.is_file() or not path.name.lower().endswith(SNAPSHOT_SUFFIXES):
+                continue
+            stat = path.stat()
+            signature = (stat.st_mtime, stat.st_size)
+            if self.seen.get(str(path)) == signature:
+                continue
+            with open(path, 'rb') as f:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    report = WarpResultsParser.parse_report_bytes(f.read(), str(path))
+            # A file still being written fails to parse; it is retried on the next poll
+            if report and 'by_op_type' in report:
+                self.seen[str(path)] = signature
+                snapshots.append((str(path.relative_to(self.directory)), report))
+        return snapshots
+
+
+class StreamSource:
+    """JSON reports in a log stream (e.g. kubectl logs -f --prefix), read on a background thread"""
+
+    def __init__(self, stream: TextIO, name: str = "stream"):
+        self.name = name
+        self.queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+        self.assemblers: Dict[str, JsonStreamAssembler] = {}
+        self.thread = threading.Thread(target=self._read, args=(stream,), daemon=True)
+        self.thread.start()
+
+    def _read(self, stream: TextIO):
+        for raw_line in stream:
+            line = ANSI_ESCAPE.sub('', raw_line.rstrip('\r\n'))
+            source = self.name
+            match = KUBECTL_PREFIX.match(line)
+            if match:
+                # kubectl prefixes look like pod/warp-0/warp; the pod name identifies the client
+                parts = match.group('source').split('/')
+                source = parts[1] if len(parts) >= 2 and parts[0] == 'pod' else match.group('source')
+                line = line[match.end():]
+            match = LINE_TIMESTAMP.match(line)
+            if match:
+                line = line[match.end():]
+            report = self.assemblers.setdefault(source, JsonStreamAssembler()).feed(line)
+            if report and 'by_op_type' in report:
+                self.queue.put((source, report))
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the stream has ended and every report in it was polled"""
+        return not self.thread.is_alive() and self.queue.empty()
+
+    def poll(self) -> List[Tuple[str, Dict[str, Any]]]:
+        snapshots = []
+        while True:
+            try:
+                snapshots.append(self.queue.get_nowait())
+            except queue.Empty:
+                return snapshots
+
+
+@dataclass
+class LiveStatus:
+    """What a live run looks like so far"""
+    job_key: str
+    result: WarpResult
+    clients: int
+    final_clients: int
+    elapsed_s: float
+    recent_obj: Optional[float]
+    recent_mib: Optional[float]
+    last_p99_ms: Optional[float]
+    baseline_runs: int = 0
+    throughput_diff_percent: Optional[float] = None  # per worker, relative to the PROD baseline
+    latency_diff_percent: Optional[float] = None
+    slo_compliance: Optional[Dict[str, float]] = None
+    regression: bool = False
+
+
+class LiveMonitor:
+    """Keeps the newest snapshot of every client and turns them into merged live results"""
+
+    def __init__(self, config: ComparisonConfig, trim_steady_state: bool = True,
+                 baseline: Optional[WarpResultsParser] = None):
+        self.parser = WarpResultsParser(config=config, trim_steady_state=trim_steady_state)
+        self.baseline = baseline
+        self.clients: Dict[str, WarpResult] = {}
+        self.final: Dict[str, bool] = {}
+        self.baseline_stats = self._baseline_stats() if baseline else {}
+
+    def update(self, source: str, report: Dict[str, Any]) -> bool:
+        """Take a new snapshot of a client; return whether it yielded metrics"""
+        operation = detect_operation(report.get('commandline', ''))
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = self.parser.extract_metrics_from_report(report, operation.lower(), source, LIVE_TIMESTAMP)
+        if not result:
+            return False
+        self.clients[source] = result
+        self.final[source] = is_final(report)
+        return True
+
+    @property
+    def all_final(self) -> bool:
+        return bool(self.final) and all(self.final.values())
+
+    def _baseline_stats(self) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """PROD statistics per (operation, obj size, concurrency) parameter key"""
+        stats = {}
+        for job_key, results in self.baseline.group_valid_results().items():
+            operation, environment, obj_size, concurrency = (job_key.split('_') + ['', '', '', ''])[:4]
+            if environment != "PROD" or not results:
+                continue
+            per_worker = [r.avg_throughput_obj / r.concurrency for r in results if r.concurrency]
+            stats[(operation, obj_size, concurrency)] = {
+                'runs': len(results),
+                'obj_per_worker': sum(per_worker) / len(per_worker) if per_worker else None,
+                'latency_avg_ms': sum(r.avg_latency_ms for r in results) / len(results),
+            }
+        return stats
+
+    def statuses(self, fail_after: Optional[float] = None) -> List[LiveStatus]:
+        """Merged status of every live run"""
+        # Imported here to avoid a circular import
+        from slo_analysis import load_slos, evaluate_job
+
+        self.parser.results = list(self.clients.values())
+        grouped = self.parser.group_results_by_job()
+        sources_by_key: Dict[str, List[str]] = {}
+        for source, result in self.clients.items():
+            sources_by_key.setdefault(self.parser._create_param_key(result), []).append(source)
+
+        statuses = []
+        for job_key, results in sorted(grouped.items()):
+            result = results[0]
+            segments = result.throughput_per_second or []
+            starts = [parse_warp_time(s.get('start', '')) for s in segments]
+            starts = [s for s in starts if s]
+            elapsed = (max(starts) - min(starts)).total_seconds() + 1 if starts else 0.0
+            recent = segments[-RECENT_SECONDS:]
+            windows = sorted(result.latency_windows or [], key=lambda w: w.get('start', ''))
+            last_start = windows[-1].get('start') if windows else None
+            last = [w for w in windows if w.get('start') == last_start]
+            sources = sources_by_key.get(job_key, [])
+
+            status = LiveStatus(
+                job_key=job_key,
+                result=result,
+                clients=len(sources),
+                final_clients=sum(1 for s in sources if self.final.get(s)),
+                elapsed_s=elapsed,
+                recent_obj=sum(s.get('obj_per_sec', 0) for s in recent) / len(recent) if recent else None,
+                recent_mib=sum(s.get('mib_per_sec', 0) for s in recent) / len(recent) if recent else None,
+                last_p99_ms=max(w.get('p99_ms', 0) for w in last) if last else None,
+            )
+
+            operation, _, obj_size, concurrency = (job_key.split('_') + ['', '', '', ''])[:4]
+            baseline = self.baseline_stats.get((operation, obj_size, concurrency))
+            config = self.parser.config
+            if baseline and result.concurrency:
+                status.baseline_runs = baseline['runs']
+                if baseline['obj_per_worker']:
+                    status.throughput_diff_percent = ((result.avg_throughput_obj / result.concurrency)
+                                                      / baseline['obj_per_worker'] - 1) * 100
+                if baseline['latency_avg_ms'] > 0:
+                    status.latency_diff_percent = (result.avg_latency_ms / baseline['latency_avg_ms'] - 1) * 100
+                status.regression = ((status.throughput_diff_percent or 0) < -config.throughput_degradation_percent
+                                     or (status.latency_diff_percent or 0) > config.latency_increase_percent)
+
+            compliance = {}
+            for slo in load_slos(self.parser):
+                for evaluation in evaluate_job(slo, job_key, results):
+                    if evaluation.compliance_percent is not None:
+                        compliance[evaluation.slo_name] = evaluation.compliance_percent
+                        status.regression = status.regression or not evaluation.met
+            status.slo_compliance = compliance
+            statuses.append(status)
+        return statuses
+
+
+def _fmt(value: Optional[float], spec: str = ".2f", suffix: str = "") -> str:
+    return f"{value:{spec}}{suffix}" if value is not None else "-"
+
+
+def render_terminal(statuses: List[LiveStatus]) -> str:
+    """Plain-text table of the live runs"""
+    lines = [f"Warp live monitor - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    if not statuses:
+        lines.append("Waiting for interim reports...")
+        return "\n".join(lines) + "\n"
+
+    lines.append(f"{'Job':<36} {'Clients':>7} {'Elapsed':>8} {'obj/s':>10} {'obj/s 30s':>10} {'MiB/s':>9} "
+                 f"{'Avg ms':>8} {'P99 ms':>8} {'Errors':>6} {'vs PROD':>8}  Status")
+    for s in statuses:
+        r = s.result
+        verdict = "REGRESSING" if s.regression else "ok"
+        lines.append(f"{s.job_key:<36} {s.final_clients:>3}/{s.clients:<3} {s.elapsed_s:>7.0f}s "
+                     f"{r.avg_throughput_obj:>10.1f} {_fmt(s.recent_obj, '.1f'):>10} {r.avg_throughput_mib:>9.1f} "
+                     f"{r.avg_latency_ms:>8.1f} {r.p99_latency_ms:>8.1f} {r.error_count:>6} "
+                     f"{_fmt(s.throughput_diff_percent, '+.1f', '%'):>8}  {verdict}")
+        for name, compliance in (s.slo_compliance or {}).items():
+            lines.append(f"{'':<36} SLO {name}: {compliance:.2f}% compliant so far")
+    return "\n".join(lines) + "\n"
+
+
+def _sparkline(result: WarpResult, width: int = 320, height: int = 48) -> str:
+    """Inline SVG of the per-second throughput so far"""
+    # Imported here so the terminal view does not load the HTML report module
+    from html_report import lttb
+
+    values = [s.get('obj_per_sec', 0) for s in result.throughput_per_second or []]
+    if len(values) < 2:
+        return ""
+    points = lttb(list(enumerate(values)), width)
+    top = max(v for _, v in points) or 1.0
+    path = " ".join(f"{x / (len(values) - 1) * width:.1f},{height - v / top * height:.1f}" for x, v in points)
+    return (f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline fill="none" stroke="#2b6cb0" stroke-width="1.5" points="{path}"/></svg>')
+
+
+def render_html(statuses: List[LiveStatus], refresh: float) -> str:
+    """Self-refreshing HTML page of the live runs"""
+    rows = []
+    for s in statuses:
+        r = s.result
+        slos = "<br>".join(f"{html.escape(name)}: {c:.2f}%" for name, c in (s.slo_compliance or {}).items())
+        state = '<span class="bad">REGRESSING</span>' if s.regression else '<span class="ok">ok</span>'
+        rows.append(
+            f"<tr><td>{html.escape(s.job_key)}</td><td>{s.final_clients}/{s.clients}</td><td>{s.elapsed_s:.0f}s</td>"
+            f"<td>{r.avg_throughput_obj:.1f}</td><td>{_fmt(s.recent_obj, '.1f')}</td><td>{r.avg_throughput_mib:.1f}</td>"
+            f"<td>{r.avg_latency_ms:.1f}</td><td>{r.p99_latency_ms:.1f}</td><td>{_fmt(s.last_p99_ms, '.1f')}</td>"
+            f"<td>{r.error_count}</td><td>{_fmt(s.throughput_diff_percent, '+.1f', '%')}</td>"
+            f"<td>{_fmt(s.latency_diff_percent, '+.1f', '%')}</td><td>{slos or '-'}</td><td>{state}</td>"
+            f"<td>{_sparkline(r)}</td></tr>")
+    body = "\n".join(rows) or '<tr><td colspan="15">Waiting for interim reports...</td></tr>'
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="{max(int(refresh), 1)}">
+<title>Warp live monitor</title>
+<style>body{{font-family:sans-serif;margin:1.5em}}table{{border-collapse:collapse}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:right}}td:first-child{{text-align:left}}
+.bad{{color:#c53030;font-weight:bold}}.ok{{color:#2f855a}}</style></head>
+<body><h1>Warp live monitor</h1><p>Updated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+<table><tr><th>Job</th><th>Final/Clients</th><th>Elapsed</th><th>obj/s</th><th>obj/s (30s)</th><th>MiB/s</th>
+<th>Avg ms</th><th>P99 ms</th><th>Last P99 ms</th><th>Errors</th><th>Throughput vs PROD</th>
+<th>Latency vs PROD</th><th>SLO compliance</th><th>Status</th><th>Throughput</th></tr>
+{body}
+</table></body></html>
+"""
+
+
+def start_kubectl(selector: str, namespace: str) -> subprocess.Popen:
+    """Follow the logs of the warp pods matching a label selector"""
+    return subprocess.Popen(["kubectl", "logs", "-f", "--prefix", "--timestamps", "--max-log-requests", "64",
+                             "-n", namespace, "-l", selector], stdout=subprocess.PIPE, text=True)
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description='Follow warp runs in progress from interim JSON reports')
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--watch-dir', help='Directory where interim reports (.json, .json.zst, .json.gz) are dropped')
+    source.add_argument('--logs', help='Log stream with JSON reports ("-" reads stdin, e.g. kubectl logs -f --prefix)')
+    source.add_argument('--kubectl-selector', help='Follow kubectl logs of the pods matching this label selector')
+    arg_parser.add_argument('--namespace', default='timesheet', help='Namespace for --kubectl-selector')
+    arg_parser.add_argument('--baseline-dir', help='Finished results to compare live runs with (PROD runs are used)')
+    arg_parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    arg_parser.add_argument('--interval', type=float, default=5, help='Seconds between refreshes (default: 5)')
+    arg_parser.add_argument('--html', help='Also write a self-refreshing HTML view to this file')
+    arg_parser.add_argument('--no-steady-state', action='store_true', help='Do not trim warm-up from live statistics')
+    arg_parser.add_argument('--fail-after', type=float,
+                            help='Exit with status 1 once a run has been regressing after this many seconds')
+    arg_parser.add_argument('--once', action='store_true', help='Render a single refresh and exit')
+    args = arg_parser.parse_args()
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+
+    baseline = None
+    if args.baseline_dir:
+        baseline = WarpResultsParser(args.baseline_dir, config=config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            baseline.find_and_parse_results()
+        print(f"Baseline: {len(baseline.results)} results from {args.baseline_dir}")
+
+    if args.watch_dir:
+        sources = DirectorySource(args.watch_dir)
+    elif args.logs:
+        stream = sys.stdin if args.logs == "-" else open(args.logs, 'r', encoding='utf-8', errors='replace')
+        sources = StreamSource(stream, "stdin" if args.logs == "-" else Path(args.logs).name)
+        if args.once and args.logs != "-":
+            # A saved log is read completely before the single refresh
+            sources.thread.join()
+    else:
+        process = start_kubectl(args.kubectl_selector, args.namespace)
+        sources = StreamSource(process.stdout, "kubectl")
+
+    monitor = LiveMonitor(config, trim_steady_state=not args.no_steady_state, baseline=baseline)
+    interactive = sys.stdout.isatty() and not args.once
+    try:
+        while True:
+            for name, report in sources.poll():
+                monitor.update(name, report)
+            statuses = monitor.statuses()
+
+            view = render_terminal(statuses)
+            sys.stdout.write(("\x1b[2J\x1b[H" if interactive else "") + view)
+            sys.stdout.flush()
+            if args.html:
+                # Imported here so the live view does not pull in the HTTP exporter otherwise
+                from metrics_exporter import write_atomically
+                write_atomically(args.html, render_html(statuses, args.interval))
+
+            if args.fail_after is not None:
+                failing = [s for s in statuses if s.regression and s.elapsed_s >= args.fail_after]
+                if failing:
+                    for s in failing:
+                        print(f"ABORT: {s.job_key} is regressing after {s.elapsed_s:.0f}s")
+                    return EXIT_ABORT
+            if args.once or monitor.all_final or getattr(sources, 'exhausted', False):
+                return EXIT_OK
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
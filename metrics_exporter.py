@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Warp OpenMetrics Exporter
+
+This module exposes parsed warp results and PROD vs TEST comparisons as
+OpenMetrics, so benchmark runs can sit next to the storage cluster's own
+metrics in Prometheus/Grafana. Three outputs are supported:
+
+- textfile: run summaries for the node_exporter textfile collector
+- serve: a local HTTP endpoint; /metrics returns the run summaries and
+  /metrics/series the per-second series with their original timestamps.
+  Both are served from an in-memory snapshot that is only rebuilt when the
+  result files change, so scrapes stay cheap.
+- backfill: the per-second series as an OpenMetrics file for
+  `promtool tsdb create-blocks-from openmetrics`
+
+Every series is labelled with op, env, obj_size, concurrency, host, run_id
+(the run timestamp) and container.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import (
+    WarpResultsParser, WarpResult, ComparisonConfig, ARCHIVE_SUFFIXES, DEFAULT_CONFIG_FILE, parse_warp_time
+)
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+MIB = 1024 * 1024
+RESULT_PATTERNS = ["**/warp-*-*.json.zst"] + [f"**/*{suffix}" for suffix in ARCHIVE_SUFFIXES]
+
+SUMMARY_FAMILIES = {
+    'warp_throughput_bytes_per_second': 'Average throughput of a run',
+    'warp_throughput_objects_per_second': 'Average operations per second of a run',
+    'warp_request_duration_seconds': 'Full request duration of a run by statistic',
+    'warp_ttfb_seconds': 'Time to first byte of a run by statistic',
+    'warp_run_errors': 'Number of failed requests in a run',
+    'warp_run_start_timestamp_seconds': 'Start time of the measured part of a run',
+    'warp_run_end_timestamp_seconds': 'End time of the measured part of a run',
+    'warp_comparison_throughput_diff_percent': 'Mean throughput difference of TEST relative to PROD',
+    'warp_comparison_latency_diff_percent': 'Mean latency difference of TEST relative to PROD',
+    'warp_comparison_p99_latency_diff_percent': 'Mean P99 latency difference of TEST relative to PROD',
+    'warp_comparison_regression': 'Whether TEST regressed against PROD (1) or not (0)',
+}
+
+SERIES_FAMILIES = {
+    'warp_segment_throughput_bytes_per_second': 'Per-second throughput of a run',
+    'warp_segment_objects_per_second': 'Per-second operations of a run',
+    'warp_segment_errors': 'Per-second failed requests of a run',
+    'warp_window_request_duration_seconds': 'Request duration per client and 10s window by statistic',
+}
+
+
+def escape_label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: Dict[str, Any]) -> str:
+    return ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items())
+
+
+def format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def result_labels(result: WarpResult, op: Optional[str] = None) -> Dict[str, Any]:
+    """Identifying labels of a (per-container) result"""
+    params = result.test_params or {}
+    labels = {
+        'op': op or result.operation,
+        'env': result.environment,
+        'obj_size': params.get('obj_size', 'unknown'),
+        'concurrency': params.get('concurrency', 'unknown'),
+        'host': params.get('host', 'unknown'),
+        'run_id': result.timestamp.replace(' ', 'T'),
+        'container': result.container_id,
+    }
+    if op and op != result.operation:
+        labels['workload'] = result.operation
+    return labels
+
+
+def _result_parts(result: WarpResult) -> List[Tuple[str, WarpResult]]:
+    """The result itself, or its per-operation parts for MIXED runs"""
+    if result.op_breakdown:
+        return sorted(result.op_breakdown.items())
+    return [(result.operation, result)]
+
+
+class MetricsBuilder:
+    """Collects samples per metric family and renders them in OpenMetrics text format"""
+
+    def __init__(self, families: Dict[str, str]):
+        self.families = families
+        self.samples: Dict[str, List[str]] = {name: [] for name in families}
+
+    def add(self, name: str, labels: Dict[str, Any], value: Optional[float], timestamp: Optional[float] = None):
+        if value is None:
+            return
+        sample = f"{name}{{{format_labels(labels)}}} {format_value(value)}"
+        if timestamp is not None:
+            sample += f" {timestamp:.3f}"
+        self.samples[name].append(sample)
+
+    def render(self) -> str:
+        lines = []
+        for name, help_text in self.families.items():
+            if not self.samples[name]:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.extend(self.samples[name])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _seconds(value_ms: Optional[float]) -> Optional[float]:
+    return value_ms / 1000.0 if value_ms is not None else None
+
+
+def _timestamp(value: str) -> Optional[float]:
+    moment = parse_warp_time(value)
+    return moment.timestamp() if moment else None
+
+
+def render_summary(parser: WarpResultsParser) -> str:
+    """Run summaries and comparisons, without timestamps (suitable for scraping and textfiles)"""
+    metrics = MetricsBuilder(SUMMARY_FAMILIES)
+
+    for result in parser.results:
+        for op, part in _result_parts(result):
+            labels = result_labels(result, op)
+            metrics.add('warp_throughput_bytes_per_second', labels, part.avg_throughput_mib * MIB)
+            metrics.add('warp_throughput_objects_per_second', labels, part.avg_throughput_obj)
+            for stat, value in (('avg', part.avg_latency_ms), ('p50', part.p50_latency_ms),
+                                ('p90', part.p90_latency_ms), ('p99', part.p99_latency_ms),
+                                ('fastest', part.fastest_req_ms), ('slowest', part.slowest_req_ms)):
+                metrics.add('warp_request_duration_seconds', {**labels, 'stat': stat}, _seconds(value))
+            for stat, value in (('avg', part.ttfb_avg_ms), ('p50', part.ttfb_median_ms),
+                                ('p90', part.ttfb_p90_ms), ('p99', part.ttfb_99th_ms)):
+                metrics.add('warp_ttfb_seconds', {**labels, 'stat': stat}, _seconds(value))
+            metrics.add('warp_run_errors', labels, part.error_count)
+            metrics.add('warp_run_start_timestamp_seconds', labels, _timestamp(part.start_time))
+            metrics.add('warp_run_end_timestamp_seconds', labels, _timestamp(part.end_time))
+
+    for comp in parser.compare_prod_vs_test():
+        # comp.operation looks like "PUT (obj:obj1M, concurrent:concurrent64)"
+        op, _, rest = comp.operation.partition(' (')
+        params = dict(item.split(':', 1) for item in rest.rstrip(')').split(', ') if ':' in item)
+        labels = {'op': op, 'obj_size': params.get('obj', 'objunknown')[len('obj'):],
+                  'concurrency': params.get('concurrent', 'concurrentunknown')[len('concurrent'):],
+                  'significance': comp.significance_level}
+        metrics.add('warp_comparison_throughput_diff_percent', labels, comp.throughput_diff_percent)
+        metrics.add('warp_comparison_latency_diff_percent', labels, comp.latency_diff_percent)
+        metrics.add('warp_comparison_p99_latency_diff_percent', labels, comp.p99_diff_percent)
+        metrics.add('warp_comparison_regression', {**labels, 'kind': 'throughput'}, int(comp.throughput_regression))
+        metrics.add('warp_comparison_regression', {**labels, 'kind': 'latency'}, int(comp.latency_regression))
+        metrics.add('warp_comparison_regression', {**labels, 'kind': 'p99_latency'}, int(comp.p99_regression))
+        metrics.add('warp_comparison_regression', {**labels, 'kind': 'slo'}, int(comp.slo_regression))
+
+    return metrics.render()
+
+
+def render_series(parser: WarpResultsParser) -> str:
+    """Per-second and per-window series with their original timestamps (for backfilling)"""
+    metrics = MetricsBuilder(SERIES_FAMILIES)
+
+    for result in parser.results:
+        for op, part in _result_parts(result):
+            labels = result_labels(result, op)
+            # OpenMetrics requires increasing timestamps within a series
+            segments = sorted((s for s in part.throughput_per_second or [] if _timestamp(s.get('start', ''))),
+                              key=lambda s: s['start'])
+            for segment in segments:
+                ts = _timestamp(segment['start'])
+                metrics.add('warp_segment_throughput_bytes_per_second', labels,
+                            segment.get('mib_per_sec', 0) * MIB, ts)
+                metrics.add('warp_segment_objects_per_second', labels, segment.get('obj_per_sec', 0), ts)
+                metrics.add('warp_segment_errors', labels, segment.get('errors', 0), ts)
+
+            windows = sorted((w for w in part.latency_windows or [] if _timestamp(w.get('start', ''))),
+                             key=lambda w: (w.get('client', ''), w['start']))
+            for stat in ('avg', 'p50', 'p90', 'p99'):
+                for window in windows:
+                    metrics.add('warp_window_request_duration_seconds',
+                                {**labels, 'client': window.get('client', ''), 'stat': stat},
+                                _seconds(window.get(f"{stat}_ms")), _timestamp(window['start']))
+
+    return metrics.render()
+
+
+def _results_signature(results_dir: str) -> Tuple:
+    """Cheap fingerprint of the result files, used to decide whether a snapshot is stale"""
+    root = Path(results_dir)
+    signature = []
+    for pattern in RESULT_PATTERNS:
+        for path in root.glob(pattern):
+            stat = path.stat()
+            signature.append((path.as_posix(), stat.st_mtime, stat.st_size))
+    return tuple(sorted(set(signature)))
+
+
+class MetricsSnapshot:
+    """Rendered metrics of a results directory, rebuilt only when its result files change"""
+
+    def __init__(self, results_dir: str, archives: Optional[List[str]] = None,
+                 config: Optional[ComparisonConfig] = None):
+        self.results_dir = results_dir
+        self.archives = archives or []
+        self.config = config
+        self.signature: Optional[Tuple] = None
+        self.summary = b"# EOF\n"
+        self.series = b"# EOF\n"
+        self.updated_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-parse the results if they changed; return whether the snapshot was rebuilt"""
+        signature = _results_signature(self.results_dir)
+        if not force and signature == self.signature:
+            return False
+
+        parser = WarpResultsParser(self.results_dir, archives=self.archives, config=self.config)
+        # The parser reports every file it reads; keep the exporter log readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            parser.find_and_parse_results()
+        summary = render_summary(parser).encode('utf-8')
+        series = render_series(parser).encode('utf-8')
+
+        with self._lock:
+            self.signature = signature
+            self.summary = summary
+            self.series = series
+            self.updated_at = time.time()
+        print(f"Snapshot refreshed: {len(parser.results)} results")
+        return True
+
+    def get(self, path: str) -> Optional[bytes]:
+        with self._lock:
+            return {'/metrics': self.summary, '/metrics/series': self.series}.get(path)
+
+    def watch(self, interval: float, stop: threading.Event):
+        """Refresh the snapshot every `interval` seconds until `stop` is set"""
+        while not stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing snapshot: {e}")
+
+
+def make_handler(snapshot: MetricsSnapshot):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = snapshot.get(self.path.split('?', 1)[0])
+            if body is None:
+                self.send_error(404, "Try /metrics or /metrics/series")
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def write_atomically(output_file: str, content: str):
+    """Write via a temporary file so collectors never read a partial file"""
+    tmp_path = f"{output_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, output_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export warp benchmark results as OpenMetrics')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--archive', action='append', default=[],
+                        help='Additional tar/tar.gz/tar.zst/zip archive of results to read (repeatable)')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    textfile = subparsers.add_parser('textfile', help='Write run summaries for the node_exporter textfile collector')
+    textfile.add_argument('--output', default='warp.prom', help='Output file (must end in .prom for node_exporter)')
+
+    serve = subparsers.add_parser('serve', help='Serve /metrics and /metrics/series over HTTP')
+    serve.add_argument('--listen', default='127.0.0.1', help='Address to listen on')
+    serve.add_argument('--port', type=int, default=9469, help='Port to listen on')
+    serve.add_argument('--refresh', type=float, default=30, help='Seconds between checks for new results')
+
+    backfill = subparsers.add_parser('backfill', help='Write per-second series with timestamps for promtool')
+    backfill.add_argument('--output', default='warp_series.om', help='Output OpenMetrics file')
+
+    args = parser.parse_args()
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+
+    if args.mode == 'serve':
+        snapshot = MetricsSnapshot(args.results_dir, args.archive, config)
+        snapshot.refresh(force=True)
+        stop = threading.Event()
+        threading.Thread(target=snapshot.watch, args=(args.refresh, stop), daemon=True).start()
+        server = ThreadingHTTPServer((args.listen, args.port), make_handler(snapshot))
+        print(f"Serving metrics on http://{args.listen}:{args.port}/metrics")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            server.server_close()
+        return
+
+    warp_parser = WarpResultsParser(args.results_dir, archives=args.archive, config=config)
+    warp_parser.find_and_parse_results()
+    if args.mode == 'textfile':
+        write_atomically(args.output, render_summary(warp_parser))
+    else:
+        write_atomically(args.output, render_series(warp_parser))
+    print(f"Metrics written: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
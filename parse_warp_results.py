@@ -8,13 +8,17 @@ a comprehensive comparison report across different job types and environments.
 
 import json
 import gzip
+import io
+import tarfile
+import zipfile
 import zstandard as zstd
 import os
 import glob
 import re
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
 import argparse
 
@@ -41,6 +45,8 @@ class WarpResult:
     ttfb_best_ms: Optional[float] = None
     ttfb_median_ms: Optional[float] = None
     ttfb_99th_ms: Optional[float] = None
+    ttfb_p90_ms: Optional[float] = None
+    ttfb_worst_ms: Optional[float] = None
     client_throughputs: List[Dict[str, float]] = None
     throughput_per_second: List[Dict[str, float]] = None
     environment: str = ""  # PROD, TEST
@@ -48,6 +54,49 @@ class WarpResult:
     concurrent_requests: int = 0
     # Test parameters for proper grouping
     test_params: Dict[str, Any] = None
+    # Per-window latency of every client (warp reports one window per client every few seconds)
+    latency_windows: List[Dict[str, Any]] = None
+    error_count: int = 0
+    start_time: str = ""
+    end_time: str = ""
+    # Per-operation results of a MIXED run, keyed by operation
+    op_breakdown: Dict[str, 'WarpResult'] = None
+    # Per-size-bucket results of runs with random object sizes, keyed by log2 size (by_obj_log_2_size)
+    size_breakdown: Dict[int, 'WarpResult'] = None
+    # Steady-state window the statistics were computed over (None = not evaluated, False = never steady)
+    steady_state: Optional[bool] = None
+    steady_start: str = ""
+    steady_end: str = ""
+    warmup_trimmed_s: float = 0.0
+    cooldown_trimmed_s: float = 0.0
+    # Little's law check: busy workers (achieved ops/s x latency) relative to the configured concurrency
+    effective_concurrency: Optional[float] = None
+    worker_utilization: Optional[float] = None
+    min_container_utilization: Optional[float] = None
+    # Endpoints the warp client spread its requests over (--host)
+    hosts: List[str] = None
+    # Objects per second completed by each endpoint (throughput_by_host)
+    host_throughputs: Dict[str, float] = None
+    
+    # Transfer time is the part of the request spent after the first byte arrived,
+    # so a bandwidth regression shows up here while a lookup regression shows up in TTFB
+    @property
+    def transfer_avg_ms(self) -> Optional[float]:
+        if self.ttfb_avg_ms is None:
+            return None
+        return max(self.avg_latency_ms - self.ttfb_avg_ms, 0.0)
+    
+    @property
+    def transfer_median_ms(self) -> Optional[float]:
+        if self.ttfb_median_ms is None:
+            return None
+        return max(self.p50_latency_ms - self.ttfb_median_ms, 0.0)
+    
+    @property
+    def transfer_99th_ms(self) -> Optional[float]:
+        if self.ttfb_99th_ms is None:
+            return None
+        return max(self.p99_latency_ms - self.ttfb_99th_ms, 0.0)
 
 
 @dataclass
@@ -61,63 +110,321 @@ class ComparisonResult:
     throughput_regression: bool
     latency_regression: bool
     significance_level: str  # HIGH, MEDIUM, LOW
+    ttfb_diff_percent: Optional[float] = None  # GET-like operations only
+    transfer_diff_percent: Optional[float] = None
+    p99_diff_percent: float = 0.0
+    p99_regression: bool = False
+    # Per SLO name: objective, PROD/TEST compliance and burn rate, regression flag
+    slo_compliance: Dict[str, Dict[str, Any]] = None
+    slo_regression: bool = False
+    # Factors of the throughput change and their shares; see root_cause.decompose
+    root_cause: Dict[str, Any] = None
+    
+    @property
+    def has_regression(self) -> bool:
+        return self.throughput_regression or self.latency_regression or self.p99_regression or self.slo_regression
+
+
+SIGNIFICANCE_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+DEFAULT_CONFIG_FILE = "comparison_config.yaml"
+
+
+@dataclass
+class ComparisonConfig:
+    """Regression and significance thresholds, as defined in comparison_config.yaml"""
+    throughput_degradation_percent: float = 5.0
+    latency_increase_percent: float = 10.0
+    p99_latency_increase_percent: float = 15.0
+    high_throughput_diff_percent: float = 20.0
+    high_combined_cv: float = 0.3
+    medium_throughput_diff_percent: float = 10.0
+    medium_combined_cv: float = 0.15
+    min_worker_utilization: float = 0.8
+    max_worker_utilization: float = 1.1
+    exclude_invalid_runs: bool = True
+    drift_threshold_percent: float = 5.0
+    min_periodic_amplitude_percent: float = 2.0
+    min_periodic_autocorrelation: float = 0.3
+    sample_min_files: int = 3
+    sample_max_ci_percent: float = 10.0
+    interference_min_correlation: float = 0.3
+    interference_max_lag_windows: int = 3
+    interference_correlation_increase: float = 0.2
+    history_min_segment_runs: int = 3
+    history_penalty: float = 3.0
+    history_min_change_percent: float = 5.0
+    capacity_min_headroom_percent: float = 30.0
+    root_cause_incident_sigmas: float = 4.0
+    root_cause_incident_drop_percent: float = 20.0
+    # Raw `slos` entries; see slo_analysis.SLODefinition
+    slo_definitions: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ComparisonConfig':
+        """Build the config from the parsed YAML document; missing keys keep their defaults"""
+        config = cls()
+        regression = data.get('regression_thresholds') or {}
+        significance = data.get('significance_thresholds') or {}
+        high = significance.get('high_significance') or {}
+        medium = significance.get('medium_significance') or {}
+        saturation = data.get('saturation') or {}
+        drift = data.get('drift') or {}
+        sample = data.get('sample') or {}
+        interference = data.get('interference') or {}
+        history = data.get('history') or {}
+        capacity = data.get('capacity') or {}
+        root_cause = data.get('root_cause') or {}
+        values = {
+            'throughput_degradation_percent': regression.get('throughput_degradation_percent'),
+            'latency_increase_percent': regression.get('latency_increase_percent'),
+            'p99_latency_increase_percent': regression.get('p99_latency_increase_percent'),
+            'high_throughput_diff_percent': high.get('throughput_diff_percent'),
+            'high_combined_cv': high.get('combined_cv_threshold'),
+            'medium_throughput_diff_percent': medium.get('throughput_diff_percent'),
+            'medium_combined_cv': medium.get('combined_cv_threshold'),
+            'min_worker_utilization': saturation.get('min_worker_utilization'),
+            'max_worker_utilization': saturation.get('max_worker_utilization'),
+            'drift_threshold_percent': drift.get('early_late_change_percent'),
+            'min_periodic_amplitude_percent': drift.get('min_periodic_amplitude_percent'),
+            'min_periodic_autocorrelation': drift.get('min_periodic_autocorrelation'),
+            'sample_max_ci_percent': sample.get('max_ci_percent'),
+            'interference_min_correlation': interference.get('min_correlation'),
+            'interference_correlation_increase': interference.get('correlation_increase'),
+            'history_penalty': history.get('penalty'),
+            'history_min_change_percent': history.get('min_change_percent'),
+            'capacity_min_headroom_percent': capacity.get('min_headroom_percent'),
+            'root_cause_incident_sigmas': root_cause.get('incident_sigmas'),
+            'root_cause_incident_drop_percent': root_cause.get('incident_drop_percent'),
+        }
+        for name, value in values.items():
+            if value is not None:
+                setattr(config, name, float(value))
+        if saturation.get('exclude_invalid_runs') is not None:
+            config.exclude_invalid_runs = bool(saturation['exclude_invalid_runs'])
+        if sample.get('min_files') is not None:
+            config.sample_min_files = int(sample['min_files'])
+        if interference.get('max_lag_windows') is not None:
+            config.interference_max_lag_windows = int(interference['max_lag_windows'])
+        if history.get('min_segment_runs') is not None:
+            config.history_min_segment_runs = int(history['min_segment_runs'])
+        config.slo_definitions = list(data.get('slos') or [])
+        return config
+    
+    @classmethod
+    def load(cls, path: str) -> 'ComparisonConfig':
+        """Load thresholds from a comparison_config.yaml file"""
+        # Imported here so the parser itself does not require PyYAML
+        import yaml
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(yaml.safe_load(f) or {})
+    
+    @classmethod
+    def find_default(cls) -> 'ComparisonConfig':
+        """Load comparison_config.yaml from the working directory or next to this script, if present"""
+        for candidate in (Path(DEFAULT_CONFIG_FILE), Path(__file__).parent / DEFAULT_CONFIG_FILE):
+            if candidate.exists():
+                return cls.load(str(candidate))
+        return cls()
+
+
+# Test parameters extracted from the warp commandline (handle both --flag=value and --flag value formats)
+COMMANDLINE_PARAMS = {
+    'obj_size': re.compile(r'--obj\.size[=\s]+(\S+)'),
+    'concurrency': re.compile(r'--concurrent[=\s]+(\d+)'),
+    'host': re.compile(r'--host[=\s]+(\S+)'),
+    'bucket': re.compile(r'--bucket[=\s]+(\S+)'),
+    'duration': re.compile(r'--duration[=\s]+(\S+)'),
+}
+
+
+# Example: warp-get-2025-08-05[213436]-e5bywi.json.zst
+RESULT_FILENAME = re.compile(r'warp-(\w+)-(\d{4}-\d{2}-\d{2})\[(\d{6})\]-([a-zA-Z0-9]+)\.json\.zst')
+
+# Packed stores written by results_store.py; index paths address their members as <store>::<member>
+STORE_SUFFIX = '.warpstore'
+STORE_MEMBER_SEPARATOR = '::'
+
+# Archives accepted as result sources (e.g. a day's warp_results/ tarball or one archive per pod)
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.zst', '.tzst', '.zip', STORE_SUFFIX)
+
+# Containers of one run start warp a few seconds apart, so their file timestamps can differ by that much
+RUN_FRAGMENT_TOLERANCE_S = 10
+
+
+def is_archive(path: Path) -> bool:
+    """Check whether a path is a supported results archive"""
+    return Path(path).is_file() and Path(path).name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def iter_archive_reports(archive_path: Path) -> Iterator[Tuple[str, bytes]]:
+    """Yield (member name, raw bytes) of the warp result files in an archive
+    
+    Members are streamed in archive order without being written to disk, and each
+    archive is read sequentially exactly once.
+    """
+    name = Path(archive_path).name.lower()
+    
+    if name.endswith(STORE_SUFFIX):
+        # Imported here to avoid a circular import
+        from results_store import ResultStore
+        yield from ResultStore(archive_path).iter_reports()
+        return
+    
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as zf:
+            # Visit members in on-disk order so the file is read front to back
+            for info in sorted(zf.infolist(), key=lambda i: i.header_offset):
+                if not info.is_dir() and RESULT_FILENAME.match(os.path.basename(info.filename)):
+                    yield info.filename, zf.read(info)
+        return
+    
+    with open(archive_path, 'rb') as raw:
+        if name.endswith(('.tar.zst', '.tzst')):
+            stream = zstd.ZstdDecompressor().stream_reader(raw)
+            mode = 'r|'
+        elif name.endswith(('.tar.gz', '.tgz')):
+            stream = raw
+            mode = 'r|gz'
+        else:
+            stream = raw
+            mode = 'r|'
+        
+        with tarfile.open(fileobj=stream, mode=mode) as tar:
+            for member in tar:
+                if member.isfile() and RESULT_FILENAME.match(os.path.basename(member.name)):
+                    yield member.name, tar.extractfile(member).read()
+
+
+def detect_operation(commandline: str, default: str = 'UNKNOWN') -> str:
+    """Determine the benchmarked operation from the warp commandline"""
+    commandline = commandline.lower()
+    for operation in ('get', 'put', 'mixed', 'delete', 'stat'):
+        if operation in commandline:
+            return operation.upper()
+    return default
+
+
+def detect_environment(commandline: str, job_name: str = "", operation: str = "") -> str:
+    """Determine PROD/TEST from the host in the commandline"""
+    if "s3-onprem.storage.yandex.net" in commandline:
+        return "TEST"
+    elif "storage.yandexcloud.net" in commandline:
+        return "PROD"
+    # Fallback: look for environment indicators in the job name or operation
+    if "test" in job_name.lower() or "test" in operation.lower():
+        return "TEST"
+    elif "prod" in job_name.lower() or "prod" in operation.lower():
+        return "PROD"
+    # Default to PROD if no clear indicator
+    return "PROD"
+
+
+def extract_test_params(commandline: str) -> Dict[str, Any]:
+    """Extract test parameters from the commandline for proper grouping"""
+    test_params = {}
+    if commandline:
+        for name, pattern in COMMANDLINE_PARAMS.items():
+            match = pattern.search(commandline)
+            if match:
+                test_params[name] = int(match.group(1)) if name == 'concurrency' else match.group(1)
+    return test_params
+
+
+WARP_TIME = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:\d{2})?$')
+
+
+# Window and segment starts repeat across clients, containers and analyses, so parsed times are cached
+@lru_cache(maxsize=65536)
+def parse_warp_time(value: str) -> Optional[datetime]:
+    """Parse an RFC 3339 timestamp from a warp report (nanosecond precision is truncated)"""
+    if not value:
+        return None
+    match = WARP_TIME.match(value)
+    if not match:
+        return None
+    fraction = (match.group(2) or '.0')[:7]
+    zone = match.group(3) or 'Z'
+    zone = '+00:00' if zone == 'Z' else zone
+    return datetime.fromisoformat(f"{match.group(1)}{fraction}{zone}")
+
+
+def parse_obj_size(size: str) -> Optional[int]:
+    """Convert a warp --obj.size value (e.g. 512B, 4K, 4KiB, 1M) to bytes"""
+    # warp follows humanize conventions: K/KB are decimal, KiB is binary
+    match = re.match(r'^\s*([\d.]+)\s*([KMGT]?)(i?)B?\s*$', str(size), re.IGNORECASE)
+    if not match:
+        return None
+    base = 1024 if match.group(3) else 1000
+    exponent = ['', 'K', 'M', 'G', 'T'].index(match.group(2).upper())
+    return int(float(match.group(1)) * base ** exponent)
 
 
 class WarpResultsParser:
     """Parser for warp benchmark results"""
     
-    def __init__(self, results_dir: str = "."):
+    def __init__(self, results_dir: str = ".", archives: Optional[List[str]] = None,
+                 config: Optional[ComparisonConfig] = None, trim_steady_state: bool = True,
+                 max_memory: Optional[int] = None, spill_dir: Optional[str] = None, index_filter=None):
         self.results_dir = Path(results_dir)
+        self.archives = [Path(a) for a in (archives or [])]
+        # results_index.IndexFilter applied to archive members, which the results index does not cover
+        self.index_filter = index_filter if index_filter is not None and not index_filter.is_empty() else None
+        self.config = config or ComparisonConfig()
+        self.trim_steady_state = trim_steady_state
         self.results: List[WarpResult] = []
+        if max_memory:
+            # Imported here to avoid a circular import
+            from spill import MemoryBudget, SpillList
+            # Results beyond the budget (approximate, in bytes) are spilled to disk
+            self.results = SpillList(MemoryBudget(max_memory, spill_dir))
         
-    def parse_json_zst_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def parse_json_zst_file(file_path: Path) -> Optional[Dict[str, Any]]:
         """Parse a compressed JSON file from warp"""
         try:
-            # Try zstd first (most likely for .json.zst files)
-            try:
-                with open(file_path, 'rb') as f:
-                    dctx = zstd.ZstdDecompressor()
-                    with dctx.stream_reader(f) as reader:
-                        data = reader.read()
-                        return json.loads(data.decode('utf-8'))
-            except Exception as zstd_error:
-                # Fallback to gzip if zstd fails
-                try:
-                    with gzip.open(file_path, 'rt', encoding='utf-8') as f:
-                        return json.load(f)
-                except Exception as gzip_error:
-                    # If both fail, try reading as plain JSON
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            return json.load(f)
-                    except Exception as json_error:
-                        print(f"Error parsing {file_path}: zstd={zstd_error}, gzip={gzip_error}, json={json_error}")
-                        return None
+            with open(file_path, 'rb') as f:
+                return WarpResultsParser.parse_report_bytes(f.read(), str(file_path))
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
             return None
     
+    @staticmethod
+    def parse_report_bytes(raw: bytes, source: str) -> Optional[Dict[str, Any]]:
+        """Parse the raw (compressed) bytes of a warp report"""
+        if raw[:1] == b'{':
+            # Already decompressed, e.g. a member of a packed store
+            try:
+                return json.loads(raw.decode('utf-8'))
+            except ValueError as e:
+                print(f"Error parsing {source}: json={e}")
+                return None
+        # Try zstd first (most likely for .json.zst files)
+        try:
+            dctx = zstd.ZstdDecompressor()
+            with dctx.stream_reader(io.BytesIO(raw)) as reader:
+                return json.loads(reader.read().decode('utf-8'))
+        except Exception as zstd_error:
+            # Fallback to gzip if zstd fails
+            try:
+                return json.loads(gzip.decompress(raw).decode('utf-8'))
+            except Exception as gzip_error:
+                # If both fail, try reading as plain JSON
+                try:
+                    return json.loads(raw.decode('utf-8'))
+                except Exception as json_error:
+                    print(f"Error parsing {source}: zstd={zstd_error}, gzip={gzip_error}, json={json_error}")
+                    return None
+    
     def extract_metrics_from_report(self, report_data: Dict[str, Any], job_name: str, 
-                                  container_id: str, timestamp: str) -> Optional[WarpResult]:
-        """Extract metrics from a warp report"""
+                                  container_id: str, timestamp: str,
+                                  op_section: Optional[str] = None) -> Optional[WarpResult]:
+        """Extract metrics from a warp report (or from one by_op_type section of it)"""
         try:
             # Extract basic info
             # Try to get operation from commandline first
             commandline = report_data.get('commandline', '')
-            if 'get' in commandline.lower():
-                operation = 'GET'
-            elif 'put' in commandline.lower():
-                operation = 'PUT'
-            elif 'mixed' in commandline.lower():
-                operation = 'MIXED'
-            elif 'delete' in commandline.lower():
-                operation = 'DELETE'
-            elif 'stat' in commandline.lower():
-                operation = 'STAT'
-            else:
-                operation = report_data.get('operation', 'UNKNOWN')
+            operation = op_section or detect_operation(commandline, report_data.get('operation', 'UNKNOWN'))
             
-            concurrency = report_data.get('concurrency', 0)
             duration = report_data.get('duration', '')
             
             # Extract metrics from the correct location (by_op_type section)
@@ -125,6 +432,10 @@ class WarpResultsParser:
             op_type = operation.upper()
             op_data = report_data.get('by_op_type', {}).get(op_type, {})
             
+            # Workers of this client (warp v2 reports them per operation and in the total)
+            concurrency = (op_data.get('concurrency') or report_data.get('total', {}).get('concurrency')
+                           or report_data.get('concurrency', 0))
+            
             # Extract throughput from the operation-specific section
             throughput_data = op_data.get('throughput', {})
             # Calculate throughput in MiB/s from bytes and duration
@@ -138,6 +449,7 @@ class WarpResultsParser:
             requests_by_client = op_data.get('requests_by_client', {})
             
             # Collect latency statistics from all clients
+            latency_windows = []
             all_avg_latencies = []
             all_p50_latencies = []
             all_p90_latencies = []
@@ -145,26 +457,42 @@ class WarpResultsParser:
             all_fastest_latencies = []
             all_slowest_latencies = []
             all_stddev_latencies = []
+            # Time to first byte (GET-like operations only)
+            all_ttfb_avg = []
+            all_ttfb_best = []
+            all_ttfb_median = []
+            all_ttfb_p90 = []
+            all_ttfb_p99 = []
+            all_ttfb_worst = []
             
-            for client_requests in requests_by_client.values():
+            for client_id, client_requests in requests_by_client.items():
                 if isinstance(client_requests, list):
                     for req_period in client_requests:
                         if isinstance(req_period, dict) and 'single_sized_requests' in req_period:
                             single_requests = req_period['single_sized_requests']
+                            first_byte = single_requests.get('first_byte', {})
+                            latency_windows.append({
+                                'client': client_id,
+                                'start': req_period.get('start_time', ''),
+                                'end': req_period.get('end_time', ''),
+                                'requests': single_requests.get('requests', 0),
+                                'avg_ms': single_requests.get('dur_avg_millis', 0),
+                                'p50_ms': single_requests.get('dur_median_millis', 0),
+                                'p90_ms': single_requests.get('dur_90_millis', 0),
+                                'p99_ms': single_requests.get('dur_99_millis', 0),
+                                'fastest_ms': single_requests.get('fastest_millis', 0),
+                                'slowest_ms': single_requests.get('slowest_millis', 0),
+                                'stddev_ms': single_requests.get('std_dev_millis', 0),
+                                'ttfb_avg_ms': first_byte.get('average_millis'),
+                                'ttfb_best_ms': first_byte.get('fastest_millis'),
+                                'ttfb_median_ms': first_byte.get('median_millis'),
+                                'ttfb_p90_ms': first_byte.get('p90_millis'),
+                                'ttfb_p99_ms': first_byte.get('p99_millis'),
+                                'ttfb_worst_ms': first_byte.get('slowest_millis'),
+                            })
                             
-                            # Extract latency statistics - different structure for GET vs PUT operations
-                            if 'first_byte' in single_requests:
-                                # GET operations have first_byte latency data
-                                fb_stats = single_requests['first_byte']
-                                all_avg_latencies.append(fb_stats.get('average_millis', 0))
-                                all_p50_latencies.append(fb_stats.get('median_millis', 0))
-                                all_p90_latencies.append(fb_stats.get('p90_millis', 0))
-                                all_p99_latencies.append(fb_stats.get('p99_millis', 0))
-                                all_fastest_latencies.append(fb_stats.get('fastest_millis', 0))
-                                all_slowest_latencies.append(fb_stats.get('slowest_millis', 0))
-                                all_stddev_latencies.append(fb_stats.get('std_dev_millis', 0))
-                            elif 'dur_avg_millis' in single_requests:
-                                # PUT operations have direct duration fields
+                            # Full request duration is reported for every operation type
+                            if 'dur_avg_millis' in single_requests:
                                 all_avg_latencies.append(single_requests.get('dur_avg_millis', 0))
                                 all_p50_latencies.append(single_requests.get('dur_median_millis', 0))
                                 all_p90_latencies.append(single_requests.get('dur_90_millis', 0))
@@ -172,6 +500,16 @@ class WarpResultsParser:
                                 all_fastest_latencies.append(single_requests.get('fastest_millis', 0))
                                 all_slowest_latencies.append(single_requests.get('slowest_millis', 0))
                                 all_stddev_latencies.append(single_requests.get('std_dev_millis', 0))
+                            
+                            # GET operations additionally carry a first_byte distribution
+                            if 'first_byte' in single_requests:
+                                fb_stats = single_requests['first_byte']
+                                all_ttfb_avg.append(fb_stats.get('average_millis', 0))
+                                all_ttfb_best.append(fb_stats.get('fastest_millis', 0))
+                                all_ttfb_median.append(fb_stats.get('median_millis', 0))
+                                all_ttfb_p90.append(fb_stats.get('p90_millis', 0))
+                                all_ttfb_p99.append(fb_stats.get('p99_millis', 0))
+                                all_ttfb_worst.append(fb_stats.get('slowest_millis', 0))
             
             # Calculate overall latency statistics
             if all_avg_latencies:
@@ -185,12 +523,15 @@ class WarpResultsParser:
             else:
                 avg_latency_ms = p50_latency_ms = p90_latency_ms = p99_latency_ms = fastest_req_ms = slowest_req_ms = stddev_ms = 0
             
-            # Extract TTFB if available
-            ttfb_stats = report_data.get('ttfb', {})
-            ttfb_avg_ms = ttfb_stats.get('average', None)
-            ttfb_best_ms = ttfb_stats.get('best', None)
-            ttfb_median_ms = ttfb_stats.get('median', None)
-            ttfb_99th_ms = ttfb_stats.get('p99', None)
+            # Calculate TTFB statistics (None when the operation has no first_byte data)
+            ttfb_avg_ms = ttfb_best_ms = ttfb_median_ms = ttfb_p90_ms = ttfb_99th_ms = ttfb_worst_ms = None
+            if all_ttfb_avg:
+                ttfb_avg_ms = sum(all_ttfb_avg) / len(all_ttfb_avg)
+                ttfb_best_ms = min(all_ttfb_best)
+                ttfb_median_ms = sum(all_ttfb_median) / len(all_ttfb_median)
+                ttfb_p90_ms = sum(all_ttfb_p90) / len(all_ttfb_p90)
+                ttfb_99th_ms = sum(all_ttfb_p99) / len(all_ttfb_p99)
+                ttfb_worst_ms = max(all_ttfb_worst)
             
             # Extract client throughputs from throughput_by_client
             client_throughputs = []
@@ -207,60 +548,84 @@ class WarpResultsParser:
                         'obj_per_sec': client_obj_per_sec
                     })
             
+            # Per-endpoint throughput shows whether one of several --host endpoints lags behind
+            host_throughputs = {}
+            for host, host_data in (op_data.get('throughput_by_host') or {}).items():
+                if isinstance(host_data, dict) and host_data.get('measure_duration_millis', 0) > 0:
+                    host_throughputs[host] = host_data.get('objects', 0) / (host_data['measure_duration_millis'] / 1000)
+            
             # Extract per-second throughput from segmented data
+            # The structure is: throughput -> segmented -> segments (one rate sample per segment_duration_millis)
             throughput_per_second = []
-            segmented_data = throughput_data.get('segmented', [])
-            for segment in segmented_data:
+            segmented_data = throughput_data.get('segmented', {})
+            for segment in segmented_data.get('segments', []) if isinstance(segmented_data, dict) else []:
                 if isinstance(segment, dict):
-                    segment_bytes = segment.get('bytes', 0)
-                    segment_duration_ms = segment.get('duration_millis', 1)
-                    segment_mib_per_sec = (segment_bytes / (1024 * 1024)) / (segment_duration_ms / 1000) if segment_duration_ms > 0 else 0
-                    segment_obj_per_sec = segment.get('objects', 0) / (segment_duration_ms / 1000) if segment_duration_ms > 0 else 0
-                    
                     throughput_per_second.append({
-                        'mib_per_sec': segment_mib_per_sec,
-                        'obj_per_sec': segment_obj_per_sec
+                        'start': segment.get('start', ''),
+                        'mib_per_sec': segment.get('bytes_per_sec', 0) / (1024 * 1024),
+                        'obj_per_sec': segment.get('obj_per_sec', 0),
+                        'errors': segment.get('errors', 0)
                     })
+            segment_seconds = (segmented_data.get('segment_duration_millis') or 1000) / 1000 \
+                if isinstance(segmented_data, dict) else 1.0
+            
+            # Trim warm-up and cool-down: recompute the statistics over the steady part of the run only
+            steady = None
+            if self.trim_steady_state:
+                # Imported here to avoid a circular import
+                from steady_state import detect_steady_state, windows_in_range, summarize_windows
+                steady = detect_steady_state(throughput_per_second, latency_windows, segment_seconds)
+            if steady and steady.reached:
+                steady_segments = throughput_per_second[steady.start_index:steady.end_index]
+                avg_throughput_mib = sum(s['mib_per_sec'] for s in steady_segments) / len(steady_segments)
+                avg_throughput_obj = sum(s['obj_per_sec'] for s in steady_segments) / len(steady_segments)
+                steady_windows = windows_in_range(latency_windows, steady.start, steady.end)
+                if steady_windows:
+                    summary = summarize_windows(steady_windows)
+                    avg_latency_ms = summary['avg_latency_ms']
+                    p50_latency_ms = summary['p50_latency_ms']
+                    p90_latency_ms = summary['p90_latency_ms']
+                    p99_latency_ms = summary['p99_latency_ms']
+                    fastest_req_ms = summary['fastest_req_ms']
+                    slowest_req_ms = summary['slowest_req_ms']
+                    stddev_ms = summary['stddev_ms']
+                    if 'ttfb_avg_ms' in summary:
+                        ttfb_avg_ms = summary['ttfb_avg_ms']
+                        ttfb_best_ms = summary['ttfb_best_ms']
+                        ttfb_median_ms = summary['ttfb_median_ms']
+                        ttfb_p90_ms = summary['ttfb_p90_ms']
+                        ttfb_99th_ms = summary['ttfb_99th_ms']
+                        ttfb_worst_ms = summary['ttfb_worst_ms']
+            
+            # MIXED runs carry one section per operation; keep them so per-op series stay available
+            op_breakdown = None
+            if op_section is None and operation == 'MIXED':
+                op_breakdown = {}
+                for sub_op in report_data.get('by_op_type', {}):
+                    sub_result = self.extract_metrics_from_report(report_data, job_name, container_id,
+                                                                  timestamp, op_section=sub_op)
+                    if sub_result:
+                        op_breakdown[sub_op] = sub_result
+            
+            # Runs with random object sizes report each power-of-two size bucket like an operation section
+            size_breakdown = None
+            size_buckets = report_data.get('by_obj_log_2_size') or {}
+            if op_section is None and operation != 'MIXED' and len(size_buckets) > 1:
+                size_breakdown = {}
+                for log2_size, bucket in size_buckets.items():
+                    bucket_report = {'commandline': commandline, 'by_op_type': {op_type: bucket}}
+                    sub_result = self.extract_metrics_from_report(bucket_report, job_name, container_id,
+                                                                  timestamp, op_section=op_type)
+                    if sub_result:
+                        size_breakdown[int(log2_size)] = sub_result
             
             # Determine environment based on the host in commandline
-            if "s3-onprem.storage.yandex.net" in commandline:
-                environment = "TEST"
-            elif "storage.yandexcloud.net" in commandline:
-                environment = "PROD"
-            else:
-                # Fallback: look for environment indicators in the job name or operation
-                if "test" in job_name.lower() or "test" in operation.lower():
-                    environment = "TEST"
-                elif "prod" in job_name.lower() or "prod" in operation.lower():
-                    environment = "PROD"
-                else:
-                    # Default to PROD if no clear indicator
-                    environment = "PROD"
+            environment = detect_environment(commandline, job_name, operation)
             
             # Extract test parameters from commandline for proper grouping
-            test_params = {}
-            if commandline:
-                # Extract object size (handle both --obj.size= and --obj.size formats)
-                obj_size_match = re.search(r'--obj\.size[=\s]+(\S+)', commandline)
-                if obj_size_match:
-                    test_params['obj_size'] = obj_size_match.group(1)
-                
-                # Extract concurrency (handle both --concurrent= and --concurrent formats)
-                concurrency_match = re.search(r'--concurrent[=\s]+(\d+)', commandline)
-                if concurrency_match:
-                    test_params['concurrency'] = int(concurrency_match.group(1))
-                
-                # Extract host (handle both --host= and --host formats)
-                host_match = re.search(r'--host[=\s]+(\S+)', commandline)
-                if host_match:
-                    test_params['host'] = host_match.group(1)
-                
-                # Extract bucket (handle both --bucket= and --bucket formats)
-                bucket_match = re.search(r'--bucket[=\s]+(\S+)', commandline)
-                if bucket_match:
-                    test_params['bucket'] = bucket_match.group(1)
+            test_params = extract_test_params(commandline)
             
-            return WarpResult(
+            result = WarpResult(
                 job_name=job_name,
                 container_id=container_id,
                 timestamp=timestamp,
@@ -280,21 +645,40 @@ class WarpResultsParser:
                 ttfb_best_ms=ttfb_best_ms,
                 ttfb_median_ms=ttfb_median_ms,
                 ttfb_99th_ms=ttfb_99th_ms,
+                ttfb_p90_ms=ttfb_p90_ms,
+                ttfb_worst_ms=ttfb_worst_ms,
                 client_throughputs=client_throughputs,
                 throughput_per_second=throughput_per_second,
                 environment=environment,
-                test_params=test_params
+                test_params=test_params,
+                latency_windows=latency_windows,
+                error_count=op_data.get('total_errors', 0),
+                start_time=op_data.get('start_time', ''),
+                end_time=op_data.get('end_time', ''),
+                hosts=list(op_data.get('hosts') or []),
+                host_throughputs=host_throughputs,
+                op_breakdown=op_breakdown,
+                size_breakdown=size_breakdown,
+                steady_state=steady.reached if steady else None,
+                steady_start=steady.start.isoformat() if steady and steady.reached else "",
+                steady_end=steady.end.isoformat() if steady and steady.reached else "",
+                warmup_trimmed_s=steady.warmup_seconds if steady else 0.0,
+                cooldown_trimmed_s=steady.cooldown_seconds if steady else 0.0
             )
             
+            # Imported here to avoid a circular import
+            from saturation_analysis import apply_littles_law
+            apply_littles_law(result)
+            return result
+            
         except Exception as e:
             print(f"Error extracting metrics from {job_name}: {e}")
             return None
     
-    def parse_filename(self, filename: str) -> tuple:
+    @staticmethod
+    def parse_filename(filename: str) -> tuple:
         """Parse warp result filename to extract job info"""
-        # Example: warp-get-2025-08-05[213436]-e5bywi.json.zst
-        pattern = r'warp-(\w+)-(\d{4}-\d{2}-\d{2})\[(\d{6})\]-([a-zA-Z0-9]+)\.json\.zst'
-        match = re.match(pattern, filename)
+        match = RESULT_FILENAME.match(filename)
         
         if match:
             operation = match.group(1)  # get, put, mixed, etc.
@@ -306,44 +690,131 @@ class WarpResultsParser:
         
         return None, None, None
     
-    def find_and_parse_results(self) -> List[WarpResult]:
-        """Find all warp result files and parse them"""
+    def find_and_parse_results(self, result_files: Optional[List[Path]] = None) -> List[WarpResult]:
+        """Find all warp result files and archives (or use the preselected files) and parse them
+        
+        Preselected files come from the results index, which covers loose files and packed stores;
+        tar/zip archives under the results directory are still read, filtered member by member.
+        """
         # Look for warp result files recursively in the results directory and subdirectories
         pattern = "**/warp-*-*.json.zst"
-        result_files = list(self.results_dir.glob(pattern))
+        archive_files = list(self.archives)
+        if is_archive(self.results_dir):
+            result_files = []
+            archive_files.append(self.results_dir)
+        elif result_files is None:
+            # In path order, the order a packed store holds its members in, so both give the same report
+            result_files = sorted(self.results_dir.glob(pattern))
+            archive_files += sorted(p for p in self.results_dir.glob("**/*") if is_archive(p))
+        else:
+            archive_files += sorted(p for p in self.results_dir.glob("**/*")
+                                    if is_archive(p) and not p.name.endswith(STORE_SUFFIX))
         
-        if not result_files:
+        if not result_files and not archive_files:
             print(f"No warp result files found matching pattern: {pattern}")
             print(f"Searched in: {self.results_dir}")
             return []
         
         print(f"Found {len(result_files)} warp result files")
         
+        # Members of packed stores selected through the index are read from their own byte ranges
+        store_members: Dict[str, List[str]] = {}
         for file_path in result_files:
-            operation, timestamp, container_id = self.parse_filename(file_path.name)
-            
-            if not all([operation, timestamp, container_id]):
-                print(f"Could not parse filename: {file_path.name}")
-                continue
-            
-            # Parse the JSON data
-            json_data = self.parse_json_zst_file(file_path)
-            if not json_data:
-                continue
-            
-            # Extract metrics
-            result = self.extract_metrics_from_report(
-                json_data, operation, container_id, timestamp
-            )
-            
-            if result:
-                self.results.append(result)
-                print(f"Parsed: {file_path.name}")
+            store, separator, member = str(file_path).partition(STORE_MEMBER_SEPARATOR)
+            if separator:
+                store_members.setdefault(store, []).append(member)
+            else:
+                self._parse_result_source(file_path.name, lambda: self.parse_json_zst_file(file_path))
+        
+        if store_members:
+            # Imported here to avoid a circular import
+            from results_store import ResultStore
+            for store, members in store_members.items():
+                for member_name, raw in ResultStore(store).iter_reports(members):
+                    source = f"{store}{STORE_MEMBER_SEPARATOR}{member_name}"
+                    self._parse_result_source(os.path.basename(member_name),
+                                              lambda: self.parse_report_bytes(raw, source))
+        
+        for archive_path in archive_files:
+            print(f"Reading archive: {archive_path}")
+            try:
+                for member_name, raw in iter_archive_reports(archive_path):
+                    source = f"{archive_path}:{member_name}"
+                    self._parse_result_source(os.path.basename(member_name),
+                                              lambda: self.parse_report_bytes(raw, source), filtered=True)
+            except (OSError, ValueError, tarfile.TarError, zipfile.BadZipFile, zstd.ZstdError) as e:
+                print(f"Error reading archive {archive_path}: {e}")
         
         return self.results
     
+    def parse_text_logs(self, paths: List[str]) -> List[WarpResult]:
+        """Parse warp text output or kubectl logs captures ("-" reads stdin) and add their results"""
+        # Imported here because text_log_parser builds on this module
+        from text_log_parser import parse_text_file
+        
+        parsed = []
+        for path in paths:
+            try:
+                results = parse_text_file(path)
+            except OSError as e:
+                print(f"Error reading text log {path}: {e}")
+                continue
+            self.results.extend(results)
+            parsed.extend(results)
+            print(f"Parsed: {path} ({len(results)} results from text output)")
+        return parsed
+    
+    def _parse_result_source(self, filename: str, load, filtered: bool = False) -> Optional[WarpResult]:
+        """Parse one result file; load() returns its decoded JSON
+        
+        With filtered set (archive members), reports not matching the index filter are skipped.
+        """
+        operation, timestamp, container_id = self.parse_filename(filename)
+        
+        if not all([operation, timestamp, container_id]):
+            print(f"Could not parse filename: {filename}")
+            return None
+        
+        # Parse the JSON data
+        json_data = load()
+        if not json_data:
+            return None
+        
+        if filtered and self.index_filter is not None:
+            # Imported here because results_index builds on this module
+            from results_index import report_matches
+            if not report_matches(self.index_filter, filename, json_data):
+                return None
+        
+        # Extract metrics
+        result = self.extract_metrics_from_report(
+            json_data, operation, container_id, timestamp
+        )
+        
+        if result:
+            self.results.append(result)
+            print(f"Parsed: {filename}")
+        return result
+    
     def group_results_by_job(self) -> Dict[str, List[WarpResult]]:
-        """Group results by job type, parameters, and timestamp (merge concurrent containers)"""
+        """Group results by job type, parameters, and timestamp (merge concurrent containers)
+        
+        Every report section groups the results, so the merged groups are cached until results are added
+        or replaced; callers get their own lists.
+        """
+        if not isinstance(self.results, list):
+            # Imported here to avoid a circular import
+            from spill import group_bounded
+            return group_bounded(self)
+        
+        # The cached list itself is kept, so a replaced list can never be mistaken for it
+        cached = getattr(self, '_grouped', None)
+        if cached is None or cached[0] is not self.results or cached[1] != len(self.results):
+            cached = (self.results, len(self.results), self._group_and_merge())
+            self._grouped = cached
+        return {param_key: list(results) for param_key, results in cached[2].items()}
+    
+    def _group_and_merge(self) -> Dict[str, List[WarpResult]]:
         # First, group by operation, environment, and test parameters
         temp_grouped = {}
         for result in self.results:
@@ -399,6 +870,9 @@ class WarpResultsParser:
         if not results:
             return None
         
+        # Merge in container order, so the merged result does not depend on the order files were read in
+        results = sorted(results, key=lambda r: r.container_id)
+        
         # Use the first result as base
         base_result = results[0]
         
@@ -422,6 +896,20 @@ class WarpResultsParser:
             weighted_p90_latency = sum(r.p90_latency_ms for r in results) / len(results)
             weighted_p99_latency = sum(r.p99_latency_ms for r in results) / len(results)
         
+        # TTFB is only present for GET-like operations; weight it the same way as latency
+        ttfb_results = [r for r in results if r.ttfb_avg_ms is not None]
+        ttfb_weight = sum(r.avg_throughput_obj for r in ttfb_results if r.avg_throughput_obj > 0)
+        
+        def weighted_ttfb(field: str) -> Optional[float]:
+            if not ttfb_results:
+                return None
+            if ttfb_weight > 0:
+                return sum(getattr(r, field) * r.avg_throughput_obj for r in ttfb_results if r.avg_throughput_obj > 0) / ttfb_weight
+            return sum(getattr(r, field) for r in ttfb_results) / len(ttfb_results)
+        
+        ttfb_best_ms = min(r.ttfb_best_ms for r in ttfb_results) if ttfb_results else None
+        ttfb_worst_ms = max(r.ttfb_worst_ms for r in ttfb_results) if ttfb_results else None
+        
         # For min/max values, take the extremes across all containers
         valid_fastest = [r.fastest_req_ms for r in results if r.fastest_req_ms > 0]
         valid_slowest = [r.slowest_req_ms for r in results if r.slowest_req_ms > 0]
@@ -444,6 +932,59 @@ class WarpResultsParser:
                     'obj_per_sec': total_obj
                 })
         
+        # Sum per-second throughput of all containers by wall-clock second
+        per_second = {}
+        for r in results:
+            for segment in r.throughput_per_second or []:
+                merged = per_second.setdefault(segment.get('start', ''), {
+                    'start': segment.get('start', ''), 'mib_per_sec': 0.0, 'obj_per_sec': 0.0, 'errors': 0
+                })
+                merged['mib_per_sec'] += segment.get('mib_per_sec', 0)
+                merged['obj_per_sec'] += segment.get('obj_per_sec', 0)
+                merged['errors'] += segment.get('errors', 0)
+        merged_per_second = [per_second[start] for start in sorted(per_second)]
+        
+        # Latency windows are per client already, so they can simply be combined
+        merged_windows = [w for r in results for w in (r.latency_windows or [])]
+        
+        # Merge the per-operation breakdown of MIXED runs operation by operation
+        merged_breakdown = None
+        if any(r.op_breakdown for r in results):
+            merged_breakdown = {}
+            for op in sorted({op for r in results for op in (r.op_breakdown or {})}):
+                op_results = [r.op_breakdown[op] for r in results if r.op_breakdown and op in r.op_breakdown]
+                merged_breakdown[op] = self._merge_container_results(op_results) if len(op_results) > 1 else op_results[0]
+        
+        # Size buckets of random-size runs merge the same way
+        merged_sizes = None
+        if any(r.size_breakdown for r in results):
+            merged_sizes = {}
+            for log2_size in sorted({size for r in results for size in (r.size_breakdown or {})}):
+                size_results = [r.size_breakdown[log2_size] for r in results
+                                if r.size_breakdown and log2_size in r.size_breakdown]
+                merged_sizes[log2_size] = (self._merge_container_results(size_results) if len(size_results) > 1
+                                           else size_results[0])
+        
+        # Every container spreads its requests over the same endpoints, so their rates add up
+        merged_hosts = {}
+        for r in results:
+            for host, rate in (r.host_throughputs or {}).items():
+                merged_hosts[host] = merged_hosts.get(host, 0.0) + rate
+        
+        start_times = [r.start_time for r in results if r.start_time]
+        end_times = [r.end_time for r in results if r.end_time]
+        
+        # The merged run is steady only where every container was steady
+        evaluated = [r for r in results if r.steady_state is not None]
+        steady_results = [r for r in evaluated if r.steady_state]
+        steady_state = all(r.steady_state for r in evaluated) if evaluated else None
+        
+        # Every container runs its own workers, so busy and configured workers add up
+        total_concurrency = sum(r.concurrency or 0 for r in results)
+        busy = [r.effective_concurrency for r in results if r.effective_concurrency is not None]
+        effective_concurrency = sum(busy) if busy else None
+        utilizations = [r.min_container_utilization for r in results if r.min_container_utilization is not None]
+        
         # Create merged container ID
         merged_container_id = "+".join(r.container_id for r in results)
         
@@ -452,7 +993,7 @@ class WarpResultsParser:
             container_id=merged_container_id,
             timestamp=base_result.timestamp,
             operation=base_result.operation,
-            concurrency=base_result.concurrency,
+            concurrency=total_concurrency,
             duration=base_result.duration,
             avg_throughput_mib=total_throughput_mib,
             avg_throughput_obj=total_throughput_obj,
@@ -463,15 +1004,59 @@ class WarpResultsParser:
             fastest_req_ms=fastest_req_ms,
             slowest_req_ms=slowest_req_ms,
             stddev_ms=base_result.stddev_ms,  # Keep from base result
-            ttfb_avg_ms=base_result.ttfb_avg_ms,
-            ttfb_best_ms=base_result.ttfb_best_ms,
-            ttfb_median_ms=base_result.ttfb_median_ms,
-            ttfb_99th_ms=base_result.ttfb_99th_ms,
+            ttfb_avg_ms=weighted_ttfb('ttfb_avg_ms'),
+            ttfb_best_ms=ttfb_best_ms,
+            ttfb_median_ms=weighted_ttfb('ttfb_median_ms'),
+            ttfb_99th_ms=weighted_ttfb('ttfb_99th_ms'),
+            ttfb_p90_ms=weighted_ttfb('ttfb_p90_ms'),
+            ttfb_worst_ms=ttfb_worst_ms,
             client_throughputs=merged_client_throughputs,
-            throughput_per_second=base_result.throughput_per_second,
-            environment=base_result.environment
+            throughput_per_second=merged_per_second,
+            environment=base_result.environment,
+            obj_size=base_result.obj_size,
+            concurrent_requests=base_result.concurrent_requests,
+            test_params=base_result.test_params,
+            latency_windows=merged_windows,
+            error_count=sum(r.error_count for r in results),
+            start_time=min(start_times) if start_times else "",
+            end_time=max(end_times) if end_times else "",
+            op_breakdown=merged_breakdown,
+            size_breakdown=merged_sizes,
+            steady_state=steady_state,
+            steady_start=max(r.steady_start for r in steady_results) if steady_state else "",
+            steady_end=min(r.steady_end for r in steady_results) if steady_state else "",
+            warmup_trimmed_s=max((r.warmup_trimmed_s for r in evaluated), default=0.0),
+            cooldown_trimmed_s=max((r.cooldown_trimmed_s for r in evaluated), default=0.0),
+            effective_concurrency=effective_concurrency,
+            worker_utilization=(effective_concurrency / total_concurrency
+                                if effective_concurrency is not None and total_concurrency else None),
+            min_container_utilization=min(utilizations) if utilizations else None,
+            hosts=sorted({host for r in results for host in (r.hosts or [])}),
+            host_throughputs=merged_hosts
         )
     
+    def merge_run_fragments(self, results: List[WarpResult],
+                            tolerance_s: float = RUN_FRAGMENT_TOLERANCE_S) -> List[WarpResult]:
+        """Merge results of one job whose timestamps lie within tolerance_s seconds of each other
+        
+        Grouping merges containers with the same timestamp only, so a run whose containers started
+        in different seconds shows up as several smaller runs. Timestamps that are not wall-clock
+        times (numbered log streams) are never merged.
+        """
+        runs = []
+        for result in sorted(results, key=lambda r: r.timestamp):
+            try:
+                start = datetime.strptime(result.timestamp, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                runs.append((None, [result]))
+                continue
+            if runs and runs[-1][0] is not None and (start - runs[-1][0]).total_seconds() <= tolerance_s:
+                runs[-1][1].append(result)
+            else:
+                runs.append((start, [result]))
+        return [self._merge_container_results(fragments) if len(fragments) > 1 else fragments[0]
+                for _, fragments in runs]
+    
     def calculate_statistics(self, results: List[WarpResult]) -> Dict[str, Any]:
         """Calculate statistics for a group of results"""
         if not results:
@@ -482,7 +1067,7 @@ class WarpResultsParser:
         latencies_avg = [r.avg_latency_ms for r in results]
         latencies_p99 = [r.p99_latency_ms for r in results]
         
-        return {
+        stats = {
             'count': len(results),
             'throughput_mib': {
                 'mean': sum(throughputs_mib) / len(throughputs_mib),
@@ -509,6 +1094,36 @@ class WarpResultsParser:
                 'stddev': self._calculate_stddev(latencies_p99)
             }
         }
+        
+        # TTFB and transfer time are tracked separately so lookup and bandwidth regressions can be told apart
+        optional_metrics = {
+            'ttfb_avg': 'ttfb_avg_ms',
+            'ttfb_p99': 'ttfb_99th_ms',
+            'transfer_avg': 'transfer_avg_ms',
+            'transfer_p99': 'transfer_99th_ms',
+            'worker_utilization': 'worker_utilization',
+        }
+        for stat_name, attr in optional_metrics.items():
+            values = [getattr(r, attr) for r in results if getattr(r, attr) is not None]
+            if values:
+                stats[stat_name] = {
+                    'mean': sum(values) / len(values),
+                    'min': min(values),
+                    'max': max(values),
+                    'stddev': self._calculate_stddev(values)
+                }
+        
+        # Steady-state detection outcome of the runs behind these statistics
+        evaluated = [r for r in results if r.steady_state is not None]
+        if evaluated:
+            stats['steady_state'] = {
+                'reached': sum(1 for r in evaluated if r.steady_state),
+                'not_reached': sum(1 for r in evaluated if not r.steady_state),
+                'warmup_s': sum(r.warmup_trimmed_s for r in evaluated) / len(evaluated),
+                'cooldown_s': sum(r.cooldown_trimmed_s for r in evaluated) / len(evaluated),
+            }
+        
+        return stats
     
     def _calculate_stddev(self, values: List[float]) -> float:
         """Calculate standard deviation"""
@@ -522,7 +1137,7 @@ class WarpResultsParser:
     def compare_prod_vs_test(self) -> List[ComparisonResult]:
         """Compare PROD vs TEST results for each operation with matching parameters"""
         comparisons = []
-        grouped_results = self.group_results_by_job()
+        grouped_results = self.group_valid_results()
         
         # Find parameter combinations that have both PROD and TEST results
         param_combinations = set()
@@ -536,7 +1151,7 @@ class WarpResultsParser:
                 param_combo = f"{operation}_{obj_size}_{concurrency}"
                 param_combinations.add(param_combo)
         
-        for param_combo in param_combinations:
+        for param_combo in sorted(param_combinations):
             # Find PROD and TEST keys for this parameter combination
             prod_key = None
             test_key = None
@@ -568,9 +1183,25 @@ class WarpResultsParser:
                     else:
                         latency_diff = 0.0  # Can't calculate percentage if PROD is 0
                     
-                    # Determine if there are regressions (thresholds can be adjusted)
-                    throughput_regression = throughput_diff < -5.0  # 5% degradation
-                    latency_regression = latency_diff > 10.0  # 10% increase
+                    # TTFB and transfer time only exist when both sides report first_byte data
+                    ttfb_diff = self._percent_diff(prod_stats, test_stats, 'ttfb_avg')
+                    transfer_diff = self._percent_diff(prod_stats, test_stats, 'transfer_avg')
+                    
+                    p99_diff = self._percent_diff(prod_stats, test_stats, 'latency_p99') or 0.0
+                    
+                    # Determine if there are regressions (thresholds come from comparison_config.yaml)
+                    throughput_regression = throughput_diff < -self.config.throughput_degradation_percent
+                    latency_regression = latency_diff > self.config.latency_increase_percent
+                    p99_regression = p99_diff > self.config.p99_latency_increase_percent
+                    
+                    # SLO compliance over every window/segment (imported here to avoid a circular import)
+                    from slo_analysis import compare_slos
+                    slo_compliance, slo_regression = compare_slos(self, prod_key, grouped_results[prod_key],
+                                                                  test_key, grouped_results[test_key])
+                    
+                    # What the throughput change consists of (imported here to avoid a circular import)
+                    from root_cause import decompose_comparison
+                    root_cause = decompose_comparison(self, grouped_results[prod_key], grouped_results[test_key])
                     
                     # Determine significance level
                     significance = self._determine_significance(prod_stats, test_stats)
@@ -588,12 +1219,55 @@ class WarpResultsParser:
                         latency_diff_percent=latency_diff,
                         throughput_regression=throughput_regression,
                         latency_regression=latency_regression,
-                        significance_level=significance
+                        significance_level=significance,
+                        p99_diff_percent=p99_diff,
+                        p99_regression=p99_regression,
+                        slo_compliance=slo_compliance,
+                        slo_regression=slo_regression,
+                        root_cause=root_cause,
+                        ttfb_diff_percent=ttfb_diff,
+                        transfer_diff_percent=transfer_diff
                     )
                     comparisons.append(comparison)
         
         return comparisons
     
+    def group_valid_results(self) -> Dict[str, List[WarpResult]]:
+        """Grouped results without the runs that failed the saturation check (if configured to exclude them)"""
+        grouped_results = self.group_results_by_job()
+        # Client-limited or inconsistent runs say nothing about the storage, so keep them out of verdicts
+        if self.config.exclude_invalid_runs:
+            excluded = {(key, r.timestamp) for key, _, r in self.invalid_runs(grouped_results)}
+            grouped_results = {key: [r for r in results if (key, r.timestamp) not in excluded]
+                               for key, results in grouped_results.items()}
+        return grouped_results
+    
+    def invalid_runs(self, grouped_results: Optional[Dict[str, List[WarpResult]]] = None
+                     ) -> List[Tuple[str, str, WarpResult]]:
+        """(job key, reason, result) of every run failing the Little's law saturation check"""
+        # Imported here to avoid a circular import
+        from saturation_analysis import invalid_reason
+        
+        if grouped_results is None:
+            grouped_results = self.group_results_by_job()
+        invalid = []
+        for job_key, results in grouped_results.items():
+            for result in results:
+                reason = invalid_reason(result, self.config.min_worker_utilization, self.config.max_worker_utilization)
+                if reason:
+                    invalid.append((job_key, reason, result))
+        return invalid
+    
+    def _percent_diff(self, prod_stats: Dict[str, Any], test_stats: Dict[str, Any], metric: str) -> Optional[float]:
+        """Percentage change of a metric mean from PROD to TEST, or None if either side lacks it"""
+        if metric not in prod_stats or metric not in test_stats:
+            return None
+        prod_value = prod_stats[metric]['mean']
+        test_value = test_stats[metric]['mean']
+        if prod_value <= 0:
+            return 0.0
+        return ((test_value - prod_value) / prod_value) * 100
+    
     def _determine_significance(self, prod_stats: Dict[str, Any], test_stats: Dict[str, Any]) -> str:
         """Determine significance level of differences"""
         # Calculate coefficient of variation for both datasets
@@ -610,9 +1284,11 @@ class WarpResultsParser:
             throughput_diff = 0.0  # Can't calculate relative difference if PROD is 0
         
         # Determine significance based on difference magnitude and variability
-        if throughput_diff > 0.2 or (prod_cv + test_cv) > 0.3:  # 20% difference or high variability
+        config = self.config
+        combined_cv = prod_cv + test_cv
+        if throughput_diff * 100 > config.high_throughput_diff_percent or combined_cv > config.high_combined_cv:
             return "HIGH"
-        elif throughput_diff > 0.1 or (prod_cv + test_cv) > 0.15:  # 10% difference or moderate variability
+        elif throughput_diff * 100 > config.medium_throughput_diff_percent or combined_cv > config.medium_combined_cv:
             return "MEDIUM"
         else:
             return "LOW"
@@ -640,7 +1316,7 @@ class WarpResultsParser:
                 f.write("|-----------|-------------------|----------------|--------|--------------|\n")
                 
                 for comp in comparisons:
-                    status = "⚠️ REGRESSION" if comp.throughput_regression or comp.latency_regression else "✅ PASS"
+                    status = "⚠️ REGRESSION" if comp.has_regression else "✅ PASS"
                     significance_emoji = {"HIGH": "🔴", "MEDIUM": "🟡", "LOW": "🟢"}[comp.significance_level]
                     
                     f.write(f"| {comp.operation} | {comp.throughput_diff_percent:+.1f}% | "
@@ -649,8 +1325,10 @@ class WarpResultsParser:
                 f.write("\n")
                 
                 # Regression Analysis
-                regressions = [c for c in comparisons if c.throughput_regression or c.latency_regression]
+                regressions = [c for c in comparisons if c.has_regression]
                 if regressions:
+                    # Imported here to avoid a circular import
+                    from root_cause import main_driver
                     f.write("### ⚠️ Detected Regressions\n\n")
                     for reg in regressions:
                         f.write(f"**{reg.operation}**:\n")
@@ -658,6 +1336,16 @@ class WarpResultsParser:
                             f.write(f"- Throughput decreased by {abs(reg.throughput_diff_percent):.1f}%\n")
                         if reg.latency_regression:
                             f.write(f"- Latency increased by {reg.latency_diff_percent:.1f}%\n")
+                        if reg.p99_regression:
+                            f.write(f"- P99 latency increased by {reg.p99_diff_percent:.1f}%\n")
+                        for name, slo in (reg.slo_compliance or {}).items():
+                            if slo['regression']:
+                                f.write(f"- SLO {name} missed: {slo['test_compliance_percent']:.2f}% compliant "
+                                        f"(PROD {slo['prod_compliance_percent']:.2f}%, "
+                                        f"objective {slo['objective_percent']:g}%)\n")
+                        driver = main_driver(reg)
+                        if driver:
+                            f.write(f"- Main driver: {driver}\n")
                         f.write(f"- Significance: {reg.significance_level}\n\n")
             else:
                 f.write("No PROD vs TEST comparisons available (missing either PROD or TEST data)\n\n")
@@ -676,6 +1364,68 @@ class WarpResultsParser:
             
             f.write("\n")
             
+            # Steady-state detection (warm-up and cool-down are excluded from all statistics)
+            steady_rows = []
+            unsteady_runs = []
+            for job_key, results in grouped_results.items():
+                evaluated = [r for r in results if r.steady_state is not None]
+                if not evaluated:
+                    continue
+                steady = [r for r in evaluated if r.steady_state]
+                windows = ", ".join(f"{r.steady_start[11:19]}-{r.steady_end[11:19]}" for r in steady)
+                steady_rows.append(f"| {job_key} | {len(steady)}/{len(evaluated)} | "
+                                   f"{sum(r.warmup_trimmed_s for r in evaluated) / len(evaluated):.0f} | "
+                                   f"{sum(r.cooldown_trimmed_s for r in evaluated) / len(evaluated):.0f} | "
+                                   f"{windows or '-'} |\n")
+                unsteady_runs.extend(f"{job_key} at {r.timestamp}" for r in evaluated if not r.steady_state)
+            
+            if steady_rows:
+                f.write("## Steady-State Detection\n\n")
+                f.write("Throughput and latency statistics are computed over the steady part of each run only; "
+                        "warm-up and cool-down are trimmed.\n\n")
+                f.write("| Job Type | Steady Runs | Avg Warm-up Trimmed (s) | Avg Cool-down Trimmed (s) | Steady Window (UTC) |\n")
+                f.write("|----------|-------------|-------------------------|---------------------------|---------------------|\n")
+                for row in steady_rows:
+                    f.write(row)
+                f.write("\n")
+                if unsteady_runs:
+                    f.write("**⚠️ No steady state reached** (statistics cover the whole run):\n\n")
+                    for run in unsteady_runs:
+                        f.write(f"- {run}\n")
+                    f.write("\n")
+            
+            # Little's law check of the warp clients (imported here to avoid a circular import)
+            from saturation_analysis import write_saturation_section
+            write_saturation_section(f, self)
+            
+            # SLO compliance per window/segment (imported here to avoid a circular import)
+            from slo_analysis import write_slo_section
+            write_slo_section(f, self, comparisons)
+            
+            # Trends and periodic dips inside long runs (imported here to avoid a circular import)
+            from drift_analysis import write_drift_section
+            write_drift_section(f, self)
+            
+            # Load of one operation vs latency of another in mixed runs (imported here to avoid a circular import)
+            from interference_analysis import write_interference_section
+            write_interference_section(f, self)
+            
+            # Containers, clients and minutes behind the latency tail (imported here to avoid a circular import)
+            from tail_attribution import write_tail_section
+            write_tail_section(f, self)
+            
+            # Level shifts across the run history (imported here to avoid a circular import)
+            from change_points import write_change_point_section
+            write_change_point_section(f, self)
+            
+            # Run-to-run repeatability (imported here to avoid a circular import)
+            from run_planner import write_planning_section
+            write_planning_section(f, self)
+            
+            # Scaling analysis across concurrency sweeps (imported here to avoid a circular import)
+            from scaling_analysis import write_scaling_section
+            write_scaling_section(f, self)
+            
             # PROD vs TEST Detailed Comparisons
             if comparisons:
                 f.write("## PROD vs TEST Detailed Comparisons\n\n")
@@ -697,9 +1447,24 @@ class WarpResultsParser:
                            f"{comp.throughput_diff_percent:+.1f}% |\n")
                     f.write(f"| Latency (ms) | {prod_latency:.2f} | {test_latency:.2f} | "
                            f"{comp.latency_diff_percent:+.1f}% |\n")
+                    f.write(f"| P99 Latency (ms) | {comp.prod_stats['latency_p99']['mean']:.2f} | "
+                           f"{comp.test_stats['latency_p99']['mean']:.2f} | "
+                           f"{comp.p99_diff_percent:+.1f}% |\n")
+                    if comp.ttfb_diff_percent is not None:
+                        f.write(f"| TTFB (ms) | {comp.prod_stats['ttfb_avg']['mean']:.2f} | "
+                               f"{comp.test_stats['ttfb_avg']['mean']:.2f} | "
+                               f"{comp.ttfb_diff_percent:+.1f}% |\n")
+                    if comp.transfer_diff_percent is not None:
+                        f.write(f"| Transfer Time (ms) | {comp.prod_stats['transfer_avg']['mean']:.2f} | "
+                               f"{comp.test_stats['transfer_avg']['mean']:.2f} | "
+                               f"{comp.transfer_diff_percent:+.1f}% |\n")
                     
                     f.write("\n")
                     
+                    # Throughput change split into factors (imported here to avoid a circular import)
+                    from root_cause import write_root_cause
+                    write_root_cause(f, comp)
+                    
                     # Statistical analysis
                     f.write("#### Statistical Analysis\n\n")
                     f.write(f"- **Significance Level**: {comp.significance_level}\n")
@@ -714,6 +1479,10 @@ class WarpResultsParser:
                         f.write("- ⚠️ **Throughput regression detected** - Investigate performance degradation\n")
                     if comp.latency_regression:
                         f.write("- ⚠️ **Latency regression detected** - Check for bottlenecks or configuration issues\n")
+                    if comp.p99_regression:
+                        f.write("- ⚠️ **P99 latency regression detected** - Look for tail latency outliers\n")
+                    if comp.slo_regression:
+                        f.write("- ⚠️ **SLO regression detected** - See the worst violating intervals under SLO Compliance\n")
                     if comp.significance_level == "HIGH":
                         f.write("- 🔴 **High significance** - Changes are statistically significant\n")
                     elif comp.significance_level == "MEDIUM":
@@ -750,7 +1519,21 @@ class WarpResultsParser:
                     f.write(f"- **P99 Latency (ms)**: Mean={stats['latency_p99']['mean']:.2f}, "
                            f"Min={stats['latency_p99']['min']:.2f}, "
                            f"Max={stats['latency_p99']['max']:.2f}, "
-                           f"StdDev={stats['latency_p99']['stddev']:.2f}\n\n")
+                           f"StdDev={stats['latency_p99']['stddev']:.2f}\n")
+                    if 'ttfb_avg' in stats:
+                        f.write(f"- **TTFB (ms)**: Mean={stats['ttfb_avg']['mean']:.2f}, "
+                               f"Min={stats['ttfb_avg']['min']:.2f}, "
+                               f"Max={stats['ttfb_avg']['max']:.2f}, "
+                               f"StdDev={stats['ttfb_avg']['stddev']:.2f}\n")
+                        f.write(f"- **P99 TTFB (ms)**: Mean={stats['ttfb_p99']['mean']:.2f}, "
+                               f"Min={stats['ttfb_p99']['min']:.2f}, "
+                               f"Max={stats['ttfb_p99']['max']:.2f}, "
+                               f"StdDev={stats['ttfb_p99']['stddev']:.2f}\n")
+                        f.write(f"- **Transfer Time (ms)**: Mean={stats['transfer_avg']['mean']:.2f}, "
+                               f"Min={stats['transfer_avg']['min']:.2f}, "
+                               f"Max={stats['transfer_avg']['max']:.2f}, "
+                               f"StdDev={stats['transfer_avg']['stddev']:.2f}\n")
+                    f.write("\n")
                 
                 # Individual results table
                 f.write("### Individual Results\n\n")
@@ -787,19 +1570,168 @@ class WarpResultsParser:
                     f.write("\n")
         
         print(f"Report generated: {output_file}")
+    
+    def comparison_summary(self, comparisons: Optional[List[ComparisonResult]] = None) -> Dict[str, Any]:
+        """Machine-readable PROD vs TEST comparisons: every metric, threshold and verdict"""
+        if comparisons is None:
+            comparisons = self.compare_prod_vs_test()
+        config = self.config
+        
+        def metric(name: str, comp: ComparisonResult, diff: Optional[float],
+                   threshold: Optional[float], regression: Optional[bool]) -> Optional[Dict[str, Any]]:
+            if name not in comp.prod_stats or name not in comp.test_stats:
+                return None
+            return {
+                'prod': comp.prod_stats[name]['mean'],
+                'test': comp.test_stats[name]['mean'],
+                'prod_stddev': comp.prod_stats[name]['stddev'],
+                'test_stddev': comp.test_stats[name]['stddev'],
+                'diff_percent': diff,
+                'threshold_percent': threshold,
+                'regression': regression,
+            }
+        
+        entries = []
+        for comp in comparisons:
+            op, _, rest = comp.operation.partition(' (')
+            params = dict(item.split(':', 1) for item in rest.rstrip(')').split(', ') if ':' in item)
+            metrics = {
+                # Throughput regresses when it drops by more than the threshold, latencies when they rise
+                'throughput_mib': metric('throughput_mib', comp, comp.throughput_diff_percent,
+                                         -config.throughput_degradation_percent, comp.throughput_regression),
+                'throughput_obj': metric('throughput_obj', comp,
+                                         self._percent_diff(comp.prod_stats, comp.test_stats, 'throughput_obj'),
+                                         None, None),
+                'latency_avg': metric('latency_avg', comp, comp.latency_diff_percent,
+                                      config.latency_increase_percent, comp.latency_regression),
+                'latency_p99': metric('latency_p99', comp, comp.p99_diff_percent,
+                                      config.p99_latency_increase_percent, comp.p99_regression),
+                'ttfb_avg': metric('ttfb_avg', comp, comp.ttfb_diff_percent, None, None),
+                'transfer_avg': metric('transfer_avg', comp, comp.transfer_diff_percent, None, None),
+                'worker_utilization': metric('worker_utilization', comp,
+                                             self._percent_diff(comp.prod_stats, comp.test_stats, 'worker_utilization'),
+                                             None, None),
+            }
+            entries.append({
+                'operation': op,
+                'obj_size': params.get('obj', '')[len('obj'):],
+                'concurrency': params.get('concurrent', '')[len('concurrent'):],
+                'label': comp.operation,
+                'prod_runs': comp.prod_stats['count'],
+                'test_runs': comp.test_stats['count'],
+                'metrics': {name: value for name, value in metrics.items() if value is not None},
+                'significance': comp.significance_level,
+                'slos': comp.slo_compliance or {},
+                'root_cause': comp.root_cause,
+                'regressions': ([name for name, value in metrics.items() if value and value['regression']]
+                                + [f"slo:{name}" for name, slo in (comp.slo_compliance or {}).items()
+                                   if slo['regression']]),
+                'verdict': "REGRESSION" if comp.has_regression else "PASS",
+            })
+        
+        # Imported here to avoid a circular import
+        from drift_analysis import drift_summary
+        from interference_analysis import interference_summary
+        from change_points import change_point_summary
+        from tail_attribution import tail_summary
+        from slo_analysis import slo_summary
+        
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'results_parsed': len(self.results),
+            'thresholds': asdict(config),
+            'comparisons': entries,
+            'regression_count': sum(1 for entry in entries if entry['verdict'] == "REGRESSION"),
+            'invalid_runs': [
+                {'job': job_key, 'timestamp': result.timestamp, 'reason': reason,
+                 'excluded': config.exclude_invalid_runs}
+                for job_key, reason, result in self.invalid_runs()
+            ],
+            'slos': slo_summary(self),
+            'drift': drift_summary(self),
+            'interference': interference_summary(self),
+            'change_points': change_point_summary(self),
+            'tail_attribution': tail_summary(self),
+        }
+    
+    def generate_json_report(self, output_file: str = "warp_comparison_report.json"):
+        """Write the comparison summary as JSON"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.comparison_summary(), f, indent=2)
+            f.write("\n")
+        print(f"Report generated: {output_file}")
 
 
 def main():
+    # Imported here because results_index builds on this module
+    from results_index import ResultsIndex, add_filter_arguments, filter_from_args, print_listing
+    
     parser = argparse.ArgumentParser(description='Parse warp benchmark results and generate comparison report')
     parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
     parser.add_argument('--output', default='warp_comparison_report.md', help='Output report file')
+    parser.add_argument('--format', choices=['markdown', 'html', 'json'], default='markdown',
+                        help='Report format (html adds interactive PROD vs TEST time series charts)')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    parser.add_argument('--no-steady-state', action='store_true',
+                        help='Compute statistics over the whole run instead of the detected steady window')
+    parser.add_argument('--archive', action='append', default=[],
+                        help='Additional tar/tar.gz/tar.zst/zip archive or .warpstore of results to read (repeatable)')
+    parser.add_argument('--text-log', action='append', default=[],
+                        help='Warp text output or kubectl logs capture to read, "-" for stdin (repeatable)')
+    parser.add_argument('--max-memory',
+                        help='Approximate memory budget for parsed results (e.g. 2G, 512MiB); '
+                             'results beyond it are spilled to disk')
+    parser.add_argument('--spill-dir',
+                        help='Directory for the --max-memory spill file, created if missing (default: system temp)')
+    parser.add_argument('--sample', type=float, metavar='FRACTION',
+                        help='Quick look: analyze this fraction of the files per group and report estimates with '
+                             'confidence intervals instead of the full report (see quick_look.py)')
+    parser.add_argument('--sample-stride', type=int, default=1,
+                        help='With --sample, keep only every n-th segment (and proportionally fewer windows) of long runs')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    add_filter_arguments(parser)
     
     args = parser.parse_args()
     
+    # Select files from the index when filtering or listing, so only matching files get decompressed
+    result_files = None
+    index_filter = filter_from_args(args)
+    if args.sample is not None:
+        if not 0 < args.sample <= 1 or args.sample_stride < 1:
+            parser.error("--sample must be in (0, 1] and --sample-stride at least 1")
+        # Imported here to avoid a circular import
+        from quick_look import quick_look, write_quick_look_report
+        index = ResultsIndex(args.results_dir)
+        index.refresh(rebuild=args.rebuild_index)
+        config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+        look = quick_look(args.results_dir, index.select(index_filter), config, args.sample, args.sample_stride,
+                          trim_steady_state=not args.no_steady_state)
+        write_quick_look_report(look, args.output, config)
+        print(f"Quick look written to {args.output} ({look.files_sampled}/{look.files_total} files sampled)")
+        return
+    if (args.list or args.rebuild_index or not index_filter.is_empty()) and not is_archive(Path(args.results_dir)):
+        index = ResultsIndex(args.results_dir)
+        index.refresh(rebuild=args.rebuild_index)
+        entries = index.select(index_filter)
+        if args.list:
+            print_listing(entries)
+            return
+        result_files = index.paths(entries)
+    
     # Create parser and parse results
-    warp_parser = WarpResultsParser(args.results_dir)
-    results = warp_parser.find_and_parse_results()
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    max_memory = None
+    if args.max_memory:
+        max_memory = parse_obj_size(args.max_memory)
+        if not max_memory:
+            parser.error(f"invalid --max-memory: {args.max_memory}")
+    warp_parser = WarpResultsParser(args.results_dir, archives=args.archive, config=config,
+                                    trim_steady_state=not args.no_steady_state,
+                                    max_memory=max_memory, spill_dir=args.spill_dir, index_filter=index_filter)
+    results = warp_parser.find_and_parse_results(result_files)
+    if args.text_log:
+        warp_parser.parse_text_logs(args.text_log)
+        results = warp_parser.results
     
     if args.verbose:
         print(f"\nParsed {len(results)} results:")
@@ -808,7 +1740,25 @@ def main():
                   f"Throughput: {result.avg_throughput_mib:.2f} MiB/s")
     
     # Generate report
-    warp_parser.generate_comparison_report(args.output)
+    if args.format == 'html':
+        from html_report import generate_html_report
+        output = args.output
+        if output.endswith('.md'):
+            output = output[:-len('.md')] + '.html'
+        generate_html_report(warp_parser, output)
+    elif args.format == 'json':
+        output = args.output
+        if output.endswith('.md'):
+            output = output[:-len('.md')] + '.json'
+        warp_parser.generate_json_report(output)
+    else:
+        warp_parser.generate_comparison_report(args.output)
+    
+    if max_memory:
+        budget = warp_parser.results.budget
+        print(f"Memory budget {args.max_memory}: spilled {budget.spilled_bytes / (1024 * 1024):.1f} MiB "
+              f"to disk in {budget.spill_count} round(s)")
+        budget.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Sampled Quick-Look Report
+
+This module gives a first read of a large sweep in seconds by analyzing a
+deterministic subset instead of every file. Files are picked per job group
+from the results index (which only reads report headers), ranked by a hash of
+their names so the same files are chosen on every run and adding files does
+not reshuffle the sample; only the sampled files are decoded. Within each sampled file of a long run only every n-th
+throughput segment (and proportionally fewer of the 10s latency windows) is
+kept (--stride) before the usual metric extraction, so steady-state detection
+and window statistics see a systematic subsample.
+
+Every group metric comes with a 95% confidence interval from two-stage
+sampling: runs are the primary units and their containers the secondary ones
+(both with finite population correction), plus the within-file error of the
+strided segments and windows. A run's throughput is the mean sampled
+container rate times its container count; latencies are throughput-weighted
+like merged runs. A PROD vs TEST metric is
+a regression or OK only when its whole interval lies beyond or within the
+configured threshold; otherwise, or when a group has fewer sampled files than
+configured, the verdict is inconclusive and a full parse is needed.
+"""
+
+import argparse
+import hashlib
+import math
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import (WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE,
+                                STORE_MEMBER_SEPARATOR, parse_warp_time)
+
+
+DEFAULT_FRACTION = 0.25
+DEFAULT_STRIDE = 1
+WINDOW_SEGMENTS = 10  # warp request windows span about this many throughput segments
+MIN_STRIDED_SEGMENTS = 30  # thinned runs keep at least this many segments for steady-state detection
+# Two-sided 97.5% quantiles of Student's t for 1-30 degrees of freedom; the normal quantile beyond
+T_975 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+Z_975 = 1.960
+
+METRICS = (
+    # name, label, WarpResult attribute, series field, higher is worse
+    ('throughput_mib', 'Throughput (MiB/s)', 'avg_throughput_mib', 'mib_per_sec', False),
+    ('latency_avg', 'Avg latency (ms)', 'avg_latency_ms', 'avg_ms', True),
+    ('latency_p99', 'P99 latency (ms)', 'p99_latency_ms', 'p99_ms', True),
+)
+
+
+def t_quantile(df: int) -> float:
+    return T_975[df - 1] if 1 <= df <= len(T_975) else Z_975
+
+
+@dataclass
+class Estimate:
+    """Sampled estimate of a group metric with its 95% confidence interval"""
+    value: float
+    standard_error: float
+    df: int
+
+    @property
+    def half_width(self) -> float:
+        return t_quantile(self.df) * self.standard_error
+
+    @property
+    def relative_half_width_percent(self) -> float:
+        if not self.half_width:
+            return 0.0
+        return self.half_width / abs(self.value) * 100 if self.value else float('inf')
+
+
+@dataclass
+class SampledFile:
+    """Metrics of one sampled file with the within-file standard error of the strided sample"""
+    path: str
+    timestamp: str
+    result: WarpResult
+    within_se: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class GroupEstimate:
+    job_key: str
+    files_total: int
+    files_sampled: int
+    runs: int
+    containers_per_run: float
+    metrics: Dict[str, Estimate] = field(default_factory=dict)
+    too_small: str = ""  # why the sample cannot support a verdict
+
+
+@dataclass
+class MetricVerdict:
+    metric: str
+    diff_percent: float
+    low_percent: float
+    high_percent: float
+    threshold_percent: float
+    verdict: str  # REGRESSION, OK or INCONCLUSIVE
+
+
+@dataclass
+class QuickComparison:
+    operation: str
+    prod: GroupEstimate
+    test: GroupEstimate
+    metrics: List[MetricVerdict]
+
+    @property
+    def verdict(self) -> str:
+        verdicts = {m.verdict for m in self.metrics}
+        if 'REGRESSION' in verdicts:
+            return 'REGRESSION'
+        if self.prod.too_small or self.test.too_small or 'INCONCLUSIVE' in verdicts or not verdicts:
+            return 'INCONCLUSIVE'
+        return 'OK'
+
+
+def group_key(entry) -> str:
+    """Job key of an index entry, matching WarpResultsParser._create_param_key"""
+    return (f"{entry.operation}_{entry.environment}_obj{entry.obj_size or 'unknown'}"
+            f"_concurrent{entry.concurrency if entry.concurrency is not None else 'unknown'}")
+
+
+def _rank(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def select_sample(entries: List[Any], fraction: float, min_files: int) -> Dict[str, Tuple[List[Any], List[Any]]]:
+    """{job key: (all entries, sampled entries)}
+
+    Runs and the files within them are ranked by a hash of their timestamp and file id (stable
+    when results are moved or packed into a store), and files are taken two per run in turn:
+    the sample spreads over as many runs as its size allows while still showing how much the
+    containers of a run differ.
+    """
+    groups: Dict[str, List[Any]] = defaultdict(list)
+    for entry in entries:
+        groups[group_key(entry)].append(entry)
+    selection = {}
+    for key, members in sorted(groups.items()):
+        count = min(len(members), max(min_files, math.ceil(fraction * len(members))))
+        runs: Dict[str, List[Any]] = defaultdict(list)
+        for entry in members:
+            runs[entry.timestamp].append(entry)
+        queues = [sorted(files, key=lambda e: _rank(e.file_id)) for _, files in
+                  sorted(runs.items(), key=lambda item: _rank(f"{key}@{item[0]}"))]
+        chosen = []
+        for depth in range(0, max(len(files) for files in queues), 2):
+            for files in queues:
+                chosen += files[depth:depth + 2]
+        selection[key] = (members, sorted(chosen[:count], key=lambda e: (e.timestamp, e.path)))
+    return selection
+
+
+def thin_report(report: Dict[str, Any], stride: int) -> Tuple[int, int]:
+    """Keep every n-th throughput segment and latency window of every section (in place)
+
+    Windows span about WINDOW_SEGMENTS segments, so they are thinned proportionally less.
+    The middle element of every block is kept, so warm-up is not over-represented. Runs
+    too short for the thinned series to support steady-state detection are kept whole.
+    Returns the (segment, window) strides applied.
+    """
+    sections = [s for s in [report.get('total')] + list((report.get('by_op_type') or {}).values())
+                if isinstance(s, dict)]
+    longest = max((len(((s.get('throughput') or {}).get('segmented') or {}).get('segments') or [])
+                   for s in sections), default=0)
+    if longest // stride < MIN_STRIDED_SEGMENTS:
+        return 1, 1
+    window_stride = max(stride // WINDOW_SEGMENTS, 1)
+    for section in sections:
+        segmented = (section.get('throughput') or {}).get('segmented')
+        if isinstance(segmented, dict) and segmented.get('segments'):
+            segmented['segments'] = segmented['segments'][stride // 2::stride]
+            segmented['segment_duration_millis'] = (segmented.get('segment_duration_millis') or 1000) * stride
+        by_client = section.get('requests_by_client')
+        if isinstance(by_client, dict) and window_stride > 1:
+            section['requests_by_client'] = {
+                client: requests[window_stride // 2::window_stride] if isinstance(requests, list) else requests
+                for client, requests in by_client.items()}
+    return stride, window_stride
+
+
+def _standard_error(values: List[float], fpc: float) -> float:
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    return math.sqrt(variance / len(values) * fpc)
+
+
+def within_file_errors(result: WarpResult, segment_stride: int, window_stride: int) -> Dict[str, float]:
+    """Standard error of each metric caused by keeping every n-th segment and window"""
+    if segment_stride <= 1 and window_stride <= 1:
+        return {name: 0.0 for name, *_ in METRICS}
+    start = parse_warp_time(result.steady_start) if result.steady_state else None
+    end = parse_warp_time(result.steady_end) if result.steady_state else None
+
+    def in_window(item: Dict[str, Any]) -> bool:
+        when = parse_warp_time(item.get('start', ''))
+        return bool(when) and (start is None or start <= when < end)
+
+    parts = list((result.op_breakdown or {}).values()) or [result]
+    errors = {}
+    for name, _, _, key, _ in METRICS:
+        if name.startswith('throughput'):
+            # Without a steady window the rate comes from the exact report totals
+            if not result.steady_state or segment_stride <= 1:
+                errors[name] = 0.0
+                continue
+            per_second: Dict[str, float] = defaultdict(float)
+            for part in parts:
+                for segment in part.throughput_per_second or []:
+                    if in_window(segment):
+                        per_second[segment['start']] += segment.get(key, 0) or 0
+            errors[name] = _standard_error(list(per_second.values()), 1.0 - 1.0 / segment_stride)
+        else:
+            values = [w.get(key) or 0 for part in parts for w in part.latency_windows or []
+                      if (w.get('requests') or 0) > 0 and in_window(w)]
+            errors[name] = _standard_error(values, 1.0 - 1.0 / window_stride)
+    return errors
+
+
+def load_sampled_file(parser: WarpResultsParser, results_dir, entry, stride: int) -> Optional[SampledFile]:
+    """Decode one sampled file, thin it and extract its metrics"""
+    operation, timestamp, container_id = parser.parse_filename(entry.path.rsplit('/', 1)[-1])
+    if not operation:
+        return None
+    store, separator, member = entry.path.partition(STORE_MEMBER_SEPARATOR)
+    if separator:
+        # Imported here to avoid a circular import
+        from results_store import ResultStore
+        report = parser.parse_report_bytes(ResultStore(results_dir / store).read(member), entry.path)
+    else:
+        report = parser.parse_json_zst_file(results_dir / entry.path)
+    if not report:
+        return None
+    strides = thin_report(report, stride) if stride > 1 else (1, 1)
+    result = parser.extract_metrics_from_report(report, operation, container_id, timestamp)
+    if not result:
+        return None
+    return SampledFile(entry.path, timestamp, result, within_file_errors(result, *strides))
+
+
+def _variance(values: List[float]) -> Optional[float]:
+    if len(values) < 2:
+        return None
+    mean = sum(values) / len(values)
+    return sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+
+
+def _run_values(name: str, attr: str, files: List[SampledFile], weights_mean: float
+                ) -> Tuple[float, List[float], List[float]]:
+    """(run value, linearized container values, their within-file errors) of one run's sampled containers"""
+    values = [getattr(s.result, attr) for s in files]
+    within = [s.within_se.get(name, 0.0) for s in files]
+    if name.startswith('throughput') or weights_mean <= 0:
+        return sum(values) / len(values), values, within
+    # Merged runs weight container latencies by their throughput: ratio estimator, linearized
+    weights = [s.result.avg_throughput_obj for s in files]
+    ratio = sum(w * v for w, v in zip(weights, values)) / sum(weights) if sum(weights) > 0 else sum(values) / len(values)
+    return (ratio, [ratio + w * (v - ratio) / weights_mean for w, v in zip(weights, values)],
+            [w * e / weights_mean for w, e in zip(weights, within)])
+
+
+def estimate_group(job_key: str, members: List[Any], sampled: List[SampledFile], min_files: int) -> GroupEstimate:
+    """Group estimates (mean over runs of all containers combined) with their standard errors
+
+    Two-stage sampling: runs are the primary units, the containers of a run the secondary ones.
+    Runs with a single sampled container borrow the pooled relative spread of the others.
+    """
+    containers = defaultdict(int)
+    for entry in members:
+        containers[entry.timestamp] += 1
+    by_run: Dict[str, List[SampledFile]] = defaultdict(list)
+    for s in sampled:
+        by_run[s.timestamp].append(s)
+    total_runs, runs = len(containers), len(by_run)
+    group = GroupEstimate(job_key=job_key, files_total=len(members), files_sampled=len(sampled), runs=total_runs,
+                          containers_per_run=len(members) / total_runs if total_runs else 1.0)
+    if len(sampled) < min(min_files, len(members)):
+        group.too_small = f"only {len(sampled)} file(s) sampled"
+    elif runs < 2 <= total_runs:
+        # The spread between runs can only be estimated from two of them, unless every run was sampled
+        group.too_small = f"only 1 of {total_runs} runs sampled"
+    if not sampled:
+        return group
+    all_sampled = runs == total_runs
+    df = max(len(sampled) - runs, 1) if all_sampled else max(runs - 1, 1)
+    weights_mean = sum(s.result.avg_throughput_obj for s in sampled) / len(sampled)
+
+    for name, _, attr, _, _ in METRICS:
+        estimates = {}
+        for timestamp, files in by_run.items():
+            estimates[timestamp] = _run_values(name, attr, files, weights_mean)
+        relative = [v / value ** 2 for value, linear, _ in estimates.values()
+                    for v in [_variance(linear)] if v is not None and value]
+        pooled = sum(relative) / len(relative) if relative else None
+        if pooled is None and any(containers[t] > 1 for t in by_run):
+            group.too_small = group.too_small or "no run with two sampled containers"
+            pooled = 0.0
+
+        run_totals, run_variances = [], []
+        for timestamp, (value, linear, within) in estimates.items():
+            size, m = containers[timestamp], len(linear)
+            # Containers of a run add up; latencies are averages over them
+            scale = size if name.startswith('throughput') else 1.0
+            spread = _variance(linear)
+            if spread is None:
+                spread = (pooled or 0.0) * value ** 2
+            variance = (1 - m / size) * spread / m + (m / size) * sum(e * e for e in within) / m ** 2
+            run_totals.append(value * scale)
+            run_variances.append(variance * scale ** 2)
+
+        mean = sum(run_totals) / runs
+        between = _variance(run_totals) or 0.0
+        variance = (1 - runs / total_runs) * between / runs + (runs / total_runs) * sum(run_variances) / runs ** 2
+        group.metrics[name] = Estimate(mean, math.sqrt(variance), df)
+    return group
+
+
+def compare_groups(prod: GroupEstimate, test: GroupEstimate, config: ComparisonConfig) -> List[MetricVerdict]:
+    """Percent difference of TEST vs PROD per metric with its 95% interval (delta method)"""
+    thresholds = {
+        'throughput_mib': config.throughput_degradation_percent,
+        'latency_avg': config.latency_increase_percent,
+        'latency_p99': config.p99_latency_increase_percent,
+    }
+    verdicts = []
+    for name, _, _, _, higher_is_worse in METRICS:
+        p, t = prod.metrics.get(name), test.metrics.get(name)
+        if not p or not t or p.value <= 0 or t.value <= 0:
+            continue
+        ratio = t.value / p.value
+        se = ratio * math.sqrt((p.standard_error / p.value) ** 2 + (t.standard_error / t.value) ** 2)
+        half = t_quantile(min(p.df, t.df)) * se * 100
+        diff = (ratio - 1) * 100
+        low, high = diff - half, diff + half
+        threshold = thresholds[name]
+        # Worse direction: latencies going up, throughput going down
+        worst, best = (high, low) if higher_is_worse else (-low, -high)
+        if best > threshold:
+            verdict = 'REGRESSION'
+        elif worst <= threshold:
+            verdict = 'OK'
+        else:
+            verdict = 'INCONCLUSIVE'
+        verdicts.append(MetricVerdict(name, diff, low, high, threshold, verdict))
+    return verdicts
+
+
+@dataclass
+class QuickLook:
+    groups: Dict[str, GroupEstimate]
+    comparisons: List[QuickComparison]
+    files_total: int
+    files_sampled: int
+    fraction: float
+    stride: int
+    seconds: float
+
+
+def quick_look(results_dir: str, entries: List[Any], config: ComparisonConfig, fraction: float = DEFAULT_FRACTION,
+               stride: int = DEFAULT_STRIDE, trim_steady_state: bool = True) -> QuickLook:
+    """Sample index entries, extract the sampled files and estimate every group and PROD vs TEST comparison"""
+    started = time.perf_counter()
+    parser = WarpResultsParser(results_dir, config=config, trim_steady_state=trim_steady_state)
+    selection = select_sample(entries, fraction, config.sample_min_files)
+
+    groups = {}
+    for job_key, (members, chosen) in selection.items():
+        sampled = [s for s in (load_sampled_file(parser, parser.results_dir, e, stride) for e in chosen) if s]
+        groups[job_key] = estimate_group(job_key, members, sampled, config.sample_min_files)
+
+    comparisons = []
+    for job_key, prod in sorted(groups.items()):
+        operation, environment, obj_size, concurrency = (job_key.split('_') + ['', '', '', ''])[:4]
+        if environment != 'PROD':
+            continue
+        test = groups.get(f"{operation}_TEST_{obj_size}_{concurrency}")
+        if test:
+            label = f"{operation} (obj:{obj_size}, concurrent:{concurrency})"
+            comparisons.append(QuickComparison(label, prod, test, compare_groups(prod, test, config)))
+
+    return QuickLook(groups=groups, comparisons=comparisons, files_total=len(entries),
+                     files_sampled=sum(g.files_sampled for g in groups.values()), fraction=fraction, stride=stride,
+                     seconds=time.perf_counter() - started)
+
+
+def _interval(estimate: Optional[Estimate]) -> str:
+    if estimate is None:
+        return "-"
+    return f"{estimate.value:.2f} ± {estimate.half_width:.2f}"
+
+
+def write_quick_look_report(look: QuickLook, output_file: str, config: ComparisonConfig):
+    """Write the sampled report as markdown"""
+    labels = {name: label for name, label, *_ in METRICS}
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("# Warp Quick Look (Sampled)\n\n")
+        f.write(f"Sampled {look.files_sampled} of {look.files_total} files (fraction {look.fraction:g}, "
+                f"stride {look.stride}) in {look.seconds:.1f}s. Values are estimates with "
+                f"95% confidence intervals; run a full parse before acting on INCONCLUSIVE verdicts or on groups "
+                f"marked as too small.\n\n")
+
+        f.write("## PROD vs TEST\n\n")
+        if look.comparisons:
+            f.write("| Operation | Verdict | Metric | PROD | TEST | Diff (95% CI) | Threshold |\n")
+            f.write("|-----------|---------|--------|------|------|---------------|-----------|\n")
+            for comparison in look.comparisons:
+                verdict = comparison.verdict
+                if verdict == 'INCONCLUSIVE':
+                    verdict += " (full parse needed)"
+                for i, metric in enumerate(comparison.metrics):
+                    f.write(f"| {comparison.operation if i == 0 else ''} | {verdict if i == 0 else ''} | "
+                            f"{labels[metric.metric]} | {_interval(comparison.prod.metrics.get(metric.metric))} | "
+                            f"{_interval(comparison.test.metrics.get(metric.metric))} | "
+                            f"{metric.diff_percent:+.1f}% [{metric.low_percent:+.1f}%, {metric.high_percent:+.1f}%] "
+                            f"{metric.verdict} | {metric.threshold_percent:.0f}% |\n")
+            f.write("\n")
+        else:
+            f.write("No PROD and TEST groups with matching parameters were sampled.\n\n")
+
+        f.write("## Groups\n\n")
+        f.write("| Job | Files Sampled | Runs | " + " | ".join(label for _, label, *_ in METRICS) + " | Note |\n")
+        f.write("|-----|---------------|------|" + "|".join("-" * (len(label) + 2) for _, label, *_ in METRICS)
+                + "|------|\n")
+        for job_key, group in sorted(look.groups.items()):
+            notes = []
+            if group.too_small:
+                notes.append(f"{group.too_small} - full parse needed")
+            wide = [labels[name] for name, estimate in group.metrics.items()
+                    if estimate.relative_half_width_percent > config.sample_max_ci_percent]
+            if wide and not group.too_small:
+                notes.append(f"CI wider than ±{config.sample_max_ci_percent:.0f}%: {', '.join(wide)}")
+            f.write(f"| {job_key} | {group.files_sampled}/{group.files_total} | {group.runs} | " +
+                    " | ".join(_interval(group.metrics.get(name)) for name, *_ in METRICS) +
+                    f" | {'; '.join(notes)} |\n")
+        f.write("\n")
+
+
+def main():
+    # Imported here because results_index builds on parse_warp_results
+    from results_index import ResultsIndex, add_filter_arguments, filter_from_args
+
+    parser = argparse.ArgumentParser(description='Fast sampled quick-look report with confidence intervals')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--output', default='warp_quick_look.md', help='Output report file')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    parser.add_argument('--sample', type=float, default=DEFAULT_FRACTION,
+                        help=f'Fraction of files to analyze per group (default: {DEFAULT_FRACTION})')
+    parser.add_argument('--stride', type=int, default=DEFAULT_STRIDE,
+                        help='Keep every n-th throughput segment and latency window of each file (default: 1)')
+    parser.add_argument('--no-steady-state', action='store_true',
+                        help='Compute statistics over the whole run instead of the detected steady window')
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+    if not 0 < args.sample <= 1 or args.stride < 1:
+        parser.error("--sample must be in (0, 1] and --stride at least 1")
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    index = ResultsIndex(args.results_dir)
+    index.refresh()
+    entries = index.select(filter_from_args(args))
+    if not entries:
+        print(f"No warp result files found in {args.results_dir}")
+        return 2
+
+    look = quick_look(args.results_dir, entries, config, args.sample, args.stride,
+                      trim_steady_state=not args.no_steady_state)
+    write_quick_look_report(look, args.output, config)
+    for comparison in look.comparisons:
+        print(f"{comparison.verdict:<13} {comparison.operation}")
+    print(f"Quick look written to {args.output} ({look.files_sampled}/{look.files_total} files, {look.seconds:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Warp Results Index
+
+This module keeps a lightweight index of warp result files next to the results
+(warp_index.json). Each entry holds the fields encoded in the filename plus the
+report header (commandline parameters, environment, start/end time, final flag),
+which is read from the first few KiB of the decompressed stream only. Queries
+such as "GET runs from yesterday on TEST" are answered from the index, so only
+the matching files ever get fully decompressed and parsed. Members of packed
+stores (results_store.py) are indexed from the store's own member index.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import zstandard as zstd
+
+from parse_warp_results import (
+    WarpResultsParser, detect_operation, detect_environment, extract_test_params, parse_obj_size,
+    STORE_SUFFIX, STORE_MEMBER_SEPARATOR
+)
+
+
+INDEX_FILE = "warp_index.json"
+INDEX_VERSION = 1
+RESULT_PATTERN = "**/warp-*-*.json.zst"
+STORE_PATTERN = f"**/*{STORE_SUFFIX}"
+
+# The header fields sit at the very beginning of a warp report
+HEADER_BYTES = 4096
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_MAGIC = b'\x1f\x8b'
+
+HEADER_PATTERNS = {
+    'commandline': re.compile(r'"commandline"\s*:\s*"((?:[^"\\]|\\.)*)"'),
+    'final': re.compile(r'"final"\s*:\s*(true|false)'),
+    'concurrency': re.compile(r'"concurrency"\s*:\s*(\d+)'),
+    'start_time': re.compile(r'"start_time"\s*:\s*"([^"]+)"'),
+    'end_time': re.compile(r'"end_time"\s*:\s*"([^"]+)"'),
+}
+
+RELATIVE_TIME = re.compile(r'^(\d+)([mhdw])$')
+TIME_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+@dataclass
+class IndexEntry:
+    """Cheaply obtained metadata of one result file"""
+    path: str  # relative to the results directory
+    mtime: float
+    size: int
+    file_op: str  # operation as written in the filename (get, put, ...)
+    timestamp: str  # YYYY-MM-DD HH:MM:SS from the filename
+    file_id: str
+    operation: str = ""
+    environment: str = ""
+    host: str = ""
+    bucket: str = ""
+    obj_size: str = ""
+    concurrency: Optional[int] = None
+    duration: str = ""
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    final: Optional[bool] = None
+
+
+@dataclass
+class IndexFilter:
+    """Selection criteria evaluated against index entries"""
+    ops: List[str] = field(default_factory=list)
+    environments: List[str] = field(default_factory=list)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None  # exclusive
+    obj_sizes: List[str] = field(default_factory=list)
+    concurrencies: List[int] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.ops or self.environments or self.since or self.until
+                    or self.obj_sizes or self.concurrencies)
+
+    def matches(self, entry: IndexEntry) -> bool:
+        if self.ops and entry.operation.upper() not in {op.upper() for op in self.ops}:
+            return False
+        if self.environments and entry.environment.upper() not in {env.upper() for env in self.environments}:
+            return False
+        if self.since or self.until:
+            # Result filenames carry UTC timestamps
+            timestamp = datetime.strptime(entry.timestamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+            if self.since and timestamp < self.since:
+                return False
+            if self.until and timestamp >= self.until:
+                return False
+        if self.obj_sizes:
+            wanted = {parse_obj_size(size) for size in self.obj_sizes}
+            if parse_obj_size(entry.obj_size) not in wanted:
+                return False
+        if self.concurrencies and entry.concurrency not in self.concurrencies:
+            return False
+        return True
+
+
+def parse_time_bound(value: str, is_until: bool = False, now: Optional[datetime] = None) -> datetime:
+    """Parse --since/--until values: dates, datetimes, today/yesterday or relative ages like 12h, 7d
+
+    Date-only values passed as an upper bound include the whole day. Values without a UTC offset
+    are UTC, like the timestamps in result filenames; the result is always timezone-aware UTC.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    value = value.strip()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    named_days = {'today': today, 'yesterday': today - timedelta(days=1)}
+    if value.lower() in named_days:
+        day = named_days[value.lower()]
+        return day + timedelta(days=1) if is_until else day
+
+    relative = RELATIVE_TIME.match(value.lower())
+    if relative:
+        return now - timedelta(**{TIME_UNITS[relative.group(2)]: int(relative.group(1))})
+
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return day + timedelta(days=1) if is_until else day
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(value)
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def _read_head(file_path: Path, size: int) -> bytes:
+    """Decompress only the first bytes of a result file"""
+    with open(file_path, 'rb') as f:
+        magic = f.read(4)
+        f.seek(0)
+        if magic == ZSTD_MAGIC:
+            chunks = []
+            with zstd.ZstdDecompressor().stream_reader(f) as reader:
+                remaining = size
+                while remaining > 0:
+                    chunk = reader.read(remaining)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    remaining -= len(chunk)
+            return b''.join(chunks)
+        if magic[:2] == GZIP_MAGIC:
+            with gzip.GzipFile(fileobj=f) as reader:
+                return reader.read(size)
+        return f.read(size)
+
+
+def header_from_text(head: str) -> Optional[Dict[str, Any]]:
+    """Header fields found in the beginning of a decompressed report, or None without a commandline"""
+    header = {}
+    for name, pattern in HEADER_PATTERNS.items():
+        match = pattern.search(head)
+        if match:
+            header[name] = match.group(1)
+
+    if 'commandline' not in header:
+        return None
+
+    header['commandline'] = json.loads(f'"{header["commandline"]}"')
+    if 'final' in header:
+        header['final'] = header['final'] == 'true'
+    if 'concurrency' in header:
+        header['concurrency'] = int(header['concurrency'])
+    return header
+
+
+def read_report_header(file_path: Path) -> Optional[Dict[str, Any]]:
+    """Read commandline, final flag, concurrency and start/end time of a report without parsing all of it"""
+    try:
+        head = _read_head(file_path, HEADER_BYTES).decode('utf-8', errors='replace')
+    except Exception as e:
+        print(f"Error reading header of {file_path}: {e}")
+        return None
+
+    header = header_from_text(head)
+    if header is None:
+        # Unusual layout; fall back to a full parse
+        report = WarpResultsParser.parse_json_zst_file(file_path)
+        if not report:
+            return None
+        return header_from_report(report)
+    return header
+
+
+def header_from_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """The indexed header fields of an already parsed report"""
+    total = report.get('total', {})
+    return {
+        'commandline': report.get('commandline', ''),
+        'final': report.get('final'),
+        'concurrency': total.get('concurrency'),
+        'start_time': total.get('start_time'),
+        'end_time': total.get('end_time'),
+    }
+
+
+def report_matches(index_filter: 'IndexFilter', filename: str, report: Dict[str, Any]) -> bool:
+    """Whether a parsed report (e.g. an archive member, which the index does not cover) matches the filter"""
+    entry = ResultsIndex.build_entry(filename, filename, None, header_from_report(report))
+    return entry is not None and index_filter.matches(entry)
+
+
+class ResultsIndex:
+    """Index of the result files under a results directory, persisted as warp_index.json"""
+
+    def __init__(self, results_dir: str = "."):
+        self.results_dir = Path(results_dir)
+        self.index_path = self.results_dir / INDEX_FILE
+        self.entries: Dict[str, IndexEntry] = {}
+
+    def load(self):
+        """Load the persisted index, discarding it if it was written by another version"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable index {self.index_path}: {e}")
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        self.entries = {path: IndexEntry(**entry) for path, entry in data.get('entries', {}).items()}
+
+    def save(self):
+        """Persist the index next to the results"""
+        tmp_path = self.index_path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION,
+                           'entries': {path: asdict(entry) for path, entry in self.entries.items()}}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not write index {self.index_path}: {e}")
+
+    def index_file(self, file_path: Path, stat: os.stat_result) -> Optional[IndexEntry]:
+        """Build the index entry of a single result file"""
+        if not WarpResultsParser.parse_filename(file_path.name)[0]:
+            return None
+        return self.build_entry(file_path.relative_to(self.results_dir).as_posix(), file_path.name,
+                                stat, read_report_header(file_path))
+
+    @staticmethod
+    def build_entry(path: str, filename: str, stat: Optional[os.stat_result],
+                    header: Optional[Dict[str, Any]]) -> Optional[IndexEntry]:
+        """Index entry from the filename fields and an already read report header"""
+        file_op, timestamp, file_id = WarpResultsParser.parse_filename(filename)
+        if not file_op:
+            return None
+
+        entry = IndexEntry(
+            path=path,
+            mtime=stat.st_mtime if stat else 0.0,
+            size=stat.st_size if stat else 0,
+            file_op=file_op,
+            timestamp=timestamp,
+            file_id=file_id,
+        )
+
+        if header:
+            commandline = header.get('commandline', '')
+            params = extract_test_params(commandline)
+            entry.operation = detect_operation(commandline, file_op.upper())
+            entry.environment = detect_environment(commandline, file_op, entry.operation)
+            entry.host = params.get('host', '')
+            entry.bucket = params.get('bucket', '')
+            entry.obj_size = params.get('obj_size', '')
+            entry.concurrency = params.get('concurrency', header.get('concurrency'))
+            entry.duration = params.get('duration', '')
+            entry.start_time = header.get('start_time')
+            entry.end_time = header.get('end_time')
+            entry.final = header.get('final')
+        else:
+            entry.operation = file_op.upper()
+        return entry
+
+    def index_store(self, store_path: Path, stat: os.stat_result) -> Dict[str, IndexEntry]:
+        """Entries of every member of a packed store, taken from the store's own member index"""
+        # Imported here to avoid a circular import
+        from results_store import ResultStore
+
+        try:
+            store = ResultStore(store_path)
+        except (OSError, ValueError, zstd.ZstdError) as e:
+            print(f"Error reading store {store_path}: {e}")
+            return {}
+        relative = store_path.relative_to(self.results_dir).as_posix()
+        entries = {}
+        for member in store.members.values():
+            path = f"{relative}{STORE_MEMBER_SEPARATOR}{member.name}"
+            entry = self.build_entry(path, os.path.basename(member.name), stat, member.header or None)
+            if entry:
+                entries[path] = entry
+        return entries
+
+    def refresh(self, rebuild: bool = False) -> int:
+        """Bring the index up to date with the files on disk; return the number of (re)indexed files"""
+        if not rebuild:
+            self.load()
+
+        seen = set()
+        updated = 0
+        for file_path in self.results_dir.glob(RESULT_PATTERN):
+            relative = file_path.relative_to(self.results_dir).as_posix()
+            seen.add(relative)
+            stat = file_path.stat()
+            existing = self.entries.get(relative)
+            if existing and existing.mtime == stat.st_mtime and existing.size == stat.st_size:
+                continue
+            entry = self.index_file(file_path, stat)
+            if entry:
+                self.entries[relative] = entry
+                updated += 1
+
+        for store_path in self.results_dir.glob(STORE_PATTERN):
+            prefix = f"{store_path.relative_to(self.results_dir).as_posix()}{STORE_MEMBER_SEPARATOR}"
+            stat = store_path.stat()
+            existing = [path for path in self.entries if path.startswith(prefix)]
+            if existing and all(self.entries[path].mtime == stat.st_mtime and self.entries[path].size == stat.st_size
+                                for path in existing):
+                seen.update(existing)
+                continue
+            for path in existing:
+                del self.entries[path]
+            members = self.index_store(store_path, stat)
+            self.entries.update(members)
+            seen.update(members)
+            updated += len(members)
+
+        stale = set(self.entries) - seen
+        for relative in stale:
+            del self.entries[relative]
+
+        if updated or stale or not self.index_path.exists():
+            self.save()
+        return updated
+
+    def select(self, index_filter: IndexFilter) -> List[IndexEntry]:
+        """Entries matching the filter, oldest first"""
+        selected = [entry for entry in self.entries.values() if index_filter.matches(entry)]
+        return sorted(selected, key=lambda entry: (entry.timestamp, entry.path))
+
+    def paths(self, entries: List[IndexEntry]) -> List[Path]:
+        return [self.results_dir / entry.path for entry in entries]
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    """Register the index-backed selection options on a command line parser"""
+    group = parser.add_argument_group('result selection (answered from the results index)')
+    group.add_argument('--op', action='append', default=[], help='Operation(s) to include, e.g. GET or GET,PUT')
+    group.add_argument('--env', action='append', default=[], help='Environment(s) to include, e.g. TEST')
+    group.add_argument('--since', help='Only runs at/after this time (YYYY-MM-DD[ HH:MM:SS], today, yesterday, 12h, 7d)')
+    group.add_argument('--until', help='Only runs before this time (date-only values include the whole day)')
+    group.add_argument('--obj-size', action='append', default=[], help='Object size(s) to include, e.g. 4K')
+    group.add_argument('--concurrency', action='append', default=[], help='Concurrency level(s) to include')
+    group.add_argument('--list', action='store_true', help='List matching runs from the index without parsing them')
+    group.add_argument('--rebuild-index', action='store_true', help='Re-read the header of every result file')
+
+
+def _split(values: List[str]) -> List[str]:
+    return [item.strip() for value in values for item in value.split(',') if item.strip()]
+
+
+def filter_from_args(args: argparse.Namespace) -> IndexFilter:
+    """Build an IndexFilter from the options registered by add_filter_arguments"""
+    return IndexFilter(
+        ops=_split(args.op),
+        environments=_split(args.env),
+        since=parse_time_bound(args.since) if args.since else None,
+        until=parse_time_bound(args.until, is_until=True) if args.until else None,
+        obj_sizes=_split(args.obj_size),
+        concurrencies=[int(value) for value in _split(args.concurrency)],
+    )
+
+
+def print_listing(entries: List[IndexEntry]):
+    """Print matching runs as a table"""
+    print(f"{'Timestamp':<20} {'Op':<7} {'Env':<5} {'Obj Size':<9} {'Conc':>5} {'Duration':<9} {'Final':<6} Path")
+    for entry in entries:
+        concurrency = entry.concurrency if entry.concurrency is not None else '-'
+        final = {True: 'yes', False: 'no'}.get(entry.final, '?')
+        print(f"{entry.timestamp:<20} {entry.operation:<7} {entry.environment:<5} {entry.obj_size:<9} "
+              f"{concurrency:>5} {entry.duration:<9} {final:<6} {entry.path}")
+    print(f"{len(entries)} matching result files")
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Packed Warp Results Store
+
+This module compacts a results directory full of small .json.zst reports into
+a single store file (results.warpstore). Reports are deduplicated by the hash
+of their decompressed content, so a run collected twice into different
+directories is kept once (the other paths are recorded as aliases). Every
+report is an independent zstd frame; frames of reports below
+DICT_MEMBER_LIMIT are compressed with a dictionary trained on the reports
+themselves, which is where most of the saving on small, highly repetitive
+reports comes from. A member index at the end of the file holds the offset,
+length and report header of every member, so single runs are read without
+scanning the store. WarpResultsParser and the results index read stores
+transparently.
+
+Layout: STORE_MAGIC, dictionary, member frames, zstd-compressed JSON index,
+then a fixed-size trailer with the index offset and length.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+import zstandard as zstd
+
+from parse_warp_results import STORE_SUFFIX, RESULT_FILENAME
+from results_index import HEADER_BYTES, header_from_text
+
+
+DEFAULT_STORE_NAME = f"results{STORE_SUFFIX}"
+STORE_MAGIC = b'WARPSTORE1'
+STORE_VERSION = 1
+TRAILER = struct.Struct(f'<QQ{len(STORE_MAGIC)}s')  # index offset, index length, magic
+RESULT_PATTERN = "**/warp-*-*.json.zst"
+
+# Warp's own .json.zst files are already compressed, so the store mainly gains from deduplication and the
+# dictionary. Level 19 packs the sample corpus about 15% smaller than 15 but takes roughly nine times as long.
+DEFAULT_LEVEL = 15
+DICT_SIZE = 112640  # zstd's default dictionary size
+DICT_MEMBER_LIMIT = 1 << 20  # larger reports compress better on their own
+MIN_DICT_SAMPLES = 8
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+@dataclass
+class StoreMember:
+    """Location and header of one report in a store"""
+    name: str  # path of the first collected copy, relative to the results directory
+    sha256: str  # of the decompressed report
+    offset: int
+    length: int
+    size: int  # decompressed
+    dictionary: bool
+    aliases: List[str] = field(default_factory=list)  # other paths the same report was collected under
+    header: Dict[str, Any] = field(default_factory=dict)  # commandline, final flag, concurrency, start/end time
+
+
+@dataclass
+class CompactionStats:
+    """What a compaction did"""
+    loose_files: int = 0
+    duplicates: int = 0
+    unreadable: int = 0
+    members: int = 0
+    loose_bytes: int = 0
+    previous_store_bytes: int = 0
+    store_bytes: int = 0
+    removed_files: int = 0
+
+
+def decompress_report(raw: bytes) -> bytes:
+    """Decompressed JSON of a zstd, gzip or plain result file"""
+    if raw[:4] == ZSTD_MAGIC:
+        with zstd.ZstdDecompressor().stream_reader(raw) as reader:
+            return reader.read()
+    if raw[:2] == GZIP_MAGIC:
+        return gzip.decompress(raw)
+    return raw
+
+
+class ResultStore:
+    """Read access to a packed store"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.members: Dict[str, StoreMember] = {}
+        self.aliases: Dict[str, str] = {}
+        self.dictionary: Optional[zstd.ZstdCompressionDict] = None
+        self._load_index()
+
+    def _load_index(self):
+        with open(self.path, 'rb') as f:
+            if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError(f"{self.path} is not a warp results store")
+            f.seek(-TRAILER.size, os.SEEK_END)
+            index_offset, index_length, magic = TRAILER.unpack(f.read(TRAILER.size))
+            if magic != STORE_MAGIC:
+                raise ValueError(f"{self.path} is truncated (no trailer)")
+            f.seek(index_offset)
+            index = json.loads(zstd.ZstdDecompressor().decompress(f.read(index_length)))
+            if index.get('version') != STORE_VERSION:
+                raise ValueError(f"{self.path} was written by an unsupported store version {index.get('version')}")
+            if index.get('dict_length'):
+                f.seek(index['dict_offset'])
+                self.dictionary = zstd.ZstdCompressionDict(f.read(index['dict_length']))
+
+        for entry in index.get('members', []):
+            member = StoreMember(**entry)
+            self.members[member.name] = member
+            for alias in member.aliases:
+                self.aliases[alias] = member.name
+
+    def _decompressor(self, member: StoreMember) -> zstd.ZstdDecompressor:
+        return zstd.ZstdDecompressor(dict_data=self.dictionary) if member.dictionary else zstd.ZstdDecompressor()
+
+    def read(self, name: str) -> bytes:
+        """Decompressed JSON of one member (by name or alias), read from its own byte range"""
+        member = self.members[self.aliases.get(name, name)]
+        with open(self.path, 'rb') as f:
+            f.seek(member.offset)
+            return self._decompressor(member).decompress(f.read(member.length))
+
+    def iter_reports(self, names: Optional[List[str]] = None) -> Iterator[Tuple[str, bytes]]:
+        """Yield (member name, decompressed JSON) in file order, optionally only for the given names"""
+        if names is None:
+            members = list(self.members.values())
+        else:
+            members = list({self.aliases.get(n, n): self.members[self.aliases.get(n, n)]
+                            for n in names if self.aliases.get(n, n) in self.members}.values())
+        plain = zstd.ZstdDecompressor()
+        with_dict = zstd.ZstdDecompressor(dict_data=self.dictionary) if self.dictionary else plain
+        with open(self.path, 'rb') as f:
+            for member in sorted(members, key=lambda m: m.offset):
+                f.seek(member.offset)
+                yield member.name, (with_dict if member.dictionary else plain).decompress(f.read(member.length))
+
+
+def train_dictionary(reports: List[bytes]) -> Optional[zstd.ZstdCompressionDict]:
+    """Dictionary trained on the small reports, or None if there are too few of them"""
+    samples = [report for report in reports if len(report) < DICT_MEMBER_LIMIT]
+    if len(samples) < MIN_DICT_SAMPLES:
+        return None
+    # zstd wants roughly 10x (ideally 100x) more sample data than dictionary
+    dict_size = min(DICT_SIZE, sum(len(sample) for sample in samples) // 10)
+    try:
+        return zstd.train_dictionary(dict_size, samples)
+    except zstd.ZstdError as e:
+        print(f"Could not train a dictionary, compressing without: {e}")
+        return None
+
+
+def write_store(path: Path, reports: List[Tuple[StoreMember, Optional[bytes], Optional[bytes]]],
+                dictionary: Optional[zstd.ZstdCompressionDict], level: int = DEFAULT_LEVEL) -> int:
+    """Write a new store file; return its size
+
+    Each report is (member, decompressed JSON, frame): members that still have their
+    frame (compressed with this same dictionary) are copied verbatim, the others are
+    compressed.
+    """
+    plain = zstd.ZstdCompressor(level=level)
+    with_dict = zstd.ZstdCompressor(level=level, dict_data=dictionary) if dictionary else plain
+
+    with open(path, 'wb') as f:
+        f.write(STORE_MAGIC)
+        dict_offset = f.tell()
+        dict_bytes = dictionary.as_bytes() if dictionary else b''
+        f.write(dict_bytes)
+
+        members = []
+        for member, data, frame in reports:
+            if frame is None:
+                member.dictionary = dictionary is not None and len(data) < DICT_MEMBER_LIMIT
+                frame = (with_dict if member.dictionary else plain).compress(data)
+                member.size = len(data)
+                member.header = header_from_text(data[:HEADER_BYTES].decode('utf-8', errors='replace')) or {}
+            member.offset, member.length = f.tell(), len(frame)
+            f.write(frame)
+            members.append(asdict(member))
+
+        index = zstd.ZstdCompressor(level=level).compress(json.dumps({
+            'version': STORE_VERSION,
+            'dict_offset': dict_offset,
+            'dict_length': len(dict_bytes),
+            'members': members,
+        }).encode('utf-8'))
+        index_offset = f.tell()
+        f.write(index)
+        f.write(TRAILER.pack(index_offset, len(index), STORE_MAGIC))
+    return path.stat().st_size
+
+
+def verify_store(path: Path, expected: Dict[str, str]) -> List[str]:
+    """Names of members (name -> sha256) that are missing or do not read back identically"""
+    store = ResultStore(path)
+    found = {name: hashlib.sha256(data).hexdigest() for name, data in store.iter_reports()}
+    return [name for name, digest in expected.items() if found.get(name) != digest]
+
+
+def compact(results_dir: str, store_path: Optional[str] = None, level: int = DEFAULT_LEVEL,
+            keep_originals: bool = False, retrain: bool = False, dry_run: bool = False) -> CompactionStats:
+    """Pack the loose result files under results_dir into its store, deduplicated by content
+
+    New reports are appended to an existing store using its dictionary, so earlier members
+    are copied without recompression; with retrain (or while the store has no dictionary
+    yet) the dictionary is trained again on the whole corpus and everything is recompressed.
+    Loose files are only removed once the new store reads back every report identically.
+    """
+    results_dir = Path(results_dir)
+    path = Path(store_path) if store_path else results_dir / DEFAULT_STORE_NAME
+    stats = CompactionStats()
+
+    store = ResultStore(path) if path.exists() else None
+    retrain = retrain or store is None or store.dictionary is None
+    reports: Dict[str, Tuple[StoreMember, Optional[bytes], Optional[bytes]]] = {}
+    if store:
+        stats.previous_store_bytes = path.stat().st_size
+        if retrain:
+            for name, data in store.iter_reports():
+                reports[store.members[name].sha256] = (store.members[name], data, None)
+        else:
+            with open(path, 'rb') as f:
+                for member in sorted(store.members.values(), key=lambda m: m.offset):
+                    f.seek(member.offset)
+                    reports[member.sha256] = (member, None, f.read(member.length))
+
+    packed = []
+    for file_path in sorted(results_dir.glob(RESULT_PATTERN)):
+        relative = file_path.relative_to(results_dir).as_posix()
+        try:
+            raw = file_path.read_bytes()
+            data = decompress_report(raw)
+            json.loads(data)
+        except (OSError, ValueError, zstd.ZstdError) as e:
+            # Left in place for the parser to report
+            print(f"Skipping unreadable {relative}: {e}")
+            stats.unreadable += 1
+            continue
+        stats.loose_files += 1
+        stats.loose_bytes += len(raw)
+        packed.append(file_path)
+
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in reports:
+            member = reports[digest][0]
+            if relative != member.name and relative not in member.aliases:
+                member.aliases.append(relative)
+            stats.duplicates += 1
+            continue
+        reports[digest] = (StoreMember(name=relative, sha256=digest, offset=0, length=0, size=len(data),
+                                       dictionary=False), data, None)
+
+    stats.members = len(reports)
+    if dry_run or not packed:
+        return stats
+
+    dictionary = train_dictionary([data for _, data, _ in reports.values()]) if retrain else store.dictionary
+    ordered = sorted(reports.values(), key=lambda item: item[0].name)
+    tmp_path = path.with_name(path.name + '.tmp')
+    stats.store_bytes = write_store(tmp_path, ordered, dictionary, level)
+    mismatches = verify_store(tmp_path, {member.name: member.sha256 for member, _, _ in ordered})
+    if mismatches:
+        raise RuntimeError(f"{tmp_path} does not read back {len(mismatches)} reports (e.g. {mismatches[0]}); "
+                           f"the previous store and the loose files were kept")
+    os.replace(tmp_path, path)
+
+    if not keep_originals:
+        for file_path in packed:
+            file_path.unlink()
+            stats.removed_files += 1
+        # Drop per-pod directories that are empty now
+        for directory in sorted({p.parent for p in packed}, key=lambda p: len(p.parts), reverse=True):
+            if directory != results_dir and not any(directory.iterdir()):
+                directory.rmdir()
+    return stats
+
+
+def _size(value: int) -> str:
+    return f"{value / (1024 * 1024):.2f} MiB" if value >= 1024 * 1024 else f"{value / 1024:.1f} KiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack warp result files into a deduplicated, dictionary-compressed store')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--store', help=f'Store file (default: <results-dir>/{DEFAULT_STORE_NAME})')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help='Pack loose result files into the store')
+    compact_parser.add_argument('--level', type=int, default=DEFAULT_LEVEL,
+                                help=f'zstd compression level (default: {DEFAULT_LEVEL})')
+    compact_parser.add_argument('--retrain', action='store_true',
+                                help='Retrain the dictionary on the whole corpus and recompress every report')
+    compact_parser.add_argument('--keep-originals', action='store_true',
+                                help='Keep the loose files (they are then read twice unless moved elsewhere)')
+    compact_parser.add_argument('--dry-run', action='store_true', help='Only report what would be packed')
+
+    subparsers.add_parser('list', help='List the members of the store')
+
+    extract = subparsers.add_parser('extract', help='Write members back as .json.zst files')
+    extract.add_argument('--output-dir', required=True, help='Directory to write the files to')
+    extract.add_argument('names', nargs='*', help='Members to extract (default: all)')
+    args = parser.parse_args()
+
+    store_path = Path(args.store) if args.store else Path(args.results_dir) / DEFAULT_STORE_NAME
+
+    if args.mode == 'compact':
+        stats = compact(args.results_dir, str(store_path), level=args.level,
+                        keep_originals=args.keep_originals, retrain=args.retrain, dry_run=args.dry_run)
+        print(f"Loose files: {stats.loose_files} ({_size(stats.loose_bytes)}), duplicates: {stats.duplicates}, "
+              f"unreadable: {stats.unreadable}")
+        if args.dry_run or not stats.loose_files:
+            print(f"Store would hold {stats.members} reports" if args.dry_run else "Nothing to compact")
+            return
+        before = stats.loose_bytes + stats.previous_store_bytes
+        print(f"Store: {store_path} with {stats.members} reports, {_size(stats.store_bytes)} "
+              f"(was {_size(before)} including the loose files, {stats.store_bytes / before:.0%})")
+        if stats.removed_files:
+            print(f"Removed {stats.removed_files} packed loose files")
+        return
+
+    store = ResultStore(store_path)
+    if args.mode == 'list':
+        print(f"{'Timestamp':<20} {'Op':<6} {'Size':>11} {'Packed':>11} {'Dict':<5} {'Aliases':>7} Name")
+        for member in sorted(store.members.values(), key=lambda m: m.name):
+            match = RESULT_FILENAME.match(os.path.basename(member.name))
+            timestamp = f"{match.group(2)} {match.group(3)}" if match else "-"
+            operation = match.group(1) if match else "-"
+            print(f"{timestamp:<20} {operation:<6} {_size(member.size):>11} {_size(member.length):>11} "
+                  f"{'yes' if member.dictionary else 'no':<5} {len(member.aliases):>7} {member.name}")
+        print(f"{len(store.members)} reports in {_size(store.path.stat().st_size)}")
+    else:
+        output_dir = Path(args.output_dir)
+        for name in args.names:
+            if name not in store.members and name not in store.aliases:
+                print(f"Not in the store: {name}")
+        compressor = zstd.ZstdCompressor()
+        count = 0
+        for name, data in store.iter_reports(args.names or None):
+            target = output_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(compressor.compress(data))
+            count += 1
+        print(f"Extracted {count} reports to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Multi-Resolution Run Rollups
+
+This module precomputes every run's time series into a rollup pyramid
+(1s -> 10s -> 1m -> 10m) so long runs can be summarized and zoomed without
+re-reading the per-second segments of every container. Each bucket holds the
+count of seconds, sum/min/max of throughput (all containers summed per
+second), errors, and a mergeable latency summary: request count, latency sum,
+fastest/slowest request and a log-bucketed histogram. warp only reports
+percentiles per 10s request window, so each window enters the histogram as
+the piecewise log-linear distribution through its fastest, median, p90, p99
+and slowest request; merged quantiles are therefore estimates within the
+histogram resolution (HIST_GROWTH), while counts, sums, minima and maxima are
+exact at every level.
+
+Rollups are cached in warp_rollups/ next to the results: index.json.zst holds
+every run's sources, summary and coarsest level, and one file per run holds
+the finer levels, loaded only when a query needs them. Sources are tracked by
+(mtime, size) for loose files and by content hash for members of packed
+stores, so a refresh only parses results that are new or changed. Queries use
+the coarsest level that divides the requested resolution.
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import zstandard as zstd
+
+from parse_warp_results import (WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE,
+                                STORE_SUFFIX, STORE_MEMBER_SEPARATOR, is_archive, parse_warp_time)
+from run_planner import parse_duration
+
+
+ROLLUP_DIR = "warp_rollups"
+ROLLUP_VERSION = 1
+LEVELS = (1, 10, 60, 600)  # bucket widths in seconds, each a multiple of the previous one
+RESULT_PATTERN = "**/warp-*-*.json.zst"
+
+HIST_GROWTH = 1.05  # relative width of a latency histogram bucket
+MIN_LATENCY_MS = 0.001
+LOG_GROWTH = math.log(HIST_GROWTH)
+
+COLUMNS = ('start', 'seconds', 'obj_sum', 'obj_min', 'obj_max', 'mib_sum', 'errors',
+           'requests', 'latency_sum', 'latency_min', 'latency_max')
+
+
+def _latency_index(ms: float) -> int:
+    return math.floor(math.log(max(ms, MIN_LATENCY_MS)) / LOG_GROWTH)
+
+
+def window_histogram(window: Dict[str, Any]) -> Dict[int, float]:
+    """Request counts per latency bucket, spread log-linearly between the window's reported quantiles"""
+    requests = window.get('requests', 0) or 0
+    anchors = [(q, window.get(key)) for q, key in ((0.0, 'fastest_ms'), (0.5, 'p50_ms'), (0.9, 'p90_ms'),
+                                                      (0.99, 'p99_ms'), (1.0, 'slowest_ms'))]
+    anchors = [(q, value) for q, value in anchors if value]
+    if requests <= 0 or not anchors:
+        return {}
+    # Quantiles must not decrease; the end points default to the outermost reported quantile
+    points, highest = [], 0.0
+    for q, value in [(0.0, anchors[0][1])] + anchors + [(1.0, anchors[-1][1])]:
+        highest = max(highest, value)
+        points.append((q, highest))
+
+    histogram: Dict[int, float] = {}
+    for (q0, v0), (q1, v1) in zip(points, points[1:]):
+        mass = (q1 - q0) * requests
+        if mass <= 0:
+            continue
+        low, high = _latency_index(v0), _latency_index(v1)
+        share = mass / (high - low + 1)
+        for index in range(low, high + 1):
+            histogram[index] = histogram.get(index, 0.0) + share
+    return histogram
+
+
+@dataclass
+class Bucket:
+    """Aggregates of one time bucket; buckets merge exactly except for the histogram's resolution"""
+    start: int  # seconds since the start of the run
+    seconds: int = 0  # seconds with throughput data
+    obj_sum: float = 0.0
+    obj_min: Optional[float] = None
+    obj_max: Optional[float] = None
+    mib_sum: float = 0.0
+    errors: float = 0.0
+    requests: float = 0.0
+    latency_sum: float = 0.0  # ms x requests
+    latency_min: Optional[float] = None
+    latency_max: Optional[float] = None
+    histogram: Dict[int, float] = field(default_factory=dict)
+
+    @property
+    def mean_obj(self) -> Optional[float]:
+        return self.obj_sum / self.seconds if self.seconds else None
+
+    @property
+    def mean_mib(self) -> Optional[float]:
+        return self.mib_sum / self.seconds if self.seconds else None
+
+    @property
+    def avg_latency_ms(self) -> Optional[float]:
+        return self.latency_sum / self.requests if self.requests else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency quantile (ms) estimated from the histogram"""
+        total = sum(self.histogram.values())
+        if total <= 0:
+            return None
+        target = q * total
+        cumulative = 0.0
+        value = math.exp((max(self.histogram) + 1) * LOG_GROWTH)
+        for index in sorted(self.histogram):
+            count = self.histogram[index]
+            if cumulative + count >= target:
+                fraction = (target - cumulative) / count if count else 0.0
+                value = math.exp((index + fraction) * LOG_GROWTH)
+                break
+            cumulative += count
+        # The exact extremes bound the estimate
+        if self.latency_max is not None:
+            value = min(value, self.latency_max)
+        return max(value, self.latency_min) if self.latency_min is not None else value
+
+    def merge(self, other: 'Bucket'):
+        self.seconds += other.seconds
+        self.obj_sum += other.obj_sum
+        self.mib_sum += other.mib_sum
+        self.errors += other.errors
+        self.requests += other.requests
+        self.latency_sum += other.latency_sum
+        for name, pick in (('obj_min', min), ('obj_max', max), ('latency_min', min), ('latency_max', max)):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            setattr(self, name, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        for index, count in other.histogram.items():
+            self.histogram[index] = self.histogram.get(index, 0.0) + count
+
+    def add_second(self, obj: float, mib: float, errors: float):
+        self.seconds += 1
+        self.obj_sum += obj
+        self.mib_sum += mib
+        self.errors += errors
+        self.obj_min = obj if self.obj_min is None else min(self.obj_min, obj)
+        self.obj_max = obj if self.obj_max is None else max(self.obj_max, obj)
+
+    def add_window(self, window: Dict[str, Any]):
+        requests = window.get('requests', 0) or 0
+        if requests <= 0:
+            return
+        self.requests += requests
+        self.latency_sum += (window.get('avg_ms', 0) or 0) * requests
+        fastest, slowest = window.get('fastest_ms'), window.get('slowest_ms')
+        if fastest:
+            self.latency_min = fastest if self.latency_min is None else min(self.latency_min, fastest)
+        if slowest:
+            self.latency_max = slowest if self.latency_max is None else max(self.latency_max, slowest)
+        for index, count in window_histogram(window).items():
+            self.histogram[index] = self.histogram.get(index, 0.0) + count
+
+
+def _encode_level(buckets: List[Bucket]) -> Dict[str, Any]:
+    """Columnar encoding of one level"""
+    level = {name: [] for name in COLUMNS}
+    level['histogram'] = []
+    for bucket in buckets:
+        for name in COLUMNS:
+            value = getattr(bucket, name)
+            level[name].append(round(value, 3) if isinstance(value, float) else value)
+        level['histogram'].append({str(k): round(v, 2) for k, v in bucket.histogram.items() if v >= 0.005})
+    return level
+
+
+def _decode_level(level: Dict[str, Any]) -> List[Bucket]:
+    buckets = []
+    for i in range(len(level['start'])):
+        bucket = Bucket(**{name: level[name][i] for name in COLUMNS})
+        bucket.histogram = {int(k): v for k, v in level['histogram'][i].items()}
+        buckets.append(bucket)
+    return buckets
+
+
+def _series_of(result: WarpResult, name: str) -> List[Dict[str, Any]]:
+    """A series of a run, or of all its operations for MIXED runs that only carry them per operation"""
+    if getattr(result, name):
+        return getattr(result, name)
+    return [item for part in (result.op_breakdown or {}).values() for item in getattr(part, name) or []]
+
+
+@dataclass
+class RunRollup:
+    """Rollup pyramid of one run (all containers merged)"""
+    key: str  # JOB_KEY@TIMESTAMP
+    job_key: str
+    timestamp: str
+    start_epoch: int
+    sources: Dict[str, str]  # source -> signature
+    steady_start_s: Optional[int] = None
+    steady_end_s: Optional[int] = None
+    levels: Dict[int, List[Bucket]] = field(default_factory=dict)
+    loader: Any = None  # loads the finer levels on demand
+
+    def level(self, width: int) -> List[Bucket]:
+        if width not in self.levels and self.loader:
+            self.levels.update(self.loader(self))
+        return self.levels.get(width, [])
+
+    def summary(self) -> Bucket:
+        """The whole run as one bucket, from the coarsest level"""
+        total = Bucket(start=0)
+        for bucket in self.level(LEVELS[-1]):
+            total.merge(bucket)
+        return total
+
+    def query(self, resolution: int, start: Optional[int] = None, end: Optional[int] = None) -> List[Bucket]:
+        """Buckets of the given width (seconds) between start and end (seconds since the run start)
+
+        The coarsest stored level whose width divides the resolution is merged up, so a
+        1h view of a 24h run reads 24 ten-minute buckets and a 1s view reads the raw level.
+        """
+        width = max(level for level in LEVELS if resolution % level == 0) if resolution >= 1 else 1
+        merged: Dict[int, Bucket] = {}
+        for bucket in self.level(width):
+            if (start is not None and bucket.start + width <= start) or (end is not None and bucket.start >= end):
+                continue
+            slot = bucket.start // resolution * resolution
+            merged.setdefault(slot, Bucket(start=slot)).merge(bucket)
+        return [merged[slot] for slot in sorted(merged)]
+
+    def elapsed_series(self, resolution: int, steady: bool = False
+                       ) -> Tuple[List[Tuple[float, float]], Dict[int, Dict[str, float]]]:
+        """([(obj/s, MiB/s)] per bucket, {elapsed second: latency}) as aligned by run_diff
+
+        Gaps repeat the last value. With steady, the series starts at the steady window,
+        rounded down to a whole bucket.
+        """
+        start = end = None
+        if steady and self.steady_start_s is not None:
+            start, end = self.steady_start_s // resolution * resolution, self.steady_end_s
+        buckets = {bucket.start: bucket for bucket in self.query(resolution, start, end)}
+        filled = [slot for slot, bucket in buckets.items() if bucket.seconds]
+        if not filled:
+            return [], {}
+
+        first, series, latency = min(filled), [], {}
+        for slot in range(first, max(filled) + 1, resolution):
+            bucket = buckets.get(slot)
+            if bucket and bucket.seconds:
+                series.append((bucket.mean_obj, bucket.mean_mib))
+            else:
+                series.append(series[-1])
+            if bucket and bucket.requests:
+                latency[slot - first] = {'avg': bucket.avg_latency_ms, 'p99': bucket.quantile(0.99)}
+        return series, latency
+
+
+def build_rollup(key: str, job_key: str, result: WarpResult, sources: Dict[str, str]) -> Optional[RunRollup]:
+    """Rollup pyramid of a (merged) run"""
+    seconds: Dict[int, List[float]] = {}
+    for segment in _series_of(result, 'throughput_per_second'):
+        when = parse_warp_time(segment.get('start', ''))
+        if when:
+            entry = seconds.setdefault(int(when.timestamp()), [0.0, 0.0, 0.0])
+            entry[0] += segment.get('obj_per_sec', 0) or 0
+            entry[1] += segment.get('mib_per_sec', 0) or 0
+            entry[2] += segment.get('errors', 0) or 0
+    windows = []
+    for window in _series_of(result, 'latency_windows'):
+        when = parse_warp_time(window.get('start', ''))
+        if when:
+            windows.append((int(when.timestamp()), window))
+    if not seconds and not windows:
+        return None
+
+    origin = min(list(seconds) + [second for second, _ in windows])
+    finest: Dict[int, Bucket] = {}
+    for second, (obj, mib, errors) in seconds.items():
+        finest.setdefault(second - origin, Bucket(start=second - origin)).add_second(obj, mib, errors)
+    for second, window in windows:
+        # Latency is only known per request window; it is filed under the window's first second
+        finest.setdefault(second - origin, Bucket(start=second - origin)).add_window(window)
+
+    rollup = RunRollup(key=key, job_key=job_key, timestamp=result.timestamp, start_epoch=origin, sources=sources)
+    if result.steady_state:
+        steady_start, steady_end = parse_warp_time(result.steady_start), parse_warp_time(result.steady_end)
+        if steady_start and steady_end:
+            rollup.steady_start_s = int(steady_start.timestamp()) - origin
+            rollup.steady_end_s = int(steady_end.timestamp()) - origin
+
+    level = [finest[start] for start in sorted(finest)]
+    rollup.levels[LEVELS[0]] = level
+    for width in LEVELS[1:]:
+        merged: Dict[int, Bucket] = {}
+        for bucket in level:
+            slot = bucket.start // width * width
+            merged.setdefault(slot, Bucket(start=slot)).merge(bucket)
+        level = [merged[slot] for slot in sorted(merged)]
+        rollup.levels[width] = level
+    return rollup
+
+
+class RollupCache:
+    """Rollups of every run under a results directory, persisted in warp_rollups/"""
+
+    def __init__(self, results_dir: str = ".", config: Optional[ComparisonConfig] = None):
+        self.results_dir = Path(results_dir)
+        self.directory = self.results_dir / ROLLUP_DIR
+        self.index_path = self.directory / "index.json.zst"
+        self.config = config or ComparisonConfig()
+        self.runs: Dict[str, RunRollup] = {}
+
+    def _run_path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.json.zst"
+
+    def _load_levels(self, rollup: RunRollup) -> Dict[int, List[Bucket]]:
+        with open(self._run_path(rollup.key), 'rb') as f:
+            data = json.loads(zstd.ZstdDecompressor().decompress(f.read()))
+        return {int(width): _decode_level(level) for width, level in data.items()}
+
+    def load(self):
+        """Load the persisted index (coarsest levels only), discarding it if written by another version"""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = json.loads(zstd.ZstdDecompressor().decompress(f.read()))
+        except (OSError, ValueError, zstd.ZstdError) as e:
+            print(f"Ignoring unreadable rollups {self.index_path}: {e}")
+            return
+        if data.get('version') != ROLLUP_VERSION:
+            return
+        for key, entry in data.get('runs', {}).items():
+            coarsest = _decode_level(entry.pop('coarsest'))
+            rollup = RunRollup(**entry, loader=self._load_levels)
+            rollup.levels[LEVELS[-1]] = coarsest
+            self.runs[key] = rollup
+
+    def save(self, changed: List[RunRollup]):
+        """Write the finer levels of changed runs and the index of all runs"""
+        self.directory.mkdir(exist_ok=True)
+        compressor = zstd.ZstdCompressor(level=9)
+        for rollup in changed:
+            finer = {str(width): _encode_level(rollup.levels[width]) for width in LEVELS[:-1]}
+            self._write(self._run_path(rollup.key), compressor.compress(json.dumps(finer).encode('utf-8')))
+
+        runs = {}
+        for key, rollup in self.runs.items():
+            runs[key] = {
+                'key': rollup.key, 'job_key': rollup.job_key, 'timestamp': rollup.timestamp,
+                'start_epoch': rollup.start_epoch, 'sources': rollup.sources,
+                'steady_start_s': rollup.steady_start_s, 'steady_end_s': rollup.steady_end_s,
+                'coarsest': _encode_level(rollup.level(LEVELS[-1])),
+            }
+        index = json.dumps({'version': ROLLUP_VERSION, 'runs': runs}).encode('utf-8')
+        self._write(self.index_path, compressor.compress(index))
+
+        # Drop the files of runs that no longer exist
+        keep = {self._run_path(key).name for key in self.runs} | {self.index_path.name}
+        for path in self.directory.glob("*.json.zst"):
+            if path.name not in keep:
+                path.unlink()
+
+    @staticmethod
+    def _write(path: Path, content: bytes):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        tmp_path.replace(path)
+
+    def current_sources(self) -> Dict[str, str]:
+        """Every result source with its signature: loose files, store members and archives"""
+        # Imported here to avoid a circular import
+        from results_store import ResultStore
+
+        sources = {}
+        for path in self.results_dir.glob(RESULT_PATTERN):
+            stat = path.stat()
+            sources[path.relative_to(self.results_dir).as_posix()] = f"{stat.st_mtime}:{stat.st_size}"
+        for path in self.results_dir.glob("**/*"):
+            if not is_archive(path):
+                continue
+            relative = path.relative_to(self.results_dir).as_posix()
+            if path.name.lower().endswith(STORE_SUFFIX):
+                # Store members keep their content hash across compactions
+                for member in ResultStore(path).members.values():
+                    sources[f"{relative}{STORE_MEMBER_SEPARATOR}{member.name}"] = member.sha256
+            else:
+                stat = path.stat()
+                sources[relative] = f"{stat.st_mtime}:{stat.st_size}"
+        return sources
+
+    def _parse_sources(self, parser: WarpResultsParser, sources: List[str]) -> Dict[str, List[str]]:
+        """Parse sources into parser.results; return the sources of every run key"""
+        run_sources: Dict[str, List[str]] = {}
+        for source in sorted(sources):
+            before = len(parser.results)
+            path = self.results_dir / source
+            if STORE_MEMBER_SEPARATOR in source or not is_archive(path):
+                parser.find_and_parse_results([path])
+            else:
+                archive_parser = WarpResultsParser(config=parser.config)
+                archive_parser.archives = [path]
+                archive_parser.find_and_parse_results([])
+                parser.results.extend(archive_parser.results)
+            for result in parser.results[before:]:
+                key = f"{parser._create_param_key(result)}@{result.timestamp}"
+                run_sources.setdefault(key, []).append(source)
+        return run_sources
+
+    def refresh(self, rebuild: bool = False) -> int:
+        """Bring the rollups up to date with the results on disk; return the number of (re)built runs"""
+        if not rebuild:
+            self.load()
+        sources = self.current_sources()
+
+        valid = {key: rollup for key, rollup in self.runs.items()
+                 if all(sources.get(source) == signature for source, signature in rollup.sources.items())}
+        covered = {source for rollup in valid.values() for source in rollup.sources}
+        dirty = [source for source in sources if source not in covered]
+        stale = set(self.runs) - set(valid)
+        self.runs = valid
+        if not dirty:
+            if stale:
+                self.save([])
+            return 0
+
+        parser = WarpResultsParser(self.results_dir, config=self.config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_sources = self._parse_sources(parser, dirty)
+            # A new container file of a cached run means the whole run is merged again
+            extra = [s for key in run_sources if key in self.runs for s in self.runs.pop(key).sources]
+            for key, more in self._parse_sources(parser, extra).items():
+                run_sources.setdefault(key, []).extend(more)
+
+        changed = []
+        for job_key, runs in parser.group_results_by_job().items():
+            for run in runs:
+                key = f"{job_key}@{run.timestamp}"
+                run_signatures = {source: sources[source] for source in run_sources.get(key, [])}
+                rollup = build_rollup(key, job_key, run, run_signatures)
+                if rollup:
+                    rollup.loader = self._load_levels
+                    self.runs[key] = rollup
+                    changed.append(rollup)
+        self.save(changed)
+        return len(changed)
+
+    def find(self, spec: str) -> RunRollup:
+        """The run a spec (JOB_KEY@TIMESTAMP, a timestamp or a unique part of the key) refers to"""
+        if spec in self.runs:
+            return self.runs[spec]
+        # Accept warp's filename form of the time (213436) as well
+        digits = spec.strip('[]')
+        if len(digits) == 6 and digits.isdigit():
+            spec = f"{digits[:2]}:{digits[2:4]}:{digits[4:]}"
+        candidates = [rollup for key, rollup in sorted(self.runs.items()) if spec in key]
+        if len(candidates) == 1:
+            return candidates[0]
+        if not candidates:
+            raise ValueError(f"No run matches '{spec}'")
+        raise ValueError(f"'{spec}' is ambiguous: " + ", ".join(rollup.key for rollup in candidates))
+
+
+def parse_resolution(value: str) -> int:
+    """Seconds of a resolution such as 1s, 10s, 1m, 10m or 1h"""
+    return max(int(parse_duration(value)), 1)
+
+
+def write_buckets_csv(output_file: str, rollup: RunRollup, buckets: List[Bucket]):
+    """One row per bucket with the run's wall-clock start of the bucket"""
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['elapsed_s', 'epoch', 'seconds', 'obj_per_sec', 'obj_min', 'obj_max', 'mib_per_sec',
+                         'errors', 'requests', 'avg_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'fastest_ms', 'slowest_ms'])
+        for bucket in buckets:
+            values = [bucket.mean_obj, bucket.obj_min, bucket.obj_max, bucket.mean_mib, bucket.errors,
+                      bucket.requests, bucket.avg_latency_ms, bucket.quantile(0.5), bucket.quantile(0.9),
+                      bucket.quantile(0.99), bucket.latency_min, bucket.latency_max]
+            writer.writerow([bucket.start, rollup.start_epoch + bucket.start, bucket.seconds] +
+                            ["" if value is None else f"{value:.6g}" for value in values])
+
+
+def _fmt(value: Optional[float], spec: str = ".2f") -> str:
+    return f"{value:{spec}}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query multi-resolution rollups of warp runs')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    build = subparsers.add_parser('build', help='Build or refresh the rollups')
+    build.add_argument('--rebuild', action='store_true', help='Rebuild every run instead of only new or changed ones')
+
+    subparsers.add_parser('summary', help='One line per run from the coarsest rollup level')
+
+    query = subparsers.add_parser('query', help='Series of one run at a given resolution')
+    query.add_argument('run', help='JOB_KEY@TIMESTAMP, a timestamp (e.g. 213436) or a unique part of the key')
+    query.add_argument('--resolution', default='1m', help='Bucket width, e.g. 1s, 10s, 1m, 10m, 1h (default: 1m)')
+    query.add_argument('--from', dest='start', help='Start, as elapsed time since the run start (e.g. 2h)')
+    query.add_argument('--to', dest='end', help='End, as elapsed time since the run start')
+    query.add_argument('--csv', help='Also export the buckets as CSV')
+    args = parser.parse_args()
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    cache = RollupCache(args.results_dir, config=config)
+
+    if args.mode == 'build':
+        started = time.perf_counter()
+        updated = cache.refresh(rebuild=args.rebuild)
+        print(f"Rollups: {len(cache.runs)} runs, {updated} (re)built in {time.perf_counter() - started:.2f}s "
+              f"({cache.directory})")
+        return 0
+
+    started = time.perf_counter()
+    cache.refresh()
+    if args.mode == 'summary':
+        print(f"{'Run':<56} {'Duration':>9} {'obj/s':>10} {'Min 1s':>9} {'Max 1s':>9} {'MiB/s':>9} "
+              f"{'Avg ms':>9} {'~P99 ms':>9} {'Errors':>7}")
+        for key, rollup in sorted(cache.runs.items()):
+            total = rollup.summary()
+            print(f"{key:<56} {total.seconds:>8}s {_fmt(total.mean_obj):>10} {_fmt(total.obj_min):>9} "
+                  f"{_fmt(total.obj_max):>9} {_fmt(total.mean_mib):>9} {_fmt(total.avg_latency_ms):>9} "
+                  f"{_fmt(total.quantile(0.99)):>9} {total.errors:>7.0f}")
+        print(f"{len(cache.runs)} runs summarized in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return 0
+
+    try:
+        rollup = cache.find(args.run)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    resolution = parse_resolution(args.resolution)
+    buckets = rollup.query(resolution, parse_resolution(args.start) if args.start else None,
+                           parse_resolution(args.end) if args.end else None)
+    print(f"{rollup.key} at {resolution}s resolution")
+    print(f"{'Elapsed (s)':>11} {'Seconds':>7} {'obj/s':>10} {'Min':>9} {'Max':>9} {'MiB/s':>9} "
+          f"{'Avg ms':>9} {'~P50 ms':>9} {'~P99 ms':>9} {'Max ms':>9} {'Errors':>7}")
+    for bucket in buckets:
+        print(f"{bucket.start:>11} {bucket.seconds:>7} {_fmt(bucket.mean_obj):>10} {_fmt(bucket.obj_min):>9} "
+              f"{_fmt(bucket.obj_max):>9} {_fmt(bucket.mean_mib):>9} {_fmt(bucket.avg_latency_ms):>9} "
+              f"{_fmt(bucket.quantile(0.5)):>9} {_fmt(bucket.quantile(0.99)):>9} {_fmt(bucket.latency_max):>9} "
+              f"{bucket.errors:>7.0f}")
+    print(f"{len(buckets)} buckets in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if args.csv:
+        write_buckets_csv(args.csv, rollup, buckets)
+        print(f"Buckets written to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Root Causes of a PROD vs TEST Throughput Change
+
+"Throughput -18%" says that TEST is slower, not why. This module splits the
+throughput change of every comparison into factors that can be read from the
+data, each with its share of the change:
+
+- Implied latency at equal concurrency: the same number of busy workers
+  completes fewer requests when each request takes longer.
+- Configured workers: a different number of containers or --concurrent
+  workers offers a different load in the first place.
+- Worker utilization (client saturation): a smaller share of the configured
+  workers was busy, e.g. clients that saturated or were throttled before the
+  storage did. This is the per-window utilization of the Client Saturation
+  section (Little's law), capped at 100%.
+- Errors: failed requests occupy workers without adding to throughput.
+- Object size mix: MiB/s changes with the mean object size even at the same
+  request rate (random sizes, different size buckets).
+- Host imbalance: with several --host endpoints, endpoints that complete
+  fewer requests than the average drag the total down.
+- Incidents: seconds whose throughput collapsed far below the run's median
+  (a stall, a failover), as opposed to a uniformly slower run.
+
+Throughput in MiB/s is the product configured workers x utilization /
+latency x success share x mean object size, so the log of the TEST/PROD ratio
+is exactly the sum of the log ratios of these terms. The latency is the one
+implied by the other terms (Little's law), which is the throughput-weighted
+mean latency of the windows; it is reported as such, next to the measured
+mean latency of the comparison table. Host imbalance and incidents surface as longer
+request latency in a closed loop, so their shares (the loss relative to all
+endpoints at least average, and to incident seconds at the median level) are
+carved out of the latency share. The log shares are scaled to percentage
+points of the reported throughput change, so the factors add up to it.
+"""
+
+import math
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, ComparisonResult, ComparisonConfig, parse_warp_time
+from slo_analysis import merged_segments
+from change_points import run_point
+
+
+MAD_SCALE = 1.4826  # MAD of normal noise times this is its standard deviation
+MIN_INCIDENT_SECONDS = 10  # shorter runs have no meaningful median level
+TOP_INCIDENTS = 3
+# Added to the latency hint for operations that report time to first byte (GET)
+TTFB_HINT = "; compare TTFB and transfer time to tell lookup from bandwidth"
+
+# (name, label, what to look at when this factor drives a throughput drop)
+FACTORS = (
+    ('latency', 'Implied latency at equal concurrency', "requests are slower at the same load"),
+    ('workers', 'Configured workers',
+     "TEST ran fewer workers (containers x --concurrent), so it was offered less load than PROD"),
+    ('utilization', 'Worker utilization (client saturation)',
+     "fewer of the configured workers were busy; see Client Saturation for client-limited runs"),
+    ('errors', 'Error rate', "failed requests; check the first errors of the runs"),
+    ('object_size', 'Object size mix', "the mean object size differs, so the runs do not move the same data"),
+    ('hosts', 'Host imbalance', "endpoints completed unequal shares of the requests; check the slowest endpoint"),
+    ('incidents', 'Incidents', "throughput collapsed in a few intervals; see the incident intervals"),
+)
+
+
+@dataclass
+class Incident:
+    """A stretch of consecutive seconds far below the run's median throughput"""
+    environment: str
+    run: str  # run timestamp
+    start: str
+    seconds: int
+    median_obj_per_sec: float
+    lost_objects: float  # objects the run would have completed at its median level
+
+
+@dataclass
+class RunTerms:
+    """Factor inputs of one run"""
+    throughput_mib: float
+    throughput_obj: float
+    latency_ms: float  # measured mean latency
+    error_rate: float  # failed share of all attempts
+    workers: float  # configured workers of all containers
+    utilization: float  # busy share of the configured workers, at most 1
+    host_loss: float  # log of the throughput with every endpoint at least average over the actual one
+    incident_loss: float  # log of the throughput with incident seconds at the median over the actual one
+    host_throughputs: Dict[str, float] = field(default_factory=dict)
+    incidents: List[Incident] = field(default_factory=list)
+
+
+@dataclass
+class EnvironmentTerms:
+    """Factor inputs averaged over the runs of one environment"""
+    runs: int
+    throughput_mib: float
+    throughput_obj: float
+    latency_ms: float
+    error_rate: float
+    workers: float
+    utilization: float
+    host_loss: float
+    incident_loss: float
+    slowest_host: Optional[str]
+    incidents: List[Incident]
+
+    @property
+    def implied_latency_ms(self) -> float:
+        """Latency at which the busy workers achieve the attempted ops/s (Little's law)"""
+        return self.workers * self.utilization * (1 - self.error_rate) / self.throughput_obj * 1000.0
+
+    @property
+    def object_size_mib(self) -> float:
+        return self.throughput_mib / self.throughput_obj
+
+    def value(self, name: str) -> float:
+        """Display value of a factor"""
+        return {
+            'latency': self.implied_latency_ms,
+            'workers': self.workers,
+            'utilization': self.utilization * 100,
+            'errors': self.error_rate * 100,
+            'object_size': self.object_size_mib * 1024,
+            'hosts': (1 - math.exp(-self.host_loss)) * 100,
+            'incidents': (1 - math.exp(-self.incident_loss)) * 100,
+        }[name]
+
+
+@dataclass
+class Factor:
+    name: str
+    label: str
+    prod: float
+    test: float
+    unit: str
+    log_contribution: float
+    contribution_percent: float  # percentage points of the throughput change
+    share_percent: Optional[float]  # share of the change; negative when the factor worked against it
+
+
+UNITS = {'latency': 'ms', 'workers': 'workers', 'utilization': '% busy', 'errors': '%', 'object_size': 'KiB',
+         'hosts': '% lost', 'incidents': '% lost'}
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def host_loss(host_throughputs: Dict[str, float]) -> Tuple[float, Optional[str]]:
+    """Log throughput lost to endpoints below the average, and the slowest endpoint"""
+    rates = {host: rate for host, rate in (host_throughputs or {}).items() if rate > 0}
+    if len(rates) < 2:
+        return 0.0, None
+    total = sum(rates.values())
+    mean = total / len(rates)
+    balanced = sum(max(rate, mean) for rate in rates.values())
+    return math.log(balanced / total), min(rates, key=rates.get)
+
+
+def find_incidents(environment: str, result: WarpResult, sigmas: float, min_drop_percent: float
+                   ) -> Tuple[float, List[Incident]]:
+    """Log throughput lost in incident seconds and the incident stretches of one run"""
+    segments = merged_segments(result)
+    if len(segments) < MIN_INCIDENT_SECONDS:
+        return 0.0, []
+    rates = [segment['obj_per_sec'] for segment in segments]
+    total = sum(rates)
+    median = _median(rates)
+    if total <= 0 or median <= 0:
+        return 0.0, []
+    sigma = MAD_SCALE * _median([abs(rate - median) for rate in rates])
+    # Both far below the usual noise and far below the median, so steady noisy runs have no incidents
+    limit = min(median - sigmas * sigma, median * (1 - min_drop_percent / 100))
+
+    incidents, lost, stretch = [], 0.0, None
+    for segment, rate in zip(segments + [None], rates + [None]):
+        if rate is not None and rate < limit:
+            lost += median - rate
+            if stretch is None:
+                stretch = Incident(environment=environment, run=result.timestamp, start=segment['start'], seconds=0,
+                                   median_obj_per_sec=median, lost_objects=0.0)
+            stretch.seconds += 1
+            stretch.lost_objects += median - rate
+        elif stretch is not None:
+            incidents.append(stretch)
+            stretch = None
+    return math.log((total + lost) / total), incidents
+
+
+def run_terms(environment: str, result: WarpResult, config: ComparisonConfig) -> RunTerms:
+    incident_loss, incidents = find_incidents(environment, result, config.root_cause_incident_sigmas,
+                                              config.root_cause_incident_drop_percent)
+    error_rate = min(run_point(result).error_rate_percent / 100, 0.999)
+    # The per-window utilization of the saturation check; more busy workers than configured is noise
+    utilization = result.worker_utilization
+    workers = result.concurrency
+    if utilization is None or not workers:
+        busy = result.avg_throughput_obj / (1 - error_rate) * result.avg_latency_ms / 1000.0
+        workers = workers or busy
+        utilization = busy / workers if workers else 1.0
+    return RunTerms(
+        throughput_mib=result.avg_throughput_mib,
+        throughput_obj=result.avg_throughput_obj,
+        latency_ms=result.avg_latency_ms,
+        error_rate=error_rate,
+        workers=workers,
+        utilization=min(utilization, 1.0),
+        host_loss=host_loss(result.host_throughputs)[0],
+        incident_loss=incident_loss,
+        host_throughputs=dict(result.host_throughputs or {}),
+        incidents=incidents,
+    )
+
+
+def environment_terms(environment: str, results: List[WarpResult], config: ComparisonConfig) -> Optional[EnvironmentTerms]:
+    """Means over the runs, the same way the comparison averages throughput and latency"""
+    runs = [run_terms(environment, result, config) for result in results]
+    if not runs:
+        return None
+    count = len(runs)
+    mean = lambda name: sum(getattr(run, name) for run in runs) / count
+    terms = EnvironmentTerms(
+        runs=count,
+        throughput_mib=mean('throughput_mib'),
+        throughput_obj=mean('throughput_obj'),
+        latency_ms=mean('latency_ms'),
+        error_rate=mean('error_rate'),
+        workers=mean('workers'),
+        utilization=mean('utilization'),
+        host_loss=mean('host_loss'),
+        incident_loss=mean('incident_loss'),
+        slowest_host=None,
+        incidents=sorted((incident for run in runs for incident in run.incidents),
+                         key=lambda incident: -incident.lost_objects),
+    )
+    hosts: Dict[str, float] = {}
+    for run in runs:
+        for host, rate in run.host_throughputs.items():
+            hosts[host] = hosts.get(host, 0.0) + rate
+    terms.slowest_host = host_loss(hosts)[1]
+    return terms
+
+
+def decompose(prod: EnvironmentTerms, test: EnvironmentTerms, has_ttfb: bool = False) -> Optional[Dict[str, Any]]:
+    """Factors of the TEST vs PROD throughput change; None when either side has no throughput or latency"""
+    if min(prod.throughput_mib, test.throughput_mib, prod.throughput_obj, test.throughput_obj,
+           prod.workers, test.workers, prod.utilization, test.utilization) <= 0:
+        return None
+
+    total = math.log(test.throughput_mib / prod.throughput_mib)
+    incidents = -(test.incident_loss - prod.incident_loss)
+    hosts = -(test.host_loss - prod.host_loss)
+    logs = {
+        # Host imbalance and incidents show up as longer requests, so they are taken out of the latency term
+        'latency': -math.log(test.implied_latency_ms / prod.implied_latency_ms) - incidents - hosts,
+        'workers': math.log(test.workers / prod.workers),
+        'utilization': math.log(test.utilization / prod.utilization),
+        'errors': math.log((1 - test.error_rate) / (1 - prod.error_rate)),
+        'object_size': math.log(test.object_size_mib / prod.object_size_mib),
+        'hosts': hosts,
+        'incidents': incidents,
+    }
+    change_percent = (test.throughput_mib / prod.throughput_mib - 1) * 100
+
+    factors = []
+    for name, label, _ in FACTORS:
+        log_contribution = logs[name]
+        factors.append(Factor(
+            name=name,
+            label=label,
+            prod=prod.value(name),
+            test=test.value(name),
+            unit=UNITS[name],
+            log_contribution=log_contribution,
+            # Log shares add up to the log ratio; scaling them keeps their sum equal to the change in percent
+            contribution_percent=(log_contribution / total * change_percent if abs(total) > 1e-9
+                                  else log_contribution * 100),
+            share_percent=log_contribution / total * 100 if abs(total) > 1e-9 else None,
+        ))
+
+    # The main driver is the largest factor pointing the same way as the change
+    drivers = [factor for factor in factors if factor.log_contribution * total > 0]
+    main = max(drivers, key=lambda factor: abs(factor.log_contribution)) if drivers else None
+    incidents_listed = sorted(prod.incidents + test.incidents, key=lambda incident: -incident.lost_objects)
+    hint = None
+    if main and total < 0:
+        hint = next(hint for name, _, hint in FACTORS if name == main.name)
+        if main.name == 'latency' and has_ttfb:
+            hint += TTFB_HINT
+    return {
+        'throughput_change_percent': change_percent,
+        'factors': [asdict(factor) for factor in factors],
+        'main_driver': main.name if main else None,
+        'hint': hint,
+        # The measured mean latency, which the implied latency of the latency factor is not
+        'prod_latency_ms': prod.latency_ms,
+        'test_latency_ms': test.latency_ms,
+        'prod_slowest_host': prod.slowest_host,
+        'test_slowest_host': test.slowest_host,
+        'incidents': [asdict(incident) for incident in incidents_listed[:TOP_INCIDENTS]],
+    }
+
+
+def decompose_comparison(parser: WarpResultsParser, prod_results: List[WarpResult],
+                         test_results: List[WarpResult]) -> Optional[Dict[str, Any]]:
+    """Root-cause breakdown of the throughput change between the PROD and TEST runs of one comparison"""
+    prod = environment_terms('PROD', prod_results, parser.config)
+    test = environment_terms('TEST', test_results, parser.config)
+    if not prod or not test:
+        return None
+    has_ttfb = any(result.ttfb_avg_ms is not None for result in prod_results + test_results)
+    return decompose(prod, test, has_ttfb)
+
+
+def main_driver(comp: ComparisonResult) -> Optional[str]:
+    """One-line summary of the factor behind the throughput change of a comparison"""
+    breakdown = comp.root_cause
+    if not breakdown or not breakdown['main_driver']:
+        return None
+    factor = next(f for f in breakdown['factors'] if f['name'] == breakdown['main_driver'])
+    summary = (f"{factor['label']} ({factor['contribution_percent']:+.1f} of "
+               f"{breakdown['throughput_change_percent']:+.1f} points)")
+    return f"{summary}: {breakdown['hint']}" if breakdown['hint'] else summary
+
+
+def _value(value: float, unit: str) -> str:
+    if unit == 'workers':
+        return f"{value:.1f}"
+    if unit == '%':
+        return f"{value:.3f}%"
+    if unit in ('% lost', '% busy'):
+        return f"{value:.1f}%"
+    return f"{value:.2f} {unit}"
+
+
+def write_root_cause(f, comp: ComparisonResult):
+    """Write the throughput change breakdown of one comparison (part of the detailed comparison)"""
+    breakdown = comp.root_cause
+    if not breakdown:
+        return
+    f.write("#### Throughput Change Breakdown\n\n")
+    f.write(f"Throughput changed by {breakdown['throughput_change_percent']:+.1f}%. Each factor's contribution is in "
+            f"percentage points of that change; the contributions add up to it.\n\n")
+    f.write("| Factor | PROD | TEST | Contribution | Share |\n")
+    f.write("|--------|------|------|--------------|-------|\n")
+    for factor in breakdown['factors']:
+        # round() or 0.0 keeps rounding noise from printing as -0
+        share = f"{round(factor['share_percent']) or 0:.0f}%" if factor['share_percent'] is not None else "-"
+        contribution = round(factor['contribution_percent'], 1) or 0.0
+        marker = " ◀" if factor['name'] == breakdown['main_driver'] else ""
+        f.write(f"| {factor['label']}{marker} | {_value(factor['prod'], factor['unit'])} | "
+                f"{_value(factor['test'], factor['unit'])} | {contribution:+.1f} pp | {share} |\n")
+    f.write("\n")
+
+    f.write(f"Implied latency is the latency at which the busy workers complete the measured requests (Little's law); "
+            f"the measured mean latency is {breakdown['prod_latency_ms']:.2f} ms (PROD) vs "
+            f"{breakdown['test_latency_ms']:.2f} ms (TEST).\n\n")
+
+    driver = main_driver(comp)
+    if driver:
+        f.write(f"- **Main driver**: {driver}\n")
+    for environment in ('prod', 'test'):
+        if breakdown[f'{environment}_slowest_host']:
+            f.write(f"- **Slowest endpoint ({environment.upper()})**: {breakdown[f'{environment}_slowest_host']}\n")
+    for incident in breakdown['incidents']:
+        start = parse_warp_time(incident['start'])
+        when = start.strftime('%H:%M:%S') if isinstance(start, datetime) else incident['start']
+        f.write(f"- **Incident ({incident['environment']})**: run {incident['run']} at {when} UTC for "
+                f"{incident['seconds']}s, {incident['lost_objects']:.0f} objects below the median rate of "
+                f"{incident['median_obj_per_sec']:.0f} obj/s\n")
+    f.write("\n")
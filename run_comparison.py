@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 """
 Simple script to run PROD vs TEST comparison analysis
+
+Exit codes (for CI gating):
+  0 - no regression at or above the --fail-on significance level
+  1 - at least one such regression was detected
+  2 - no results or no PROD vs TEST comparisons were available
 """
 
+import argparse
+import json
 import sys
 import os
 from pathlib import Path
@@ -10,100 +17,149 @@ from pathlib import Path
 # Add the current directory to Python path to import our modules
 sys.path.insert(0, str(Path(__file__).parent))
 
-from parse_warp_results import WarpResultsParser
+from parse_warp_results import (WarpResultsParser, ComparisonConfig, SIGNIFICANCE_LEVELS, DEFAULT_CONFIG_FILE,
+                                is_archive, parse_obj_size)
+
 
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_NO_DATA = 2
 
-def main():
+
+def main() -> int:
     """Run PROD vs TEST comparison analysis"""
-    
+    arg_parser = argparse.ArgumentParser(description='Run PROD vs TEST comparison analysis')
+    arg_parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    arg_parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    arg_parser.add_argument('--output', default='warp_comparison_report.md', help='Markdown report file')
+    arg_parser.add_argument('--json', dest='json_output',
+                            help='Also write every comparison, metric, threshold and verdict to this JSON file')
+    arg_parser.add_argument('--fail-on', choices=SIGNIFICANCE_LEVELS + ['never'], default='LOW',
+                            help='Exit non-zero on regressions at or above this significance level (default: LOW)')
+    arg_parser.add_argument('--max-memory',
+                            help='Approximate memory budget for parsed results (e.g. 2G); the rest is spilled to disk')
+    args = arg_parser.parse_args()
+
     print("🔍 Warp PROD vs TEST Comparison Analysis")
     print("=" * 50)
-    
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+
     # Check if we have results to analyze
-    results_dir = Path(".")
+    results_dir = Path(args.results_dir)
     warp_files = list(results_dir.glob("**/warp-*-*.json.zst"))
-    
+    warp_files += [path for path in results_dir.glob("**/*") if is_archive(path)]
+
     if not warp_files:
         print("❌ No warp result files found!")
         print("   Please ensure you have collected results first.")
         print("   Run: ./collect_warp_results.ps1 --collect")
         print(f"   Searched in: {results_dir}")
-        return
-    
-    print(f"📁 Found {len(warp_files)} warp result files")
-    
+        return EXIT_NO_DATA
+
+    print(f"📁 Found {len(warp_files)} warp result files and archives")
+
     # Create parser and analyze results
-    parser = WarpResultsParser(".")
+    max_memory = parse_obj_size(args.max_memory) if args.max_memory else None
+    if args.max_memory and not max_memory:
+        arg_parser.error(f"invalid --max-memory: {args.max_memory}")
+    parser = WarpResultsParser(args.results_dir, config=config, max_memory=max_memory)
     results = parser.find_and_parse_results()
-    
+
     if not results:
         print("❌ No results could be parsed!")
-        return
-    
+        return EXIT_NO_DATA
+
     print(f"✅ Successfully parsed {len(results)} results")
-    
+
     # Group results by environment
     prod_results = [r for r in results if r.environment == "PROD"]
     test_results = [r for r in results if r.environment == "TEST"]
-    
+
     print(f"📊 PROD results: {len(prod_results)}")
     print(f"🧪 TEST results: {len(test_results)}")
-    
+
     # Run comparison analysis
     comparisons = parser.compare_prod_vs_test()
-    
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(parser.comparison_summary(comparisons), f, indent=2)
+            f.write("\n")
+        print(f"🧾 JSON written: {args.json_output}")
+
     if not comparisons:
         print("\n⚠️  No PROD vs TEST comparisons available")
         print("   Make sure you have both PROD and TEST results for the same operations")
-        return
-    
+        return EXIT_NO_DATA
+
     print(f"\n🔍 Found {len(comparisons)} operation comparisons")
-    
+    print(f"   Thresholds: throughput -{config.throughput_degradation_percent:g}%, "
+          f"latency +{config.latency_increase_percent:g}%, P99 +{config.p99_latency_increase_percent:g}%")
+
     # Display comparison summary
     print("\n📈 Comparison Summary:")
-    print("-" * 80)
-    print(f"{'Operation':<12} {'Throughput':<15} {'Latency':<15} {'Status':<12} {'Significance':<12}")
-    print("-" * 80)
-    
+    print("-" * 95)
+    print(f"{'Operation':<12} {'Throughput':<15} {'Latency':<15} {'P99 Latency':<15} {'Status':<12} {'Significance':<12}")
+    print("-" * 95)
+
     regressions_found = 0
-    
+
     for comp in comparisons:
-        status = "⚠️ REGRESSION" if comp.throughput_regression or comp.latency_regression else "✅ PASS"
+        status = "⚠️ REGRESSION" if comp.has_regression else "✅ PASS"
         significance_emoji = {"HIGH": "🔴", "MEDIUM": "🟡", "LOW": "🟢"}[comp.significance_level]
-        
+
         print(f"{comp.operation:<12} {comp.throughput_diff_percent:+.1f}%{'':<8} "
-              f"{comp.latency_diff_percent:+.1f}%{'':<8} {status:<12} {significance_emoji} {comp.significance_level}")
-        
-        if comp.throughput_regression or comp.latency_regression:
+              f"{comp.latency_diff_percent:+.1f}%{'':<8} {comp.p99_diff_percent:+.1f}%{'':<8} "
+              f"{status:<12} {significance_emoji} {comp.significance_level}")
+
+        if comp.has_regression:
             regressions_found += 1
-    
-    print("-" * 80)
-    
+
+    print("-" * 95)
+
     # Summary
     if regressions_found > 0:
         print(f"\n⚠️  {regressions_found} regression(s) detected!")
         print("   Check the detailed report for more information.")
     else:
         print(f"\n✅ No regressions detected - all tests passed!")
-    
+
     # Generate detailed report
     print(f"\n📄 Generating detailed report...")
-    parser.generate_comparison_report("warp_comparison_report.md")
-    print(f"✅ Report generated: warp_comparison_report.md")
-    
+    parser.generate_comparison_report(args.output)
+    print(f"✅ Report generated: {args.output}")
+
     # Show quick recommendations
     if regressions_found > 0:
         print(f"\n💡 Quick Recommendations:")
         for comp in comparisons:
-            if comp.throughput_regression or comp.latency_regression:
+            if comp.has_regression:
                 print(f"   • {comp.operation}: Investigate performance changes")
                 if comp.throughput_regression:
                     print(f"     - Throughput decreased by {abs(comp.throughput_diff_percent):.1f}%")
                 if comp.latency_regression:
                     print(f"     - Latency increased by {comp.latency_diff_percent:.1f}%")
-    
+                if comp.p99_regression:
+                    print(f"     - P99 latency increased by {comp.p99_diff_percent:.1f}%")
+                for name, slo in (comp.slo_compliance or {}).items():
+                    if slo['regression']:
+                        print(f"     - SLO {name}: {slo['test_compliance_percent']:.2f}% compliant "
+                              f"(objective {slo['objective_percent']:g}%)")
+
     print(f"\n🎯 Analysis complete!")
 
+    # Gate on regressions at or above the chosen significance level
+    if args.fail_on == 'never':
+        return EXIT_OK
+    min_level = SIGNIFICANCE_LEVELS.index(args.fail_on)
+    blocking = [c for c in comparisons
+                if c.has_regression and SIGNIFICANCE_LEVELS.index(c.significance_level) >= min_level]
+    if blocking:
+        print(f"\n⛔ {len(blocking)} regression(s) at or above {args.fail_on} significance - failing")
+        return EXIT_REGRESSION
+    return EXIT_OK
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
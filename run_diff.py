@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Time-Aligned Run Diff
+
+This module puts two individual runs side by side, typically one PROD and one
+TEST run of the same configuration, instead of comparing group means. Both
+runs are aligned on elapsed time since their start (or since the start of
+their steady window), all containers of a run summed per second. From the
+per-second throughput deltas and the per-window latency deltas it finds the
+intervals holding most of the difference and classifies the gap:
+
+  constant  - B differs from A by a similar amount throughout
+  growing   - the gap widens (or closes) over the run
+  isolated  - A and B agree except for a few incidents
+  none      - no difference above the configured thresholds
+
+The aligned delta series can be exported as CSV or JSON for plotting.
+Runs are given as a result file (or store member), a run timestamp such as
+"2025-08-05 21:34:36" or 213436 (optionally prefixed with JOB_KEY@), or a
+container file id to diff a single container of a merged run.
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import re
+import sys
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import (WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE,
+                                STORE_MEMBER_SEPARATOR, parse_warp_time)
+
+
+LATENCY_FIELDS = {'avg': 'avg_ms', 'p99': 'p99_ms', 'ttfb_avg': 'ttfb_avg_ms', 'ttfb_p99': 'ttfb_p99_ms'}
+SMOOTH_SECONDS = 10  # rolling window used to find intervals
+MERGE_GAP_SECONDS = 5  # flagged stretches closer than this form one interval
+MIN_INTERVAL_SECONDS = 3
+ISOLATED_COVERAGE = 0.25  # incidents cover at most this share of the run
+EDGE_FRACTION = 0.2  # early and late windows of the gap trend
+
+RUN_SPEC = re.compile(r'^(?:(?P<job>[A-Za-z0-9_]+)@)?(?P<when>.+)$')
+SPEC_TIME = re.compile(r'^(?:(?P<date>\d{4}-\d{2}-\d{2})[ T\[])?'
+                       r'(?P<hh>\d{2}):?(?P<mm>\d{2}):?(?P<ss>\d{2})\]?$')
+
+
+@dataclass
+class DiffInterval:
+    """Stretch of the aligned runs where the throughput difference is concentrated"""
+    start_s: int
+    end_s: int  # exclusive
+    mean_delta_obj: float
+    mean_delta_percent: float
+    share_percent: float  # of the total absolute throughput difference
+
+
+@dataclass
+class RunDiff:
+    """Second-by-second comparison of two runs aligned on elapsed time"""
+    label_a: str
+    label_b: str
+    seconds: int
+    mean_a_obj: float
+    mean_b_obj: float
+    mean_delta_obj: float
+    mean_delta_percent: float
+    median_delta_percent: float
+    gap_trend_percent: float  # change of the gap over the run (robust slope), relative to A
+    pattern: str
+    concentrated_percent: float  # share of the total absolute difference inside the intervals
+    coverage_percent: float  # share of the run covered by the intervals
+    mean_delta_avg_ms: Optional[float] = None
+    mean_delta_p99_ms: Optional[float] = None
+    intervals: List[DiffInterval] = field(default_factory=list)
+    throughput: List[Dict[str, Any]] = field(default_factory=list)  # aligned per-second series
+    latency: List[Dict[str, Any]] = field(default_factory=list)  # aligned per-window series
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _time_of(spec: str) -> Optional[Tuple[Optional[str], str]]:
+    """(date or None, HH:MM:SS) of a run timestamp given on the command line"""
+    match = SPEC_TIME.match(spec.strip())
+    if not match:
+        return None
+    return match.group('date'), f"{match.group('hh')}:{match.group('mm')}:{match.group('ss')}"
+
+
+def resolve_run(parser: WarpResultsParser, spec: str) -> Tuple[str, WarpResult]:
+    """Find the run a command line spec refers to among the parsed results; return (label, run)"""
+    for result in parser.results:
+        if result.container_id == spec:
+            return f"{parser._create_param_key(result)}@{result.timestamp} (container {spec})", result
+
+    match = RUN_SPEC.match(spec)
+    when = _time_of(match.group('when')) if match else None
+    if not when:
+        raise ValueError(f"'{spec}' is neither a result file, a container id nor a run timestamp")
+    date, clock = when
+
+    candidates = []
+    for job_key, runs in sorted(parser.group_results_by_job().items()):
+        if match.group('job') and match.group('job') != job_key:
+            continue
+        for run in runs:
+            run_date, _, run_clock = run.timestamp.partition(' ')
+            if run_clock == clock and (date is None or run_date == date):
+                candidates.append((f"{job_key}@{run.timestamp}", run))
+
+    if len(candidates) == 1:
+        return candidates[0]
+    if not candidates:
+        raise ValueError(f"No run matches '{spec}'")
+    raise ValueError(f"'{spec}' is ambiguous, use JOB_KEY@TIMESTAMP: " + ", ".join(label for label, _ in candidates))
+
+
+def load_run(spec: str, shared: WarpResultsParser, config: ComparisonConfig) -> Tuple[str, WarpResult]:
+    """A run given as a result file (parsed on its own) or as a spec resolved among the shared results"""
+    store, separator, _ = spec.partition(STORE_MEMBER_SEPARATOR)
+    if Path(spec).is_file() or (separator and Path(store).is_file()):
+        single = WarpResultsParser(config=config, trim_steady_state=shared.trim_steady_state)
+        single.find_and_parse_results([Path(spec)])
+        if not single.results:
+            raise ValueError(f"Could not parse {spec}")
+        return Path(spec).name, single.results[0]
+    if not shared.results:
+        shared.find_and_parse_results()
+    return resolve_run(shared, spec)
+
+
+def _parts_field(result: WarpResult, name: str) -> List[Dict[str, Any]]:
+    """A series of a run, or of all its operations for MIXED runs that only carry them per operation"""
+    if getattr(result, name):
+        return getattr(result, name)
+    return [item for part in (result.op_breakdown or {}).values() for item in getattr(part, name) or []]
+
+
+def _bounds(result: WarpResult, steady: bool) -> Tuple[Optional[datetime], Optional[datetime]]:
+    if steady and result.steady_state:
+        return parse_warp_time(result.steady_start), parse_warp_time(result.steady_end)
+    return None, None
+
+
+def elapsed_throughput(result: WarpResult, steady: bool = False) -> Tuple[Optional[int], List[Tuple[float, float]]]:
+    """(start second, [(obj/s, MiB/s)] per elapsed second) with all containers summed; gaps repeat the last value"""
+    start, end = _bounds(result, steady)
+    buckets: Dict[int, List[float]] = {}
+    for segment in _parts_field(result, 'throughput_per_second'):
+        when = parse_warp_time(segment.get('start', ''))
+        if not when or (start and when < start) or (end and when >= end):
+            continue
+        bucket = buckets.setdefault(int(when.timestamp()), [0.0, 0.0])
+        bucket[0] += segment.get('obj_per_sec', 0)
+        bucket[1] += segment.get('mib_per_sec', 0)
+    if not buckets:
+        return None, []
+
+    first = min(buckets)
+    series = []
+    for second in range(first, max(buckets) + 1):
+        series.append(tuple(buckets.get(second, series[-1] if series else (0.0, 0.0))))
+    return first, series
+
+
+def elapsed_latency(result: WarpResult, origin: int, steady: bool = False) -> Dict[int, Dict[str, Any]]:
+    """Latency windows of all clients merged (request-weighted) by their slot in elapsed time since origin"""
+    start, end = _bounds(result, steady)
+    slots: Dict[int, Dict[str, List[float]]] = {}
+    widths = []
+    for window in _parts_field(result, 'latency_windows'):
+        window_start = parse_warp_time(window.get('start', ''))
+        window_end = parse_warp_time(window.get('end', ''))
+        requests = window.get('requests', 0) or 0
+        if not window_start or not window_end or window_end <= window_start or requests <= 0:
+            continue
+        if start and end and not start <= window_start + (window_end - window_start) / 2 <= end:
+            continue
+        width = (window_end - window_start).total_seconds()
+        widths.append(width)
+        # Clients start within a second of each other, so their n-th windows share a slot
+        slot = slots.setdefault(round((window_start.timestamp() - origin) / width), {})
+        for name, key in LATENCY_FIELDS.items():
+            if window.get(key) is not None:
+                weighted = slot.setdefault(name, [0.0, 0])
+                weighted[0] += window[key] * requests
+                weighted[1] += requests
+    if not widths:
+        return {}
+
+    width = _median(widths)
+    return {int(round(index * width)): {name: total / requests for name, (total, requests) in slot.items()}
+            for index, slot in sorted(slots.items())}
+
+
+def _rolling_mean(values: List[float], width: int) -> List[float]:
+    half = width // 2
+    prefix = [0.0]
+    for value in values:
+        prefix.append(prefix[-1] + value)
+    smoothed = []
+    for i in range(len(values)):
+        low, high = max(i - half, 0), min(i + half + 1, len(values))
+        smoothed.append((prefix[high] - prefix[low]) / (high - low))
+    return smoothed
+
+
+def find_intervals(deltas: List[float], threshold: float, step: int = 1) -> List[Tuple[int, int]]:
+    """[start, end) stretches (in samples of step seconds) whose smoothed delta exceeds the threshold"""
+    smoothed = _rolling_mean(deltas, max(SMOOTH_SECONDS // step, 1))
+    merge_gap = max(MERGE_GAP_SECONDS // step, 1)
+    min_length = max(-(-MIN_INTERVAL_SECONDS // step), 1)
+    stretches: List[List[int]] = []
+    for second, value in enumerate(smoothed):
+        if abs(value) <= threshold:
+            continue
+        same_sign = stretches and (smoothed[stretches[-1][0]] > 0) == (value > 0)
+        if same_sign and second - stretches[-1][1] <= merge_gap:
+            stretches[-1][1] = second + 1
+        else:
+            stretches.append([second, second + 1])
+    return [(start, end) for start, end in stretches if end - start >= min_length]
+
+
+def diff_runs(label_a: str, run_a: WarpResult, label_b: str, run_b: WarpResult,
+              config: ComparisonConfig, steady: bool = False) -> Optional[RunDiff]:
+    """Align two runs on elapsed time and characterize where and how B differs from A"""
+    origin_a, series_a = elapsed_throughput(run_a, steady)
+    origin_b, series_b = elapsed_throughput(run_b, steady)
+    if not series_a or not series_b:
+        return None
+    return diff_series(label_a, series_a, elapsed_latency(run_a, origin_a, steady),
+                       label_b, series_b, elapsed_latency(run_b, origin_b, steady), config)
+
+
+def diff_series(label_a: str, series_a: List[Tuple[float, float]], latency_a: Dict[int, Dict[str, Any]],
+                label_b: str, series_b: List[Tuple[float, float]], latency_b: Dict[int, Dict[str, Any]],
+                config: ComparisonConfig, step: int = 1) -> Optional[RunDiff]:
+    """Diff two aligned series of (obj/s, MiB/s) samples taken every step seconds"""
+    # Imported here to avoid a circular import
+    from drift_analysis import theil_sen_slope
+
+    samples = min(len(series_a), len(series_b))
+    if samples == 0:
+        return None
+    seconds = samples * step
+
+    a_obj = [series_a[t][0] for t in range(samples)]
+    b_obj = [series_b[t][0] for t in range(samples)]
+    deltas = [b - a for a, b in zip(a_obj, b_obj)]
+    mean_a = sum(a_obj) / samples
+    mean_b = sum(b_obj) / samples
+    scale = mean_a if mean_a > 0 else 1.0
+    # A gap is significant once it exceeds the throughput degradation threshold of the comparison
+    threshold = config.throughput_degradation_percent / 100 * scale
+
+    slope, _ = theil_sen_slope(deltas)
+    edge = max(int(samples * EDGE_FRACTION), 1)
+    early, late = _median(deltas[:edge]), _median(deltas[-edge:])
+    trend = slope * samples
+    median_delta = _median(deltas)
+
+    intervals = []
+    total_abs = sum(abs(d) for d in deltas) or 1.0
+    covered = 0
+    concentrated = 0.0
+    for start, end in find_intervals(deltas, threshold, step):
+        part = deltas[start:end]
+        interval_a = sum(a_obj[start:end]) / (end - start)
+        mean_delta = sum(part) / len(part)
+        share = sum(abs(d) for d in part) / total_abs * 100
+        intervals.append(DiffInterval(start_s=start * step, end_s=end * step, mean_delta_obj=mean_delta,
+                                      mean_delta_percent=mean_delta / interval_a * 100 if interval_a > 0 else 0.0,
+                                      share_percent=share))
+        covered += end - start
+        concentrated += share
+    coverage = covered / samples
+
+    if abs(trend) > threshold and abs(late - early) > threshold and (late - early) * slope > 0:
+        pattern = "growing"
+    elif intervals and coverage <= ISOLATED_COVERAGE and abs(median_delta) <= threshold:
+        pattern = "isolated"
+    elif abs(median_delta) > threshold:
+        pattern = "constant"
+    else:
+        pattern = "none"
+
+    diff = RunDiff(
+        label_a=label_a,
+        label_b=label_b,
+        seconds=seconds,
+        mean_a_obj=mean_a,
+        mean_b_obj=mean_b,
+        mean_delta_obj=mean_b - mean_a,
+        mean_delta_percent=(mean_b - mean_a) / scale * 100,
+        median_delta_percent=median_delta / scale * 100,
+        gap_trend_percent=trend / scale * 100,
+        pattern=pattern,
+        concentrated_percent=concentrated,
+        coverage_percent=coverage * 100,
+        intervals=sorted(intervals, key=lambda i: i.share_percent, reverse=True),
+    )
+    for t in range(samples):
+        diff.throughput.append({
+            'elapsed_s': t * step,
+            'a_obj_per_sec': a_obj[t],
+            'b_obj_per_sec': b_obj[t],
+            'delta_obj_per_sec': deltas[t],
+            'delta_percent': deltas[t] / a_obj[t] * 100 if a_obj[t] > 0 else None,
+            'a_mib_per_sec': series_a[t][1],
+            'b_mib_per_sec': series_b[t][1],
+        })
+
+    for elapsed, window_a in sorted(latency_a.items()):
+        window_b = latency_b.get(elapsed)
+        if window_b is None or not 0 <= elapsed < seconds:
+            continue
+        entry = {'elapsed_s': elapsed}
+        for name in LATENCY_FIELDS:
+            if window_a.get(name) is not None and window_b.get(name) is not None:
+                entry[f'a_{name}_ms'] = window_a[name]
+                entry[f'b_{name}_ms'] = window_b[name]
+                entry[f'delta_{name}_ms'] = window_b[name] - window_a[name]
+        diff.latency.append(entry)
+    for name in ('avg', 'p99'):
+        values = [w[f'delta_{name}_ms'] for w in diff.latency if f'delta_{name}_ms' in w]
+        if values:
+            setattr(diff, f'mean_delta_{name}_ms', sum(values) / len(values))
+    return diff
+
+
+PATTERN_TEXT = {
+    'constant': "constant gap throughout the run",
+    'growing': "the gap changes over the run",
+    'isolated': "runs agree apart from isolated incidents",
+    'none': "no difference above the threshold",
+}
+
+
+def write_diff_markdown(f, diff: RunDiff):
+    """Write a diff as a markdown section"""
+    f.write(f"# Run Diff: {diff.label_a} vs {diff.label_b}\n\n")
+    f.write(f"Aligned on elapsed time, {diff.seconds}s of overlap. Deltas are B - A.\n\n")
+    f.write("| Metric | A | B | Delta |\n")
+    f.write("|--------|---|---|-------|\n")
+    f.write(f"| Throughput (obj/s) | {diff.mean_a_obj:.2f} | {diff.mean_b_obj:.2f} | "
+            f"{diff.mean_delta_obj:+.2f} ({diff.mean_delta_percent:+.1f}%) |\n")
+    for name, label in (('avg', 'Average'), ('p99', 'P99')):
+        values = [(w[f'a_{name}_ms'], w[f'b_{name}_ms']) for w in diff.latency if f'a_{name}_ms' in w]
+        if values:
+            mean_a = sum(a for a, _ in values) / len(values)
+            mean_b = sum(b for _, b in values) / len(values)
+            f.write(f"| {label} latency per window (ms) | {mean_a:.2f} | {mean_b:.2f} | {mean_b - mean_a:+.2f} |\n")
+    f.write("\n")
+
+    description = PATTERN_TEXT[diff.pattern]
+    if diff.pattern == 'growing':
+        widening = (diff.gap_trend_percent > 0) == (diff.median_delta_percent > 0)
+        description = f"the gap {'widens' if widening else 'narrows'} over the run"
+    f.write(f"**Pattern: {diff.pattern}** - {description}. Median per-second gap "
+            f"{diff.median_delta_percent:+.1f}%, gap trend over the run {diff.gap_trend_percent:+.1f}%; "
+            f"{diff.concentrated_percent:.0f}% of the difference lies in {len(diff.intervals)} interval(s) "
+            f"covering {diff.coverage_percent:.0f}% of the run.\n\n")
+
+    if diff.intervals:
+        f.write("| Interval (s) | Duration (s) | Mean Delta (obj/s) | Mean Delta | Share of Difference |\n")
+        f.write("|--------------|--------------|--------------------|------------|---------------------|\n")
+        for interval in diff.intervals:
+            f.write(f"| {interval.start_s}-{interval.end_s} | {interval.end_s - interval.start_s} | "
+                    f"{interval.mean_delta_obj:+.2f} | {interval.mean_delta_percent:+.1f}% | "
+                    f"{interval.share_percent:.0f}% |\n")
+        f.write("\n")
+
+    worst = sorted((w for w in diff.latency if w.get('delta_p99_ms', 0) > 0), key=lambda w: w['delta_p99_ms'],
+                   reverse=True)
+    if worst:
+        f.write("Largest P99 latency increases per window:\n\n")
+        f.write("| Elapsed (s) | A P99 (ms) | B P99 (ms) | Delta (ms) |\n")
+        f.write("|-------------|------------|------------|------------|\n")
+        for window in worst[:5]:
+            f.write(f"| {window['elapsed_s']} | {window['a_p99_ms']:.2f} | {window['b_p99_ms']:.2f} | "
+                    f"{window['delta_p99_ms']:+.2f} |\n")
+        f.write("\n")
+
+
+def write_diff_csv(output_file: str, diff: RunDiff):
+    """Aligned per-second series; latency columns repeat the window covering each second"""
+    latency_columns = sorted({key for w in diff.latency for key in w if key != 'elapsed_s'})
+    windows = sorted(diff.latency, key=lambda w: w['elapsed_s'])
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        columns = list(diff.throughput[0].keys()) if diff.throughput else ['elapsed_s']
+        writer.writerow(columns + latency_columns)
+        index = -1
+        for row in diff.throughput:
+            while index + 1 < len(windows) and windows[index + 1]['elapsed_s'] <= row['elapsed_s']:
+                index += 1
+            window = windows[index] if index >= 0 else {}
+            values = ["" if row[c] is None else f"{row[c]:.6g}" for c in columns]
+            writer.writerow(values + [f"{window[c]:.6g}" if c in window else "" for c in latency_columns])
+
+
+def diff_results(args, config: ComparisonConfig) -> Optional[RunDiff]:
+    """Diff two runs parsed from their result files"""
+    shared = WarpResultsParser(args.results_dir, archives=args.archive, config=config)
+    try:
+        # Parser progress goes to stderr so the diff can be piped
+        with contextlib.redirect_stdout(sys.stderr):
+            label_a, run_a = load_run(args.run_a, shared, config)
+            label_b, run_b = load_run(args.run_b, shared, config)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return None
+
+    if args.op:
+        parts = []
+        for run in (run_a, run_b):
+            part = (run.op_breakdown or {}).get(args.op.upper())
+            if part is None:
+                print(f"Error: {args.op.upper()} is not an operation of both runs", file=sys.stderr)
+                return None
+            parts.append(part)
+        run_a, run_b = parts
+        label_a, label_b = f"{label_a} {args.op.upper()}", f"{label_b} {args.op.upper()}"
+
+    diff = diff_runs(label_a, run_a, label_b, run_b, config, steady=args.steady_state)
+    if not diff:
+        print("Error: the runs have no per-second throughput to align", file=sys.stderr)
+    return diff
+
+
+def diff_rollups(args, config: ComparisonConfig) -> Optional[RunDiff]:
+    """Diff two runs from their cached rollups at the requested resolution"""
+    # Imported here to avoid a circular import
+    from rollups import RollupCache, parse_resolution
+
+    if args.op or args.archive:
+        print("Error: --op and --archive are not supported with --resolution", file=sys.stderr)
+        return None
+    cache = RollupCache(args.results_dir, config=config)
+    try:
+        resolution = parse_resolution(args.resolution)
+        with contextlib.redirect_stdout(sys.stderr):
+            cache.refresh()
+        rollup_a, rollup_b = cache.find(args.run_a), cache.find(args.run_b)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return None
+
+    series_a, latency_a = rollup_a.elapsed_series(resolution, args.steady_state)
+    series_b, latency_b = rollup_b.elapsed_series(resolution, args.steady_state)
+    diff = diff_series(rollup_a.key, series_a, latency_a, rollup_b.key, series_b, latency_b, config, step=resolution)
+    if not diff:
+        print("Error: the runs have no throughput to align", file=sys.stderr)
+    return diff
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description='Diff two warp runs second by second, aligned on elapsed time')
+    arg_parser.add_argument('run_a', help='Run A: result file, [JOB_KEY@]TIMESTAMP (e.g. 213436) or container id')
+    arg_parser.add_argument('run_b', help='Run B, same forms as run A')
+    arg_parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    arg_parser.add_argument('--archive', action='append', default=[],
+                            help='Additional tar/tar.gz/tar.zst/zip archive or .warpstore of results to read (repeatable)')
+    arg_parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    arg_parser.add_argument('--op', help='Operation to compare within MIXED runs (default: all operations combined)')
+    arg_parser.add_argument('--steady-state', action='store_true',
+                            help='Align the steady windows of both runs instead of their starts')
+    arg_parser.add_argument('--resolution',
+                            help='Diff the cached rollups of both runs at this bucket width (e.g. 10s, 1m) '
+                                 'instead of parsing their result files; see rollups.py')
+    arg_parser.add_argument('--output', help='Write the markdown diff to this file instead of stdout')
+    arg_parser.add_argument('--csv', help='Export the aligned per-second delta series as CSV')
+    arg_parser.add_argument('--json', help='Export the diff and both aligned series as JSON')
+    args = arg_parser.parse_args()
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    diff = diff_rollups(args, config) if args.resolution else diff_results(args, config)
+    if not diff:
+        return 2
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write_diff_markdown(f, diff)
+        print(f"Diff written to {args.output}")
+    else:
+        write_diff_markdown(sys.stdout, diff)
+    if args.csv:
+        write_diff_csv(args.csv, diff)
+        print(f"Aligned series written to {args.csv}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(asdict(diff), f, indent=2)
+        print(f"Diff written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Warp Repeatability Planner
+
+This module estimates how noisy each benchmark configuration is and how much
+benchmarking is needed to detect a given throughput difference. The variance
+of a run's mean throughput is split into two parts:
+
+  Var(run mean) = between-run variance + within-run coefficient / steady duration
+
+The within-run coefficient comes from batch means of the per-second throughput
+of every run (batches absorb the autocorrelation of neighbouring seconds); the
+between-run variance is what remains of the spread of the run means across
+the history once the within-run part is subtracted. From that, the standard
+two-sample power calculation gives the runs per environment needed at a given
+run duration, and the cheapest duration x repeats combination is recommended
+as the sweep length. Longer runs only shrink the within-run part, so when
+runs differ mostly from one another a few short runs beat one long run.
+
+Throughput is normalized by the configured workers of each run, so runs that
+merged a different number of client containers remain comparable.
+"""
+
+import argparse
+import json
+import math
+import sys
+from dataclasses import dataclass, asdict
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional
+
+from parse_warp_results import WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE, parse_warp_time
+
+
+DEFAULT_POWER = 0.8
+DEFAULT_ALPHA = 0.05
+# Seconds per run spent outside the measured window (pod start, warp prepare phase, result upload)
+DEFAULT_OVERHEAD_S = 30.0
+DEFAULT_DURATIONS = ["30s", "1m", "2m", "5m", "10m", "15m", "30m", "60m"]
+MIN_BATCHES = 4
+MIN_RUNS = 2  # the run-to-run spread cannot be judged from a single run
+# Configurations needing more repeats than this are reported as too noisy instead of sizing the sweep
+DEFAULT_MAX_REPEATS = 10
+
+
+@dataclass
+class VarianceEstimate:
+    """Run-to-run and within-run variance of one configuration's throughput (obj/s per worker)"""
+    job_key: str
+    runs: int
+    mean_per_worker: float
+    steady_duration_s: float  # average steady part of a run
+    trimmed_s: float  # average warm-up + cool-down excluded from the statistics
+    within_run_coeff: float  # variance of a T-second mean is within_run_coeff / T
+    between_run_var: Optional[float]  # None when there is a single run
+
+    @property
+    def between_run_cv(self) -> Optional[float]:
+        if self.between_run_var is None or self.mean_per_worker <= 0:
+            return None
+        return math.sqrt(self.between_run_var) / self.mean_per_worker
+
+    @property
+    def within_run_cv(self) -> float:
+        """Coefficient of variation of the mean of one run at its measured duration"""
+        if self.mean_per_worker <= 0 or self.steady_duration_s <= 0:
+            return 0.0
+        return math.sqrt(self.within_run_coeff / self.steady_duration_s) / self.mean_per_worker
+
+    def run_mean_variance(self, steady_s: float) -> float:
+        """Variance of a run's mean throughput when its steady part lasts steady_s seconds"""
+        return (self.between_run_var or 0.0) + self.within_run_coeff / steady_s
+
+
+@dataclass
+class PlanRow:
+    """Runs needed for one configuration at one run duration"""
+    job_key: str
+    duration: str
+    runs_needed: int
+    min_duration_s: Optional[float]  # shortest --duration that reaches the power with runs_needed runs
+
+
+def parse_duration(value: str) -> float:
+    """Seconds of a warp duration such as 30s, 5m or 1h30m"""
+    units = {'h': 3600, 'm': 60, 's': 1}
+    total, number = 0.0, ""
+    for char in value.strip():
+        if char.isdigit() or char == '.':
+            number += char
+        elif char in units and number:
+            total += float(number) * units[char]
+            number = ""
+        else:
+            raise ValueError(f"Invalid duration: {value}")
+    return total + (float(number) if number else 0.0)
+
+
+def format_duration(seconds: float) -> str:
+    """Warp duration string (e.g. 90 -> 1m30s)"""
+    seconds = int(math.ceil(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    if not minutes:
+        return f"{seconds}s"
+    return f"{minutes}m{seconds}s" if seconds else f"{minutes}m"
+
+
+def steady_series(result: WarpResult) -> List[float]:
+    """Per-second throughput (obj/s per worker) of the part of a run the statistics were computed over"""
+    segments = result.throughput_per_second or []
+    if result.steady_state and result.steady_start and result.steady_end:
+        start, end = parse_warp_time(result.steady_start), parse_warp_time(result.steady_end)
+        segments = [s for s in segments if start <= (parse_warp_time(s.get('start', '')) or start) < end]
+    workers = result.concurrency or 1
+    return [s.get('obj_per_sec', 0) / workers for s in segments]
+
+
+def batch_variance_coeff(series: List[float]) -> Optional[float]:
+    """Within-run coefficient (variance of the mean x seconds) from non-overlapping batch means"""
+    batch = max(int(math.sqrt(len(series))), 1)
+    batches = len(series) // batch
+    if batches < MIN_BATCHES:
+        return None
+    means = [sum(series[i * batch:(i + 1) * batch]) / batch for i in range(batches)]
+    mean = sum(means) / batches
+    variance = sum((m - mean) ** 2 for m in means) / (batches - 1)
+    # Var(mean of T seconds) ~= Var(batch mean) * batch / T
+    return variance * batch
+
+
+def estimate_variance(job_key: str, results: List[WarpResult]) -> Optional[VarianceEstimate]:
+    """Estimate run-to-run and within-run variance of a configuration from its runs"""
+    runs = [r for r in results if r.avg_throughput_obj > 0]
+    if not runs:
+        return None
+
+    coeffs, durations, trimmed = [], [], []
+    for result in runs:
+        series = steady_series(result)
+        coeff = batch_variance_coeff(series)
+        if coeff is not None:
+            coeffs.append(coeff)
+            durations.append(float(len(series)))
+        trimmed.append(result.warmup_trimmed_s + result.cooldown_trimmed_s)
+
+    means = [r.avg_throughput_obj / (r.concurrency or 1) for r in runs]
+    mean = sum(means) / len(means)
+    within = sum(coeffs) / len(coeffs) if coeffs else 0.0
+    steady_s = sum(durations) / len(durations) if durations else 0.0
+
+    between = None
+    if len(runs) > 1:
+        spread = sum((m - mean) ** 2 for m in means) / (len(means) - 1)
+        # Part of the spread of run means is within-run noise of each mean
+        between = max(spread - (within / steady_s if steady_s else 0.0), 0.0)
+
+    return VarianceEstimate(
+        job_key=job_key,
+        runs=len(runs),
+        mean_per_worker=mean,
+        steady_duration_s=steady_s,
+        trimmed_s=sum(trimmed) / len(trimmed),
+        within_run_coeff=within,
+        between_run_var=between,
+    )
+
+
+def _z_sum(alpha: float, power: float) -> float:
+    normal = NormalDist()
+    return normal.inv_cdf(1 - alpha / 2) + normal.inv_cdf(power)
+
+
+def required_runs(estimate: VarianceEstimate, steady_s: float, effect_percent: float,
+                  alpha: float = DEFAULT_ALPHA, power: float = DEFAULT_POWER) -> int:
+    """Runs per environment needed to detect a relative throughput difference (two-sided two-sample test)"""
+    delta = effect_percent / 100.0 * estimate.mean_per_worker
+    if delta <= 0 or steady_s <= 0:
+        return MIN_RUNS
+    n = 2 * _z_sum(alpha, power) ** 2 * estimate.run_mean_variance(steady_s) / delta ** 2
+    return max(int(math.ceil(n)), MIN_RUNS)
+
+
+def min_steady_duration(estimate: VarianceEstimate, runs: int, effect_percent: float,
+                        alpha: float = DEFAULT_ALPHA, power: float = DEFAULT_POWER) -> Optional[float]:
+    """Shortest steady duration (s) at which the given number of runs detects the effect, or None if none does"""
+    delta = effect_percent / 100.0 * estimate.mean_per_worker
+    if delta <= 0:
+        return None
+    budget = runs * delta ** 2 / (2 * _z_sum(alpha, power) ** 2) - (estimate.between_run_var or 0.0)
+    if budget <= 0:
+        return None
+    return estimate.within_run_coeff / budget
+
+
+class RunPlanner:
+    """Estimates variance per configuration and plans run count and duration for a target effect size"""
+
+    def __init__(self, parser: WarpResultsParser, effect_percent: Optional[float] = None,
+                 alpha: float = DEFAULT_ALPHA, power: float = DEFAULT_POWER,
+                 overhead_s: float = DEFAULT_OVERHEAD_S, max_repeats: int = DEFAULT_MAX_REPEATS):
+        self.parser = parser
+        self.effect_percent = effect_percent or parser.config.throughput_degradation_percent
+        self.alpha = alpha
+        self.power = power
+        self.overhead_s = overhead_s
+        self.max_repeats = max_repeats
+        self.estimates: List[VarianceEstimate] = []
+
+    def estimate(self) -> List[VarianceEstimate]:
+        """Variance estimates of every configuration in the parsed history"""
+        self.estimates = []
+        for job_key, results in sorted(self.parser.group_valid_results().items()):
+            # Containers of one run that started in different seconds are one run, not several
+            estimate = estimate_variance(job_key, self.parser.merge_run_fragments(results))
+            if estimate:
+                self.estimates.append(estimate)
+        return self.estimates
+
+    def steady_seconds(self, estimate: VarianceEstimate, duration: str) -> float:
+        """Steady part of a run of the given warp --duration, after warm-up/cool-down trimming"""
+        return max(parse_duration(duration) - estimate.trimmed_s, 1.0)
+
+    def plan(self, durations: List[str]) -> List[PlanRow]:
+        """Runs needed per configuration at each candidate duration"""
+        rows = []
+        for estimate in self.estimates:
+            for duration in durations:
+                runs = required_runs(estimate, self.steady_seconds(estimate, duration),
+                                     self.effect_percent, self.alpha, self.power)
+                minimum = min_steady_duration(estimate, runs, self.effect_percent, self.alpha, self.power)
+                rows.append(PlanRow(job_key=estimate.job_key, duration=duration, runs_needed=runs,
+                                    min_duration_s=minimum + estimate.trimmed_s if minimum is not None else None))
+        return rows
+
+    def recommend(self, durations: List[str]) -> Optional[Dict[str, Any]]:
+        """Cheapest duration x repeats that detects the effect for every configuration it can be detected for
+        
+        Configurations that would need more than max_repeats runs at every candidate duration are
+        listed as too noisy: their run-to-run variance has to be reduced, more runs will not help.
+        """
+        if not self.estimates:
+            return None
+        needed = {duration: {e.job_key: required_runs(e, self.steady_seconds(e, duration), self.effect_percent,
+                                                      self.alpha, self.power) for e in self.estimates}
+                  for duration in durations}
+        too_noisy = sorted(key for key in needed[durations[0]]
+                           if all(needed[d][key] > self.max_repeats for d in durations))
+        
+        best = None
+        for duration in durations:
+            counts = [runs for key, runs in needed[duration].items() if key not in too_noisy]
+            if not counts or max(counts) > self.max_repeats:
+                continue
+            cost = max(counts) * (parse_duration(duration) + self.overhead_s)
+            if best is None or cost < best[2]:
+                best = (duration, max(counts), cost)
+        if best is None:
+            return None
+        duration, repeats, cost = best
+        return {
+            'duration': duration,
+            'repeats': repeats,
+            'seconds_per_configuration': cost,
+            'effect_percent': self.effect_percent,
+            'alpha': self.alpha,
+            'power': self.power,
+            'overhead_s': self.overhead_s,
+            'too_noisy': too_noisy,
+        }
+    
+    def summary(self, durations: List[str]) -> Dict[str, Any]:
+        """Machine-readable estimates, per-duration plan and recommendation"""
+        return {
+            'estimates': [dict(asdict(e), between_run_cv=e.between_run_cv, within_run_cv=e.within_run_cv)
+                          for e in self.estimates],
+            'plan': [asdict(row) for row in self.plan(durations)],
+            'recommendation': self.recommend(durations),
+        }
+
+
+def _percent(value: Optional[float]) -> str:
+    return f"{value:.1%}" if value is not None else "-"
+
+
+def write_planning_section(f, parser: WarpResultsParser):
+    """Write the repeatability section of the comparison report"""
+    planner = RunPlanner(parser)
+    estimates = planner.estimate()
+    if not estimates:
+        return
+
+    f.write("## Repeatability\n\n")
+    f.write(f"Runs per environment needed to detect a {planner.effect_percent:g}% throughput difference "
+            f"(α={planner.alpha:g}, power={planner.power:.0%}) at the measured run duration. Between-run CV is the "
+            f"spread of run means beyond within-run noise; see `run_planner.py` for the recommended sweep length.\n\n")
+    f.write("| Job Type | Runs | Steady Duration (s) | Between-Run CV | Within-Run CV | Runs Needed |\n")
+    f.write("|----------|------|---------------------|----------------|---------------|-------------|\n")
+    for e in estimates:
+        needed = required_runs(e, e.steady_duration_s, planner.effect_percent, planner.alpha, planner.power)
+        note = "" if e.between_run_var is not None else " (single run)"
+        f.write(f"| {e.job_key} | {e.runs} | {e.steady_duration_s:.0f} | {_percent(e.between_run_cv)} | "
+                f"{_percent(e.within_run_cv)} | {needed}{note} |\n")
+    f.write("\n")
+
+
+def apply_to_spec(spec_path: str, output_path: str, recommendation: Dict[str, Any]):
+    """Write a copy of a sweep specification with the recommended duration and repeats"""
+    # Imported here so planning itself does not require PyYAML
+    import yaml
+
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = yaml.safe_load(f) or {}
+    spec.setdefault('matrix', {})['duration'] = [recommendation['duration']]
+    spec['repeats'] = recommendation['repeats']
+    with open(output_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(spec, f, sort_keys=False)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Estimate run-to-run variance and plan run count and duration')
+    arg_parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    arg_parser.add_argument('--archive', action='append', default=[],
+                            help='Results archive (.tar, .tar.gz, .tar.zst, .zip); may be given several times')
+    arg_parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    arg_parser.add_argument('--effect', type=float,
+                            help='Throughput difference to detect, in percent (default: throughput regression threshold)')
+    arg_parser.add_argument('--power', type=float, default=DEFAULT_POWER, help='Statistical power (default: 0.8)')
+    arg_parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help='Significance level (default: 0.05)')
+    arg_parser.add_argument('--overhead', type=float, default=DEFAULT_OVERHEAD_S,
+                            help='Seconds per run outside the measurement (default: 30)')
+    arg_parser.add_argument('--max-repeats', type=int, default=DEFAULT_MAX_REPEATS,
+                            help='Most runs per configuration a sweep may use (default: 10)')
+    arg_parser.add_argument('--durations', default=",".join(DEFAULT_DURATIONS),
+                            help='Candidate warp --duration values, comma separated')
+    arg_parser.add_argument('--spec', help='Sweep specification to apply the recommendation to')
+    arg_parser.add_argument('--write-spec', help='Where to write the sweep specification with the recommendation')
+    arg_parser.add_argument('--json', dest='json_output', help='Write estimates, plan and recommendation as JSON')
+    args = arg_parser.parse_args()
+
+    durations = [d.strip() for d in args.durations.split(',') if d.strip()]
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    parser = WarpResultsParser(args.results_dir, archives=args.archive, config=config)
+    parser.find_and_parse_results()
+
+    planner = RunPlanner(parser, args.effect, args.alpha, args.power, args.overhead, args.max_repeats)
+    estimates = planner.estimate()
+    if not estimates:
+        print("No results with per-second throughput to estimate variance from")
+        return 2
+
+    print(f"\nDetecting a {planner.effect_percent:g}% throughput difference "
+          f"(alpha={planner.alpha:g}, power={planner.power:.0%})\n")
+    print(f"{'Configuration':<36} {'Runs':>4} {'Between CV':>10} {'Within CV':>9}  "
+          + " ".join(f"{d:>5}" for d in durations))
+    plan = {(row.job_key, row.duration): row.runs_needed for row in planner.plan(durations)}
+    for e in estimates:
+        between = _percent(e.between_run_cv) if e.between_run_var is not None else "n/a"
+        print(f"{e.job_key:<36} {e.runs:>4} {between:>10} {_percent(e.within_run_cv):>9}  "
+              + " ".join(f"{plan[(e.job_key, d)]:>5}" for d in durations))
+
+    recommendation = planner.recommend(durations)
+    if recommendation:
+        print(f"\nRecommended sweep: --duration {recommendation['duration']} x {recommendation['repeats']} runs per "
+              f"configuration ({format_duration(recommendation['seconds_per_configuration'])} of cluster time each)")
+        for key in recommendation['too_noisy']:
+            print(f"  {key}: needs more than {planner.max_repeats} runs at any duration - "
+                  f"reduce its run-to-run variance first")
+    else:
+        print(f"\nNo candidate duration detects the effect within {planner.max_repeats} runs")
+    if any(e.between_run_var is None for e in estimates):
+        print("Configurations with a single run have no between-run estimate; their run counts are lower bounds")
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(planner.summary(durations), f, indent=2)
+            f.write("\n")
+        print(f"JSON written: {args.json_output}")
+
+    if args.spec and args.write_spec and recommendation:
+        apply_to_spec(args.spec, args.write_spec, recommendation)
+        print(f"Sweep specification written: {args.write_spec}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Warp Client Saturation Analysis
+
+This module applies Little's law (N = X * R) to every run: with N workers
+each waiting R seconds per request, the clients can at most achieve N / R
+operations per second. The effective concurrency X * R, computed per latency
+window and client, shows how many workers were actually busy. When it falls
+well short of the configured --concurrent, the warp clients themselves (CPU,
+NIC, connection pool) limited the run rather than the storage, and the run
+is marked invalid so it does not feed PROD vs TEST verdicts.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from parse_warp_results import WarpResultsParser, WarpResult, parse_warp_time
+
+
+@dataclass
+class LittleWindow:
+    """Little's law check of one latency window (all clients of a container combined)"""
+    start: str
+    achieved_ops: float
+    mean_latency_ms: float
+    effective_concurrency: float
+
+
+def littles_law_windows(result: WarpResult) -> List[LittleWindow]:
+    """Per-window achieved ops/s and effective concurrency, restricted to the steady window if one was found"""
+    windows = result.latency_windows or []
+    if result.steady_state and result.steady_start and result.steady_end:
+        # Imported here to avoid a circular import
+        from steady_state import windows_in_range
+        windows = windows_in_range(windows, parse_warp_time(result.steady_start), parse_warp_time(result.steady_end))
+
+    # Sum X * R over the clients reporting the same window
+    combined: Dict[str, List[float]] = {}
+    for window in windows:
+        start = parse_warp_time(window.get('start', ''))
+        end = parse_warp_time(window.get('end', ''))
+        requests = window.get('requests', 0) or 0
+        if not start or not end or end <= start or requests <= 0:
+            continue
+        ops = requests / (end - start).total_seconds()
+        entry = combined.setdefault(window['start'], [0.0, 0.0, 0.0, 0])
+        entry[0] += ops
+        entry[1] += ops * window.get('avg_ms', 0) / 1000.0
+        entry[2] += requests * window.get('avg_ms', 0)
+        entry[3] += requests
+
+    checks = []
+    for start in sorted(combined):
+        ops, busy, latency_sum, requests = combined[start]
+        checks.append(LittleWindow(start=start, achieved_ops=ops, mean_latency_ms=latency_sum / requests,
+                                   effective_concurrency=busy))
+    return checks
+
+
+def effective_concurrency(result: WarpResult) -> Optional[float]:
+    """Average number of busy workers during the run (X * R)"""
+    if result.op_breakdown:
+        # All operations of a mixed run share the same workers
+        parts = [effective_concurrency(part) for part in result.op_breakdown.values()]
+        parts = [part for part in parts if part is not None]
+        return sum(parts) if parts else None
+
+    windows = littles_law_windows(result)
+    if windows:
+        return sum(w.effective_concurrency for w in windows) / len(windows)
+    if result.avg_throughput_obj > 0 and result.avg_latency_ms > 0:
+        # Text output carries run-level numbers only
+        return result.avg_throughput_obj * result.avg_latency_ms / 1000.0
+    return None
+
+
+def apply_littles_law(result: WarpResult):
+    """Fill in the effective concurrency and worker utilization of a freshly parsed result"""
+    busy = effective_concurrency(result)
+    result.effective_concurrency = busy
+    if busy is not None and result.concurrency:
+        result.worker_utilization = busy / result.concurrency
+        result.min_container_utilization = result.worker_utilization
+
+
+def achieved_throughput(result: WarpResult) -> float:
+    """Ops/s of the run; a mixed run only carries them per operation"""
+    return result.avg_throughput_obj or sum(part.avg_throughput_obj for part in (result.op_breakdown or {}).values())
+
+
+def theoretical_throughput(result: WarpResult) -> Optional[float]:
+    """Ops/s the configured workers could achieve at the measured latency (N / R)
+
+    R is the latency implied by the per-window check (effective concurrency / achieved ops/s), so achieved
+    and theoretical throughput relate exactly like the worker utilization. Without windows the run-level
+    mean latency is used.
+    """
+    if not result.concurrency:
+        return None
+    achieved = achieved_throughput(result)
+    if result.effective_concurrency and achieved > 0:
+        return result.concurrency * achieved / result.effective_concurrency
+    if result.avg_latency_ms <= 0:
+        return None
+    return result.concurrency / (result.avg_latency_ms / 1000.0)
+
+
+def is_client_limited(result: WarpResult, min_utilization: float) -> bool:
+    """Whether any container kept fewer than min_utilization of its workers busy"""
+    return result.min_container_utilization is not None and result.min_container_utilization < min_utilization
+
+
+def is_inconsistent(result: WarpResult, max_utilization: float) -> bool:
+    """Whether more workers than configured appear busy, i.e. throughput and latency do not agree"""
+    # Run-level averages of text output cover different periods for throughput and latency,
+    # so only the per-window numbers of JSON results are precise enough for this check
+    parts = [result] + list((result.op_breakdown or {}).values())
+    has_windows = any(part.latency_windows for part in parts)
+    return has_windows and result.worker_utilization is not None and result.worker_utilization > max_utilization
+
+
+def invalid_reason(result: WarpResult, min_utilization: float, max_utilization: float) -> Optional[str]:
+    """Why a run cannot be trusted for PROD vs TEST verdicts, or None if it is valid"""
+    if is_client_limited(result, min_utilization):
+        return (f"client-limited: only {result.min_container_utilization:.0%} of workers busy "
+                f"(threshold {min_utilization:.0%})")
+    if is_inconsistent(result, max_utilization):
+        return (f"inconsistent: {result.worker_utilization:.0%} of configured workers busy "
+                f"(limit {max_utilization:.0%})")
+    return None
+
+
+def write_saturation_section(f, parser: WarpResultsParser):
+    """Write the Little's law section of the comparison report"""
+    config = parser.config
+    rows = []
+    invalid = []
+    for job_key, results in parser.group_results_by_job().items():
+        for result in sorted(results, key=lambda r: r.timestamp):
+            if result.effective_concurrency is None:
+                continue
+            theoretical = theoretical_throughput(result)
+            reason = invalid_reason(result, config.min_worker_utilization, config.max_worker_utilization)
+            status = "⚠️ INVALID" if reason else "✅ OK"
+            rows.append(f"| {job_key} | {result.timestamp} | {result.concurrency} | "
+                        f"{achieved_throughput(result):.2f} | "
+                        f"{f'{theoretical:.2f}' if theoretical else '-'} | "
+                        f"{result.effective_concurrency:.1f} | {result.worker_utilization:.0%} | "
+                        f"{result.min_container_utilization:.0%} | {status} |\n")
+            if reason:
+                invalid.append(f"{job_key} at {result.timestamp}: {reason}")
+
+    if not rows:
+        return
+
+    f.write("## Client Saturation (Little's Law)\n\n")
+    f.write("Effective concurrency is achieved ops/s × mean latency per latency window (N = X × R); theoretical "
+            "throughput is configured workers / the latency implied by the windows (achieved / utilization). A low worker utilization means the warp clients, "
+            "not the storage, limited the run.\n\n")
+    f.write("| Job Type | Run | Workers | Achieved (obj/s) | Theoretical (obj/s) | Effective Concurrency | "
+            "Utilization | Lowest Container | Status |\n")
+    f.write("|----------|-----|---------|------------------|---------------------|-----------------------|"
+            "-------------|------------------|--------|\n")
+    for row in rows:
+        f.write(row)
+    f.write("\n")
+
+    if invalid:
+        excluded = " and excluded from PROD vs TEST verdicts" if config.exclude_invalid_runs else ""
+        f.write(f"**⚠️ Invalid runs** (marked{excluded}):\n\n")
+        for line in invalid:
+            f.write(f"- {line}\n")
+        f.write("\n")
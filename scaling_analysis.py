@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Warp Scaling Analysis
+
+This module collects benchmark runs that differ only in concurrency and fits
+the Universal Scalability Law (USL) to their throughput, so PROD and TEST can be
+compared on their maximum sustainable throughput instead of a single point on
+the curve. It also builds throughput and latency surfaces over
+concurrency x object size.
+
+Concurrency is the total number of workers of a run (containers x --concurrent),
+since a run's throughput is the sum over all of its containers.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, parse_obj_size
+
+
+# Fraction of the peak throughput at which the curve is considered to have reached its knee
+KNEE_FRACTION = 0.9
+
+
+@dataclass
+class ScalingPoint:
+    """Mean throughput and latency of one concurrency level"""
+    concurrency: int  # total workers of the runs
+    throughput_obj: float
+    throughput_mib: float
+    latency_avg_ms: float
+    latency_p99_ms: float
+    runs: int
+
+
+@dataclass
+class USLFit:
+    """Universal Scalability Law fit for one operation/environment/object size sweep"""
+    operation: str
+    environment: str
+    obj_size: str
+    points: List[ScalingPoint] = field(default_factory=list)
+    lambda_obj: float = 0.0  # single-worker throughput (obj/s)
+    sigma: float = 0.0  # contention coefficient
+    kappa: float = 0.0  # coherency coefficient
+    r_squared: float = 0.0
+    peak_concurrency: Optional[float] = None  # None when the fit has no retrograde region
+    max_throughput_obj: float = 0.0
+    max_throughput_mib: float = 0.0
+    knee_concurrency: Optional[int] = None
+    extrapolated: bool = False  # peak lies outside the measured concurrency range
+
+    def predict(self, concurrency: float) -> float:
+        """Throughput (obj/s) predicted by the fitted curve at the given concurrency"""
+        n = float(concurrency)
+        return self.lambda_obj * n / (1 + self.sigma * (n - 1) + self.kappa * n * (n - 1))
+
+
+def collect_concurrency_sweeps(parser: WarpResultsParser) -> Dict[Tuple[str, str, str], List[ScalingPoint]]:
+    """Collect runs that differ only in total workers, keyed by (operation, environment, obj_size)
+
+    Runs of one job can merge a different number of containers, so they are grouped by their
+    total workers rather than by the per-container --concurrent of the job.
+    """
+    levels: Dict[Tuple[str, str, str], Dict[int, List[WarpResult]]] = {}
+    for results in parser.group_results_by_job().values():
+        # Containers of one run that started in different seconds are one run at the combined workers
+        for result in parser.merge_run_fragments(results):
+            if not result.concurrency:
+                continue
+            params = result.test_params or {}
+            key = (result.operation, result.environment, params.get('obj_size', 'unknown'))
+            levels.setdefault(key, {}).setdefault(result.concurrency, []).append(result)
+
+    sweeps: Dict[Tuple[str, str, str], List[ScalingPoint]] = {}
+    for key, runs_by_workers in levels.items():
+        for workers, runs in sorted(runs_by_workers.items()):
+            stats = parser.calculate_statistics(runs)
+            sweeps.setdefault(key, []).append(ScalingPoint(
+                concurrency=workers,
+                throughput_obj=stats['throughput_obj']['mean'],
+                throughput_mib=stats['throughput_mib']['mean'],
+                latency_avg_ms=stats['latency_avg']['mean'],
+                latency_p99_ms=stats['latency_p99']['mean'],
+                runs=stats['count']
+            ))
+    return sweeps
+
+
+def _solve_least_squares(rows: List[List[float]], targets: List[float]) -> Optional[List[float]]:
+    """Solve the normal equations of a small linear least-squares problem"""
+    size = len(rows[0])
+    matrix = [[sum(row[i] * row[j] for row in rows) for j in range(size)] +
+              [sum(row[i] * t for row, t in zip(rows, targets))] for i in range(size)]
+
+    # Gaussian elimination with partial pivoting
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(matrix[r][col]))
+        if abs(matrix[pivot][col]) < 1e-12:
+            return None
+        matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+        for r in range(size):
+            if r != col:
+                factor = matrix[r][col] / matrix[col][col]
+                matrix[r] = [a - factor * b for a, b in zip(matrix[r], matrix[col])]
+
+    return [matrix[i][size] / matrix[i][i] for i in range(size)]
+
+
+def fit_usl(points: List[ScalingPoint]) -> Optional[Tuple[float, float, float]]:
+    """Fit lambda, sigma and kappa of the USL to a concurrency sweep
+
+    Uses the linearised form N/X(N) = a + b(N-1) + cN(N-1) with lambda = 1/a,
+    sigma = b/a and kappa = c/a. Coefficients that come out negative are pinned
+    to zero and the remaining ones refitted.
+    """
+    usable = [p for p in points if p.throughput_obj > 0 and p.concurrency > 0]
+    if len(usable) < 2:
+        return None
+
+    targets = [p.concurrency / p.throughput_obj for p in usable]
+    terms = [
+        lambda n: 1.0,
+        lambda n: n - 1.0,
+        lambda n: n * (n - 1.0),
+    ]
+    # With only two concurrency levels the coherency term cannot be identified
+    active = [0, 1, 2] if len(usable) >= 3 else [0, 1]
+
+    while True:
+        rows = [[terms[i](float(p.concurrency)) for i in active] for p in usable]
+        solution = _solve_least_squares(rows, targets)
+        if solution is None:
+            return None
+        coefficients = dict(zip(active, solution))
+        negative = [i for i in active if i != 0 and coefficients[i] < 0]
+        if not negative:
+            break
+        active = [i for i in active if i not in negative]
+
+    a = coefficients[0]
+    if a <= 0:
+        return None
+    return 1.0 / a, coefficients.get(1, 0.0) / a, coefficients.get(2, 0.0) / a
+
+
+def analyze_sweep(operation: str, environment: str, obj_size: str,
+                  points: List[ScalingPoint]) -> Optional[USLFit]:
+    """Fit the USL to one sweep and derive its peak and knee"""
+    fitted = fit_usl(points)
+    if fitted is None:
+        return None
+
+    lambda_obj, sigma, kappa = fitted
+    fit = USLFit(operation=operation, environment=environment, obj_size=obj_size,
+                 points=points, lambda_obj=lambda_obj, sigma=sigma, kappa=kappa)
+
+    observed = [p.throughput_obj for p in points]
+    mean_observed = sum(observed) / len(observed)
+    ss_tot = sum((x - mean_observed) ** 2 for x in observed)
+    ss_res = sum((p.throughput_obj - fit.predict(p.concurrency)) ** 2 for p in points)
+    fit.r_squared = 1 - ss_res / ss_tot if ss_tot > 0 else 1.0
+
+    max_measured = max(p.concurrency for p in points)
+    if kappa > 0 and sigma < 1:
+        fit.peak_concurrency = math.sqrt((1 - sigma) / kappa)
+        fit.max_throughput_obj = fit.predict(fit.peak_concurrency)
+        fit.extrapolated = fit.peak_concurrency > max_measured
+    elif sigma > 0:
+        # Amdahl-style asymptote: throughput approaches lambda/sigma but never peaks
+        fit.max_throughput_obj = lambda_obj / sigma
+        fit.extrapolated = True
+    else:
+        # Linear scaling in the measured range; the best we can say is the observed maximum
+        fit.max_throughput_obj = max(observed)
+
+    # Convert to MiB/s with the sweep's average object size
+    bytes_per_obj = [p.throughput_mib / p.throughput_obj for p in points if p.throughput_obj > 0]
+    if bytes_per_obj:
+        fit.max_throughput_mib = fit.max_throughput_obj * sum(bytes_per_obj) / len(bytes_per_obj)
+
+    # Knee: smallest concurrency reaching KNEE_FRACTION of the peak
+    search_limit = int(fit.peak_concurrency) if fit.peak_concurrency else max_measured * 16
+    for n in range(1, max(search_limit, 1) + 1):
+        if fit.predict(n) >= KNEE_FRACTION * fit.max_throughput_obj:
+            fit.knee_concurrency = n
+            break
+
+    return fit
+
+
+def analyze_scaling(parser: WarpResultsParser) -> List[USLFit]:
+    """Fit USL curves to every sweep with at least two concurrency levels"""
+    fits = []
+    for (operation, environment, obj_size), points in sorted(collect_concurrency_sweeps(parser).items()):
+        if len(points) < 2:
+            continue
+        fit = analyze_sweep(operation, environment, obj_size, points)
+        if fit:
+            fits.append(fit)
+    return fits
+
+
+def build_scaling_surface(parser: WarpResultsParser) -> Dict[Tuple[str, str], Dict[Tuple[str, int], ScalingPoint]]:
+    """Throughput/latency surface over (obj_size, concurrency), keyed by (operation, environment)"""
+    surfaces: Dict[Tuple[str, str], Dict[Tuple[str, int], ScalingPoint]] = {}
+    for (operation, environment, obj_size), points in collect_concurrency_sweeps(parser).items():
+        surface = surfaces.setdefault((operation, environment), {})
+        for point in points:
+            surface[(obj_size, point.concurrency)] = point
+    return surfaces
+
+
+def _size_sort_key(obj_size: str) -> Tuple[int, str]:
+    size = parse_obj_size(obj_size)
+    return (size if size is not None else -1, obj_size)
+
+
+def write_scaling_section(f, parser: WarpResultsParser):
+    """Write the scaling analysis section of the comparison report"""
+    fits = analyze_scaling(parser)
+    surfaces = build_scaling_surface(parser)
+    # A surface is only interesting if it spans more than one cell
+    surfaces = {k: v for k, v in surfaces.items() if len(v) > 1}
+    if not fits and not surfaces:
+        return
+
+    f.write("## Scaling Analysis\n\n")
+
+    if fits:
+        f.write("### Universal Scalability Law Fits\n\n")
+        f.write("Concurrency is the total number of workers of a run (containers × `--concurrent`).\n\n")
+        f.write("| Operation | Environment | Obj Size | Levels | σ (contention) | κ (coherency) | "
+                "Peak Concurrency | Max Throughput (obj/s) | Max Throughput (MiB/s) | Knee | R² |\n")
+        f.write("|-----------|-------------|----------|--------|----------------|---------------|"
+                "------------------|------------------------|------------------------|------|----|\n")
+        for fit in fits:
+            peak = f"{fit.peak_concurrency:.0f}" if fit.peak_concurrency else "∞"
+            if fit.extrapolated:
+                peak += " (extrapolated)"
+            knee = str(fit.knee_concurrency) if fit.knee_concurrency else "-"
+            f.write(f"| {fit.operation} | {fit.environment} | {fit.obj_size} | {len(fit.points)} | "
+                    f"{fit.sigma:.4f} | {fit.kappa:.6f} | {peak} | {fit.max_throughput_obj:.2f} | "
+                    f"{fit.max_throughput_mib:.2f} | {knee} | {fit.r_squared:.3f} |\n")
+        f.write("\n")
+
+        # PROD vs TEST on maximum sustainable throughput
+        by_key = {(fit.operation, fit.obj_size, fit.environment): fit for fit in fits}
+        pairs = [(by_key[(op, size, 'PROD')], by_key[(op, size, 'TEST')])
+                 for (op, size, env) in sorted(by_key) if env == 'PROD' and (op, size, 'TEST') in by_key]
+        if pairs:
+            f.write("### Maximum Sustainable Throughput: PROD vs TEST\n\n")
+            f.write("| Operation | Obj Size | PROD (obj/s) | TEST (obj/s) | Difference | PROD Knee | TEST Knee |\n")
+            f.write("|-----------|----------|--------------|--------------|------------|-----------|-----------|\n")
+            for prod, test in pairs:
+                diff = ((test.max_throughput_obj - prod.max_throughput_obj) / prod.max_throughput_obj * 100
+                        if prod.max_throughput_obj > 0 else 0.0)
+                f.write(f"| {prod.operation} | {prod.obj_size} | {prod.max_throughput_obj:.2f} | "
+                        f"{test.max_throughput_obj:.2f} | {diff:+.1f}% | "
+                        f"{prod.knee_concurrency or '-'} | {test.knee_concurrency or '-'} |\n")
+            f.write("\n")
+
+    for (operation, environment), surface in sorted(surfaces.items()):
+        sizes = sorted({size for size, _ in surface}, key=_size_sort_key)
+        levels = sorted({level for _, level in surface})
+
+        f.write(f"### {operation} {environment} Surface (total workers × object size)\n\n")
+        header = "| Obj Size | " + " | ".join(f"c={level}" for level in levels) + " |\n"
+        divider = "|----------|" + "|".join("------" for _ in levels) + "|\n"
+
+        f.write("Throughput (MiB/s):\n\n")
+        f.write(header)
+        f.write(divider)
+        for size in sizes:
+            cells = [f"{surface[(size, level)].throughput_mib:.2f}" if (size, level) in surface else "-"
+                     for level in levels]
+            f.write(f"| {size} | " + " | ".join(cells) + " |\n")
+        f.write("\n")
+
+        f.write("Latency avg / p99 (ms):\n\n")
+        f.write(header)
+        f.write(divider)
+        for size in sizes:
+            cells = [f"{surface[(size, level)].latency_avg_ms:.1f} / {surface[(size, level)].latency_p99_ms:.1f}"
+                     if (size, level) in surface else "-" for level in levels]
+            f.write(f"| {size} | " + " | ".join(cells) + " |\n")
+        f.write("\n")
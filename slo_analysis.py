@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Latency SLO Compliance and Error Budgets
+
+This module evaluates SLOs such as "p99 GET < 300 ms in 99.9% of 10-second
+windows" against every interval of a run instead of against run averages.
+SLOs are defined per operation and environment in the `slos` section of
+comparison_config.yaml. Latency objectives are checked per requests_by_client
+window, throughput and error-rate objectives per segment. Windows and segments
+of all containers are merged by wall clock first (aligned to the window
+length, latencies weighted by requests, throughput and errors summed), so a
+merged run is judged as one cluster-wide load. Only the steady part of a run
+is evaluated when steady-state trimming found one. MIXED runs are evaluated per
+operation, on the windows and segments of each operation, so a GET SLO also
+covers the GET traffic of `warp mixed` runs.
+
+For every SLO and job type the report shows the share of compliant intervals,
+the burn rate (share of failing intervals relative to the error budget,
+1 - objective; above 1 the budget is exhausted) and the worst violating
+intervals. PROD and TEST are compared on compliance as well.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, parse_warp_time
+
+
+WORST_INTERVALS = 3
+DEFAULT_OBJECTIVE_PERCENT = 99.9
+# Latency objectives (`latency_ms` keys) and the window field each is checked against
+LATENCY_FIELDS = {
+    'avg': 'avg_ms',
+    'p50': 'p50_ms',
+    'p90': 'p90_ms',
+    'p99': 'p99_ms',
+    'ttfb_avg': 'ttfb_avg_ms',
+    'ttfb_p90': 'ttfb_p90_ms',
+    'ttfb_p99': 'ttfb_p99_ms',
+}
+
+
+@dataclass
+class SLODefinition:
+    """One SLO from the `slos` section of comparison_config.yaml"""
+    name: str
+    operation: str = "*"
+    environment: str = "*"
+    objective_percent: float = DEFAULT_OBJECTIVE_PERCENT
+    latency_ms: Dict[str, float] = field(default_factory=dict)  # e.g. {'p99': 300}
+    min_throughput_obj: Optional[float] = None  # per segment, all containers summed
+    max_error_rate_percent: Optional[float] = None  # per segment
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SLODefinition':
+        latency = {key: float(value) for key, value in (data.get('latency_ms') or {}).items()}
+        unknown = set(latency) - set(LATENCY_FIELDS)
+        if unknown:
+            raise ValueError(f"SLO {data.get('name')}: unknown latency objective(s) {', '.join(sorted(unknown))}")
+        return cls(
+            name=str(data.get('name', 'slo')),
+            operation=str(data.get('operation', '*')).upper(),
+            environment=str(data.get('environment', '*')).upper(),
+            objective_percent=float(data.get('objective_percent', DEFAULT_OBJECTIVE_PERCENT)),
+            latency_ms=latency,
+            min_throughput_obj=(float(data['min_throughput_obj'])
+                                if data.get('min_throughput_obj') is not None else None),
+            max_error_rate_percent=(float(data['max_error_rate_percent'])
+                                    if data.get('max_error_rate_percent') is not None else None),
+        )
+
+    def applies_to(self, result: WarpResult) -> bool:
+        return (self.operation in ("*", result.operation.upper())
+                and self.environment in ("*", result.environment.upper()))
+
+    @property
+    def checks_windows(self) -> bool:
+        return bool(self.latency_ms)
+
+    @property
+    def checks_segments(self) -> bool:
+        return self.min_throughput_obj is not None or self.max_error_rate_percent is not None
+
+
+@dataclass
+class Violation:
+    """One failing interval and its worst objective"""
+    run: str  # timestamp of the run the interval belongs to
+    start: str
+    interval: str  # "window" or "segment"
+    metric: str
+    value: float
+    limit: float
+    severity: float  # how far past the limit (1.0 = exactly at the limit)
+
+
+@dataclass
+class SLOResult:
+    """Compliance of one job type with one SLO, over all its runs"""
+    slo: SLODefinition
+    job_key: str
+    environment: str
+    operation: str = ""
+    mixed: bool = False  # evaluated on one operation of MIXED runs
+    runs: int = 0
+    windows: int = 0
+    windows_ok: int = 0
+    segments: int = 0
+    segments_ok: int = 0
+    worst: List[Violation] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return f"{self.job_key} ({self.operation})" if self.mixed else self.job_key
+
+    @property
+    def slo_name(self) -> str:
+        """SLO name, with the evaluated operation for MIXED runs"""
+        return f"{self.slo.name} ({self.operation})" if self.mixed else self.slo.name
+
+    @property
+    def window_compliance(self) -> Optional[float]:
+        return self.windows_ok / self.windows * 100 if self.windows else None
+
+    @property
+    def segment_compliance(self) -> Optional[float]:
+        return self.segments_ok / self.segments * 100 if self.segments else None
+
+    @property
+    def compliance_percent(self) -> Optional[float]:
+        """Compliance of the stricter interval type"""
+        values = [v for v in (self.window_compliance, self.segment_compliance) if v is not None]
+        return min(values) if values else None
+
+    @property
+    def burn_rate(self) -> Optional[float]:
+        """Failing share of intervals relative to the error budget (1 = budget used up exactly)"""
+        compliance = self.compliance_percent
+        budget = 100 - self.slo.objective_percent
+        if compliance is None or budget <= 0:
+            return None
+        return (100 - compliance) / budget
+
+    @property
+    def met(self) -> Optional[bool]:
+        compliance = self.compliance_percent
+        return compliance >= self.slo.objective_percent if compliance is not None else None
+
+
+def load_slos(parser: WarpResultsParser) -> List[SLODefinition]:
+    """SLO definitions of the parser's configuration"""
+    return [SLODefinition.from_dict(data) for data in parser.config.slo_definitions]
+
+
+def merged_windows(result: WarpResult) -> List[Dict[str, Any]]:
+    """requests_by_client windows of all clients merged by wall clock, aligned to the window length"""
+    start = parse_warp_time(result.steady_start) if result.steady_state else None
+    end = parse_warp_time(result.steady_end) if result.steady_state else None
+
+    buckets: Dict[int, Dict[str, Any]] = {}
+    for window in result.latency_windows or []:
+        window_start = parse_warp_time(window.get('start', ''))
+        window_end = parse_warp_time(window.get('end', ''))
+        requests = window.get('requests', 0) or 0
+        if not window_start or not window_end or window_end <= window_start or requests <= 0:
+            continue
+        middle = window_start + (window_end - window_start) / 2
+        if start and end and not start <= middle <= end:
+            continue
+        width = max(int((window_end - window_start).total_seconds()), 1)
+        slot = int(window_start.timestamp()) // width * width
+        bucket = buckets.setdefault(slot, {'requests': 0, 'weighted': {}})
+        bucket['requests'] += requests
+        for name, key in LATENCY_FIELDS.items():
+            if window.get(key) is not None:
+                weighted = bucket['weighted'].setdefault(name, [0.0, 0])
+                weighted[0] += window[key] * requests
+                weighted[1] += requests
+
+    merged = []
+    for slot in sorted(buckets):
+        bucket = buckets[slot]
+        entry = {'start': datetime.fromtimestamp(slot, timezone.utc).isoformat(), 'requests': bucket['requests']}
+        for name, (total, requests) in bucket['weighted'].items():
+            entry[name] = total / requests
+        merged.append(entry)
+    return merged
+
+
+def merged_segments(result: WarpResult) -> List[Dict[str, Any]]:
+    """Per-second segments of all containers summed by wall-clock second"""
+    start = parse_warp_time(result.steady_start) if result.steady_state else None
+    end = parse_warp_time(result.steady_end) if result.steady_state else None
+
+    buckets: Dict[int, List[float]] = {}
+    for segment in result.throughput_per_second or []:
+        when = parse_warp_time(segment.get('start', ''))
+        if not when or (start and end and not start <= when < end):
+            continue
+        bucket = buckets.setdefault(int(when.timestamp()), [0.0, 0.0])
+        bucket[0] += segment.get('obj_per_sec', 0)
+        bucket[1] += segment.get('errors', 0) or 0
+
+    return [{'start': datetime.fromtimestamp(second, timezone.utc).isoformat(), 'obj_per_sec': ops, 'errors': errors}
+            for second, (ops, errors) in sorted(buckets.items())]
+
+
+def _window_violation(slo: SLODefinition, window: Dict[str, Any]) -> Optional[Violation]:
+    worst = None
+    for name, limit in slo.latency_ms.items():
+        value = window.get(name)
+        if value is None or value <= limit:
+            continue
+        severity = value / limit if limit > 0 else float('inf')
+        if worst is None or severity > worst.severity:
+            worst = Violation("", window['start'], "window", f"{name} latency (ms)", value, limit, severity)
+    return worst
+
+
+def _segment_violation(slo: SLODefinition, segment: Dict[str, Any]) -> Optional[Violation]:
+    worst = None
+    ops, errors = segment['obj_per_sec'], segment['errors']
+    if slo.min_throughput_obj is not None and ops < slo.min_throughput_obj:
+        severity = slo.min_throughput_obj / ops if ops > 0 else float('inf')
+        worst = Violation("", segment['start'], "segment", "throughput (obj/s)", ops, slo.min_throughput_obj, severity)
+    if slo.max_error_rate_percent is not None and errors > 0:
+        rate = errors / (ops + errors) * 100
+        if rate > slo.max_error_rate_percent:
+            severity = rate / slo.max_error_rate_percent if slo.max_error_rate_percent > 0 else float('inf')
+            if worst is None or severity > worst.severity:
+                worst = Violation("", segment['start'], "segment", "error rate (%)", rate,
+                                  slo.max_error_rate_percent, severity)
+    return worst
+
+
+def evaluate_slo(slo: SLODefinition, job_key: str, results: List[WarpResult]) -> Optional[SLOResult]:
+    """Compliance of a job type's runs with an SLO, or None if the SLO does not apply to them"""
+    results = [r for r in results if slo.applies_to(r)]
+    if not results:
+        return None
+
+    evaluation = SLOResult(slo=slo, job_key=job_key, environment=results[0].environment,
+                           operation=results[0].operation.upper(), runs=len(results))
+    violations = []
+    for result in results:
+        if slo.checks_windows:
+            for window in merged_windows(result):
+                violation = _window_violation(slo, window)
+                evaluation.windows += 1
+                if violation:
+                    violation.run = result.timestamp
+                    violations.append(violation)
+                else:
+                    evaluation.windows_ok += 1
+        if slo.checks_segments:
+            for segment in merged_segments(result):
+                violation = _segment_violation(slo, segment)
+                evaluation.segments += 1
+                if violation:
+                    violation.run = result.timestamp
+                    violations.append(violation)
+                else:
+                    evaluation.segments_ok += 1
+
+    if not evaluation.windows and not evaluation.segments:
+        return None
+    evaluation.worst = sorted(violations, key=lambda v: v.severity, reverse=True)[:WORST_INTERVALS]
+    return evaluation
+
+
+def operation_parts(results: List[WarpResult]) -> Dict[str, List[WarpResult]]:
+    """Runs per operation; MIXED runs contribute each operation of their per-operation breakdown"""
+    parts: Dict[str, List[WarpResult]] = {}
+    for result in results:
+        for part in (result.op_breakdown.values() if result.op_breakdown else [result]):
+            parts.setdefault(part.operation.upper(), []).append(part)
+    return parts
+
+
+def evaluate_job(slo: SLODefinition, job_key: str, results: List[WarpResult]) -> List[SLOResult]:
+    """An SLO evaluated for a job type's runs, once per operation for MIXED runs"""
+    mixed = any(r.op_breakdown for r in results)
+    evaluations = []
+    for _, parts in sorted(operation_parts(results).items()):
+        evaluation = evaluate_slo(slo, job_key, parts)
+        if evaluation:
+            evaluation.mixed = mixed
+            evaluations.append(evaluation)
+    return evaluations
+
+
+def evaluate_slos(parser: WarpResultsParser) -> List[SLOResult]:
+    """Every configured SLO evaluated for every job type (and operation of MIXED runs) it applies to"""
+    evaluations = []
+    grouped = parser.group_valid_results()
+    for slo in load_slos(parser):
+        for job_key, results in sorted(grouped.items()):
+            evaluations.extend(evaluate_job(slo, job_key, results))
+    return evaluations
+
+
+def compare_slos(parser: WarpResultsParser, prod_key: str, prod_results: List[WarpResult],
+                 test_key: str, test_results: List[WarpResult]) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """SLO compliance of PROD vs TEST for every SLO applying to both, and whether TEST regressed
+
+    TEST regresses on an SLO when it misses the objective and complies less often than PROD.
+    MIXED runs are compared per operation, under "<SLO name> (<operation>)".
+    """
+    compliance = {}
+    regression = False
+    for slo in load_slos(parser):
+        prod_evaluations = {e.operation: e for e in evaluate_job(slo, prod_key, prod_results)}
+        test_evaluations = {e.operation: e for e in evaluate_job(slo, test_key, test_results)}
+        for operation in sorted(set(prod_evaluations) & set(test_evaluations)):
+            prod, test = prod_evaluations[operation], test_evaluations[operation]
+            slo_regression = not test.met and test.compliance_percent < prod.compliance_percent
+            regression = regression or slo_regression
+            compliance[test.slo_name] = {
+                'objective_percent': slo.objective_percent,
+                'prod_compliance_percent': prod.compliance_percent,
+                'test_compliance_percent': test.compliance_percent,
+                'prod_burn_rate': prod.burn_rate,
+                'test_burn_rate': test.burn_rate,
+                'regression': slo_regression,
+            }
+    return compliance, regression
+
+
+def slo_summary(parser: WarpResultsParser) -> List[Dict[str, Any]]:
+    """Machine-readable SLO compliance of every job type"""
+    summary = []
+    for evaluation in evaluate_slos(parser):
+        summary.append({
+            'slo': evaluation.slo.name,
+            'job': evaluation.job_key,
+            'operation': evaluation.operation,
+            'environment': evaluation.environment,
+            'objective_percent': evaluation.slo.objective_percent,
+            'runs': evaluation.runs,
+            'windows': evaluation.windows,
+            'windows_compliant': evaluation.windows_ok,
+            'segments': evaluation.segments,
+            'segments_compliant': evaluation.segments_ok,
+            'compliance_percent': evaluation.compliance_percent,
+            'burn_rate': evaluation.burn_rate,
+            'met': evaluation.met,
+            'worst_intervals': [
+                {'run': v.run, 'start': v.start, 'interval': v.interval, 'metric': v.metric, 'value': v.value, 'limit': v.limit}
+                for v in evaluation.worst
+            ],
+        })
+    return summary
+
+
+def _percent(value: Optional[float]) -> str:
+    return f"{value:.2f}%" if value is not None else "-"
+
+
+def write_slo_section(f, parser: WarpResultsParser, comparisons: List[Any]):
+    """Write the SLO compliance section of the comparison report"""
+    evaluations = evaluate_slos(parser)
+    if not evaluations:
+        return
+
+    f.write("## SLO Compliance\n\n")
+    f.write("Latency objectives are checked per 10s request window, throughput and error-rate objectives per "
+            "segment, with all containers merged by wall clock; MIXED runs are evaluated per operation. Burn rate is the failing share of intervals "
+            "relative to the error budget (1 - objective); above 1 the budget is exhausted.\n\n")
+    f.write("| SLO | Job Type | Objective | Windows | Segments | Compliance | Burn Rate | Status |\n")
+    f.write("|-----|----------|-----------|---------|----------|------------|-----------|--------|\n")
+    for e in evaluations:
+        windows = f"{e.windows_ok}/{e.windows}" if e.windows else "-"
+        segments = f"{e.segments_ok}/{e.segments}" if e.segments else "-"
+        burn = f"{e.burn_rate:.2f}" if e.burn_rate is not None else "-"
+        status = "✅ MET" if e.met else "❌ MISSED"
+        f.write(f"| {e.slo.name} | {e.label} | {e.slo.objective_percent:g}% | {windows} | {segments} | "
+                f"{_percent(e.compliance_percent)} | {burn} | {status} |\n")
+    f.write("\n")
+
+    missed = [e for e in evaluations if e.worst]
+    if missed:
+        f.write("### Worst Violating Intervals\n\n")
+        for e in missed:
+            f.write(f"**{e.slo.name}** - {e.label}:\n")
+            for v in e.worst:
+                f.write(f"- {v.start} ({v.interval} of run {v.run}): {v.metric} {v.value:.2f} vs limit {v.limit:g}\n")
+            f.write("\n")
+
+    rows = [(comp, name, values) for comp in comparisons for name, values in (comp.slo_compliance or {}).items()]
+    if rows:
+        f.write("### PROD vs TEST SLO Compliance\n\n")
+        f.write("| Operation | SLO | PROD Compliance | TEST Compliance | Difference | PROD Burn | TEST Burn | Status |\n")
+        f.write("|-----------|-----|-----------------|-----------------|------------|-----------|-----------|--------|\n")
+        for comp, name, values in rows:
+            diff = values['test_compliance_percent'] - values['prod_compliance_percent']
+            burns = [f"{b:.2f}" if b is not None else "-" for b in (values['prod_burn_rate'], values['test_burn_rate'])]
+            status = "⚠️ REGRESSION" if values['regression'] else "✅ PASS"
+            f.write(f"| {comp.operation} | {name} | {_percent(values['prod_compliance_percent'])} | "
+                    f"{_percent(values['test_compliance_percent'])} | {diff:+.2f} pts | {burns[0]} | {burns[1]} | "
+                    f"{status} |\n")
+        f.write("\n")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Memory-Budgeted Result Storage
+
+With --max-memory the parser keeps its results in SpillLists instead of plain
+lists. A SpillList holds items in memory while the shared MemoryBudget allows
+it and pickles them to a temporary spill file once the budget is exceeded;
+spilled items are read back one at a time on access. Grouping then streams
+over the container results: a first pass records which results belong to
+which run, and each run is merged on its own (reading back only its
+containers) into a per-job SpillList under the same budget. The merged runs
+are computed once and shared by every report section.
+
+Each run's containers are merged in a single pass with the same code as the
+in-memory path, in the same order, so the report is identical; a partial merge
+of containers as they arrive would change the floating-point sums.
+"""
+
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Python objects take several times their pickled size in memory
+PICKLE_OVERHEAD = 4
+
+
+class Spilled:
+    """Location of a pickled item in the spill file"""
+    __slots__ = ('offset', 'length')
+
+    def __init__(self, offset: int, length: int):
+        self.offset = offset
+        self.length = length
+
+
+class MemoryBudget:
+    """Approximate memory budget shared by SpillLists, with the spill file they write to"""
+
+    def __init__(self, limit_bytes: int, directory: Optional[str] = None):
+        self.limit_bytes = limit_bytes
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self.spill_count = 0
+        self.directory = directory
+        self._file = None
+        self._lists: List['SpillList'] = []
+
+    def register(self, spill_list: 'SpillList'):
+        self._lists.append(spill_list)
+
+    def release(self, spill_list: 'SpillList'):
+        """Stop tracking a list that is no longer used"""
+        self._lists.remove(spill_list)
+        self.resident_bytes -= sum(spill_list._sizes.values())
+
+    def charge(self, size: int):
+        self.resident_bytes += size
+        if self.resident_bytes > self.limit_bytes:
+            self.spill_count += 1
+            for spill_list in self._lists:
+                spill_list.spill()
+
+    def write(self, data: bytes) -> Spilled:
+        if self._file is None:
+            if self.directory:
+                # --spill-dir may name a directory that does not exist yet
+                os.makedirs(self.directory, exist_ok=True)
+            self._file = tempfile.TemporaryFile(prefix='warp-spill-', dir=self.directory)
+        self._file.seek(0, 2)
+        location = Spilled(self._file.tell(), len(data))
+        self._file.write(data)
+        self.spilled_bytes += len(data)
+        return location
+
+    def read(self, location: Spilled) -> Any:
+        self._file.seek(location.offset)
+        return pickle.loads(self._file.read(location.length))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SpillList:
+    """Append-only list whose items move to the budget's spill file when memory runs short
+
+    Supports what the report code does with result lists: append/extend, len, indexing,
+    slicing, iteration and in-place sort. Spilled items are unpickled on every access, so
+    they should not be mutated through the list.
+    """
+
+    def __init__(self, budget: MemoryBudget, items=None):
+        self.budget = budget
+        self._slots: List[Any] = []  # item, or Spilled
+        self._sizes: Dict[int, int] = {}  # slot -> charged size of resident items
+        budget.register(self)
+        for item in items or []:
+            self.append(item)
+
+    def append(self, item: Any):
+        size = len(pickle.dumps(item, pickle.HIGHEST_PROTOCOL)) * PICKLE_OVERHEAD
+        self._slots.append(item)
+        self._sizes[len(self._slots) - 1] = size
+        self.budget.charge(size)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def spill(self):
+        """Move every resident item to the spill file"""
+        for slot, size in self._sizes.items():
+            self._slots[slot] = self.budget.write(pickle.dumps(self._slots[slot], pickle.HIGHEST_PROTOCOL))
+            self.budget.resident_bytes -= size
+        self._sizes = {}
+
+    def _load(self, slot: Any) -> Any:
+        return self.budget.read(slot) if isinstance(slot, Spilled) else slot
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._load(slot) for slot in self._slots[index]]
+        return self._load(self._slots[index])
+
+    def __iter__(self) -> Iterator[Any]:
+        for slot in list(self._slots):
+            yield self._load(slot)
+
+    def sort(self, key: Callable[[Any], Any], reverse: bool = False):
+        keys = [key(item) for item in self]
+        order = sorted(range(len(self._slots)), key=keys.__getitem__, reverse=reverse)
+        self._slots = [self._slots[i] for i in order]
+        position = {old: new for new, old in enumerate(order)}
+        self._sizes = {position[slot]: size for slot, size in self._sizes.items()}
+
+    def view(self) -> 'SpillList':
+        """An independent list over the same items (sorting it leaves this one as is)"""
+        view = SpillList.__new__(SpillList)
+        view.budget = self.budget
+        view._slots = list(self._slots)
+        # Resident items stay charged to (and spilled through) the list that owns them
+        view._sizes = {}
+        return view
+
+
+def group_bounded(parser) -> Dict[str, SpillList]:
+    """group_results_by_job for a parser whose results are a SpillList"""
+    results = parser.results
+    cached: Optional[Tuple[int, Dict[str, SpillList]]] = getattr(parser, '_bounded_groups', None)
+    if cached is None or cached[0] != len(results):
+        for stale in (cached[1].values() if cached else []):
+            results.budget.release(stale)
+        # Which results form which run, in the order the in-memory grouping sees them
+        runs: Dict[str, Dict[str, List[int]]] = {}
+        for index, result in enumerate(results):
+            runs.setdefault(parser._create_param_key(result), {}).setdefault(result.timestamp, []).append(index)
+
+        grouped = {}
+        for param_key, timestamps in runs.items():
+            merged_results = SpillList(results.budget)
+            for indices in timestamps.values():
+                if len(indices) > 1:
+                    merged_results.append(parser._merge_container_results([results[i] for i in indices]))
+                else:
+                    merged_results.append(results[indices[0]])
+            grouped[param_key] = merged_results
+        cached = (len(results), grouped)
+        parser._bounded_groups = cached
+    # Report sections sort their lists in place, so each caller gets its own
+    return {param_key: merged_results.view() for param_key, merged_results in cached[1].items()}
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Steady-State Detection
+
+This module finds the steady part of a warp run so warm-up (connection
+ramp-up) and cool-down (workers draining) can be trimmed before statistics
+are computed. Throughput is examined per segment (1s) with a rolling window:
+a position is steady when the rolling mean stays within a tolerance band
+around the plateau level (the median of the middle half of the run) and the
+rolling coefficient of variation is low. Rolling sums are computed from
+prefix sums, so detection is linear in the number of segments and cheap
+enough to run on every file. The per-window (10s) request latencies are then
+checked against their own plateau to cut windows with warm-up latency.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import parse_warp_time
+
+
+ROLLING_WINDOW = 5  # segments
+THROUGHPUT_TOLERANCE = 0.15  # allowed deviation of the rolling mean from the plateau level
+MAX_ROLLING_CV = 0.35
+LATENCY_TOLERANCE = 0.5  # per-window average latency may exceed its plateau by this fraction
+MIN_STEADY_FRACTION = 0.5  # steady part must cover at least this share of the run
+MIN_SEGMENTS = 10
+
+
+@dataclass
+class SteadyWindow:
+    """Steady part of a run; indices refer to the per-second segments"""
+    start_index: int
+    end_index: int  # exclusive
+    start: Optional[datetime]
+    end: Optional[datetime]
+    reached: bool
+    warmup_seconds: float = 0.0
+    cooldown_seconds: float = 0.0
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def steady_range(values: List[float], window: int = ROLLING_WINDOW, tolerance: float = THROUGHPUT_TOLERANCE,
+                 max_cv: float = MAX_ROLLING_CV) -> Optional[Tuple[int, int]]:
+    """Index range [start, end) of the steady part of a series, or None if no position is steady"""
+    n = len(values)
+    window = max(1, min(window, n // 4 or 1))
+
+    # Plateau level from the middle half of the run, which excludes warm-up and cool-down
+    level = _median(values[n // 4:n - n // 4] or values)
+    if level <= 0:
+        return None
+
+    prefix = [0.0]
+    prefix_sq = [0.0]
+    for value in values:
+        prefix.append(prefix[-1] + value)
+        prefix_sq.append(prefix_sq[-1] + value * value)
+
+    steady = []
+    for i in range(n - window + 1):
+        total = prefix[i + window] - prefix[i]
+        mean = total / window
+        variance = max((prefix_sq[i + window] - prefix_sq[i]) / window - mean * mean, 0.0)
+        cv = variance ** 0.5 / mean if mean > 0 else float('inf')
+        if abs(mean - level) <= tolerance * level and cv <= max_cv:
+            steady.append(i)
+
+    if not steady:
+        return None
+    return steady[0], steady[-1] + window
+
+
+def _window_latency(windows: List[Dict[str, Any]]) -> List[Tuple[datetime, datetime, float]]:
+    """Request-weighted average latency per window start, combined across clients"""
+    combined: Dict[datetime, List[float]] = {}
+    for window in windows:
+        start = parse_warp_time(window.get('start', ''))
+        end = parse_warp_time(window.get('end', ''))
+        requests = window.get('requests', 0) or 0
+        if not start or not end or requests <= 0:
+            continue
+        entry = combined.setdefault(start, [end, 0.0, 0.0])
+        entry[1] += window.get('avg_ms', 0) * requests
+        entry[2] += requests
+    return [(start, entry[0], entry[1] / entry[2]) for start, entry in sorted(combined.items())]
+
+
+def detect_steady_state(segments: List[Dict[str, Any]], windows: List[Dict[str, Any]],
+                        segment_seconds: float = 1.0) -> Optional[SteadyWindow]:
+    """Detect the steady part of a run from its per-second segments and latency windows
+
+    Returns None when there is too little data to judge. When no steady state is
+    found the whole run is returned with reached=False.
+    """
+    starts = [parse_warp_time(segment.get('start', '')) for segment in segments]
+    if len(segments) < MIN_SEGMENTS or not all(starts):
+        return None
+
+    # Operations per second also cover zero-byte operations such as DELETE and STAT
+    values = [segment.get('obj_per_sec', 0) for segment in segments]
+    run_start = starts[0]
+    run_end = starts[-1] + timedelta(seconds=segment_seconds)
+    whole_run = SteadyWindow(0, len(segments), run_start, run_end, reached=False)
+
+    found = steady_range(values)
+    if found is None:
+        return whole_run
+    start_index, end_index = found
+    start = starts[start_index]
+    end = starts[end_index - 1] + timedelta(seconds=segment_seconds)
+
+    # Drop leading/trailing latency windows whose latency is far above the plateau
+    latency = [(s, e, value) for s, e, value in _window_latency(windows) if start <= s + (e - s) / 2 <= end]
+    if len(latency) >= 3:
+        level = _median([value for _, _, value in latency])
+        ok = [value <= level * (1 + LATENCY_TOLERANCE) for _, _, value in latency]
+        if any(ok):
+            first = ok.index(True)
+            last = len(ok) - 1 - ok[::-1].index(True)
+            start = max(start, latency[first][0]) if first > 0 else start
+            end = min(end, latency[last][1]) if last < len(ok) - 1 else end
+            step = timedelta(seconds=segment_seconds)
+            start_index = next((i for i, s in enumerate(starts) if s >= start), start_index)
+            end_index = max((i + 1 for i, s in enumerate(starts) if s + step <= end), default=end_index)
+
+    if end_index - start_index < MIN_STEADY_FRACTION * len(segments):
+        return whole_run
+
+    return SteadyWindow(
+        start_index=start_index,
+        end_index=end_index,
+        start=start,
+        end=end,
+        reached=True,
+        warmup_seconds=(start - run_start).total_seconds(),
+        cooldown_seconds=(run_end - end).total_seconds(),
+    )
+
+
+def windows_in_range(windows: List[Dict[str, Any]], start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Latency windows whose midpoint lies inside [start, end]"""
+    selected = []
+    for window in windows:
+        window_start = parse_warp_time(window.get('start', ''))
+        window_end = parse_warp_time(window.get('end', ''))
+        if window_start and window_end and start <= window_start + (window_end - window_start) / 2 <= end:
+            selected.append(window)
+    return selected
+
+
+def summarize_windows(windows: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """Latency and TTFB statistics of a set of latency windows, aggregated like a whole-run report"""
+    def mean(key: str, items: List[Dict[str, Any]]) -> float:
+        return sum(w.get(key) or 0 for w in items) / len(items)
+
+    summary = {
+        'avg_latency_ms': mean('avg_ms', windows),
+        'p50_latency_ms': mean('p50_ms', windows),
+        'p90_latency_ms': mean('p90_ms', windows),
+        'p99_latency_ms': mean('p99_ms', windows),
+        'fastest_req_ms': min(w.get('fastest_ms', 0) for w in windows),
+        'slowest_req_ms': max(w.get('slowest_ms', 0) for w in windows),
+        'stddev_ms': mean('stddev_ms', windows),
+    }
+
+    ttfb = [w for w in windows if w.get('ttfb_avg_ms') is not None]
+    if ttfb:
+        summary.update({
+            'ttfb_avg_ms': mean('ttfb_avg_ms', ttfb),
+            'ttfb_best_ms': min(w.get('ttfb_best_ms') or 0 for w in ttfb),
+            'ttfb_median_ms': mean('ttfb_median_ms', ttfb),
+            'ttfb_p90_ms': mean('ttfb_p90_ms', ttfb),
+            'ttfb_99th_ms': mean('ttfb_p99_ms', ttfb),
+            'ttfb_worst_ms': max(w.get('ttfb_worst_ms') or 0 for w in ttfb),
+        })
+    return summary
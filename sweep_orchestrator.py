@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Warp Parameter Sweep Orchestrator
+
+This script expands a parameter matrix (see sweep_matrix.yaml) into warp
+Kubernetes Jobs, runs them sequentially or with a bounded number in parallel,
+collects and parses the results of every finished run, and records progress in
+a state file so an interrupted sweep can be resumed.
+
+All kubectl calls go through a KubectlRunner, so the orchestrator can be driven
+against a fake cluster (see DryRunKubectlRunner).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+
+import yaml
+
+from parse_warp_results import WarpResultsParser
+
+
+STATE_FILE = "sweep_state.json"
+RUN_METADATA_FILE = "sweep_run.json"
+
+# Run statuses, in the order a run moves through them
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"  # Job finished, results not collected yet
+STATUS_COLLECTED = "collected"
+STATUS_FAILED = "failed"
+
+# Slack around a run's start/end when matching result files to it (filenames carry second precision)
+FILE_MATCH_SLACK = timedelta(seconds=60)
+
+
+@dataclass
+class SweepRun:
+    """One combination of the parameter matrix and its progress"""
+    run_id: str
+    index: int
+    op: str
+    environment: str
+    host: str
+    obj_size: str
+    concurrent: int
+    duration: str
+    job_name: str
+    repetition: int = 1
+    status: str = STATUS_PENDING
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    collected_files: List[str] = field(default_factory=list)
+    parsed_results: int = 0
+
+
+class KubectlRunner(ABC):
+    """Executes kubectl commands. Subclass to point the orchestrator at another backend."""
+
+    @abstractmethod
+    def run(self, args: List[str], stdin: Optional[str] = None) -> str:
+        """Run kubectl with the given arguments and return its stdout; raise CalledProcessError on failure"""
+
+
+class SubprocessKubectlRunner(KubectlRunner):
+    """Runs the real kubectl binary"""
+
+    def __init__(self, kubectl: str = "kubectl"):
+        self.kubectl = kubectl
+
+    def run(self, args: List[str], stdin: Optional[str] = None) -> str:
+        completed = subprocess.run([self.kubectl] + args, input=stdin, capture_output=True,
+                                   text=True, check=True)
+        return completed.stdout
+
+
+class DryRunKubectlRunner(KubectlRunner):
+    """Fake cluster: records every command and reports each Job as succeeded
+    
+    pod_files maps fake client pods to local result files, which are listed and copied as if
+    they were in the pod's /tmp. Without them every run finishes with no result files.
+    """
+
+    def __init__(self, pod_files: Optional[Dict[str, List[str]]] = None):
+        self.calls: List[List[str]] = []
+        self.pod_files = pod_files or {}
+
+    def run(self, args: List[str], stdin: Optional[str] = None) -> str:
+        self.calls.append(args)
+        print(f"[dry-run] kubectl {' '.join(args)}")
+        if args[:2] == ["get", "job"]:
+            return "1,"
+        if args[:2] == ["get", "pods"]:
+            return " ".join(self.pod_files)
+        if args[0] == "exec":
+            return "\n".join(f"/tmp/{os.path.basename(path)}" for path in self.pod_files.get(args[3], []))
+        if args[0] == "cp":
+            # <namespace>/<pod>:<remote path> <local path>
+            location, _, remote_path = args[1].partition(':')
+            pod = location.partition('/')[2]
+            for path in self.pod_files.get(pod, []):
+                if os.path.basename(path) == os.path.basename(remote_path):
+                    shutil.copyfile(path, args[2])
+                    return ""
+            raise subprocess.CalledProcessError(1, ["kubectl"] + args)
+        return ""
+
+
+def _slug(value: str, max_length: int = 63) -> str:
+    """Lowercase DNS-1123 label fragment"""
+    slug = re.sub(r'[^a-z0-9-]+', '-', value.lower()).strip('-')
+    return slug[:max_length].rstrip('-')
+
+
+def expand_matrix(spec: Dict[str, Any]) -> List[SweepRun]:
+    """Expand the sweep matrix into runs, in a stable order
+    
+    With repeats > 1 the whole matrix is run that many times in rounds, so the
+    repetitions of a combination are spread over the sweep rather than back to back.
+    """
+    matrix = spec.get('matrix', {})
+    sweep_slug = _slug(str(spec.get('sweep_id', 'sweep')), 40)
+    repeats = max(int(spec.get('repeats', 1)), 1)
+
+    hosts = matrix.get('host', {})
+    if isinstance(hosts, dict):
+        host_items = list(hosts.items())
+    else:
+        host_items = [(str(host), str(host)) for host in hosts]
+
+    runs = []
+    combinations = list(itertools.product(
+        matrix.get('op', []),
+        host_items,
+        matrix.get('obj_size', []),
+        matrix.get('concurrent', []),
+        matrix.get('duration', []),
+    ))
+    rounds = itertools.product(range(1, repeats + 1), combinations)
+    for index, (repetition, (op, (environment, host), obj_size, concurrent, duration)) in enumerate(rounds):
+        run_id = f"{op}-{environment}-{obj_size}-c{concurrent}-{duration}".lower()
+        if repeats > 1:
+            run_id += f"-r{repetition}"
+        runs.append(SweepRun(
+            run_id=run_id,
+            index=index,
+            op=str(op).lower(),
+            environment=str(environment),
+            host=str(host),
+            obj_size=str(obj_size),
+            concurrent=int(concurrent),
+            duration=str(duration),
+            job_name=f"warp-{sweep_slug}-{index:03d}",
+            repetition=repetition,
+        ))
+    return runs
+
+
+def build_job_manifest(run: SweepRun, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the Kubernetes Job for a run, mirroring the Jobs in Jobs.yaml"""
+    args = [run.op, "--bucket", str(spec.get('bucket', 't-dp-tests')), "--host", run.host]
+    if spec.get('tls', True):
+        args.append("--tls")
+    args += ["--json", "--warp-client", str(spec.get('warp_client', '')),
+             "--obj.size", run.obj_size, "--concurrent", str(run.concurrent),
+             "--duration", run.duration]
+    args += [str(arg) for arg in spec.get('extra_args', [])]
+
+    labels = {
+        'app': 'warp-sweep',
+        'warp-sweep-id': _slug(str(spec.get('sweep_id', 'sweep'))),
+        'warp-run-id': _slug(run.run_id),
+    }
+
+    return {
+        'apiVersion': 'batch/v1',
+        'kind': 'Job',
+        'metadata': {
+            'name': run.job_name,
+            'namespace': spec.get('namespace', 'timesheet'),
+            'labels': labels,
+        },
+        'spec': {
+            'template': {
+                'metadata': {'labels': dict(labels)},
+                'spec': {
+                    'containers': [{
+                        'name': f"warp-{run.op}",
+                        'image': spec.get('image', 'minio/warp:latest'),
+                        'env': [{'name': k, 'value': str(v)} for k, v in spec.get('env', {}).items()],
+                        'args': args,
+                    }],
+                    'restartPolicy': 'Never',
+                },
+            },
+            'backoffLimit': 1,
+        },
+    }
+
+
+class SweepOrchestrator:
+    """Schedules the runs of a sweep, collects their results and tracks progress on disk"""
+
+    def __init__(self, spec: Dict[str, Any], results_dir: str = "./warp_results",
+                 runner: Optional[KubectlRunner] = None, sleep: Callable[[float], None] = time.sleep):
+        self.spec = spec
+        self.sweep_id = str(spec.get('sweep_id', 'sweep'))
+        self.namespace = spec.get('namespace', 'timesheet')
+        self.max_parallel = max(int(spec.get('max_parallel', 1)), 1)
+        self.poll_interval = float(spec.get('poll_interval', 15))
+        self.sweep_dir = Path(results_dir) / self.sweep_id
+        self.runner = runner or SubprocessKubectlRunner()
+        self.sleep = sleep
+        self.runs: List[SweepRun] = []
+
+    # ---- state ----
+
+    def load_state(self, retry_failed: bool = False):
+        """Load progress of a previous invocation and merge it into the expanded matrix"""
+        self.runs = expand_matrix(self.spec)
+        state_path = self.sweep_dir / STATE_FILE
+        if not state_path.exists():
+            return
+
+        with open(state_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f).get('runs', {})
+
+        for run in self.runs:
+            if run.run_id in saved:
+                for key, value in saved[run.run_id].items():
+                    setattr(run, key, value)
+            if retry_failed and run.status == STATUS_FAILED:
+                run.status = STATUS_PENDING
+
+        done = sum(1 for r in self.runs if r.status == STATUS_COLLECTED)
+        print(f"Resuming sweep {self.sweep_id}: {done}/{len(self.runs)} runs already collected")
+
+    def save_state(self):
+        """Atomically persist the progress of every run"""
+        self.sweep_dir.mkdir(parents=True, exist_ok=True)
+        state_path = self.sweep_dir / STATE_FILE
+        tmp_path = state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sweep_id': self.sweep_id, 'runs': {r.run_id: asdict(r) for r in self.runs}}, f, indent=2)
+        os.replace(tmp_path, state_path)
+
+    # ---- kubectl ----
+
+    def launch(self, run: SweepRun) -> bool:
+        """Submit the Job of a run; return False (and mark the run failed) if kubectl rejects it"""
+        manifest = build_job_manifest(run, self.spec)
+        print(f"Launching {run.run_id} as job {run.job_name}")
+        try:
+            self.runner.run(["apply", "-n", self.namespace, "-f", "-"], stdin=json.dumps(manifest))
+        except subprocess.CalledProcessError as e:
+            print(f"Could not launch job {run.job_name} for {run.run_id}: {e}")
+            run.status = STATUS_FAILED
+            run.finished_at = datetime.now(timezone.utc).isoformat()
+            self.save_state()
+            return False
+        run.status = STATUS_RUNNING
+        run.started_at = datetime.now(timezone.utc).isoformat()
+        self.save_state()
+        return True
+
+    def job_status(self, run: SweepRun) -> Optional[str]:
+        """Current status of a run's Job, or None if the Job does not exist"""
+        try:
+            output = self.runner.run(["get", "job", run.job_name, "-n", self.namespace, "-o",
+                                      'jsonpath={.status.succeeded},{.status.conditions[?(@.type=="Failed")].status}'])
+        except subprocess.CalledProcessError:
+            return None
+
+        succeeded, _, failed = output.strip().partition(',')
+        if succeeded and int(succeeded) > 0:
+            return STATUS_SUCCEEDED
+        if failed == "True":
+            return STATUS_FAILED
+        return STATUS_RUNNING
+
+    def _run_matches_file(self, run: SweepRun, filename: str) -> bool:
+        """Check whether a result file was produced by the given run"""
+        operation, timestamp, _ = WarpResultsParser.parse_filename(filename)
+        if not operation or operation != run.op or not run.started_at:
+            return False
+        file_time = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        started = datetime.fromisoformat(run.started_at)
+        finished = datetime.fromisoformat(run.finished_at) if run.finished_at else datetime.now(timezone.utc)
+        return started - FILE_MATCH_SLACK <= file_time <= finished + FILE_MATCH_SLACK
+
+    def collect(self, run: SweepRun):
+        """Copy the run's result files from the warp client pods into the sweep directory"""
+        run_dir = self.sweep_dir / run.run_id
+        already_collected = {name for r in self.runs for name in r.collected_files}
+        selector = self.spec.get('client_selector', 'app=warp')
+
+        pods = self.runner.run(["get", "pods", "-n", self.namespace, "-l", selector, "-o",
+                                "jsonpath={.items[*].metadata.name}"]).split()
+        for pod in pods:
+            try:
+                listing = self.runner.run(["exec", "-n", self.namespace, pod, "--", "find", "/tmp",
+                                           "-name", "warp-*.json.zst"])
+            except subprocess.CalledProcessError as e:
+                print(f"Could not list results in pod {pod}: {e}")
+                continue
+
+            for remote_path in listing.split():
+                filename = os.path.basename(remote_path)
+                key = f"{pod}/{filename}"
+                if key in already_collected or not self._run_matches_file(run, filename):
+                    continue
+                local_path = run_dir / pod / filename
+                local_path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    self.runner.run(["cp", f"{self.namespace}/{pod}:{remote_path}", str(local_path)])
+                    run.collected_files.append(key)
+                except subprocess.CalledProcessError as e:
+                    print(f"Failed to copy {filename} from {pod}: {e}")
+
+        # Tag the results with the sweep they belong to
+        run_dir.mkdir(parents=True, exist_ok=True)
+        with open(run_dir / RUN_METADATA_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'sweep_id': self.sweep_id, **asdict(run)}, f, indent=2)
+
+        print(f"Collected {len(run.collected_files)} files for {run.run_id}")
+
+    def parse(self, run: SweepRun):
+        """Parse the collected results of a run"""
+        parser = WarpResultsParser(str(self.sweep_dir / run.run_id))
+        run.parsed_results = len(parser.find_and_parse_results())
+
+    def finish(self, run: SweepRun, status: str):
+        """Handle a Job that reached a terminal state"""
+        run.finished_at = datetime.now(timezone.utc).isoformat()
+        if status == STATUS_FAILED:
+            print(f"Job {run.job_name} for {run.run_id} failed")
+            run.status = STATUS_FAILED
+            self.save_state()
+            return
+
+        run.status = STATUS_SUCCEEDED
+        self.save_state()
+        self.collect(run)
+        self.parse(run)
+        if not run.parsed_results:
+            # Nothing to compare; keep it failed so --retry-failed picks it up again
+            print(f"No results collected for {run.run_id}")
+            run.status = STATUS_FAILED
+            self.save_state()
+            return
+        run.status = STATUS_COLLECTED
+        self.save_state()
+
+        if self.spec.get('cleanup', False):
+            try:
+                self.runner.run(["delete", "job", run.job_name, "-n", self.namespace])
+            except subprocess.CalledProcessError as e:
+                print(f"Could not delete job {run.job_name}: {e}")
+
+    # ---- scheduling ----
+
+    def run_sweep(self, retry_failed: bool = False) -> bool:
+        """Run every outstanding combination; return True if all runs were collected"""
+        self.load_state(retry_failed)
+        self.save_state()
+
+        active: List[SweepRun] = []
+        for run in self.runs:
+            if run.status == STATUS_SUCCEEDED:
+                # Interrupted between completion and collection
+                self.finish(run, STATUS_SUCCEEDED)
+            elif run.status == STATUS_RUNNING:
+                if self.job_status(run) is None:
+                    print(f"Job {run.job_name} for {run.run_id} is gone, relaunching")
+                    run.status = STATUS_PENDING
+                else:
+                    active.append(run)
+        queue = [r for r in self.runs if r.status == STATUS_PENDING]
+
+        while queue or active:
+            while queue and len(active) < self.max_parallel:
+                run = queue.pop(0)
+                if self.launch(run):
+                    active.append(run)
+
+            for run in list(active):
+                status = self.job_status(run)
+                if status in (STATUS_SUCCEEDED, STATUS_FAILED):
+                    active.remove(run)
+                    self.finish(run, status)
+                elif status is None:
+                    print(f"Job {run.job_name} disappeared while running")
+                    active.remove(run)
+                    self.finish(run, STATUS_FAILED)
+
+            if active:
+                self.sleep(self.poll_interval)
+
+        collected = [r for r in self.runs if r.status == STATUS_COLLECTED]
+        failed = [r for r in self.runs if r.status == STATUS_FAILED]
+        print(f"Sweep {self.sweep_id}: {len(collected)} collected, {len(failed)} failed")
+        return not failed
+
+    def generate_report(self, output_file: Optional[str] = None):
+        """Parse every collected run of the sweep and write a comparison report"""
+        parser = WarpResultsParser(str(self.sweep_dir))
+        parser.find_and_parse_results()
+        parser.generate_comparison_report(output_file or str(self.sweep_dir / "warp_comparison_report.md"))
+
+
+def write_manifests(spec: Dict[str, Any], output_dir: str):
+    """Write the expanded Jobs as one YAML file per run (for review or manual kubectl apply)"""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    for run in expand_matrix(spec):
+        path = Path(output_dir) / f"{run.job_name}.yaml"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# {run.run_id}\n")
+            yaml.safe_dump(build_job_manifest(run, spec), f, sort_keys=False)
+        print(f"Wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a warp parameter sweep from a matrix specification')
+    parser.add_argument('spec', help='Sweep specification (YAML)')
+    parser.add_argument('--results-dir', default='./warp_results', help='Directory to collect results into')
+    parser.add_argument('--sweep-id', help='Override the sweep_id from the specification')
+    parser.add_argument('--max-parallel', type=int, help='Override max_parallel from the specification')
+    parser.add_argument('--retry-failed', action='store_true', help='Re-run runs that failed in a previous invocation')
+    parser.add_argument('--emit-manifests', metavar='DIR', help='Only write the Job manifests to DIR')
+    parser.add_argument('--dry-run', action='store_true', help='Use a fake kubectl that records commands')
+    parser.add_argument('--no-report', action='store_true', help='Skip the comparison report at the end')
+
+    args = parser.parse_args()
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        spec = yaml.safe_load(f) or {}
+    if args.sweep_id:
+        spec['sweep_id'] = args.sweep_id
+    if args.max_parallel:
+        spec['max_parallel'] = args.max_parallel
+
+    if args.emit_manifests:
+        write_manifests(spec, args.emit_manifests)
+        return
+
+    runner = DryRunKubectlRunner() if args.dry_run else SubprocessKubectlRunner()
+    orchestrator = SweepOrchestrator(spec, args.results_dir, runner,
+                                     sleep=(lambda _: None) if args.dry_run else time.sleep)
+    success = orchestrator.run_sweep(retry_failed=args.retry_failed)
+
+    if not args.no_report and not args.dry_run:
+        orchestrator.generate_report()
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Tail-Latency Attribution
+
+A p99 in the summary table is one number for the whole job; this module shows
+where the requests behind it came from. Every 10s request window of every
+client (requests_by_client, before containers are merged) describes its
+latency distribution with the fastest, p50, p90, p99 and slowest request. The
+requests of a window are spread log-uniformly between those points, the same
+model the rollups use, so the latency distribution of the whole job is a
+mixture of per-window pieces. The job's p99 and p99.9 are read from that
+mixture with one sweep over the sorted piece boundaries, and each window's
+share of the requests above them follows in closed form. A window whose
+slowest request lies above a threshold contributes at least that request,
+even when its own p99 is far below.
+
+The tail requests are then summed per container, client, host, operation, run
+and minute, and the top contributors are ranked by their share of the tail
+next to their share of all requests; a contributor with a tail share well
+above its request share is where the tail comes from.
+
+The windows are held as columns (one list per field) and every step is a
+single pass over them; both tail thresholds come from the same sweep, so an
+hour-long mixed run of 8 containers (~12k windows of four operations) is
+attributed in a fraction of a second.
+"""
+
+import argparse
+import math
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+from parse_warp_results import WarpResultsParser, WarpResult, ComparisonConfig, DEFAULT_CONFIG_FILE, parse_warp_time
+
+
+TAIL_QUANTILES = (0.99, 0.999)
+TIME_SLOT_S = 60
+TOP_CONTRIBUTORS = 3
+SLOWEST_WINDOWS = 5
+DIMENSIONS = ('container', 'client', 'host', 'op', 'run', 'minute')
+# Quantile of each latency field of a window
+KNOTS = ((0.0, 'fastest_ms'), (0.5, 'p50_ms'), (0.9, 'p90_ms'), (0.99, 'p99_ms'), (1.0, 'slowest_ms'))
+MIN_LATENCY_MS = 1e-3
+
+
+@dataclass
+class WindowColumns:
+    """Request windows of one job, one list per field"""
+    container: List[str] = field(default_factory=list)
+    client: List[str] = field(default_factory=list)
+    host: List[str] = field(default_factory=list)
+    op: List[str] = field(default_factory=list)
+    run: List[str] = field(default_factory=list)
+    minute: List[str] = field(default_factory=list)
+    start: List[str] = field(default_factory=list)
+    requests: List[float] = field(default_factory=list)
+    slowest_ms: List[float] = field(default_factory=list)
+    # Per window: (lower log latency, upper log latency, requests) of each piece between two knots
+    pieces: List[List[Tuple[float, float, float]]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+
+@dataclass
+class Contributor:
+    """Share of the tail requests of one container, client, host, op, run or minute"""
+    name: str
+    tail_share: float
+    request_share: float
+
+    @property
+    def lift(self) -> Optional[float]:
+        """How over-represented the contributor is in the tail (1 = as in all requests)"""
+        return self.tail_share / self.request_share if self.request_share > 0 else None
+
+
+@dataclass
+class TailAttribution:
+    """Where the requests above a job's p99 and p99.9 came from"""
+    job_key: str
+    environment: str
+    runs: int
+    windows: int
+    requests: float
+    thresholds_ms: Dict[float, float]  # quantile -> latency
+    # quantile -> dimension -> top contributors (dimensions with a single value are left out)
+    contributors: Dict[float, Dict[str, List[Contributor]]]
+    slowest: List[Dict[str, Any]]
+
+
+def window_pieces(window: Dict[str, Any]) -> List[Tuple[float, float, float]]:
+    """Log-uniform pieces of a window's latency distribution between its reported quantiles"""
+    requests = window.get('requests', 0) or 0
+    knots = []
+    for quantile, key in KNOTS:
+        value = window.get(key)
+        if value:
+            # Quantiles of one window never decrease
+            value = max(value, knots[-1][1] if knots else MIN_LATENCY_MS)
+            knots.append((quantile, value))
+    if len(knots) < 2 or knots[0][0] > 0 or knots[-1][0] < 1:
+        return []
+    return [(math.log(low), math.log(high), requests * (q_high - q_low))
+            for (q_low, low), (q_high, high) in zip(knots, knots[1:]) if q_high > q_low]
+
+
+def collect_windows(job_results: List[WarpResult]) -> WindowColumns:
+    """Steady request windows of all containers, clients and operations of a job"""
+    columns = WindowColumns()
+    # Windows of all clients share their start and end times, so each is parsed once
+    epochs: Dict[str, Optional[float]] = {}
+    minutes: Dict[int, str] = {}
+
+    def epoch(value: str) -> Optional[float]:
+        if value not in epochs:
+            when = parse_warp_time(value)
+            epochs[value] = when.timestamp() if when else None
+        return epochs[value]
+
+    for result in job_results:
+        parts = sorted(result.op_breakdown.items()) if result.op_breakdown else [(result.operation, result)]
+        for op, part in parts:
+            steady = part if part.steady_state else result
+            start = parse_warp_time(steady.steady_start).timestamp() if steady.steady_state else None
+            end = parse_warp_time(steady.steady_end).timestamp() if steady.steady_state else None
+            host = ", ".join(part.hosts or result.hosts or []) or "-"
+            for window in part.latency_windows or []:
+                window_start = epoch(window.get('start', ''))
+                window_end = epoch(window.get('end', ''))
+                if window_start is None or window_end is None or (window.get('requests', 0) or 0) <= 0:
+                    continue
+                if start and end and not start <= (window_start + window_end) / 2 <= end:
+                    continue
+                pieces = window_pieces(window)
+                if not pieces:
+                    continue
+                slot = int(window_start) // TIME_SLOT_S * TIME_SLOT_S
+                if slot not in minutes:
+                    minutes[slot] = datetime.fromtimestamp(slot, timezone.utc).strftime('%Y-%m-%d %H:%M')
+                columns.container.append(result.container_id)
+                columns.client.append(window.get('client', '-'))
+                columns.host.append(host)
+                columns.op.append(op)
+                columns.run.append(result.timestamp)
+                columns.minute.append(minutes[slot])
+                columns.start.append(window.get('start', ''))
+                columns.requests.append(float(window['requests']))
+                columns.slowest_ms.append(window.get('slowest_ms') or 0.0)
+                columns.pieces.append(pieces)
+    return columns
+
+
+def mixture_quantiles(columns: WindowColumns, quantiles: Tuple[float, ...] = TAIL_QUANTILES) -> Dict[float, float]:
+    """Latency (ms) below which each given share of all requests of the windows lies"""
+    total = sum(columns.requests)
+    if total <= 0:
+        return {}
+    # Requests per unit of log latency change at the piece boundaries; zero-width pieces are point masses
+    density_change: Dict[float, float] = {}
+    point_mass: Dict[float, float] = {}
+    for pieces in columns.pieces:
+        for low, high, mass in pieces:
+            if high > low:
+                density = mass / (high - low)
+                density_change[high] = density_change.get(high, 0.0) + density
+                density_change[low] = density_change.get(low, 0.0) - density
+            else:
+                point_mass[low] = point_mass.get(low, 0.0) + mass
+
+    # One sweep down from the slowest request; the tail of the highest quantile fills first
+    targets = sorted(((total * (1 - quantile), quantile) for quantile in quantiles), reverse=True)
+    found: Dict[float, float] = {}
+    above, density, previous = 0.0, 0.0, None
+    for position in sorted(set(density_change) | set(point_mass), reverse=True):
+        if previous is not None and density > 0:
+            between = density * (previous - position)
+            while targets and above + between >= targets[-1][0]:
+                target, quantile = targets.pop()
+                found[quantile] = math.exp(previous - (target - above) / density)
+            above += between
+        above += point_mass.get(position, 0.0)
+        while targets and above >= targets[-1][0]:
+            found[targets.pop()[1]] = math.exp(position)
+        density += density_change.get(position, 0.0)
+        previous = position
+    for _, quantile in targets:
+        found[quantile] = math.exp(previous)
+    return found
+
+
+def tail_requests(columns: WindowColumns, threshold_ms: float) -> List[float]:
+    """Estimated requests above the threshold in every window"""
+    cut = math.log(threshold_ms)
+    counts = []
+    for pieces, slowest in zip(columns.pieces, columns.slowest_ms):
+        count = 0.0
+        for low, high, mass in pieces:
+            if low >= cut:
+                count += mass
+            elif high > cut:
+                count += mass * (high - cut) / (high - low)
+        # The slowest request is measured, not modelled
+        if slowest > threshold_ms:
+            count = max(count, 1.0)
+        counts.append(count)
+    return counts
+
+
+def top_contributors(labels: List[str], tail: List[float], requests: List[float],
+                     limit: int = TOP_CONTRIBUTORS) -> List[Contributor]:
+    tail_by: Dict[str, float] = {}
+    requests_by: Dict[str, float] = {}
+    for label, tail_count, request_count in zip(labels, tail, requests):
+        tail_by[label] = tail_by.get(label, 0.0) + tail_count
+        requests_by[label] = requests_by.get(label, 0.0) + request_count
+    if len(tail_by) < 2:
+        return []
+    tail_total, request_total = sum(tail_by.values()), sum(requests_by.values())
+    if tail_total <= 0:
+        return []
+    ranked = sorted(tail_by, key=lambda label: (-tail_by[label], label))[:limit]
+    return [Contributor(name=label, tail_share=tail_by[label] / tail_total,
+                        request_share=requests_by[label] / request_total) for label in ranked]
+
+
+def attribute_job(job_key: str, job_results: List[WarpResult]) -> Optional[TailAttribution]:
+    """Tail attribution of all runs of one job"""
+    columns = collect_windows(job_results)
+    if not len(columns):
+        return None
+    thresholds = mixture_quantiles(columns)
+    contributors = {}
+    for quantile, threshold in thresholds.items():
+        tail = tail_requests(columns, threshold)
+        contributors[quantile] = {}
+        for dimension in DIMENSIONS:
+            top = top_contributors(getattr(columns, dimension), tail, columns.requests)
+            if top:
+                contributors[quantile][dimension] = top
+
+    worst = sorted(range(len(columns)), key=lambda i: -columns.slowest_ms[i])[:SLOWEST_WINDOWS]
+    slowest = [{'container': columns.container[i], 'client': columns.client[i], 'op': columns.op[i],
+                'run': columns.run[i], 'start': columns.start[i], 'slowest_ms': columns.slowest_ms[i],
+                'requests': columns.requests[i]} for i in worst]
+    return TailAttribution(
+        job_key=job_key,
+        environment=job_results[0].environment,
+        runs=len({result.timestamp for result in job_results}),
+        windows=len(columns),
+        requests=sum(columns.requests),
+        thresholds_ms=thresholds,
+        contributors=contributors,
+        slowest=slowest,
+    )
+
+
+def analyze_tails(parser: WarpResultsParser) -> List[TailAttribution]:
+    """Tail attribution of every job type, from the unmerged container results"""
+    by_job: Dict[str, List[WarpResult]] = {}
+    for result in parser.results:
+        by_job.setdefault(parser._create_param_key(result), []).append(result)
+    attributions = []
+    for job_key, job_results in sorted(by_job.items()):
+        attribution = attribute_job(job_key, sorted(job_results, key=lambda r: (r.timestamp, r.container_id)))
+        if attribution:
+            attributions.append(attribution)
+    return attributions
+
+
+def _quantile_name(quantile: float) -> str:
+    return f"p{quantile * 100:g}"
+
+
+def tail_summary(parser: WarpResultsParser) -> List[Dict[str, Any]]:
+    """Machine-readable tail attribution of every job type"""
+    summary = []
+    for attribution in analyze_tails(parser):
+        summary.append({
+            'job': attribution.job_key,
+            'environment': attribution.environment,
+            'runs': attribution.runs,
+            'windows': attribution.windows,
+            'requests': attribution.requests,
+            'tails': {
+                _quantile_name(quantile): {
+                    'threshold_ms': threshold,
+                    'contributors': {
+                        dimension: [dict(asdict(contributor), lift=contributor.lift) for contributor in top]
+                        for dimension, top in attribution.contributors[quantile].items()
+                    },
+                }
+                for quantile, threshold in attribution.thresholds_ms.items()
+            },
+            'slowest_windows': attribution.slowest,
+        })
+    return summary
+
+
+def _contributors(top: List[Contributor]) -> str:
+    return "; ".join(f"{c.name} {c.tail_share:.0%} (of requests {c.request_share:.0%})" for c in top) or "-"
+
+
+def write_tail_section(f, parser: WarpResultsParser):
+    """Write the tail-latency attribution section of the comparison report"""
+    attributions = analyze_tails(parser)
+    if not attributions:
+        return
+    low, high = (_quantile_name(quantile) for quantile in TAIL_QUANTILES)
+
+    f.write("## Tail-Latency Attribution\n\n")
+    f.write(f"Requests above the job's {low} and {high} (estimated from the per-client request windows of all "
+            f"containers, steady part only) attributed to the containers, clients, hosts, operations, runs and "
+            f"minutes they came from. Each contributor shows its share of the tail and, in brackets, of all "
+            f"requests; a tail share well above the request share marks the source of the tail. Dimensions with "
+            f"a single value are left out.\n\n")
+    f.write(f"| Job Type | {low} (ms) | {high} (ms) | Dimension | Top of {low} Tail | Top of {high} Tail |\n")
+    f.write(f"|----------|{'-' * (len(low) + 7)}|{'-' * (len(high) + 7)}|-----------|"
+            f"{'-' * (len(low) + 13)}|{'-' * (len(high) + 13)}|\n")
+    for attribution in attributions:
+        thresholds = [attribution.thresholds_ms.get(quantile) for quantile in TAIL_QUANTILES]
+        contributors = [attribution.contributors.get(quantile, {}) for quantile in TAIL_QUANTILES]
+        dimensions = [dimension for dimension in DIMENSIONS if any(dimension in c for c in contributors)]
+        for dimension in dimensions:
+            values = " | ".join(f"{threshold:.1f}" if threshold is not None else "-" for threshold in thresholds)
+            tails = " | ".join(_contributors(c.get(dimension, [])) for c in contributors)
+            f.write(f"| {attribution.job_key} | {values} | {dimension} | {tails} |\n")
+    f.write("\n")
+
+    f.write("**Slowest request per job type:**\n\n")
+    f.write(f"| Job Type | Slowest (ms) | × {high} | Container | Client | Operation | Window Start |\n")
+    f.write(f"|----------|--------------|{'-' * (len(high) + 4)}|-----------|--------|-----------|--------------|\n")
+    for attribution in attributions:
+        if not attribution.slowest:
+            continue
+        worst = attribution.slowest[0]
+        threshold = attribution.thresholds_ms.get(TAIL_QUANTILES[-1])
+        ratio = f"{worst['slowest_ms'] / threshold:.1f}" if threshold else "-"
+        f.write(f"| {attribution.job_key} | {worst['slowest_ms']:.1f} | {ratio} | {worst['container']} | "
+                f"{worst['client']} | {worst['op']} | {worst['start']} |\n")
+    f.write("\n")
+
+
+def main():
+    # Imported here because results_index builds on parse_warp_results
+    from results_index import ResultsIndex, add_filter_arguments, filter_from_args
+
+    parser = argparse.ArgumentParser(description='Attribute the latency tail of warp jobs to containers, '
+                                                 'clients, hosts, operations and time windows')
+    parser.add_argument('--results-dir', default='.', help='Directory containing warp result files')
+    parser.add_argument('--config', help=f'Threshold configuration (default: {DEFAULT_CONFIG_FILE} if present)')
+    parser.add_argument('--job', help='Only job types whose key contains this (e.g. MIXED_TEST)')
+    parser.add_argument('--top', type=int, default=TOP_CONTRIBUTORS, help='Contributors to list per dimension')
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    config = ComparisonConfig.load(args.config) if args.config else ComparisonConfig.find_default()
+    index_filter = filter_from_args(args)
+    # Archives are not indexed, so their members are filtered as they are read
+    results_parser = WarpResultsParser(args.results_dir, config=config, index_filter=index_filter)
+    index = ResultsIndex(args.results_dir)
+    index.refresh()
+    results_parser.find_and_parse_results(index.paths(index.select(index_filter)))
+    if not results_parser.results:
+        print(f"No warp result files found in {args.results_dir}")
+        return 2
+
+    by_job: Dict[str, List[WarpResult]] = {}
+    for result in results_parser.results:
+        job_key = results_parser._create_param_key(result)
+        if not args.job or args.job.upper() in job_key:
+            by_job.setdefault(job_key, []).append(result)
+
+    for job_key, job_results in sorted(by_job.items()):
+        started = time.perf_counter()
+        columns = collect_windows(job_results)
+        print(f"\n{job_key}: {len(columns)} windows, {sum(columns.requests):.0f} requests")
+        for quantile, threshold in mixture_quantiles(columns).items():
+            tail = tail_requests(columns, threshold)
+            print(f"  {_quantile_name(quantile)} = {threshold:.1f} ms, {sum(tail):.0f} requests above")
+            for dimension in DIMENSIONS:
+                top = top_contributors(getattr(columns, dimension), tail, columns.requests, args.top)
+                if top:
+                    print(f"    {dimension:<9} {_contributors(top)}")
+        worst = max(range(len(columns)), key=lambda i: columns.slowest_ms[i], default=None)
+        if worst is not None:
+            print(f"  slowest request {columns.slowest_ms[worst]:.1f} ms: container {columns.container[worst]}, "
+                  f"client {columns.client[worst]}, {columns.op[worst]}, window {columns.start[worst]}")
+        print(f"  attributed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Index filters applied to results read from archives
+
+The results index only covers loose files and packed stores, so a filtered run
+(--op, --env, --since, ...) has to filter tar/zip archive members as they are
+read instead of dropping the archives.
+"""
+
+import tarfile
+from pathlib import Path
+
+from parse_warp_results import WarpResultsParser
+from results_index import IndexFilter, ResultsIndex
+
+
+SAMPLE_DIR = Path(__file__).parent / "warp_results" / "warp-0"
+
+
+def _archive(tmp_path: Path, name: str) -> Path:
+    """A tar.gz of the sample GET and PUT results of one container"""
+    archive_path = tmp_path / name
+    with tarfile.open(archive_path, 'w:gz') as tar:
+        for file_path in sorted(SAMPLE_DIR.glob("warp-*-*.json.zst")):
+            if file_path.name.startswith(('warp-get-', 'warp-put-')):
+                tar.add(file_path, arcname=f"warp-0/{file_path.name}")
+    return archive_path
+
+
+def _filtered_parse(results_dir: Path, index_filter: IndexFilter, archives=None) -> WarpResultsParser:
+    """Parse the way the command line does with selection options: index first, then archives"""
+    index = ResultsIndex(str(results_dir))
+    index.refresh()
+    parser = WarpResultsParser(str(results_dir), archives=archives, index_filter=index_filter)
+    parser.find_and_parse_results(index.paths(index.select(index_filter)))
+    return parser
+
+
+def test_filter_applies_to_archives_in_results_dir(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    _archive(results_dir, "day.tar.gz")
+
+    parser = _filtered_parse(results_dir, IndexFilter(ops=['GET']))
+
+    assert parser.results
+    assert {result.operation for result in parser.results} == {'GET'}
+
+
+def test_filter_applies_to_explicit_archives(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    archive_path = _archive(tmp_path, "extra.tar.gz")
+
+    parser = _filtered_parse(results_dir, IndexFilter(ops=['PUT']), archives=[str(archive_path)])
+
+    assert parser.results
+    assert {result.operation for result in parser.results} == {'PUT'}
+
+
+def test_unfiltered_archive_reads_every_member(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    _archive(results_dir, "day.tar.gz")
+
+    parser = WarpResultsParser(str(results_dir))
+    parser.find_and_parse_results()
+
+    assert {result.operation for result in parser.results} == {'GET', 'PUT'}
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Sweep orchestration against the fake kubectl
+
+DryRunKubectlRunner serves local result files as if they were in the client pods,
+so a sweep can be launched, collected, parsed and resumed without a cluster.
+"""
+
+import json
+import subprocess
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sweep_orchestrator import (DryRunKubectlRunner, SweepOrchestrator, STATE_FILE, STATUS_COLLECTED,
+                                STATUS_FAILED, STATUS_PENDING, STATUS_RUNNING, expand_matrix)
+
+
+SAMPLE_DIR = Path(__file__).parent / "warp_results" / "warp-0"
+
+
+def _spec(ops):
+    return {
+        'sweep_id': 'test',
+        'matrix': {
+            'op': ops,
+            'host': {'TEST': 'test.example:443'},
+            'obj_size': ['4K'],
+            'concurrent': [8],
+            'duration': ['30s'],
+        },
+    }
+
+
+def _pod_files(tmp_path: Path, ops) -> dict:
+    """One sample result per operation, renamed to the current time so it matches the runs launched now"""
+    stamp = datetime.now(timezone.utc).strftime("%Y-%m-%d[%H%M%S]")
+    pod_dir = tmp_path / "pod"
+    pod_dir.mkdir()
+    files = []
+    for op in ops:
+        sample = sorted(SAMPLE_DIR.glob(f"warp-{op}-*.json.zst"))[0]
+        path = pod_dir / f"warp-{op}-{stamp}-fake{op}.json.zst"
+        path.write_bytes(sample.read_bytes())
+        files.append(str(path))
+    return {'warp-client-0': files}
+
+
+def _orchestrator(tmp_path: Path, spec, runner) -> SweepOrchestrator:
+    return SweepOrchestrator(spec, str(tmp_path / "results"), runner, sleep=lambda _: None)
+
+
+def _launched(runner: DryRunKubectlRunner) -> int:
+    return sum(1 for args in runner.calls if args[0] == "apply")
+
+
+def test_sweep_launches_collects_and_parses(tmp_path):
+    runner = DryRunKubectlRunner(_pod_files(tmp_path, ['get', 'put']))
+    orchestrator = _orchestrator(tmp_path, _spec(['get', 'put']), runner)
+
+    assert orchestrator.run_sweep()
+    assert _launched(runner) == 2
+    for run in orchestrator.runs:
+        assert run.status == STATUS_COLLECTED
+        assert [key.split('/')[0] for key in run.collected_files] == ['warp-client-0']
+        assert f"/warp-{run.op}-" in run.collected_files[0]
+        assert run.parsed_results == 1
+        assert (orchestrator.sweep_dir / run.run_id / "sweep_run.json").exists()
+
+
+def test_run_without_results_fails(tmp_path):
+    runner = DryRunKubectlRunner(_pod_files(tmp_path, ['get']))
+    orchestrator = _orchestrator(tmp_path, _spec(['get', 'put']), runner)
+
+    assert not orchestrator.run_sweep()
+    statuses = {run.op: run.status for run in orchestrator.runs}
+    assert statuses == {'get': STATUS_COLLECTED, 'put': STATUS_FAILED}
+
+
+def test_rejected_job_fails_only_its_run(tmp_path):
+    class RejectingRunner(DryRunKubectlRunner):
+        def run(self, args, stdin=None):
+            if args[0] == "apply" and '"warp-get"' in stdin:
+                raise subprocess.CalledProcessError(1, ["kubectl"] + args)
+            return super().run(args, stdin)
+
+    runner = RejectingRunner(_pod_files(tmp_path, ['get', 'put']))
+    orchestrator = _orchestrator(tmp_path, _spec(['get', 'put']), runner)
+
+    assert not orchestrator.run_sweep()
+    statuses = {run.op: run.status for run in orchestrator.runs}
+    assert statuses == {'get': STATUS_FAILED, 'put': STATUS_COLLECTED}
+
+
+def test_resume_collects_running_jobs_and_skips_collected_runs(tmp_path):
+    spec = _spec(['get', 'put'])
+    runner = DryRunKubectlRunner(_pod_files(tmp_path, ['get', 'put']))
+    orchestrator = _orchestrator(tmp_path, spec, runner)
+
+    # State of an invocation interrupted while the PUT Job was running
+    runs = {run.op: run for run in expand_matrix(spec)}
+    runs['get'].status = STATUS_COLLECTED
+    runs['put'].status = STATUS_RUNNING
+    runs['put'].started_at = datetime.now(timezone.utc).isoformat()
+    orchestrator.sweep_dir.mkdir(parents=True)
+    with open(orchestrator.sweep_dir / STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'sweep_id': 'test', 'runs': {run.run_id: asdict(run) for run in runs.values()}}, f)
+
+    assert orchestrator.run_sweep()
+    assert _launched(runner) == 0
+    statuses = {run.op: run.status for run in orchestrator.runs}
+    assert statuses == {'get': STATUS_COLLECTED, 'put': STATUS_COLLECTED}
+
+
+def test_retry_failed_relaunches_failed_runs(tmp_path):
+    spec = _spec(['get'])
+    orchestrator = _orchestrator(tmp_path, spec, DryRunKubectlRunner())
+    assert not orchestrator.run_sweep()
+    assert orchestrator.runs[0].status == STATUS_FAILED
+
+    runner = DryRunKubectlRunner(_pod_files(tmp_path, ['get']))
+    orchestrator = _orchestrator(tmp_path, spec, runner)
+    orchestrator.load_state(retry_failed=True)
+    assert orchestrator.runs[0].status == STATUS_PENDING
+    assert orchestrator.run_sweep(retry_failed=True)
+    assert _launched(runner) == 1
+    assert orchestrator.runs[0].status == STATUS_COLLECTED
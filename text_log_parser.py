@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Warp Text Output Parser
+
+This module streams warp's human-readable output - saved console output such
+as results.md or `kubectl logs` captures - line by line and turns every
+benchmark report in it into the same WarpResult objects the JSON parser
+produces, so text-only runs flow into grouping, comparison and reports.
+
+Lines may carry the prefixes added by `kubectl logs --prefix` ("[pod/warp-0/warp] ")
+and `--timestamps` (RFC 3339). Each pod (prefix) is tracked as its own stream,
+so interleaved logs of several pods are reassembled per pod. A job ends at a
+"# ..." header, a "Benchmark data written to" marker, a repeated operation
+report, or the end of its stream.
+"""
+
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Iterator
+
+from parse_warp_results import WarpResult, detect_environment, extract_test_params, parse_warp_time
+from saturation_analysis import apply_littles_law
+
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+KUBECTL_PREFIX = re.compile(r'^\[(?P<source>[^\]]+)\]\s?')
+LINE_TIMESTAMP = re.compile(r'^(?P<ts>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2}))\s')
+
+JOB_HEADER = re.compile(r'^#\s*(?!PARAMS)(?P<title>\S.*)$')
+PARAMS_LINE = re.compile(r'^#\s*PARAMS\s*:\s*(?P<args>.*)$')
+QUOTED_ARG = re.compile(r'"([^"]*)"')
+DATA_MARKER = re.compile(r'warp-(\w+)-(\d{4}-\d{2}-\d{2})\[(\d{6})\]-([a-zA-Z0-9]+)\.(?:json|csv)(?:\.zst)?')
+REPORT_LINE = re.compile(r'^(?:Report|Operation):\s*(?P<op>\w+)[.,]\s*Concurrency:\s*(?P<concurrency>\d+)'
+                         r'(?:[.,]\s*Ran:\s*(?P<ran>\S+?))?\.?\s*$')
+AVERAGE_LINE = re.compile(r'^\*\s*Average:\s*(?:(?P<mib>[\d.]+)\s*MiB/s,\s*)?(?P<obj>[\d.]+)\s*obj/s')
+REQS_LINE = re.compile(r'^\*\s*Reqs:\s*(?P<values>.*)$')
+TTFB_LINE = re.compile(r'^\*\s*TTFB:\s*(?P<values>.*)$')
+CLIENT_LINE = re.compile(r'^Client\s+(?P<client>\d+)\s+throughput:\s*(?P<mib>[\d.]+)\s*MiB/s,\s*(?P<obj>[\d.]+)\s*obj/s')
+STAT_VALUE = re.compile(r'(?P<key>[A-Za-z0-9%]+):\s*(?P<value>[\d.]+)\s*(?P<unit>ns|µs|us|ms|s|m|h)?(?=[,\s]|$)')
+
+UNIT_MILLIS = {'ns': 1e-6, 'µs': 1e-3, 'us': 1e-3, 'ms': 1.0, 's': 1000.0, 'm': 60000.0, 'h': 3600000.0}
+HEADER_OPERATIONS = {'WRITE': 'PUT', 'READ': 'GET', 'RPS': 'GET', 'SCALE': 'PUT', 'MIXED': 'MIXED'}
+
+
+def parse_stat_values(text: str) -> Dict[str, float]:
+    """Parse "Avg: 96.9ms, 50%: 48.3ms, ..., Worst: 3.73s" into milliseconds keyed by lowercase name"""
+    return {match.group('key').lower(): float(match.group('value')) * UNIT_MILLIS[match.group('unit') or 'ms']
+            for match in STAT_VALUE.finditer(text)}
+
+
+@dataclass
+class TextSection:
+    """One "Report: OP. Concurrency: N. Ran: D" block"""
+    operation: str
+    concurrency: int
+    duration: str = ""
+    avg_throughput_mib: float = 0.0
+    avg_throughput_obj: float = 0.0
+    reqs: Dict[str, float] = field(default_factory=dict)
+    ttfb: Dict[str, float] = field(default_factory=dict)
+    clients: List[Dict[str, float]] = field(default_factory=list)
+    timestamp: Optional[datetime] = None
+
+
+@dataclass
+class TextJob:
+    """Everything seen in one stream between two job boundaries"""
+    title: str = ""
+    commandline: str = ""
+    file_op: str = ""
+    file_timestamp: str = ""
+    file_id: str = ""
+    sections: List[TextSection] = field(default_factory=list)
+
+
+class TextLogParser:
+    """Incremental parser; feed() lines in any order across pods and collect WarpResults"""
+
+    def __init__(self, source: str = "text"):
+        self.source = source
+        self.jobs: Dict[str, TextJob] = {}
+        self.job_counts: Dict[str, int] = {}
+        self.results: List[WarpResult] = []
+
+    def _stream_name(self, prefix: Optional[str]) -> str:
+        # kubectl prefixes look like pod/warp-0/warp; the pod name identifies the stream
+        if not prefix:
+            return self.source
+        parts = prefix.split('/')
+        return parts[1] if len(parts) >= 2 and parts[0] == 'pod' else prefix
+
+    def feed(self, raw_line: str) -> List[WarpResult]:
+        """Consume one line; return the results completed by it"""
+        line = ANSI_ESCAPE.sub('', raw_line.rstrip('\r\n'))
+        prefix = None
+        line_time = None
+        match = KUBECTL_PREFIX.match(line)
+        if match:
+            prefix = match.group('source')
+            line = line[match.end():]
+        match = LINE_TIMESTAMP.match(line)
+        if match:
+            line_time = parse_warp_time(match.group('ts'))
+            line = line[match.end():]
+        line = line.strip()
+        if line.startswith('warp:'):
+            line = line[len('warp:'):].strip()
+        if not line:
+            return []
+
+        stream = self._stream_name(prefix)
+        job = self.jobs.get(stream)
+        completed = []
+
+        match = PARAMS_LINE.match(line)
+        if match:
+            job = self.jobs.setdefault(stream, TextJob())
+            job.commandline = " ".join(QUOTED_ARG.findall(match.group('args'))) or match.group('args')
+            return completed
+
+        match = JOB_HEADER.match(line)
+        if match:
+            completed += self._finish(stream)
+            self.jobs[stream] = TextJob(title=match.group('title').strip())
+            return completed
+
+        match = DATA_MARKER.search(line)
+        if match and 'written to' in line:
+            # Warp names the data file before printing the analysis of the same run
+            if job and job.sections:
+                completed += self._finish(stream)
+            job = self.jobs.setdefault(stream, TextJob())
+            job.file_op = match.group(1)
+            time_part = match.group(3)
+            job.file_timestamp = f"{match.group(2)} {time_part[:2]}:{time_part[2:4]}:{time_part[4:6]}"
+            job.file_id = match.group(4)
+            return completed
+
+        match = REPORT_LINE.match(line)
+        if match:
+            operation = match.group('op').upper()
+            if job and any(s.operation == operation for s in job.sections):
+                # The same operation again means a new run started without a header
+                completed += self._finish(stream)
+                job = None
+            job = job or self.jobs.setdefault(stream, TextJob())
+            job.sections.append(TextSection(operation=operation, concurrency=int(match.group('concurrency')),
+                                            duration=match.group('ran') or "", timestamp=line_time))
+            return completed
+
+        section = job.sections[-1] if job and job.sections else None
+        if section is None:
+            return completed
+
+        match = AVERAGE_LINE.match(line)
+        if match:
+            section.avg_throughput_mib = float(match.group('mib') or 0)
+            section.avg_throughput_obj = float(match.group('obj'))
+            return completed
+        match = REQS_LINE.match(line)
+        if match:
+            section.reqs = parse_stat_values(match.group('values'))
+            return completed
+        match = TTFB_LINE.match(line)
+        if match:
+            section.ttfb = parse_stat_values(match.group('values'))
+            return completed
+        match = CLIENT_LINE.match(line)
+        if match:
+            section.clients.append({'mib_per_sec': float(match.group('mib')),
+                                    'obj_per_sec': float(match.group('obj'))})
+        return completed
+
+    def close(self) -> List[WarpResult]:
+        """Finish all open jobs (end of input)"""
+        completed = []
+        for stream in list(self.jobs):
+            completed += self._finish(stream)
+        return completed
+
+    def _finish(self, stream: str) -> List[WarpResult]:
+        job = self.jobs.pop(stream, None)
+        if not job or not job.sections:
+            return []
+        self.job_counts[stream] = self.job_counts.get(stream, 0) + 1
+        completed = self._build_results(job, stream, self.job_counts[stream])
+        self.results.extend(completed)
+        return completed
+
+    def _build_results(self, job: TextJob, stream: str, index: int) -> List[WarpResult]:
+        sections = {s.operation: s for s in job.sections if s.operation != 'TOTAL'}
+        total = next((s for s in job.sections if s.operation == 'TOTAL'), None)
+        header_op = next((op for word, op in HEADER_OPERATIONS.items() if word in job.title.upper()), None)
+        is_mixed = (total is not None or header_op == 'MIXED' or 'mixed' in job.commandline.split()[:1]
+                    or job.file_op == 'mixed')
+
+        timestamp = job.file_timestamp
+        if not timestamp:
+            first_seen = next((s.timestamp for s in job.sections if s.timestamp), None)
+            # Without a data file name or log timestamps, number the runs of the stream
+            timestamp = first_seen.strftime("%Y-%m-%d %H:%M:%S") if first_seen else f"{stream}#{index}"
+        container_id = job.file_id or stream
+
+        def build(section: TextSection, operation: str) -> WarpResult:
+            reqs, ttfb = section.reqs, section.ttfb
+            return WarpResult(
+                job_name=job.file_op or operation.lower(),
+                container_id=container_id,
+                timestamp=timestamp,
+                operation=operation,
+                concurrency=section.concurrency,
+                duration=section.duration,
+                avg_throughput_mib=section.avg_throughput_mib,
+                avg_throughput_obj=section.avg_throughput_obj,
+                avg_latency_ms=reqs.get('avg', 0),
+                p50_latency_ms=reqs.get('50%', 0),
+                p90_latency_ms=reqs.get('90%', 0),
+                p99_latency_ms=reqs.get('99%', 0),
+                fastest_req_ms=reqs.get('fastest', 0),
+                slowest_req_ms=reqs.get('slowest', 0),
+                stddev_ms=reqs.get('stddev', 0),
+                ttfb_avg_ms=ttfb.get('avg'),
+                ttfb_best_ms=ttfb.get('best'),
+                ttfb_median_ms=ttfb.get('median'),
+                ttfb_99th_ms=ttfb.get('99th'),
+                ttfb_p90_ms=ttfb.get('90th'),
+                ttfb_worst_ms=ttfb.get('worst'),
+                client_throughputs=section.clients,
+                throughput_per_second=[],
+                environment=detect_environment(job.commandline, job.title, operation),
+                test_params=extract_test_params(job.commandline),
+                latency_windows=[],
+            )
+
+        if is_mixed:
+            breakdown = {op: build(section, op) for op, section in sorted(sections.items())}
+            base = total or next(iter(sections.values()))
+            result = build(base, 'MIXED')
+            if total is not None:
+                # The Total block has no latency line; weight the per-operation latencies by operation rate
+                weight = sum(r.avg_throughput_obj for r in breakdown.values())
+                if weight > 0:
+                    for attr in ('avg_latency_ms', 'p50_latency_ms', 'p90_latency_ms', 'p99_latency_ms'):
+                        setattr(result, attr, sum(getattr(r, attr) * r.avg_throughput_obj
+                                                  for r in breakdown.values()) / weight)
+                    result.fastest_req_ms = min(r.fastest_req_ms for r in breakdown.values())
+                    result.slowest_req_ms = max(r.slowest_req_ms for r in breakdown.values())
+            result.op_breakdown = breakdown
+            results = [result]
+        else:
+            results = [build(section, section.operation) for section in sections.values()]
+
+        for result in results:
+            for part in (result.op_breakdown or {}).values():
+                apply_littles_law(part)
+            apply_littles_law(result)
+        return results
+
+
+def iter_lines(path: str) -> Iterator[str]:
+    """Lines of a text file, or of stdin for "-", read lazily"""
+    if path == '-':
+        yield from sys.stdin
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from f
+
+
+def parse_text_lines(lines: Iterable[str], source: str = "text") -> Iterator[WarpResult]:
+    """Stream WarpResults out of warp text output as soon as each job is complete"""
+    parser = TextLogParser(source)
+    for line in lines:
+        yield from parser.feed(line)
+    yield from parser.close()
+
+
+def parse_text_file(path: str) -> List[WarpResult]:
+    """Parse a saved warp console output or kubectl logs capture ("-" reads stdin)"""
+    source = "stdin" if path == '-' else Path(path).stem
+    return list(parse_text_lines(iter_lines(path), source))